@@ -3,36 +3,79 @@
 AdGuard DNS Analytics → SigNoz Exporter v2.0
 
 Exports both METRICS and LOGS to SigNoz:
-- Metrics: Client summaries, risk scores, counts (existing)
-- Logs: Individual anomaly detections with full details (NEW)
-
-Runs hourly after AdGuard log ingestion completes.
+- Metrics: Client summaries, risk scores, anomaly counts, top blocked domains
+- Logs: Individual anomaly detections with full details
+
+Two modes:
+- Daemon (--daemon, recommended): long-running. Polls every few seconds for
+  anomaly rows past a per-table high-water mark (rowid) and exports only
+  those as logs, flushing deterministically — new anomalies reach SigNoz
+  within seconds. Block-rate / risk-score gauges are observable: they report
+  an in-memory snapshot that is rebuilt when a new ingestion run lands (or
+  every --refresh-interval seconds to slide the 24h window). The 24h totals
+  stay counters, added once per ingestion run as the hourly one-shot did.
+- One-shot (default): a single pass for cron/systemd timers, flushed with
+  force_flush() before exit.
+
+Watermarks persist in a small JSON state file next to the database, so a
+restart resumes where it stopped instead of re-exporting or skipping rows.
+The anomaly mark only advances once the logs read past it have been
+flushed; after a failed flush the next poll sends the same logs again.
+Ingestion runs feed cumulative counters, which a failed metric export does
+not lose, so their mark advances as soon as a run is recorded.
 
 Deploy on AdGuard LXC at: /home/tbailey/adgh/adguard_metrics_exporter.py
 """
 
+import argparse
+import json
+import logging
+import os
+import signal
 import sqlite3
+import threading
 import time
-import logging
-import json
-from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 from opentelemetry import metrics
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+from opentelemetry.metrics import CallbackOptions, Observation
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import Resource
 
-# NEW: Log export imports
 from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
 from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
 from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
 
 # Configuration
 DB_PATH = "/home/tbailey/adgh/cache.db"
+STATE_PATH = "/home/tbailey/adgh/metrics_exporter_state.json"
 SIGNOZ_ENDPOINT = "192.168.2.106:4317"
-EXPORT_INTERVAL_MS = 60000  # Export every 60 seconds during run
+EXPORT_INTERVAL_MS = 60000  # Metric export interval
+POLL_INTERVAL_S = 5         # Daemon: how often to look for new anomaly / ingestion rows
+REFRESH_INTERVAL_S = 900    # Daemon: rebuild 24h snapshots at least this often
+FLUSH_TIMEOUT_MS = 10000
+MMAP_SIZE = 256 * 1024 * 1024  # Map cache.db pages instead of copying them through the page cache
+
+# Indexes behind the exporter's hot predicates. Each one covers its query, so
+# the 24h aggregates never touch the table rows. Created only with
+# --ensure-indexes (i.e. when this host owns cache.db); otherwise checked and
+# reported at startup.
+HOT_INDEXES = {
+    # refresh_anomaly_metrics / load_state: detected_at range, grouped by type+severity
+    "idx_anomalies_detected_ack": "anomalies(detected_at, acknowledged, anomaly_type, severity)",
+    # refresh_blocked_domains: is_filtered = 1 AND t > ?, grouped by domain, distinct clients
+    "idx_visits_filtered_t": "visits(is_filtered, t, domain_id, client_id)",
+}
+
+# Map severity to log level
+SEVERITY_LEVELS = {
+    "low": logging.INFO,
+    "medium": logging.WARNING,
+    "high": logging.ERROR,
+    "critical": logging.CRITICAL
+}
 
 # Logging
 logging.basicConfig(
@@ -45,10 +88,26 @@ logger = logging.getLogger(__name__)
 class AdGuardMetricsExporter:
     """Exports AdGuard DNS analytics to SigNoz as OTLP metrics + logs"""
 
-    def __init__(self, db_path: str, signoz_endpoint: str):
+    def __init__(self, db_path: str, signoz_endpoint: str, state_path: str = STATE_PATH):
         self.db_path = db_path
+        self.state_path = state_path
         self.conn = None
 
+        # High-water marks (rowid) per source table. Anomaly rows are held in
+        # _pending (and their export counts in _pending_exported) until a
+        # successful flush; ingestion runs advance their mark directly
+        self.watermarks: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._pending_exported: Dict[Tuple[str, str], int] = {}
+
+        # Snapshots read by the observable-gauge callbacks and record_totals(). Each is replaced
+        # wholesale (never mutated in place), so a callback running on the
+        # metric reader's thread always sees a consistent list.
+        self._client_snapshot: List[sqlite3.Row] = []
+        self._anomaly_snapshot: List[sqlite3.Row] = []
+        self._domain_snapshot: List[sqlite3.Row] = []
+        self._refreshed_at = 0.0
+
         # Setup OpenTelemetry Resource
         resource = Resource.create({
             "service.name": "adguard-metrics-exporter",
@@ -56,14 +115,11 @@ class AdGuardMetricsExporter:
             "host.name": "adguard.mcducklabs.com"
         })
 
-        # Setup METRICS export (existing)
         self._setup_metrics(resource, signoz_endpoint)
-        
-        # NEW: Setup LOGS export
         self._setup_logs(resource, signoz_endpoint)
 
     def _setup_metrics(self, resource: Resource, endpoint: str):
-        """Setup metrics export (existing functionality)"""
+        """Setup metrics export"""
         exporter = OTLPMetricExporter(
             endpoint=endpoint,
             insecure=True
@@ -74,28 +130,28 @@ class AdGuardMetricsExporter:
             export_interval_millis=EXPORT_INTERVAL_MS
         )
 
-        provider = MeterProvider(resource=resource, metric_readers=[reader])
-        metrics.set_meter_provider(provider)
+        self.meter_provider = MeterProvider(resource=resource, metric_readers=[reader])
+        metrics.set_meter_provider(self.meter_provider)
 
-        self.meter = metrics.get_meter("adguard-dns-analytics")
+        self.meter = self.meter_provider.get_meter("adguard-dns-analytics")
         self._create_metric_instruments()
 
     def _setup_logs(self, resource: Resource, endpoint: str):
-        """Setup log export for anomalies (NEW)"""
+        """Setup log export for anomalies"""
         log_exporter = OTLPLogExporter(
             endpoint=endpoint,
             insecure=True
         )
 
-        log_provider = LoggerProvider(resource=resource)
-        log_provider.add_log_record_processor(
+        self.log_provider = LoggerProvider(resource=resource)
+        self.log_provider.add_log_record_processor(
             BatchLogRecordProcessor(log_exporter)
         )
 
         # Create anomaly logger
         handler = LoggingHandler(
             level=logging.NOTSET,
-            logger_provider=log_provider
+            logger_provider=self.log_provider
         )
 
         self.anomaly_logger = logging.getLogger("adguard.anomalies")
@@ -103,8 +159,10 @@ class AdGuardMetricsExporter:
         self.anomaly_logger.setLevel(logging.INFO)
 
     def _create_metric_instruments(self):
-        """Create all metric instruments (existing)"""
-        # Client metrics
+        """Create all metric instruments"""
+        # Client metrics. The 24h totals are counters (dashboards and alerts
+        # use rate()/increase() on them), added once per ingestion run in
+        # record_totals(); the ratios are observed from the snapshot
         self.queries_counter = self.meter.create_counter(
             "adguard.queries.total",
             description="Total DNS queries per client (24h)",
@@ -117,14 +175,25 @@ class AdGuardMetricsExporter:
             unit="queries"
         )
 
-        self.block_rate_gauge = self.meter.create_gauge(
+        # The same 24h query count as a gauge: its latest sample is the
+        # client's current volume, whatever the counter has accumulated
+        self.meter.create_observable_gauge(
+            "adguard.client.queries_24h",
+            callbacks=[self._observe_client("last_24h_queries")],
+            description="DNS queries per client over the last 24h",
+            unit="queries"
+        )
+
+        self.meter.create_observable_gauge(
             "adguard.block.rate",
+            callbacks=[self._observe_client("last_24h_block_pct")],
             description="Percentage of queries blocked per client",
             unit="percent"
         )
 
-        self.risk_score_gauge = self.meter.create_gauge(
+        self.meter.create_observable_gauge(
             "adguard.client.risk_score",
+            callbacks=[self._observe_client("risk_score")],
             description="Client risk score (0-10)",
             unit="score"
         )
@@ -136,6 +205,12 @@ class AdGuardMetricsExporter:
             unit="anomalies"
         )
 
+        self.anomalies_exported_counter = self.meter.create_counter(
+            "adguard.anomalies.exported",
+            description="Anomaly rows exported as logs",
+            unit="anomalies"
+        )
+
         # Domain metrics
         self.blocked_domains_counter = self.meter.create_counter(
             "adguard.blocked_domains.total",
@@ -143,7 +218,7 @@ class AdGuardMetricsExporter:
             unit="blocks"
         )
 
-        # Ingestion health
+        # Ingestion health — recorded once per new ingestion_runs row
         self.ingestion_duration_histogram = self.meter.create_histogram(
             "adguard.ingestion.duration",
             description="Ingestion run duration",
@@ -156,24 +231,134 @@ class AdGuardMetricsExporter:
             unit="records"
         )
 
+    # ── Observable gauge callbacks ────────────────────────────────────────────
+
+    def _observe_client(self, column: str):
+        def callback(options: CallbackOptions) -> Iterable[Observation]:
+            for row in self._client_snapshot:
+                if row[column] is not None:
+                    yield Observation(row[column], {
+                        "client.ip": row["client_ip"],
+                        "client.name": row["client_name"] or "unknown",
+                        "traffic.type": row["traffic_type"] or "unknown"
+                    })
+        return callback
+
+    def record_totals(self):
+        """Add the snapshot's 24h totals to the counters — once per ingestion run."""
+        for row in self._client_snapshot:
+            attributes = {
+                "client.ip": row["client_ip"],
+                "client.name": row["client_name"] or "unknown",
+                "traffic.type": row["traffic_type"] or "unknown"
+            }
+            self.queries_counter.add(row["last_24h_queries"], attributes=attributes)
+            self.blocks_counter.add(row["last_24h_blocked"], attributes=attributes)
+        for row in self._anomaly_snapshot:
+            self.anomalies_counter.add(
+                row["count"], attributes={"anomaly.type": row["anomaly_type"], "severity": row["severity"]}
+            )
+        for row in self._domain_snapshot:
+            self.blocked_domains_counter.add(row["block_count"], attributes={
+                "domain": row["full_domain"],
+                "unique_clients": str(row["unique_clients"])
+            })
+
+    # ── Database / state ──────────────────────────────────────────────────────
+
     def connect_db(self):
-        """Connect to AdGuard SQLite database"""
+        """Connect to AdGuard SQLite database, read-only.
+
+        mode=ro + query_only: this process can never write or lock cache.db
+        for the ingestion job. Under WAL, readers don't block the writer and
+        see its last commit. mmap_size serves pages straight from the OS page
+        cache; temp_store keeps GROUP BY sorts off disk.
+        """
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
             self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA query_only=ON")
+            self.conn.execute("PRAGMA busy_timeout=5000")
+            self.conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self.conn.execute("PRAGMA cache_size=-16000")  # 16 MiB
+            self.conn.execute("PRAGMA temp_store=MEMORY")
             logger.info(f"Connected to database: {self.db_path}")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
 
+    def check_indexes(self) -> List[str]:
+        """Names of HOT_INDEXES missing from cache.db (logged with the fix)."""
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        missing = [name for name in HOT_INDEXES if name not in existing]
+        for name in missing:
+            logger.warning(f"Missing index {name}; run with --ensure-indexes or: "
+                           f"CREATE INDEX {name} ON {HOT_INDEXES[name]};")
+        return missing
+
+    def ensure_indexes(self):
+        """Create HOT_INDEXES (needs write access: only when this host owns cache.db)."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")  # ingestion may hold the write lock
+            for name, target in HOT_INDEXES.items():
+                start = time.time()
+                try:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Could not create {name}: {e}")
+                    continue
+                logger.info(f"Index {name} ready ({time.time() - start:.1f}s)")
+            conn.execute("ANALYZE")
+            conn.commit()
+        finally:
+            conn.close()
+
     def close_db(self):
         """Close database connection"""
         if self.conn:
             self.conn.close()
+            self.conn = None
             logger.info("Database connection closed")
 
-    def export_client_metrics(self):
-        """Export per-client query and block metrics from client_summary"""
+    def load_state(self):
+        """Load watermarks; seed any missing ones from the database."""
+        try:
+            with open(self.state_path) as f:
+                self.watermarks = {k: int(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            self.watermarks = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.state_path}: {e}")
+            self.watermarks = {}
+
+        if "anomalies" not in self.watermarks:
+            # First run: start with the last hour, as the hourly one-shot did
+            row = self.conn.execute(
+                "SELECT COALESCE(MAX(rowid), 0) FROM anomalies WHERE detected_at <= ?",
+                (int(time.time()) - 3600,),
+            ).fetchone()
+            self.watermarks["anomalies"] = row[0]
+        if "ingestion_runs" not in self.watermarks:
+            try:
+                # Record the most recent run once, not the whole history
+                row = self.conn.execute("SELECT COALESCE(MAX(rowid), 1) - 1 FROM ingestion_runs").fetchone()
+                self.watermarks["ingestion_runs"] = max(row[0], 0)
+            except sqlite3.OperationalError:
+                self.watermarks["ingestion_runs"] = 0
+        logger.info(f"Watermarks: {self.watermarks}")
+
+    def save_state(self):
+        """Persist the committed watermarks atomically."""
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.watermarks, f)
+        os.replace(tmp, self.state_path)
+
+    # ── Snapshots (24h windows, rebuilt per ingestion run) ────────────────────
+
+    def refresh_client_metrics(self):
+        """Snapshot per-client query and block metrics from client_summary"""
         query = """
             SELECT
                 cs.client_ip,
@@ -188,76 +373,147 @@ class AdGuardMetricsExporter:
             WHERE cs.last_24h_queries > 0
             ORDER BY cs.last_24h_queries DESC
         """
+        self._client_snapshot = self.conn.execute(query).fetchall()
+        logger.info(f"Snapshot of metrics for {len(self._client_snapshot)} clients")
 
-        cursor = self.conn.execute(query)
-        rows = cursor.fetchall()
-
-        for row in rows:
-            attributes = {
-                "client.ip": row["client_ip"],
-                "client.name": row["client_name"] or "unknown",
-                "traffic.type": row["traffic_type"] or "unknown"
-            }
-
-            # Export metrics
-            self.queries_counter.add(row["last_24h_queries"], attributes=attributes)
-            self.blocks_counter.add(row["last_24h_blocked"], attributes=attributes)
-            self.block_rate_gauge.set(row["last_24h_block_pct"], attributes=attributes)
-            self.risk_score_gauge.set(row["risk_score"], attributes=attributes)
-
-        logger.info(f"Exported metrics for {len(rows)} clients")
-
-    def export_anomaly_metrics(self):
-        """Export anomaly detection metrics from last 24h"""
+    def refresh_anomaly_metrics(self):
+        """Snapshot anomaly counts from the last 24h"""
         query = """
             SELECT
                 anomaly_type,
                 severity,
                 COUNT(*) as count
             FROM anomalies
-            WHERE detected_at > strftime('%s', 'now', '-1 day')
+            WHERE detected_at > ?
             GROUP BY anomaly_type, severity
         """
+        # Integer cutoff computed here: compared against the INTEGER column
+        # as-is, so the range is an index seek
+        self._anomaly_snapshot = self.conn.execute(query, (int(time.time()) - 86400,)).fetchall()
+        logger.info(f"Snapshot of {len(self._anomaly_snapshot)} anomaly metric groups")
+
+    def refresh_blocked_domains(self, limit: int = 20):
+        """Snapshot top blocked domains from the last 24h"""
+        # Aggregate on the covering index by domain_id, then look up names
+        # for the top `limit` only
+        query = """
+            SELECT
+                d.full_domain,
+                top.block_count,
+                top.unique_clients
+            FROM (
+                SELECT
+                    domain_id,
+                    COUNT(*) as block_count,
+                    COUNT(DISTINCT client_id) as unique_clients
+                FROM visits
+                WHERE is_filtered = 1
+                  AND t > ?
+                GROUP BY domain_id
+                ORDER BY block_count DESC
+                LIMIT ?
+            ) top
+            JOIN domains d ON d.id = top.domain_id
+            ORDER BY top.block_count DESC
+        """
+
+        try:
+            self._domain_snapshot = self.conn.execute(query, (int(time.time()) - 86400, limit)).fetchall()
+            logger.info(f"Snapshot of top {len(self._domain_snapshot)} blocked domains")
+        except sqlite3.OperationalError as e:
+            # Handle case where visits table doesn't exist or schema changed
+            logger.warning(f"Could not export blocked domains: {e}")
+
+    def refresh_snapshots(self):
+        self.refresh_client_metrics()
+        self.refresh_anomaly_metrics()
+        self.refresh_blocked_domains(limit=20)
+        self._refreshed_at = time.time()
+
+    # ── Incremental exports (rows past the watermark) ─────────────────────────
+
+    def export_ingestion_health(self) -> int:
+        """
+        Record each ingestion run past the watermark once. Returns runs recorded.
+
+        The watermark advances right away: the runs go into cumulative
+        counters, and a failed export loses nothing, so reading them again
+        would count them twice.
+        """
+        query = """
+            SELECT
+                rowid AS rid,
+                duration_seconds,
+                records_inserted,
+                records_skipped,
+                status
+            FROM ingestion_runs
+            WHERE rowid > ?
+            ORDER BY rowid
+        """
 
-        cursor = self.conn.execute(query)
-        rows = cursor.fetchall()
+        try:
+            rows = self.conn.execute(query, (self.watermarks["ingestion_runs"],)).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not export ingestion health: {e}")
+            return 0
 
         for row in rows:
-            attributes = {
-                "anomaly.type": row["anomaly_type"],
-                "severity": row["severity"]
-            }
-            self.anomalies_counter.add(row["count"], attributes=attributes)
+            attributes = {"status": row["status"]}
 
-        logger.info(f"Exported {len(rows)} anomaly metric groups")
+            if row["duration_seconds"]:
+                self.ingestion_duration_histogram.record(
+                    row["duration_seconds"],
+                    attributes=attributes
+                )
+
+            if row["records_inserted"]:
+                self.ingestion_records_counter.add(
+                    row["records_inserted"],
+                    attributes={**attributes, "type": "inserted"}
+                )
 
-    def export_anomaly_logs(self):
+            if row["records_skipped"]:
+                self.ingestion_records_counter.add(
+                    row["records_skipped"],
+                    attributes={**attributes, "type": "skipped"}
+                )
+
+            self.watermarks["ingestion_runs"] = row["rid"]
+            logger.info(f"Exported ingestion health: {row['status']}")
+        return len(rows)
+
+    def export_anomaly_logs(self) -> int:
         """
-        NEW: Export individual anomalies as structured logs.
-        
-        Exports unacknowledged anomalies from last hour with full details.
-        These become searchable logs in SigNoz with all metadata.
+        Export anomalies past the watermark as structured logs.
+
+        Only unacknowledged anomalies are logged, but every row read moves the
+        pending watermark, committed by commit() once delivered. These become
+        searchable logs in SigNoz with all metadata.
         """
         query = """
             SELECT
+                rowid AS rid,
                 detected_at,
                 anomaly_type,
                 client_ip,
                 severity,
                 description,
                 metadata,
-                confidence
+                confidence,
+                acknowledged
             FROM anomalies
-            WHERE detected_at > strftime('%s', 'now', '-1 hour')
-            AND acknowledged = 0
-            ORDER BY detected_at DESC
+            WHERE rowid > ?
+            ORDER BY rowid
         """
 
-        cursor = self.conn.execute(query)
-        rows = cursor.fetchall()
+        rows = self.conn.execute(query, (self.watermarks["anomalies"],)).fetchall()
 
         anomaly_count = 0
         for row in rows:
+            self._pending["anomalies"] = row["rid"]
+            if row["acknowledged"]:
+                continue
             try:
                 # Parse metadata JSON
                 metadata = {}
@@ -267,14 +523,7 @@ class AdGuardMetricsExporter:
                     except json.JSONDecodeError:
                         logger.warning(f"Failed to parse metadata for anomaly: {row['description']}")
 
-                # Map severity to log level
-                severity_map = {
-                    "low": logging.INFO,
-                    "medium": logging.WARNING,
-                    "high": logging.ERROR,
-                    "critical": logging.CRITICAL
-                }
-                log_level = severity_map.get(row["severity"], logging.WARNING)
+                log_level = SEVERITY_LEVELS.get(row["severity"], logging.WARNING)
 
                 # Create structured log with all details
                 extra_attrs = {
@@ -303,6 +552,8 @@ class AdGuardMetricsExporter:
                     row["description"],
                     extra=extra_attrs
                 )
+                key = (row["anomaly_type"], row["severity"])
+                self._pending_exported[key] = self._pending_exported.get(key, 0) + 1
 
                 anomaly_count += 1
 
@@ -310,102 +561,74 @@ class AdGuardMetricsExporter:
                 logger.error(f"Failed to export anomaly log: {e}", exc_info=True)
                 continue
 
-        logger.info(f"Exported {anomaly_count} anomaly logs (from last hour)")
+        if anomaly_count:
+            logger.info(f"Exported {anomaly_count} new anomaly logs")
         return anomaly_count
 
-    def export_blocked_domains(self, limit: int = 20):
-        """Export top blocked domains from last 24h"""
-        query = """
-            SELECT
-                d.full_domain,
-                COUNT(*) as block_count,
-                COUNT(DISTINCT v.client_id) as unique_clients
-            FROM visits v
-            JOIN domains d ON d.id = v.domain_id
-            WHERE v.is_filtered = 1
-              AND v.t > strftime('%s', 'now', '-1 day')
-            GROUP BY d.full_domain
-            ORDER BY block_count DESC
-            LIMIT ?
-        """
+    def flush(self) -> bool:
+        """Push buffered logs and metrics now; True if both exporters acknowledged."""
+        logs_ok = self.log_provider.force_flush(timeout_millis=FLUSH_TIMEOUT_MS)
+        metrics_ok = self.meter_provider.force_flush(timeout_millis=FLUSH_TIMEOUT_MS)
+        if not (logs_ok and metrics_ok):
+            logger.warning(f"Flush incomplete (logs={logs_ok}, metrics={metrics_ok})")
+        return logs_ok and metrics_ok
 
-        try:
-            cursor = self.conn.execute(query, (limit,))
-            rows = cursor.fetchall()
-
-            for row in rows:
-                attributes = {
-                    "domain": row["full_domain"],
-                    "unique_clients": str(row["unique_clients"])
-                }
-                self.blocked_domains_counter.add(row["block_count"], attributes=attributes)
-
-            logger.info(f"Exported top {len(rows)} blocked domains")
-        except sqlite3.OperationalError as e:
-            # Handle case where visits table doesn't exist or schema changed
-            logger.warning(f"Could not export blocked domains: {e}")
-
-    def export_ingestion_health(self):
-        """Export ingestion pipeline health metrics"""
-        query = """
-            SELECT
-                duration_seconds,
-                records_inserted,
-                records_skipped,
-                status
-            FROM ingestion_runs
-            ORDER BY start_time DESC
-            LIMIT 1
+    def commit(self) -> bool:
         """
-
-        try:
-            cursor = self.conn.execute(query)
-            row = cursor.fetchone()
-
-            if row:
-                attributes = {"status": row["status"]}
-
-                if row["duration_seconds"]:
-                    self.ingestion_duration_histogram.record(
-                        row["duration_seconds"],
-                        attributes=attributes
-                    )
-
-                if row["records_inserted"]:
-                    self.ingestion_records_counter.add(
-                        row["records_inserted"],
-                        attributes={**attributes, "type": "inserted"}
-                    )
-
-                if row["records_skipped"]:
-                    self.ingestion_records_counter.add(
-                        row["records_skipped"],
-                        attributes={**attributes, "type": "skipped"}
-                    )
-
-                logger.info(f"Exported ingestion health: {row['status']}")
-        except sqlite3.OperationalError as e:
-            logger.warning(f"Could not export ingestion health: {e}")
+        Flush, then advance the anomaly watermark past the logs exported since
+        the last commit, count them and persist the marks. If the flush fails
+        the pending logs are dropped, so the next poll reads — and re-sends —
+        the same rows.
+        """
+        if not self.flush():
+            self._pending, self._pending_exported = {}, {}
+            return False
+        self.watermarks.update(self._pending)
+        for (anomaly_type, severity), count in self._pending_exported.items():
+            self.anomalies_exported_counter.add(
+                count, attributes={"anomaly.type": anomaly_type, "severity": severity}
+            )
+        self._pending, self._pending_exported = {}, {}
+        self.save_state()
+        return True
+
+    def poll(self, refresh_interval: float = REFRESH_INTERVAL_S) -> int:
+        """One daemon iteration. Returns anomaly logs exported."""
+        new_runs = self.export_ingestion_health()
+        new_anomalies = self.export_anomaly_logs()
+
+        # A new ingestion run rewrote client_summary / visits; otherwise only
+        # slide the 24h windows occasionally
+        if new_runs:
+            self.refresh_snapshots()
+            self.record_totals()
+        elif time.time() - self._refreshed_at > refresh_interval:
+            self.refresh_snapshots()
+
+        if new_runs or self._pending:
+            # Deterministic delivery, then record progress
+            self.commit()
+        return new_anomalies
+
+    # ── Entry points ──────────────────────────────────────────────────────────
 
     def run(self):
-        """Run the full export process"""
+        """Run a single export pass (cron / systemd timer)"""
         start_time = time.time()
         logger.info("Starting AdGuard metrics + logs export to SigNoz")
 
         try:
             self.connect_db()
+            self.check_indexes()
+            self.load_state()
 
-            # Export all metrics (existing)
-            self.export_client_metrics()
-            self.export_anomaly_metrics()
-            self.export_blocked_domains(limit=20)
+            self.refresh_snapshots()
+            self.record_totals()
             self.export_ingestion_health()
-
-            # NEW: Export anomaly logs
             self.export_anomaly_logs()
 
-            # Wait for export to complete
-            time.sleep(3)  # Increased to 3s for logs to flush
+            # Observable gauges are read at collection time: flush before exit
+            self.commit()
 
             duration = time.time() - start_time
             logger.info(f"Export completed successfully in {duration:.2f} seconds")
@@ -417,12 +640,57 @@ class AdGuardMetricsExporter:
         finally:
             self.close_db()
 
+    def run_daemon(self, stop: threading.Event, poll_interval: float = POLL_INTERVAL_S,
+                   refresh_interval: float = REFRESH_INTERVAL_S):
+        """Poll for new rows until `stop` is set"""
+        logger.info(f"AdGuard exporter daemon started (poll every {poll_interval}s)")
+        try:
+            while not stop.is_set():
+                try:
+                    if self.conn is None:
+                        self.connect_db()
+                        self.check_indexes()
+                        if not self.watermarks:
+                            self.load_state()
+                        self.refresh_snapshots()
+                    self.poll(refresh_interval)
+                except sqlite3.Error as e:
+                    # Locked or mid-rewrite by ingestion: reconnect next poll
+                    logger.warning(f"Poll failed: {e}")
+                    self.close_db()
+                stop.wait(poll_interval)
+        finally:
+            self.flush()
+            self.close_db()
+            self.log_provider.shutdown()
+            self.meter_provider.shutdown()
+            logger.info("AdGuard exporter daemon stopped")
+
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Export AdGuard DNS analytics to SigNoz")
+    parser.add_argument("--daemon", action="store_true", help="Run continuously, exporting new rows as they land")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_S)
+    parser.add_argument("--refresh-interval", type=float, default=REFRESH_INTERVAL_S)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument("--endpoint", default=SIGNOZ_ENDPOINT)
+    parser.add_argument("--ensure-indexes", action="store_true",
+                        help="Create the covering indexes the exporter's queries need (writes to cache.db)")
+    args = parser.parse_args()
+
     try:
-        exporter = AdGuardMetricsExporter(DB_PATH, SIGNOZ_ENDPOINT)
-        exporter.run()
+        exporter = AdGuardMetricsExporter(args.db, args.endpoint, state_path=args.state)
+        if args.ensure_indexes:
+            exporter.ensure_indexes()
+        if args.daemon:
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            signal.signal(signal.SIGINT, lambda *_: stop.set())
+            exporter.run_daemon(stop, args.poll_interval, args.refresh_interval)
+        else:
+            exporter.run()
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         exit(1)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+AdGuard Query Log → ClickHouse Shipper
+
+Tails AdGuard Home's query log (querylog.json, one JSON object per query)
+and inserts every query into ClickHouse `first_light.dns_queries`
+(clickhouse/migrations/004_dns_queries.sql), so the agent can aggregate and
+drill into individual queries instead of the 24h per-client rollups.
+
+- Reads only complete lines past a saved (inode, offset) position, in
+  batches of --batch-size, every --interval seconds.
+- Follows AdGuard's rotation (querylog.json → querylog.json.1): the rotated
+  file is drained from the saved offset before switching to the new one.
+- Each batch is inserted with insert_deduplication_token = inode:start:end,
+  and the position is saved only after ClickHouse accepts it, so a retry
+  after a crash or a failed request never inserts the same queries twice.
+
+No dependencies beyond the standard library.
+
+Deploy on AdGuard LXC at: /home/tbailey/adgh/adguard_querylog_shipper.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import signal
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Configuration
+QUERYLOG_PATH = "/opt/AdGuardHome/data/querylog.json"
+STATE_PATH = "/home/tbailey/adgh/querylog_shipper_state.json"
+CLICKHOUSE_URL = "http://192.168.2.106:8123"
+TABLE = "first_light.dns_queries"
+BATCH_SIZE = 5000       # Queries per INSERT
+INTERVAL_S = 5          # How often to look for new lines
+MAX_BACKOFF_S = 60      # Cap on retry delay while ClickHouse is unreachable
+INSERT_TIMEOUT_S = 30
+
+# AdGuard Home filtering.Reason (internal/filtering), by numeric value
+REASONS = [
+    "NotFilteredNotFound",
+    "NotFilteredAllowList",
+    "NotFilteredError",
+    "FilteredBlockList",
+    "FilteredSafeBrowsing",
+    "FilteredParental",
+    "FilteredInvalid",
+    "FilteredSafeSearch",
+    "FilteredBlockedService",
+    "Rewritten",
+    "RewrittenAutoHosts",
+    "RewrittenRule",
+]
+
+# AdGuard writes RFC 3339 with nanoseconds; older Pythons' fromisoformat
+# accept at most microseconds
+_FRACTION = re.compile(r"(\.\d{6})\d+")
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_entry(line: bytes) -> Optional[Dict]:
+    """One querylog.json line → a dns_queries row, or None if unusable."""
+    try:
+        entry = json.loads(line)
+        ts = datetime.fromisoformat(_FRACTION.sub(r"\1", entry["T"]).replace("Z", "+00:00"))
+        qname = entry["QH"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    # AdGuard omits zero values: no Result/IsFiltered/Reason means "not filtered"
+    result = entry.get("Result") or {}
+    reason = result.get("Reason", 0)
+    return {
+        "ts": int(ts.timestamp()),
+        "client": entry.get("IP", ""),
+        "qname": qname.rstrip(".").lower(),
+        "qtype": entry.get("QT", ""),
+        "blocked": bool(result.get("IsFiltered", False)),
+        "reason": REASONS[reason] if isinstance(reason, int) and 0 <= reason < len(REASONS) else str(reason),
+    }
+
+
+@dataclass
+class Batch:
+    """Rows read from one file between two byte offsets."""
+    inode: int
+    start: int
+    end: int
+    rows: List[Dict] = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def token(self) -> str:
+        return f"{self.inode}:{self.start}:{self.end}"
+
+
+class QueryLogTailer:
+    """Reads complete lines from querylog.json past a saved position."""
+
+    def __init__(self, path: str, state_path: str):
+        self.path = path
+        self.rotated_path = f"{path}.1"
+        self.state_path = state_path
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.inode, self.offset = state["inode"], state["offset"]
+            logger.info(f"Resuming at inode {self.inode} offset {self.offset}")
+        except FileNotFoundError:
+            logger.info("No state file; shipping the current query log from the start")
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.state_path}: {e}")
+
+    def save_state(self):
+        """Persist the position atomically."""
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"inode": self.inode, "offset": self.offset}, f)
+        os.replace(tmp, self.state_path)
+
+    def _source(self) -> Optional[str]:
+        """File to read next, following rotation. May move to a new inode."""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+
+        if self.inode is None:
+            if current is None:
+                return None
+            self.inode, self.offset = current.st_ino, 0
+
+        if current is not None and current.st_ino == self.inode:
+            if current.st_size < self.offset:
+                logger.warning(f"{self.path} shrank below offset {self.offset}; restarting at 0")
+                self.offset = 0
+            return self.path
+
+        # Our file was rotated away: finish it before moving on
+        try:
+            rotated = os.stat(self.rotated_path)
+            if rotated.st_ino == self.inode and rotated.st_size > self.offset:
+                return self.rotated_path
+        except FileNotFoundError:
+            rotated = None
+        if rotated is None or rotated.st_ino != self.inode:
+            logger.warning(f"Lost track of inode {self.inode} (rotated twice?); queries may be missing")
+
+        if current is None:
+            return None
+        logger.info(f"Switching to new {self.path} (inode {current.st_ino})")
+        self.inode, self.offset = current.st_ino, 0
+        return self.path
+
+    def read_batch(self, max_lines: int) -> Optional[Batch]:
+        """Up to max_lines complete lines past the position; None if none yet."""
+        path = self._source()
+        if path is None:
+            return None
+
+        batch = Batch(self.inode, self.offset, self.offset)
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            while len(batch.rows) + batch.skipped < max_lines:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # EOF, or a line AdGuard is still writing
+                batch.end += len(line)
+                row = parse_entry(line)
+                if row is None:
+                    batch.skipped += 1
+                else:
+                    batch.rows.append(row)
+        return batch if batch.end > batch.start else None
+
+    def advance(self, batch: Batch):
+        self.inode, self.offset = batch.inode, batch.end
+        self.save_state()
+
+
+class ClickHouseWriter:
+    """INSERT ... FORMAT JSONEachRow over the ClickHouse HTTP interface."""
+
+    def __init__(self, url: str, table: str, user: str = "default", password: str = ""):
+        self.url = url.rstrip("/")
+        self.table = table
+        self.headers = {"X-ClickHouse-User": user, "X-ClickHouse-Key": password}
+
+    def insert(self, rows: List[Dict], token: str):
+        params = urllib.parse.urlencode({
+            "query": f"INSERT INTO {self.table} FORMAT JSONEachRow",
+            "insert_deduplication_token": token,
+        })
+        body = "\n".join(json.dumps(r, separators=(",", ":")) for r in rows).encode()
+        request = urllib.request.Request(f"{self.url}/?{params}", data=body, headers=self.headers)
+        with urllib.request.urlopen(request, timeout=INSERT_TIMEOUT_S) as response:
+            response.read()
+
+
+class QueryLogShipper:
+    def __init__(self, tailer: QueryLogTailer, writer: ClickHouseWriter, batch_size: int = BATCH_SIZE):
+        self.tailer = tailer
+        self.writer = writer
+        self.batch_size = batch_size
+        self.shipped = 0
+        self.skipped = 0
+
+    def ship_available(self, stop: Optional[threading.Event] = None) -> int:
+        """Insert everything readable now, one batch at a time. Raises on insert failure."""
+        shipped = 0
+        while stop is None or not stop.is_set():
+            batch = self.tailer.read_batch(self.batch_size)
+            if batch is None:
+                break
+            if batch.rows:
+                self.writer.insert(batch.rows, batch.token)
+            self.tailer.advance(batch)
+            shipped += len(batch.rows)
+            self.skipped += batch.skipped
+            if batch.skipped:
+                logger.warning(f"Skipped {batch.skipped} unparseable lines at {batch.token}")
+        self.shipped += shipped
+        return shipped
+
+    def run(self, stop: threading.Event, interval: float = INTERVAL_S):
+        """Ship new queries every `interval` seconds until `stop` is set."""
+        logger.info(f"Shipping {self.tailer.path} → {self.writer.table} every {interval:.0f}s")
+        backoff = interval
+        last_report = time.monotonic()
+        while not stop.is_set():
+            try:
+                self.ship_available(stop)
+                backoff = interval
+            except Exception as e:
+                logger.error(f"Insert failed, retrying in {backoff:.0f}s: {e}")
+                stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_S)
+                continue
+
+            if time.monotonic() - last_report >= 300:
+                logger.info(f"Shipped {self.shipped} queries so far ({self.skipped} lines skipped)")
+                last_report = time.monotonic()
+            stop.wait(interval)
+        logger.info(f"Stopped after shipping {self.shipped} queries")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Ship AdGuard's query log to ClickHouse")
+    parser.add_argument("--querylog", default=QUERYLOG_PATH)
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument("--clickhouse", default=os.getenv("CLICKHOUSE_URL", CLICKHOUSE_URL))
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--interval", type=float, default=INTERVAL_S)
+    parser.add_argument("--once", action="store_true", help="Ship what is there now and exit (cron/backfill)")
+    args = parser.parse_args()
+
+    tailer = QueryLogTailer(args.querylog, args.state)
+    writer = ClickHouseWriter(
+        args.clickhouse,
+        args.table,
+        user=os.getenv("CLICKHOUSE_USER", "default"),
+        password=os.getenv("CLICKHOUSE_PASSWORD", ""),
+    )
+    shipper = QueryLogShipper(tailer, writer, args.batch_size)
+
+    try:
+        if args.once:
+            logger.info(f"Shipped {shipper.ship_available()} queries")
+        else:
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            signal.signal(signal.SIGINT, lambda *_: stop.set())
+            shipper.run(stop, args.interval)
+    except Exception as e:
+        logger.error(f"Fatal error: {e}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
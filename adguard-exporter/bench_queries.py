@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark the AdGuard exporter's cache.db queries on a synthetic database.
+
+Builds a cache.db-shaped file with a multi-million-row `visits` table, then
+times the exporter's two 24h aggregates (top blocked domains, anomaly counts)
+three ways:
+  - legacy:  default connection, strftime('%s','now',...) predicates, no indexes
+  - indexed: same queries after creating the covering indexes
+  - current: read-only connection with the exporter's pragmas, integer
+             cutoffs bound from Python, covering indexes, and the top-domains
+             query aggregating by domain_id before joining domain names
+
+The schema, index definitions and pragmas mirror adguard_metrics_exporter_v2.py
+(HOT_INDEXES / connect_db); this script has no OpenTelemetry dependency so it
+runs anywhere.
+
+Usage:
+    python bench_queries.py                      # 5M visits in a temp dir
+    python bench_queries.py --visits 20000000 --keep /tmp/bench-cache.db
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+HOT_INDEXES = {
+    "idx_anomalies_detected_ack": "anomalies(detected_at, acknowledged, anomaly_type, severity)",
+    "idx_visits_filtered_t": "visits(is_filtered, t, domain_id, client_id)",
+}
+MMAP_SIZE = 256 * 1024 * 1024
+
+LEGACY_DOMAINS = """
+    SELECT d.full_domain, COUNT(*) AS block_count, COUNT(DISTINCT v.client_id) AS unique_clients
+    FROM visits v JOIN domains d ON d.id = v.domain_id
+    WHERE v.is_filtered = 1 AND v.t > strftime('%s', 'now', '-1 day')
+    GROUP BY d.full_domain ORDER BY block_count DESC LIMIT 20
+"""
+LEGACY_ANOMALIES = """
+    SELECT anomaly_type, severity, COUNT(*) AS count FROM anomalies
+    WHERE detected_at > strftime('%s', 'now', '-1 day')
+    GROUP BY anomaly_type, severity
+"""
+CURRENT_DOMAINS = """
+    SELECT d.full_domain, top.block_count, top.unique_clients
+    FROM (
+        SELECT domain_id, COUNT(*) AS block_count, COUNT(DISTINCT client_id) AS unique_clients
+        FROM visits WHERE is_filtered = 1 AND t > ?
+        GROUP BY domain_id ORDER BY block_count DESC LIMIT 20
+    ) top
+    JOIN domains d ON d.id = top.domain_id
+    ORDER BY top.block_count DESC
+"""
+CURRENT_ANOMALIES = LEGACY_ANOMALIES.replace("strftime('%s', 'now', '-1 day')", "?")
+
+
+def build(path: str, visits: int, days: int, domains: int, clients: int, anomalies: int):
+    """Synthetic cache.db: visits spread evenly over `days`, ~15% filtered."""
+    now = int(time.time())
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=OFF;
+        CREATE TABLE domains (id INTEGER PRIMARY KEY, full_domain TEXT);
+        CREATE TABLE visits (t INTEGER, domain_id INTEGER, client_id INTEGER, is_filtered INTEGER);
+        CREATE TABLE anomalies (
+            id INTEGER PRIMARY KEY, detected_at INTEGER, anomaly_type TEXT, client_ip TEXT,
+            severity TEXT, description TEXT, metadata TEXT, confidence REAL, acknowledged INTEGER DEFAULT 0
+        );
+    """)
+    start = time.time()
+    conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {domains})
+        INSERT INTO domains SELECT i, 'd' || i || '.example.com' FROM n
+    """)
+    conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {visits - 1})
+        INSERT INTO visits
+        SELECT {now} - (i * {days * 86400} / {visits}),
+               1 + (abs(random()) % {domains}) * (abs(random()) % {domains}) / {domains},
+               abs(random()) % {clients},
+               abs(random()) % 100 < 15
+        FROM n
+    """)
+    conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {anomalies - 1})
+        INSERT INTO anomalies (detected_at, anomaly_type, client_ip, severity, description, confidence, acknowledged)
+        SELECT {now} - (i * {days * 86400} / {anomalies}),
+               CASE abs(random()) % 4 WHEN 0 THEN 'dga' WHEN 1 THEN 'tunnel' WHEN 2 THEN 'burst' ELSE 'new_domain' END,
+               '192.168.1.' || (abs(random()) % {clients}),
+               CASE abs(random()) % 4 WHEN 0 THEN 'low' WHEN 1 THEN 'medium' WHEN 2 THEN 'high' ELSE 'critical' END,
+               'synthetic', 0.9, abs(random()) % 2
+        FROM n
+    """)
+    conn.commit()
+    conn.close()
+    size = os.path.getsize(path) / 1e6
+    print(f"Built {path}: {visits:,} visits, {anomalies:,} anomalies, {size:.0f} MB in {time.time() - start:.1f}s")
+
+
+def create_indexes(path: str):
+    conn = sqlite3.connect(path)
+    start = time.time()
+    for name, target in HOT_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    print(f"Created covering indexes in {time.time() - start:.1f}s")
+
+
+def connect_current(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute("PRAGMA cache_size=-16000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: tuple, rounds: int):
+    conn.execute(sql, params).fetchall()  # warm the page cache
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), rows
+
+
+def plan(conn: sqlite3.Connection, sql: str, params: tuple) -> str:
+    return "; ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def run(label: str, conn: sqlite3.Connection, domains_sql: str, anomalies_sql: str, params: tuple, rounds: int):
+    dom_ms, dom_rows = timed(conn, domains_sql, params, rounds)
+    an_ms, an_rows = timed(conn, anomalies_sql, params, rounds)
+    print(f"  {label:<9} top domains {dom_ms:9.1f} ms   anomalies {an_ms:8.2f} ms")
+    print(f"  {'':<9}   plan: {plan(conn, domains_sql, params)}")
+    print(f"  {'':<9}   plan: {plan(conn, anomalies_sql, params)}")
+    return dom_ms + an_ms, dom_rows, an_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--visits", type=int, default=5_000_000)
+    parser.add_argument("--days", type=int, default=30, help="History the visits span")
+    parser.add_argument("--domains", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--anomalies", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--keep", help="Build/reuse the database at this path instead of a temp dir")
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(prefix="adguard-bench-"), "cache.db")
+    if not os.path.exists(path):
+        build(path, args.visits, args.days, args.domains, args.clients, args.anomalies)
+    else:
+        conn = sqlite3.connect(path)
+        for name in HOT_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.commit()
+        conn.close()
+
+    legacy = sqlite3.connect(path)
+    legacy_ms, legacy_dom, legacy_an = run("legacy", legacy, LEGACY_DOMAINS, LEGACY_ANOMALIES, (), args.rounds)
+    legacy.close()
+
+    create_indexes(path)
+    indexed = sqlite3.connect(path)
+    run("indexed", indexed, LEGACY_DOMAINS, LEGACY_ANOMALIES, (), args.rounds)
+    indexed.close()
+
+    current = connect_current(path)
+    cutoff = int(time.time()) - 86400
+    domains_ms, dom_rows = timed(current, CURRENT_DOMAINS, (cutoff,), args.rounds)
+    anomalies_ms, an_rows = timed(current, CURRENT_ANOMALIES, (cutoff,), args.rounds)
+    print(f"  {'current':<9} top domains {domains_ms:9.1f} ms   anomalies {anomalies_ms:8.2f} ms")
+    print(f"  {'':<9}   plan: {plan(current, CURRENT_DOMAINS, (cutoff,))}")
+    print(f"  {'':<9}   plan: {plan(current, CURRENT_ANOMALIES, (cutoff,))}")
+    current.close()
+
+    print(f"  speedup legacy -> current: {legacy_ms / (domains_ms + anomalies_ms):.1f}x")
+    same = sorted(legacy_an) == sorted(an_rows) and [r[1] for r in legacy_dom] == [r[1] for r in dom_rows]
+    print(f"  equivalence: {'OK' if same else 'MISMATCH (cutoff moved between runs?)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Answer cache for repeated interactive questions.
+
+Operators ask the bots the same few things ("any threats today?", "is the
+validator ok?", /status); each costs a full ReAct loop. Answers to
+standalone questions are cached in Redis, shared by Telegram and Slack,
+and served with an "as of HH:MM" stamp.
+
+Keys:
+  answers:generation               INCR'd on every daily report and alert
+  answers:<generation>:<bucket>    hash: question key → {"question", "answer", "as_of"}
+
+A cached answer is only valid within its freshness bucket (wall-clock
+windows of ANSWER_CACHE_SECONDS, default 15 min) and its data generation:
+a new report or alert bumps the generation, so every earlier answer stops
+matching at once, and the hash simply expires.
+
+Questions match only when their normalized content words are identical
+(case, punctuation, word order and filler words ignored), so "is the
+validator ok" / "validator okay?" share an answer but questions that differ
+in one IP, host, number or time window never do. Follow-ups that depend on
+the conversation ("what about that IP?") are never cached, and neither are
+failed or fallback answers.
+
+Public API:
+    cacheable(question, history)      -> bool
+    storable(answer)                  -> bool
+    get_answer_cache()                -> AnswerCache, or None when disabled
+    bump_generation(reason)           -> None
+    stamp(entry)                      -> answer text with the "as of" note
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "answers:generation"
+
+_FILLER = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "any", "there",
+    "please", "pls", "can", "could", "would", "you", "me", "us", "tell", "show", "give", "i",
+    "we", "my", "our", "hey", "hi", "so", "far", "right", "now", "currently", "of", "on", "for",
+    "to", "in", "at", "what", "whats", "how", "hows", "status", "quick", "check", "ok", "okay",
+}
+# Words that point back into the conversation
+_FOLLOW_UP = {
+    "it", "its", "that", "those", "this", "these", "them", "they", "their", "he", "she",
+    "also", "else", "more", "again", "same", "above", "earlier", "before", "then", "instead",
+}
+_WORD = re.compile(r"[a-z0-9][a-z0-9._:/-]*")
+# Answers that report a failure rather than the network's state
+_FAILED_ANSWER = re.compile(
+    r"^\s*\[[\w/-]+: no (final )?content|\b(i )?(couldn'?t|could not|was unable to|am unable to"
+    r"|can'?t|cannot) (retrieve|fetch|reach|access|connect|query|get|find|complete)|tool error",
+    re.IGNORECASE,
+)
+
+
+def _words(question: str) -> list[str]:
+    return _WORD.findall(question.lower().replace("'", ""))
+
+
+def tokens(question: str) -> frozenset[str]:
+    """Content words of a question: lowercased, de-punctuated, filler removed."""
+    words = [w.rstrip(".:/-") for w in _words(question)]
+    content = {w for w in words if w and w not in _FILLER}
+    return frozenset(content or words)
+
+
+def cacheable(question: str, history: Optional[list[dict]] = None) -> bool:
+    """Whether the answer can be shared: no references back into the conversation."""
+    words = _words(question)
+    if not words or len(question) > 500:
+        return False
+    if question.lower().startswith(("and ", "what about", "how about")):
+        return False
+    return not (history and _FOLLOW_UP.intersection(words))
+
+
+def storable(answer: str) -> bool:
+    """Whether an answer is worth sharing: not empty, not an error or fallback reply."""
+    return bool(answer.strip()) and not _FAILED_ANSWER.search(answer)
+
+
+def stamp(entry: dict) -> str:
+    as_of = datetime.fromtimestamp(entry["as_of"]).strftime("%H:%M")
+    return f"{entry['answer']}\n\n_As of {as_of} (cached answer)_"
+
+
+class AnswerCache:
+    """Generation- and bucket-scoped answers in one Redis hash per bucket."""
+
+    def __init__(self, redis: Callable[[], Optional[object]], bucket_seconds: int = 900):
+        self._redis = redis
+        self.bucket_seconds = bucket_seconds
+
+    def _hash_key(self, generation: int, now: float) -> str:
+        return f"answers:{generation}:{int(now // self.bucket_seconds)}"
+
+    @staticmethod
+    def _field(toks: frozenset) -> str:
+        return hashlib.sha256(" ".join(sorted(toks)).encode()).hexdigest()[:24]
+
+    def generation(self) -> Optional[int]:
+        """Current data generation, or None if Redis is unavailable."""
+        r = self._redis()
+        if not r:
+            return None
+        try:
+            return int(r.get(GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.warning("Answer cache unavailable: %s", e)
+            return None
+
+    def get(self, question: str) -> tuple[Optional[dict], Optional[int]]:
+        """(cached entry or None, generation to store a fresh answer under)."""
+        generation = self.generation()
+        if generation is None:
+            return None, None
+        try:
+            raw = self._redis().hget(self._hash_key(generation, time.time()), self._field(tokens(question)))
+        except Exception as e:
+            logger.warning("Answer cache lookup failed: %s", e)
+            return None, generation
+        if raw is None:
+            return None, generation
+        entry = json.loads(raw)
+        logger.info("Answer cache hit for %r (asked as %r)", question, entry["question"])
+        return entry, generation
+
+    def put(self, question: str, answer: str, generation: Optional[int]) -> None:
+        """Store an answer computed while `generation` was current."""
+        if generation is None or not storable(answer):
+            return
+        r = self._redis()
+        if not r:
+            return
+        now = time.time()
+        toks = tokens(question)
+        key = self._hash_key(generation, now)
+        entry = {"question": question, "answer": answer, "as_of": now}
+        try:
+            pipe = r.pipeline()
+            pipe.hset(key, self._field(toks), json.dumps(entry))
+            pipe.expire(key, self.bucket_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Answer cache store failed: %s", e)
+
+
+_redis_client = None
+_cache: Optional[AnswerCache] = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is not None:
+        return _redis_client
+    try:
+        import redis
+        url = os.getenv("REDIS_URL", "redis://fl-redis:6379/0")
+        client = redis.Redis.from_url(
+            url, socket_connect_timeout=2, socket_timeout=2, decode_responses=True
+        )
+        client.ping()
+    except Exception:
+        return None
+    # Only a client that answered is kept; a failed one is retried next call
+    _redis_client = client
+    return _redis_client
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """The shared cache, or None when disabled (ANSWER_CACHE_SECONDS=0)."""
+    global _cache
+    if _cache is None:
+        from agent.config import get_config
+        seconds = get_config().answer_cache_seconds
+        if seconds <= 0:
+            return None
+        _cache = AnswerCache(_get_redis, seconds)
+    return _cache
+
+
+def bump_generation(reason: str) -> None:
+    """Invalidate every cached answer (new report, new alert). Best effort."""
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        generation = r.incr(GENERATION_KEY)
+        logger.info("Answer cache invalidated (%s), generation %d", reason, generation)
+    except Exception as e:
+        logger.warning("Could not invalidate answer cache: %s", e)
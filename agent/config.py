@@ -63,6 +63,8 @@ class FirstLightConfig(BaseSettings):
     uptime_kuma_host: Optional[str] = None
     uptime_kuma_port: int = 3001
     uptime_kuma_api_key: Optional[str] = None
+    # Heartbeat rollup store written by services/kuma-rollup, read by the uptime tools
+    kuma_rollup_db: str = "/data/kuma-rollup/kuma_rollup.db"
 
     # Ethereum Validator
     validator_host: Optional[str] = None
@@ -73,8 +75,20 @@ class FirstLightConfig(BaseSettings):
     execution_metrics_port: int = 6060
     validator_pubkeys: Optional[str] = None
 
+    # Device inventory SQLite (exporters/device-inventory), read-only for lease history
+    device_inventory_db: str = "/data/device-inventory/device_inventory.db"
+
+    # Exporter scrape cache (agent/utils/scrape_cache.py)
+    scrape_cache_enabled: bool = True
+    scrape_history_seconds: int = 3900  # ~65 min of snapshots per target, for rate-of-change fields
+
     # AI Agent
     anthropic_api_key: Optional[str] = None
+    # Agent execution pool (agent/execution.py), per process
+    agent_max_workers: int = 4   # concurrent agent runs; one is kept free for reports
+    agent_max_queued: int = 16   # waiting runs per lane before new ones are rejected
+    # Shared answers to repeated bot questions (agent/answer_cache.py); 0 disables
+    answer_cache_seconds: int = 900
 
     # QNAP File Station API (for directory size analysis)
     qnap_api_url: Optional[str] = None
@@ -10,7 +10,8 @@ Each agent:
   3. Returns a plain-text / markdown summary of its domain
 
 These summaries are collected and handed to the synthesis agent in
-agent/graphs/daily_report_graph.py.
+agent/graphs/daily_report_graph.py. An agent that fails raises
+DomainAgentError, whose message is the summary shown in its place.
 """
 
 import logging
@@ -21,6 +22,10 @@ from agent.llm import run_react_loop
 logger = logging.getLogger(__name__)
 
 
+class DomainAgentError(Exception):
+    """A domain agent could not produce its summary; str() is the failure summary."""
+
+
 # ─────────────────────────────────────────────
 # Domain Agent: Firewall & Threat Intelligence
 # ─────────────────────────────────────────────
@@ -40,10 +45,13 @@ Tools to call:
 1. query_threat_intel_summary(hours={hours}, min_score=0) — START HERE
 2. query_security_summary(hours={hours}) — raw firewall blocks / ntopng context
 3. lookup_ip_threat_intel(ip) — for any IP with score > 50 (max 5 IPs)
+4. query_blocked_ips_by_geo(hours={hours}) — country / ASN breakdown of all blocked IPs
 
 Return a focused markdown summary with:
 - Count of firewall blocks, unique attacker IPs
 - Confirmed malicious IPs (threat_score > 50) — IP, score, country, what they tried
+- How many blocked IPs are already on public blocklists (FireHOL / Spamhaus / CrowdSec)
+- Top source countries / ASNs for blocked traffic (only if concentrated)
 - Notable ntopng alerts
 - Any CRITICAL cross-VLAN events
 
@@ -64,9 +72,16 @@ def run_firewall_threat_agent(
         query_threat_intel_summary,
         lookup_ip_threat_intel,
         query_threat_intel_coverage,
+        query_blocked_ips_by_geo,
     )
 
-    tools = [query_threat_intel_summary, query_security_summary, lookup_ip_threat_intel, query_threat_intel_coverage]
+    tools = [
+        query_threat_intel_summary,
+        query_security_summary,
+        lookup_ip_threat_intel,
+        query_threat_intel_coverage,
+        query_blocked_ips_by_geo,
+    ]
     system = prompt_override or FIREWALL_THREAT_SYSTEM.format(hours=hours)
     user = FIREWALL_THREAT_USER.format(hours=hours)
 
@@ -75,7 +90,7 @@ def run_firewall_threat_agent(
         return run_react_loop(system, user, tools, "firewall_threat", session_id=session_id)
     except Exception as e:
         logger.error(f"firewall_threat_agent failed: {e}", exc_info=True)
-        return f"**Firewall/Threat Intel**: Agent failed — {e}"
+        raise DomainAgentError(f"**Firewall/Threat Intel**: Agent failed — {e}") from e
 
 
 # ─────────────────────────────────────────────
@@ -96,6 +111,7 @@ Tools to call:
 3. query_adguard_blocked_domains(hours={hours})
 4. query_adguard_top_clients(hours={hours})
 5. query_adguard_traffic_by_type(hours={hours})
+6. query_adguard_dns_queries(client_ip=..., domain=..., hours={hours}) — drill into individual queries for any client or domain that stands out
 
 Return a focused markdown summary with:
 - Total queries, block rate %
@@ -121,6 +137,7 @@ def run_dns_agent(
         query_adguard_high_risk_clients,
         query_adguard_blocked_domains,
         query_adguard_traffic_by_type,
+        query_adguard_dns_queries,
     )
 
     tools = [
@@ -129,6 +146,7 @@ def run_dns_agent(
         query_adguard_blocked_domains,
         query_adguard_top_clients,
         query_adguard_traffic_by_type,
+        query_adguard_dns_queries,
     ]
     system = prompt_override or DNS_SYSTEM.format(hours=hours)
     user = DNS_USER.format(hours=hours)
@@ -138,7 +156,7 @@ def run_dns_agent(
         return run_react_loop(system, user, tools, "dns_security", session_id=session_id)
     except Exception as e:
         logger.error(f"dns_agent failed: {e}", exc_info=True)
-        return f"**DNS Security**: Agent failed — {e}"
+        raise DomainAgentError(f"**DNS Security**: Agent failed — {e}") from e
 
 
 # ─────────────────────────────────────────────
@@ -203,7 +221,7 @@ def run_network_flow_agent(
         return run_react_loop(system, user, tools, "network_flow", session_id=session_id)
     except Exception as e:
         logger.error(f"network_flow_agent failed: {e}", exc_info=True)
-        return f"**Network Flow**: Agent failed — {e}"
+        raise DomainAgentError(f"**Network Flow**: Agent failed — {e}") from e
 
 
 # ─────────────────────────────────────────────
@@ -267,7 +285,7 @@ def run_infrastructure_agent(
         return run_react_loop(system, user, tools, "infrastructure", session_id=session_id)
     except Exception as e:
         logger.error(f"infrastructure_agent failed: {e}", exc_info=True)
-        return f"**Infrastructure**: Agent failed — {e}"
+        raise DomainAgentError(f"**Infrastructure**: Agent failed — {e}") from e
 
 
 # ─────────────────────────────────────────────
@@ -314,7 +332,7 @@ def run_wireless_agent(
         return run_react_loop(system, user, tools, "wireless", session_id=session_id)
     except Exception as e:
         logger.error(f"wireless_agent failed: {e}", exc_info=True)
-        return f"**Wireless**: Agent failed — {e}"
+        raise DomainAgentError(f"**Wireless**: Agent failed — {e}") from e
 
 
 # ─────────────────────────────────────────────
@@ -361,4 +379,4 @@ def run_validator_agent(
         return run_react_loop(system, user, tools, "validator", session_id=session_id)
     except Exception as e:
         logger.error(f"validator_agent failed: {e}", exc_info=True)
-        return f"**Validator**: Agent failed — {e}"
+        raise DomainAgentError(f"**Validator**: Agent failed — {e}") from e
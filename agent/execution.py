@@ -0,0 +1,251 @@
+"""
+Agent execution scheduler.
+
+Every synchronous agent run (interactive ReAct loops, the daily and rollup
+report graphs) goes through one bounded worker pool per process instead of
+the event loop's default executor, so a burst of chat messages cannot
+exhaust the threads the report, the UI or Redis/catalog helpers rely on.
+
+Admission rules, applied whenever a worker frees up:
+  - Global cap: at most `max_workers` runs at once.
+  - Priority lanes: "report" jobs are admitted before "interactive" ones,
+    and interactive runs may use at most max_workers - 1 workers, so a
+    scheduled report never waits behind a queue of chat questions.
+  - Per-key serialization: jobs sharing a key (one chat / channel, or
+    "report") run one at a time, in arrival order; other keys overtake a
+    busy one instead of waiting behind it.
+  - Bounded queues: a lane with `max_queued` jobs waiting, or a key with
+    `max_queued_per_key` waiting, rejects new work with ExecutorBusy.
+
+stats() reports queue depth, running counts and recent wait / run times per
+lane; the UI exposes it at /api/executor.
+
+Public API:
+    get_executor()                               -> AgentExecutor (per process)
+    await executor.run(fn, *args, lane=, key=)   -> fn's return value
+"""
+
+import asyncio
+import contextvars
+import functools
+import itertools
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+Lane = Literal["report", "interactive"]
+LANES: dict[str, int] = {"report": 0, "interactive": 1}    # lower runs first
+
+# Waits longer than this are logged
+SLOW_WAIT_SECONDS = 5.0
+# Samples kept per lane for the wait / run time percentiles
+_SAMPLES = 200
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised instead of queueing when a lane or key already has too much waiting."""
+
+
+@dataclass
+class _Job:
+    lane: str
+    key: Optional[str]
+    seq: int
+    loop: asyncio.AbstractEventLoop
+    admitted: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+
+
+@dataclass
+class _LaneStats:
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    waits: deque = field(default_factory=lambda: deque(maxlen=_SAMPLES))
+    runs: deque = field(default_factory=lambda: deque(maxlen=_SAMPLES))
+
+
+def _percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class AgentExecutor:
+    """Bounded, prioritised, per-key serialised thread pool for agent runs."""
+
+    def __init__(self, max_workers: int = 4, max_queued: int = 16, max_queued_per_key: int = 2):
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self.max_queued_per_key = max_queued_per_key
+        self.lane_limits = {
+            "report": self.max_workers,
+            "interactive": max(1, self.max_workers - 1),
+        }
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent")
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiting: list[_Job] = []
+        self._running: dict[str, int] = {lane: 0 for lane in LANES}
+        self._active_keys: set[str] = set()
+        self._stats = {lane: _LaneStats() for lane in LANES}
+
+    # ── Admission ──────────────────────────────────────────────────────────────
+
+    def _eligible(self, job: _Job) -> bool:
+        return (
+            sum(self._running.values()) < self.max_workers
+            and self._running[job.lane] < self.lane_limits[job.lane]
+            and (job.key is None or job.key not in self._active_keys)
+        )
+
+    def _dispatch(self) -> None:
+        """Admit waiting jobs in priority order while workers are free. Holds self._lock."""
+        self._waiting.sort(key=lambda j: (LANES[j.lane], j.seq))
+        for job in list(self._waiting):
+            if not self._eligible(job):
+                continue
+            self._waiting.remove(job)
+            self._running[job.lane] += 1
+            if job.key is not None:
+                self._active_keys.add(job.key)
+            job.started_at = time.monotonic()
+            job.loop.call_soon_threadsafe(_admit, job.admitted)
+
+    def _release(self, job: _Job, ok: Optional[bool]) -> None:
+        """Free the job's worker and key; ok=None for a job cancelled before it ran."""
+        with self._lock:
+            self._running[job.lane] -= 1
+            if job.key is not None:
+                self._active_keys.discard(job.key)
+            stats = self._stats[job.lane]
+            if ok is not None:
+                stats.completed += ok
+                stats.failed += not ok
+                stats.runs.append(time.monotonic() - job.started_at)
+            self._dispatch()
+
+    def _position(self, job: _Job) -> int:
+        """Jobs ahead of `job` (in a lane at or above its priority). Holds self._lock."""
+        return sum(1 for j in self._waiting if (LANES[j.lane], j.seq) < (LANES[job.lane], job.seq))
+
+    # ── Public ─────────────────────────────────────────────────────────────────
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        lane: Lane = "interactive",
+        key: Optional[str] = None,
+        on_queued: Optional[Callable[[int], None]] = None,
+    ) -> Any:
+        """
+        Run fn(*args) on a worker thread once admitted, and return its result.
+
+        Args:
+            lane:      "report" or "interactive" (priority and worker share).
+            key:       Serialization key — jobs with the same key never overlap.
+            on_queued: Called with the number of jobs ahead if the job has to
+                       wait; not called when it starts immediately.
+
+        Raises:
+            ExecutorBusy: the lane or the key already has too many jobs waiting.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane} (expected one of {list(LANES)})")
+        loop = asyncio.get_running_loop()
+        job = _Job(lane, key, next(self._seq), loop, loop.create_future())
+
+        with self._lock:
+            in_lane = sum(1 for j in self._waiting if j.lane == lane)
+            for_key = sum(1 for j in self._waiting if key is not None and j.key == key)
+            if in_lane >= self.max_queued or (key is not None and for_key >= self.max_queued_per_key):
+                self._stats[lane].rejected += 1
+                logger.warning("Agent executor busy: rejected %s job (key=%s, %d queued in lane, %d for key)",
+                               lane, key, in_lane, for_key)
+                raise ExecutorBusy(
+                    "The agent is busy — too many requests are already waiting. Try again in a minute."
+                )
+            self._waiting.append(job)
+            self._dispatch()
+            ahead = self._position(job) if job in self._waiting else None
+
+        if ahead is not None and on_queued is not None:
+            on_queued(ahead)
+
+        try:
+            await job.admitted
+        except asyncio.CancelledError:
+            with self._lock:
+                admitted = job not in self._waiting
+                if not admitted:
+                    self._waiting.remove(job)
+            if admitted:    # admitted just as it was cancelled
+                self._release(job, None)
+            raise
+
+        wait = job.started_at - job.queued_at
+        self._stats[lane].waits.append(wait)
+        if wait > SLOW_WAIT_SECONDS:
+            logger.info("Agent %s job (key=%s) waited %.1fs for a worker", lane, key, wait)
+
+        # Copy the context like asyncio.to_thread, so tracing spans nest correctly
+        ctx = contextvars.copy_context()
+        future = self._pool.submit(ctx.run, functools.partial(fn, *args))
+        # Released when the thread finishes, not when the awaiting task is cancelled
+        future.add_done_callback(lambda f: self._release(job, not f.cancelled() and f.exception() is None))
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth, running jobs and recent wait / run times per lane."""
+        with self._lock:
+            lanes = {}
+            for lane, s in self._stats.items():
+                lanes[lane] = {
+                    "queued": sum(1 for j in self._waiting if j.lane == lane),
+                    "running": self._running[lane],
+                    "limit": self.lane_limits[lane],
+                    "completed": s.completed,
+                    "failed": s.failed,
+                    "rejected": s.rejected,
+                    "wait_seconds_p50": _percentile(s.waits, 0.5),
+                    "wait_seconds_p95": _percentile(s.waits, 0.95),
+                    "wait_seconds_max": round(max(s.waits), 3) if s.waits else None,
+                    "run_seconds_p50": _percentile(s.runs, 0.5),
+                    "run_seconds_mean": round(statistics.fmean(s.runs), 3) if s.runs else None,
+                }
+            return {
+                "max_workers": self.max_workers,
+                "running": sum(self._running.values()),
+                "queued": len(self._waiting),
+                "lanes": lanes,
+            }
+
+
+def _admit(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_executor: Optional[AgentExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AgentExecutor:
+    """The process-wide executor, sized from AGENT_MAX_WORKERS / AGENT_MAX_QUEUED."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from agent.config import get_config
+            cfg = get_config()
+            _executor = AgentExecutor(max_workers=cfg.agent_max_workers, max_queued=cfg.agent_max_queued)
+        return _executor
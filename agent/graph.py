@@ -10,10 +10,13 @@ running the full ReAct loop against INTERACTIVE_TOOLS.
 """
 
 import asyncio
+import functools
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 
+from agent.answer_cache import cacheable, get_answer_cache, stamp
 from agent.config import get_config, load_topology
+from agent.execution import get_executor
 
 logger = logging.getLogger(__name__)
 from agent.tools.metrics import (
@@ -22,6 +25,7 @@ from agent.tools.metrics import (
     query_adguard_high_risk_clients,
     query_adguard_blocked_domains,
     query_adguard_traffic_by_type,
+    query_adguard_dns_queries,
 )
 from agent.tools.logs import (
     query_security_summary,
@@ -33,9 +37,12 @@ from agent.tools.threat_intel_tools import (
     query_threat_intel_summary,
     lookup_ip_threat_intel,
     query_threat_intel_coverage,
+    query_blocked_ips_by_geo,
 )
 from agent.tools.qnap_tools import query_qnap_health, query_qnap_directory_sizes
 from agent.tools.proxmox_tools import query_proxmox_health
+from agent.tools.devices import lookup_device_by_ip
+from agent.tools.reports import search_reports
 
 
 # Full tool set available to the interactive agent (Sprint 3 adds validator + qnap directory)
@@ -45,16 +52,20 @@ INTERACTIVE_TOOLS = [
     query_adguard_high_risk_clients,
     query_adguard_blocked_domains,
     query_adguard_traffic_by_type,
+    query_adguard_dns_queries,
     query_security_summary,
     query_wireless_health,
     query_infrastructure_events,
     search_logs_by_ip,
+    lookup_device_by_ip,
     query_threat_intel_summary,
     lookup_ip_threat_intel,
     query_threat_intel_coverage,
+    query_blocked_ips_by_geo,
     query_qnap_health,
     query_qnap_directory_sizes,
     query_proxmox_health,
+    search_reports,
 ]
 
 
@@ -118,12 +129,14 @@ You have tools to query:
 - **Security Logs**: pfSense firewall blocks, ntopng security alerts (query_security_summary)
 - **Wireless Health**: UniFi deauth events, client anomalies, roaming issues (query_wireless_health)
 - **Infrastructure**: Docker health checks, Home Assistant errors, Proxmox operations (query_infrastructure_events)
-- **IP Investigation**: Search all logs for a specific IP address (search_logs_by_ip)
+- **IP Investigation**: Search all logs for a specific IP address (search_logs_by_ip — includes which device held the IP while those logs were written)
+- **Device History**: lookup_device_by_ip(ip, at) — which device held an internal IP at a past time (DHCP lease history)
 - **Hardware Health**: query_qnap_health (NAS volumes/disks/temps), query_proxmox_health (VMs/containers/storage)
 - **Threat Intelligence**: Enriched IP reputation from AbuseIPDB, VirusTotal, AlienVault:
-  - query_threat_intel_summary(hours, min_score) — blocked IPs joined with threat scores, sorted by severity
+  - query_threat_intel_summary(hours, min_score) — blocked IPs joined with threat scores and public blocklist membership, sorted by severity
   - lookup_ip_threat_intel(ip) — full reputation profile for a specific IP
   - query_threat_intel_coverage() — how many blocked IPs have been enriched
+  - query_blocked_ips_by_geo(hours, top_n) — blocked IPs grouped by country / ASN (offline GeoIP, covers every IP)
 
 When analyzing security:
 1. Call query_threat_intel_summary(hours=24) — this is the highest signal view, showing confirmed malicious IPs hitting the firewall
@@ -148,16 +161,19 @@ def run_interactive_query_sync(
     question: str,
     history: Optional[list[dict]] = None,
     session_id: Optional[str] = None,
+    on_event=None,
 ) -> str:
     """
     Synchronous interactive query — runs the ReAct loop with the full tool set.
 
     Args:
         question:   The user's question or request.
-        history:    Optional prior conversation turns as OpenAI-format messages
-                    [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}, ...]
-                    The question is appended as the final user turn.
+        history:    Optional prior conversation as OpenAI-format messages
+                    [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}, ...],
+                    already windowed by the caller (see bot/memory.py); passed
+                    to the model as real turns. The question is the final user turn.
         session_id: Groups Langfuse traces under one session (e.g. Telegram chat_id).
+        on_event:   Progress callback, see agent.llm.EventCallback.
 
     Returns:
         Answer string from the agent.
@@ -166,24 +182,15 @@ def run_interactive_query_sync(
 
     system_prompt = create_system_prompt()
 
-    # Build a user prompt that includes condensed history if provided
-    if history:
-        history_text = "\n".join(
-            f"{m['role'].upper()}: {m['content']}"
-            for m in history[-10:]  # last 10 turns to avoid context overflow
-            if m.get("content")
-        )
-        user_prompt = f"Conversation history:\n{history_text}\n\nCurrent question: {question}"
-    else:
-        user_prompt = question
-
     return run_react_loop(
         system_prompt=system_prompt,
-        user_prompt=user_prompt,
+        user_prompt=question,
+        history=history,
         tools=INTERACTIVE_TOOLS,
         agent_name="interactive",
         agent_type="micro",
         session_id=session_id,
+        on_event=on_event,
     )
 
 
@@ -193,8 +200,10 @@ async def run_interactive_query(
     session_id: Optional[str] = None,
 ) -> str:
     """
-    Async interactive query — wraps the synchronous ReAct loop in a thread
-    so it doesn't block the asyncio event loop used by the Telegram/Slack bots.
+    Async interactive query — runs the synchronous ReAct loop on the agent
+    execution pool (interactive lane) so it doesn't block the asyncio event
+    loop used by the Telegram/Slack bots. Queries with the same session_id
+    run one at a time.
 
     Args:
         question:   The user's question or request.
@@ -204,10 +213,63 @@ async def run_interactive_query(
     Returns:
         Answer string from the agent.
     """
-    return await asyncio.get_running_loop().run_in_executor(
-        None,
+    return await get_executor().run(
         run_interactive_query_sync,
         question,
         history,
         session_id,
+        key=session_id,
     )
+
+
+async def stream_interactive_query(
+    question: str,
+    history: Optional[list[dict]] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """
+    Streaming interactive query — yields progress while the ReAct loop runs.
+
+    Yields the agent.llm.EventCallback events (tool_start, tool_end, token)
+    as they happen — preceded by {"type": "queued", "ahead": n} if the query
+    has to wait for a worker — then exactly one {"type": "answer", "text": ...}
+    with the final answer. An exception in the loop is raised from the generator.
+
+    Standalone questions go through the shared answer cache
+    (agent/answer_cache.py): a hit is yielded at once as the answer, stamped
+    with its time and "cached": True, without running the loop. Fresh answers
+    are stored unless a tool failed during the run or the answer is an error
+    or fallback reply (answer_cache.storable).
+    """
+    cache = get_answer_cache() if cacheable(question, history) else None
+    generation = None
+    if cache is not None:
+        entry, generation = await asyncio.to_thread(cache.get, question)
+        if entry is not None:
+            yield {"type": "answer", "text": stamp(entry), "cached": True}
+            return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: dict) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    task = asyncio.ensure_future(get_executor().run(
+        functools.partial(run_interactive_query_sync, question, history, session_id, on_event=on_event),
+        key=session_id,
+        on_queued=lambda ahead: queue.put_nowait({"type": "queued", "ahead": ahead}),
+    ))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+
+    tool_failed = False
+    while (event := await queue.get()) is not None:
+        tool_failed |= event.get("type") == "tool_end" and not event.get("ok")
+        yield event
+    answer = await task
+    # An answer built around a failed tool call is not shared
+    if cache is not None and not tool_failed:
+        # Under the generation read before the run: a report or alert that
+        # arrived meanwhile has already made this answer stale
+        await asyncio.to_thread(cache.put, question, answer, generation)
+    yield {"type": "answer", "text": answer}
@@ -7,7 +7,8 @@ via operator.add reducer, then passed to a synthesis node.
 Flow:
   START
     └─ initialize  (fetch Langfuse prompts)
-         └─ [Send x6]  run_domain  (fan-out)
+         └─ [Send x6]  run_domain  (fan-out; reuses the last result of a domain
+                                    whose data is unchanged, see domain_cache.py)
               └─ synthesize  (writes final report)
                    └─ END
 
@@ -15,6 +16,7 @@ All LLM calls go through agent.llm — tracing handled there.
 
 Public interface:
     generate_daily_report(hours=24) -> str
+    run_daily_report(hours=24, reuse=True) -> DailyReportState (report + per-domain metrics)
 """
 
 import logging
@@ -26,6 +28,7 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.types import Send
 
 from agent.domains.daily_report import (
+    DomainAgentError,
     run_firewall_threat_agent,
     run_dns_agent,
     run_network_flow_agent,
@@ -35,7 +38,9 @@ from agent.domains.daily_report import (
 )
 from langfuse import observe
 from agent.langfuse_integration import get_agent_prompt_with_fallback
-from agent.llm import chat
+from agent.llm import chat, record_tool_calls
+from agent.reports import domain_cache
+from agent.reports.daily_metrics import extract_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +72,9 @@ LANGFUSE_PROMPT_NAMES = {
 class DomainResult(TypedDict):
     domain: str
     summary: str
+    metrics: dict[str, float]   # numeric tool results, see agent/reports/daily_metrics.py
+    reused: bool                # carried over from the previous run, data unchanged
+    failed: bool                # the agent failed; summary describes the failure
 
 
 class DomainNodeInput(TypedDict):
@@ -74,11 +82,13 @@ class DomainNodeInput(TypedDict):
     hours: int
     session_id: str
     prompt_override: str
+    reuse: bool
 
 
 class DailyReportState(TypedDict):
     hours: int
     session_id: str
+    reuse: bool
     domain_results: Annotated[list[DomainResult], operator.add]
     prompts: dict[str, str]
     final_report: Optional[str]
@@ -202,18 +212,39 @@ def run_domain(state: DomainNodeInput) -> dict:
     session_id = state["session_id"]
     prompt_override = state.get("prompt_override") or ""
 
+    if state.get("reuse"):
+        previous = domain_cache.reusable(domain_name, hours, prompt_override)
+        if previous is not None:
+            return {"domain_results": [{"domain": domain_name, **previous, "reused": True, "failed": False}]}
+
     fn = DOMAIN_AGENTS[domain_name]
     logger.info(
         "Running %s%s...", domain_name,
         " (Langfuse prompt)" if prompt_override else " (hardcoded prompt)"
     )
-    try:
-        summary = fn(hours, prompt_override=prompt_override, session_id=session_id)
-    except Exception as e:
-        logger.error(f"Domain node '{domain_name}' failed: {e}", exc_info=True)
-        summary = f"**{domain_name}**: Agent failed — {e}"
-
-    return {"domain_results": [{"domain": domain_name, "summary": summary}]}
+    failed = False
+    with record_tool_calls() as calls:
+        try:
+            summary = fn(hours, prompt_override=prompt_override, session_id=session_id)
+        except DomainAgentError as e:
+            # Already logged by the agent
+            summary, failed = str(e), True
+        except Exception as e:
+            logger.error(f"Domain node '{domain_name}' failed: {e}", exc_info=True)
+            summary, failed = f"**{domain_name}**: Agent failed — {e}", True
+    metrics = extract_metrics(calls, hours)
+    logger.info("%s: %d tool calls, %d metrics", domain_name, len(calls), len(metrics))
+
+    # A failed run is never reused
+    if calls and not failed:
+        try:
+            domain_cache.store(domain_name, hours, prompt_override, calls, summary, metrics)
+        except Exception as e:
+            logger.warning(f"Could not store {domain_name} result for reuse: {e}")
+
+    return {"domain_results": [
+        {"domain": domain_name, "summary": summary, "metrics": metrics, "reused": False, "failed": failed}
+    ]}
 
 
 def synthesize(state: DailyReportState) -> dict:
@@ -256,6 +287,7 @@ def dispatch_domains(state: DailyReportState) -> list[Send]:
             "hours": state["hours"],
             "session_id": state["session_id"],
             "prompt_override": state["prompts"].get(domain_name, ""),
+            "reuse": state.get("reuse", False),
         })
         for domain_name in DOMAIN_AGENTS
     ]
@@ -278,7 +310,6 @@ graph = _builder.compile()
 
 # ── Public entrypoint ──────────────────────────────────────────────────────────
 
-@observe(as_type="span", capture_input=False, capture_output=False)
 def generate_daily_report(hours: int = 24) -> str:
     """
     Run the full daily report pipeline via LangGraph.
@@ -289,6 +320,19 @@ def generate_daily_report(hours: int = 24) -> str:
     Returns:
         Final report markdown string
     """
+    return run_daily_report(hours).get("final_report") or ""
+
+
+@observe(as_type="span", capture_input=False, capture_output=False)
+def run_daily_report(hours: int = 24, reuse: bool = True) -> DailyReportState:
+    """
+    Run the full daily report pipeline and return its final state:
+    final_report plus each domain's summary and metrics in domain_results.
+
+    With reuse, domains whose tool data is unchanged since their last run
+    (agent/reports/domain_cache.py) keep that run's summary instead of
+    calling the LLM again; reuse=False re-analyses every domain.
+    """
     import uuid
     from langfuse import get_client as get_langfuse_client, LangfuseOtelSpanAttributes
     from opentelemetry import trace as otel_trace
@@ -303,11 +347,12 @@ def generate_daily_report(hours: int = 24) -> str:
     span.set_attribute(LangfuseOtelSpanAttributes.TRACE_NAME, session_id)
     span.set_attribute(LangfuseOtelSpanAttributes.TRACE_SESSION_ID, session_id)
     span.set_attribute(LangfuseOtelSpanAttributes.TRACE_TAGS, ["daily-report"])
-    lf.update_current_span(name="daily-report", input={"hours": hours})
+    lf.update_current_span(name="daily-report", input={"hours": hours, "reuse": reuse})
 
     initial_state: DailyReportState = {
         "hours": hours,
         "session_id": session_id,
+        "reuse": reuse,
         "domain_results": [],
         "prompts": {},
         "final_report": None,
@@ -320,9 +365,11 @@ def generate_daily_report(hours: int = 24) -> str:
     lf.flush()
 
     elapsed = (datetime.now(timezone.utc) - start).total_seconds()
-    logger.info("=== Daily Report Complete in %.1fs session=%s ===", elapsed, session_id)
+    reused = [r["domain"] for r in result.get("domain_results", []) if r.get("reused")]
+    logger.info("=== Daily Report Complete in %.1fs session=%s (reused: %s) ===",
+                elapsed, session_id, ", ".join(sorted(reused)) or "none")
 
-    return final_report
+    return result
 
 
 # ── CLI test entrypoint ────────────────────────────────────────────────────────
@@ -0,0 +1,296 @@
+"""
+Rollup Report Graph — weekly / monthly synthesis over stored daily results.
+
+No tools and no raw log queries: the inputs are the daily domain summaries
+and metric trends loaded by agent/reports/rollup.py.
+
+Flow:
+  START
+    └─ [Send per domain]  summarize_domain  (fan-out)
+         map:    each week-sized chunk's daily summaries → one chunk summary
+                 (cached by input fingerprint; monthly reuses the weekly runs')
+         reduce: chunk summaries → one period summary (monthly only)
+    └─ synthesize  (writes final report)
+         └─ END
+
+Public interface:
+    run_rollup_report(period, days, stats) -> str
+"""
+
+import logging
+import operator
+from typing import Annotated, Any, Optional, TypedDict
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from langfuse import observe
+
+from agent.llm import chat
+from agent.reports.rollup import (
+    LEGACY_DOMAIN,
+    Day,
+    Period,
+    cached_chunk,
+    chunk_inputs,
+    fingerprint,
+    stats_table,
+    store_chunk,
+)
+
+logger = logging.getLogger(__name__)
+
+# Same order the daily synthesis uses
+DOMAIN_ORDER = [
+    "firewall_threat",
+    "dns_security",
+    "network_flow",
+    "infrastructure",
+    "wireless",
+    "validator",
+    LEGACY_DOMAIN,
+]
+
+
+# ── State ──────────────────────────────────────────────────────────────────────
+
+class DomainRollup(TypedDict):
+    domain: str
+    summary: str
+
+
+class DomainNodeInput(TypedDict):
+    domain: str
+    kind: str
+    period_label: str
+    chunks: list[dict[str, Any]]    # [{"period": Period, "inputs": [{"date", "summary"}]}]
+    stats_table: str
+    session_id: str
+
+
+class RollupState(TypedDict):
+    kind: str
+    period_label: str
+    session_id: str
+    domain_inputs: list[DomainNodeInput]
+    overview_table: str
+    domain_results: Annotated[list[DomainRollup], operator.add]
+    final_report: Optional[str]
+
+
+# ── Prompts ────────────────────────────────────────────────────────────────────
+
+MAP_SYSTEM = """You condense a week of daily security findings for one domain of a home/prosumer network.
+
+You are given the daily summaries one domain agent wrote for each day of the week.
+Write a compact weekly digest for that domain:
+- Recurring issues (which days, whether they are getting better or worse)
+- New issues and one-off incidents, with dates
+- Specific IPs, hostnames, devices, counts and percentages — keep the numbers
+- What was resolved during the week
+
+Drop anything that was routine every day. No preamble. Markdown bullets, at most ~300 words.
+"""
+
+MAP_USER = """Domain: {domain}
+Week: {start} to {end}
+
+{days}
+"""
+
+REDUCE_SYSTEM = """You combine weekly digests for one domain of a home/prosumer network into a {kind} summary.
+
+Keep what persisted across weeks, what changed between weeks, and one-off incidents worth
+remembering. Use the metric table for trends; do not invent numbers that are not in the inputs.
+No preamble. Markdown bullets, at most ~400 words.
+"""
+
+REDUCE_USER = """Domain: {domain}
+Period: {period}
+
+## Weekly digests
+{weeks}
+
+## Metric trends (vs previous period)
+{stats}
+"""
+
+SYNTHESIS_SYSTEM = """You are First Light AI, writing the {kind} security and health rollup for a home/prosumer network.
+
+You receive one period summary per domain (built from the daily reports) and a table of metric
+trends compared with the previous period. Write a scannable Markdown report:
+
+## Executive Summary
+3-5 sentences: overall posture this period and how it compares with the last.
+
+## 📈 Trends
+The metric changes that matter, with numbers from the table.
+
+## 🔁 Recurring Issues
+Problems seen on several days or persisting across weeks.
+
+## 🆕 New This Period
+## 🛡️ Threats · 🌐 Network & DNS · 🖥️ Infrastructure · 📡 Wireless · ⛓️ Validator
+Only where there is something to say.
+
+## ✅ Recommendations  (only if action is actually needed)
+
+Rules: be specific (IPs, hosts, dates, counts); do not repeat a finding across sections;
+do not invent numbers; omit empty sections.
+"""
+
+SYNTHESIS_USER = """{kind} rollup for {period}.
+
+{domains}
+
+---
+
+## Metric trends (all domains, vs previous period)
+{stats}
+
+Write the final report now.
+"""
+
+
+def _content(response) -> str:
+    return response.choices[0].message.content or ""
+
+
+# ── Nodes ──────────────────────────────────────────────────────────────────────
+
+def summarize_domain(state: DomainNodeInput) -> dict:
+    """Map each chunk (cached where the inputs are unchanged), then reduce."""
+    domain = state["domain"]
+    digests = []
+    for chunk in state["chunks"]:
+        period: Period = chunk["period"]
+        inputs = chunk["inputs"]
+        fp = fingerprint(inputs, MAP_SYSTEM)
+        digest = cached_chunk(domain, period, fp)
+        if digest is None:
+            days = "\n\n".join(f"### {i['date']}\n{i['summary']}" for i in inputs)
+            messages = [
+                {"role": "system", "content": MAP_SYSTEM},
+                {"role": "user", "content": MAP_USER.format(domain=domain, start=period.start,
+                                                            end=period.end, days=days)},
+            ]
+            try:
+                digest = _content(chat(messages, "weekly", session_id=state["session_id"],
+                                       agent_name=f"rollup/{domain}/map"))
+                store_chunk(domain, period, fp, digest)
+            except Exception as e:
+                logger.error(f"Rollup map {domain} {period.stem} failed: {e}", exc_info=True)
+                digest = f"_Summary unavailable for {period.label}: {e}_"
+        else:
+            logger.info(f"Rollup map {domain} {period.stem}: cached")
+        digests.append((period, digest))
+
+    if len(digests) == 1:
+        summary = digests[0][1]
+    else:
+        weeks = "\n\n".join(f"### {p.label}\n{d}" for p, d in digests)
+        messages = [
+            {"role": "system", "content": REDUCE_SYSTEM.format(kind=state["kind"])},
+            {"role": "user", "content": REDUCE_USER.format(domain=domain, period=state["period_label"],
+                                                           weeks=weeks, stats=state["stats_table"])},
+        ]
+        try:
+            summary = _content(chat(messages, state["kind"], session_id=state["session_id"],
+                                    agent_name=f"rollup/{domain}/reduce"))
+        except Exception as e:
+            logger.error(f"Rollup reduce {domain} failed: {e}", exc_info=True)
+            summary = weeks
+
+    return {"domain_results": [{"domain": domain, "summary": summary}]}
+
+
+def synthesize(state: RollupState) -> dict:
+    """Final report from the per-domain period summaries and the metric trends."""
+    summaries = {r["domain"]: r["summary"] for r in state["domain_results"]}
+    domains = "\n\n---\n\n".join(
+        f"## {domain.upper()}\n{summaries[domain]}" for domain in DOMAIN_ORDER if domain in summaries
+    )
+    messages = [
+        {"role": "system", "content": SYNTHESIS_SYSTEM.format(kind=state["kind"])},
+        {"role": "user", "content": SYNTHESIS_USER.format(kind=state["kind"].capitalize(),
+                                                          period=state["period_label"],
+                                                          domains=domains, stats=state["overview_table"])},
+    ]
+    logger.info("Running rollup synthesis...")
+    response = chat(messages, state["kind"], session_id=state["session_id"], agent_name="rollup/synthesis")
+    return {"final_report": _content(response)}
+
+
+def dispatch_domains(state: RollupState) -> list[Send]:
+    return [Send("summarize_domain", node_input) for node_input in state["domain_inputs"]]
+
+
+# ── Graph ──────────────────────────────────────────────────────────────────────
+
+_builder = StateGraph(RollupState)
+_builder.add_node("summarize_domain", summarize_domain)
+_builder.add_node("synthesize", synthesize)
+_builder.add_conditional_edges(START, dispatch_domains, ["summarize_domain"])
+_builder.add_edge("summarize_domain", "synthesize")
+_builder.add_edge("synthesize", END)
+
+graph = _builder.compile()
+
+
+# ── Public entrypoint ──────────────────────────────────────────────────────────
+
+def build_domain_inputs(period: Period, days: list[Day], stats: dict, session_id: str) -> list[DomainNodeInput]:
+    """One node input per domain that has summaries in the period."""
+    present = {domain for d in days for domain in d.summaries}
+    domains = [d for d in DOMAIN_ORDER if d in present] + sorted(present - set(DOMAIN_ORDER))
+    inputs = []
+    for domain in domains:
+        chunks = [
+            {"period": chunk, "inputs": chunk_inputs(domain, chunk, days)}
+            for chunk in period.chunks()
+        ]
+        inputs.append({
+            "domain": domain,
+            "kind": period.kind,
+            "period_label": period.label,
+            "chunks": [c for c in chunks if c["inputs"]],
+            "stats_table": stats_table(stats, domain),
+            "session_id": session_id,
+        })
+    return inputs
+
+
+@observe(as_type="span", capture_input=False, capture_output=False)
+def run_rollup_report(period: Period, days: list[Day], stats: dict) -> str:
+    """
+    Run the rollup pipeline for `period` over the loaded daily results.
+
+    Returns:
+        Final report markdown string
+    """
+    import uuid
+    from datetime import datetime, timezone
+    from langfuse import get_client as get_langfuse_client
+
+    start = datetime.now(timezone.utc)
+    session_id = f"{period.kind}-rollup-{period.stem}-{uuid.uuid4().hex[:6]}"
+    logger.info("=== %s rollup start: %s (%d days) session=%s ===",
+                period.kind.capitalize(), period.label, len(days), session_id)
+
+    lf = get_langfuse_client()
+    lf.update_current_span(name=f"{period.kind}-rollup", input={"period": period.label, "days": len(days)})
+
+    result = graph.invoke({
+        "kind": period.kind,
+        "period_label": period.label,
+        "session_id": session_id,
+        "domain_inputs": build_domain_inputs(period, days, stats, session_id),
+        "overview_table": stats_table(stats),
+        "domain_results": [],
+        "final_report": None,
+    })
+    final_report = result.get("final_report") or ""
+
+    lf.update_current_span(output=final_report[:500])
+    lf.flush()
+    logger.info("=== Rollup complete in %.1fs ===", (datetime.now(timezone.utc) - start).total_seconds())
+    return final_report
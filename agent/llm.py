@@ -7,11 +7,16 @@ Langfuse tracing uses the @observe decorator + SDK update methods (4.0 API).
 Public API:
     chat(messages, agent_type, ...)          -> litellm.ModelResponse
     run_react_loop(system, user, tools, ...) -> str
+                   (on_event= streams tool progress and answer tokens)
+    record_tool_calls()                      -> context manager → list[ToolCall]
 """
 
 import json
 import logging
-from typing import Literal, Optional
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Literal, NamedTuple, Optional
 
 import litellm
 from langchain_core.tools import BaseTool
@@ -29,6 +34,14 @@ logger = logging.getLogger(__name__)
 
 AgentType = Literal["micro", "supervisor", "synthesis", "weekly", "monthly"]
 
+# run_react_loop progress callback. Events are dicts:
+#   {"type": "tool_start", "tool": name, "args": {...}}
+#   {"type": "tool_end", "tool": name, "ok": bool, "seconds": float}
+#   {"type": "token", "text": delta}   — answer text as it is generated; text
+#       streamed in a turn that then calls tools was interim, and the next
+#       tool_start says so
+EventCallback = Callable[[dict], None]
+
 MAX_TOOL_ITERATIONS = 12
 
 # Silence LiteLLM's verbose logging
@@ -42,6 +55,27 @@ def _set_trace_session(session_id: Optional[str]) -> None:
         span.set_attribute(LangfuseOtelSpanAttributes.TRACE_SESSION_ID, session_id)
 
 
+class ToolCall(NamedTuple):
+    """A successful tool invocation made inside run_react_loop."""
+    tool: BaseTool
+    args: dict
+    result: Any
+
+
+_tool_calls: ContextVar[Optional[list[ToolCall]]] = ContextVar("tool_calls", default=None)
+
+
+@contextmanager
+def record_tool_calls() -> Iterator[list[ToolCall]]:
+    """Collect the tool calls run_react_loop makes within this block (same thread)."""
+    calls: list[ToolCall] = []
+    token = _tool_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _tool_calls.reset(token)
+
+
 # ── Core call ──────────────────────────────────────────────────────────────────
 
 @observe(as_type="generation", capture_input=False, capture_output=False)
@@ -51,6 +85,7 @@ def chat(
     tools: Optional[list[dict]] = None,
     session_id: Optional[str] = None,
     agent_name: Optional[str] = None,
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> litellm.ModelResponse:
     """
     Single LLM call through LiteLLM with Langfuse generation tracing.
@@ -64,6 +99,8 @@ def chat(
         tools:       OpenAI-format tool schemas (enables tool_choice=auto)
         session_id:  Groups all calls in a report run under one Langfuse session
         agent_name:  Langfuse generation name for this call
+        on_token:    Stream the response, calling this with each content
+                     delta; the assembled response is still returned
     """
     config = get_model_config()
     model = get_model_for_agent_type(agent_type)
@@ -93,7 +130,16 @@ def chat(
         kwargs["tools"] = tools
         kwargs["tool_choice"] = "auto"
 
-    response = litellm.completion(**kwargs)
+    if on_token is None:
+        response = litellm.completion(**kwargs)
+    else:
+        chunks = []
+        for chunk in litellm.completion(**kwargs, stream=True, stream_options={"include_usage": True}):
+            chunks.append(chunk)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                on_token(delta)
+        response = litellm.stream_chunk_builder(chunks, messages=messages)
 
     msg = response.choices[0].message
     lf.update_current_generation(
@@ -122,6 +168,8 @@ def run_react_loop(
     agent_name: str,
     agent_type: AgentType = "micro",
     session_id: Optional[str] = None,
+    on_event: Optional[EventCallback] = None,
+    history: Optional[list[dict]] = None,
 ) -> str:
     """
     ReAct tool-calling loop via LiteLLM.
@@ -135,8 +183,13 @@ def run_react_loop(
         agent_name:    Name used in Langfuse traces and logs
         agent_type:    Model tier (default: "micro")
         session_id:    Groups all calls in a report run under one Langfuse session
+        on_event:      Progress callback (see EventCallback); when set, LLM
+                       responses are streamed and tokens reported as they arrive
+        history:       Prior conversation messages, placed between the system
+                       prompt and user_prompt
     """
     lf = get_langfuse_client()
+    on_token = (lambda text: on_event({"type": "token", "text": text})) if on_event else None
     _set_trace_session(session_id)
     lf.update_current_span(name=agent_name, input=user_prompt)
 
@@ -145,6 +198,7 @@ def run_react_loop(
 
     messages: list[dict] = [
         {"role": "system", "content": system_prompt},
+        *(history or []),
         {"role": "user", "content": user_prompt},
     ]
 
@@ -155,6 +209,7 @@ def run_react_loop(
             tools=tool_schemas,
             session_id=session_id,
             agent_name=f"{agent_name}/llm",
+            on_token=on_token,
         )
         msg = response.choices[0].message
 
@@ -184,11 +239,23 @@ def run_react_loop(
         for tc in msg.tool_calls:
             tool = tool_map.get(tc.function.name)
             if tool:
+                started = time.monotonic()
+                ok = False
                 try:
                     args = json.loads(tc.function.arguments)
+                    if on_event:
+                        on_event({"type": "tool_start", "tool": tool.name, "args": args})
                     result = tool.invoke(args)
+                    ok = True
                 except Exception as e:
                     result = f"Tool error: {e}"
+                else:
+                    recorded = _tool_calls.get()
+                    if recorded is not None:
+                        recorded.append(ToolCall(tool, args, result))
+                if on_event:
+                    on_event({"type": "tool_end", "tool": tool.name, "ok": ok,
+                              "seconds": round(time.monotonic() - started, 2)})
             else:
                 result = f"Unknown tool: {tc.function.name}"
 
@@ -203,7 +270,8 @@ def run_react_loop(
         "role": "user",
         "content": "Provide your final summary now based on the data collected.",
     })
-    response = chat(messages, agent_type, session_id=session_id, agent_name=f"{agent_name}/llm")
+    response = chat(messages, agent_type, session_id=session_id, agent_name=f"{agent_name}/llm",
+                    on_token=on_token)
     result = response.choices[0].message.content or f"[{agent_name}: no final content]"
     lf.update_current_span(output=result)
     return result
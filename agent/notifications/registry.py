@@ -13,6 +13,7 @@ import asyncio
 import logging
 from typing import Union
 
+from agent.answer_cache import bump_generation
 from agent.notifications.base import NotificationChannel
 from agent.notifications.telegram import TelegramChannel, build_telegram_channel
 from agent.notifications.slack import SlackWebhookChannel, build_slack_channel
@@ -95,7 +96,9 @@ async def broadcast_alert(message: str) -> None:
     """
     Send an alert message to all registered channels concurrently.
     Individual channel failures are logged but don't affect other channels.
+    Also invalidates the bots' cached answers, which predate the alert.
     """
+    await asyncio.to_thread(bump_generation, "alert")
     if not _channels:
         logger.warning("broadcast_alert: no notification channels registered")
         return
@@ -163,9 +163,13 @@ class SlackWebhookChannel:
             return False
 
     async def send_report(self, report: dict) -> None:
-        """Send the daily report as formatted Block Kit blocks."""
+        """Send a daily report or weekly / monthly rollup as formatted Block Kit blocks."""
         report_text = report.get("report_text", "")
-        header = f"First Light Daily Report — {report.get('date', 'N/A')}"
+        kind = report.get("kind", "daily")
+        if kind == "daily":
+            header = f"First Light Daily Report — {report.get('date', 'N/A')}"
+        else:
+            header = f"First Light {kind.capitalize()} Rollup — {report.get('period', 'N/A')}"
 
         body = _md_to_mrkdwn(report_text)
         blocks = _build_blocks(header, body)
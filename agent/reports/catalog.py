@@ -0,0 +1,191 @@
+"""
+Report catalog — SQLite index of saved daily reports.
+
+generate_daily_report() records each report as it writes it, and the UI
+answers its list / lookup / count queries from here instead of walking
+reports/daily/ on every request. A date lookup is a primary-key read, a
+listing page is one indexed range scan, and the count is cached until another
+process commits a change (PRAGMA data_version), so status polling stays
+constant-time however many years of reports accumulate.
+
+The same database holds the search index (agent/reports/search.py): a
+report's text, entities and facts are (re)indexed whenever it is recorded or
+its file or metrics JSON has changed since it was last indexed.
+
+The files remain the source of truth: rebuild() re-syncs with the directory
+(the UI runs it once at startup), re-indexing only what changed, get() falls
+back to the conventional YYYY/MM/<date>_daily_report.md path for reports the
+catalog has not seen, and entries whose file has disappeared are dropped when
+looked up.
+"""
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from agent.reports import search as report_search
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = "catalog.db"
+REPORT_SUFFIX = "_daily_report.md"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    date TEXT PRIMARY KEY,      -- YYYY-MM-DD
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _as_dict(row: tuple) -> dict:
+    date, path, size, mtime = row
+    return {
+        "date": date,
+        "path": path,
+        "size_kb": round(size / 1024, 1),
+        "modified": datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+class ReportCatalog:
+    """Index of daily reports under `reports_dir` (the .../daily directory)."""
+
+    def __init__(self, reports_dir: Path, db_path: Optional[Path] = None):
+        self.reports_dir = Path(reports_dir)
+        self.db_path = Path(db_path) if db_path else self.reports_dir.parent / CATALOG_FILENAME
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._count: Optional[int] = None
+        self._count_version: Optional[int] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.executescript(report_search.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def path_for(self, date: str) -> Path:
+        """Where generate_daily_report() writes the report for `date`."""
+        year, month, _ = date.split("-")
+        return self.reports_dir / year / month / f"{date}{REPORT_SUFFIX}"
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def _upsert(self, conn: sqlite3.Connection, path: Path) -> tuple:
+        stat = path.stat()
+        date = path.name[:-len(REPORT_SUFFIX)]
+        row = (date, str(path), stat.st_size, stat.st_mtime)
+        conn.execute(
+            "INSERT INTO reports (date, path, size, mtime) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(date) DO UPDATE SET path = excluded.path, size = excluded.size, mtime = excluded.mtime",
+            row,
+        )
+
+        metrics_path = path.with_name(f"{date}_metrics.json")
+        metrics_mtime = metrics_path.stat().st_mtime if metrics_path.exists() else None
+        if not report_search.is_current(conn, date, stat.st_mtime, metrics_mtime):
+            metrics = report_search.load_metrics(metrics_path.read_text()) if metrics_mtime is not None else None
+            report_search.index(conn, date, path.read_text(), stat.st_mtime, metrics, metrics_mtime)
+        return row
+
+    def _remove(self, conn: sqlite3.Connection, date: str):
+        conn.execute("DELETE FROM reports WHERE date = ?", (date,))
+        report_search.remove(conn, date)
+
+    def record(self, path: Path) -> dict:
+        """Add or refresh the entry for a report file that was just written."""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                row = self._upsert(conn, Path(path))
+            self._count = None
+        return _as_dict(row)
+
+    def rebuild(self) -> int:
+        """Re-sync with the reports directory; returns the number of reports.
+
+        Unchanged reports are only stat()ed, so this is cheap to run at every
+        startup; deleted reports are dropped from the catalog and the index.
+        """
+        paths = sorted(self.reports_dir.rglob(f"*{REPORT_SUFFIX}")) if self.reports_dir.exists() else []
+        with self._lock:
+            conn = self._db()
+            with conn:
+                seen = set()
+                for path in paths:
+                    try:
+                        seen.add(self._upsert(conn, path)[0])
+                    except FileNotFoundError:
+                        pass  # removed while we were walking
+                indexed = {r[0] for r in conn.execute("SELECT date FROM reports")}
+                indexed |= {r[0] for r in conn.execute("SELECT date FROM report_index_state")}
+                for date in indexed - seen:
+                    self._remove(conn, date)
+            self._count = None
+        logger.info(f"Report catalog rebuilt: {len(seen)} reports in {self.reports_dir}")
+        return len(seen)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def get(self, date: str) -> Optional[dict]:
+        """Metadata for the report on `date` (YYYY-MM-DD), or None."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT date, path, size, mtime FROM reports WHERE date = ?", (date,)
+            ).fetchone()
+        if row is not None:
+            if Path(row[1]).exists():
+                return _as_dict(row)
+            with self._lock, self._db() as conn:
+                self._remove(conn, date)
+                self._count = None
+            return None
+
+        # Not indexed yet (written by something other than generate_daily_report)
+        path = self.path_for(date)
+        if path.exists():
+            return self.record(path)
+        return None
+
+    def page(self, limit: int, offset: int = 0) -> list[dict]:
+        """Reports newest first, `limit` at a time."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT date, path, size, mtime FROM reports ORDER BY date DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [_as_dict(r) for r in rows]
+
+    def count(self) -> int:
+        """Number of reports; recounted only after a commit by any connection."""
+        with self._lock:
+            conn = self._db()
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._count is None or version != self._count_version:
+                self._count = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+                self._count_version = version
+            return self._count
+
+    def search(self, text: str = "", entity: str = "", fact: str = "",
+               below: Optional[float] = None, above: Optional[float] = None,
+               since: str = "", until: str = "", limit: int = 20) -> list[dict]:
+        """Reports matching every given criterion — see agent.reports.search.search()."""
+        with self._lock:
+            return report_search.search(self._db(), text=text, entity=entity, fact=fact,
+                                        below=below, above=above, since=since, until=until, limit=limit)
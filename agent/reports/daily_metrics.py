@@ -0,0 +1,143 @@
+"""
+Per-report metrics — the numbers behind each daily report, as data.
+
+While a domain agent runs, agent.llm.record_tool_calls() keeps its tool
+results. extract_metrics() turns them into flat metric → value pairs:
+
+- JSON object results: every numeric leaf, named by its key path
+  ("validator_health.consensus.attestation_effectiveness.source_pct").
+  Lists are skipped — they are top-N samples, not totals — except for the
+  tools in ROW_METRICS, whose rows are a complete breakdown.
+- Only calls over the report window count: a call with a different `hours`,
+  or with any other argument away from its default (a drill-down on one IP,
+  a higher min_score), is left out so a metric means the same thing every day.
+
+generate_daily_report() writes the result into <date>_metrics.json and
+first_light.daily_metrics in ClickHouse (migration 006), one row per
+(date, domain, metric), for trend queries that neither re-read raw logs nor
+call the LLM.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+import httpx
+
+from agent.config import get_config
+from agent.llm import ToolCall
+
+logger = logging.getLogger(__name__)
+
+TABLE = "first_light.daily_metrics"
+
+# Tool → (label column, value columns) for tools that return a full breakdown
+# as rows; each row becomes "<tool>.<label>.<column>"
+ROW_METRICS = {
+    "adguard_traffic_by_type": ("traffic_type", ("total_queries", "unique_clients")),
+}
+
+# Subtrees that describe the query rather than the network
+_SKIP_KEYS = {"scrape"}
+
+# Guard against a tool that returns a large keyed map
+MAX_METRICS_PER_CALL = 200
+
+
+def _is_report_window(call: ToolCall, hours: int) -> bool:
+    defaults = {name: spec.get("default") for name, spec in call.tool.args.items()}
+    if "hours" in defaults and call.args.get("hours", defaults["hours"]) != hours:
+        return False
+    return all(name == "hours" or defaults.get(name) == value for name, value in call.args.items())
+
+
+def _flatten(data: dict, prefix: str, out: Dict[str, float]):
+    for key, value in data.items():
+        if key in _SKIP_KEYS:
+            continue
+        name = f"{prefix}.{key}"
+        if isinstance(value, bool):
+            out[name] = float(value)
+        elif isinstance(value, (int, float)):
+            out[name] = float(value)
+        elif isinstance(value, dict):
+            _flatten(value, name, out)
+
+
+def _rows(rows: list, prefix: str, out: Dict[str, float]):
+    label, columns = ROW_METRICS[prefix]
+    for row in rows:
+        if not isinstance(row, dict) or not row.get(label):
+            continue
+        for column in columns:
+            value = row.get(column)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                out[f"{prefix}.{row[label]}.{column}"] = float(value)
+
+
+def extract_metrics(calls: Iterable[ToolCall], hours: int) -> Dict[str, float]:
+    """Metric name → value from one domain agent's tool calls. Later calls win."""
+    metrics: Dict[str, float] = {}
+    for call in calls:
+        if not _is_report_window(call, hours):
+            continue
+        try:
+            data = json.loads(call.result)
+        except (TypeError, ValueError):
+            continue  # error text, "No results found", ...
+
+        prefix = call.tool.name.removeprefix("query_")
+        found: Dict[str, float] = {}
+        if isinstance(data, dict) and "error" not in data:
+            _flatten(data, prefix, found)
+        elif isinstance(data, list) and prefix in ROW_METRICS:
+            _rows(data, prefix, found)
+        if len(found) > MAX_METRICS_PER_CALL:
+            logger.warning(f"{call.tool.name}: {len(found)} numeric fields, keeping none")
+            continue
+        metrics.update(found)
+    return metrics
+
+
+def to_rows(date: str, report_id: str, generated_at: datetime,
+            metrics: Dict[str, Dict[str, float]]) -> List[dict]:
+    """daily_metrics rows for {domain: {metric: value}}."""
+    return [
+        {
+            "date": date,
+            "domain": domain,
+            "metric": metric,
+            "value": value,
+            "report_id": report_id,
+            "generated_at": generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        for domain, values in sorted(metrics.items())
+        for metric, value in sorted(values.items())
+    ]
+
+
+def store_daily_metrics(date: str, report_id: str, generated_at: datetime,
+                        metrics: Dict[str, Dict[str, float]]) -> int:
+    """Insert one report's metrics into ClickHouse; returns the row count.
+
+    Regenerating a day's report inserts again; the table is a
+    ReplacingMergeTree on (domain, metric, date), so the newest run wins.
+    """
+    rows = to_rows(date, report_id, generated_at, metrics)
+    if not rows:
+        return 0
+
+    config = get_config()
+    with httpx.Client(timeout=30.0) as client:
+        response = client.post(
+            f"http://{config.signoz_clickhouse_host}:8123",
+            params={
+                "user": config.signoz_clickhouse_user,
+                "password": config.signoz_clickhouse_password,
+                "query": f"INSERT INTO {TABLE} FORMAT JSONEachRow",
+            },
+            content="\n".join(json.dumps(r) for r in rows).encode(),
+        )
+        response.raise_for_status()
+    return len(rows)
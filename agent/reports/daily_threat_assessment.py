@@ -18,6 +18,11 @@ from typing import Dict, Any
 import os
 import logging
 
+from agent.answer_cache import bump_generation
+from agent.execution import get_executor
+from agent.reports.catalog import ReportCatalog
+from agent.reports.daily_metrics import store_daily_metrics
+
 logger = logging.getLogger(__name__)
 
 REPORTS_BASE = os.getenv("FIRST_LIGHT_REPORTS_DIR", str(Path(__file__).parent.parent.parent / "reports"))
@@ -44,17 +49,24 @@ def get_metrics_path(date: str) -> Path:
     return report_dir / f"{date}_metrics.json"
 
 
-async def generate_daily_report(hours: int = 24) -> Dict[str, Any]:
+def get_domains_path(date: str) -> Path:
+    """Get file path for the domain agents' summaries (read by the weekly/monthly rollups)."""
+    year, month, _ = date.split("-")
+    report_dir = REPORTS_DIR / year / month
+    return report_dir / f"{date}_domains.json"
+
+
+async def generate_daily_report(hours: int = 24, reuse: bool = True) -> Dict[str, Any]:
     """
     Generate the daily report using the multi-agent pipeline.
 
-    Runs in a thread executor because the domain agents and synthesis
-    agent are synchronous (LiteLLM / LangChain calls).
+    Runs on the agent execution pool (agent/execution.py) because the domain
+    agents and synthesis agent are synchronous (LiteLLM / LangChain calls).
 
     Returns:
         Dict with report_id, date, report_path, report_text
     """
-    from agent.graphs.daily_report_graph import generate_daily_report as _run_graph
+    from agent.graphs.daily_report_graph import run_daily_report as _run_graph
 
     ensure_directories()
 
@@ -63,9 +75,14 @@ async def generate_daily_report(hours: int = 24) -> Dict[str, Any]:
 
     logger.info(f"Generating daily report {report_id} for {report_date}")
 
-    # Run the synchronous multi-agent pipeline in a thread so we don't
-    # block the asyncio event loop.
-    report_body = await asyncio.get_running_loop().run_in_executor(None, _run_graph, hours)
+    # Run the synchronous multi-agent pipeline on the agent pool's report
+    # lane, ahead of any queued chat questions and never two at once.
+    # Domains whose data is unchanged since their last run are not re-analysed
+    # unless reuse=False (agent/reports/domain_cache.py)
+    result = await get_executor().run(_run_graph, hours, reuse, lane="report", key="report")
+    report_body = result.get("final_report") or ""
+    domain_results = sorted(result.get("domain_results", []), key=lambda r: r["domain"])
+    domain_metrics = {r["domain"]: r.get("metrics", {}) for r in domain_results}
 
     # Build the full report with a standard header
     report_header = (
@@ -82,11 +99,42 @@ async def generate_daily_report(hours: int = 24) -> Dict[str, Any]:
     report_path.write_text(full_report)
     logger.info(f"Report saved: {report_path}")
 
-    # Save lightweight metrics JSON (placeholder — extend as needed)
+    # Numbers the domain agents' tools returned, "<domain>.<tool>.<field>";
+    # written before cataloguing so the search index picks them up as facts
+    generated_at = datetime.now()
     metrics = {"report_id": report_id, "report_type": "daily", "date": report_date,
-                "generated_at": datetime.now().isoformat(), "report_path": str(report_path)}
+               "generated_at": generated_at.isoformat(), "report_path": str(report_path),
+               "hours": hours,
+               "metrics": {f"{domain}.{name}": value
+                           for domain, values in sorted(domain_metrics.items())
+                           for name, value in sorted(values.items())}}
     get_metrics_path(report_date).write_text(json.dumps(metrics, indent=2))
 
+    # Domain summaries, so rollups can build on them instead of re-reading logs
+    get_domains_path(report_date).write_text(json.dumps({
+        "report_id": report_id, "date": report_date, "hours": hours,
+        "domains": {r["domain"]: r["summary"] for r in domain_results},
+    }, indent=2))
+
+    # Index it for the UI; the file is what matters, so a catalog failure
+    # is only logged (the UI re-indexes the directory on startup)
+    try:
+        catalog = ReportCatalog(REPORTS_DIR)
+        catalog.record(report_path)
+        catalog.close()
+    except Exception as e:
+        logger.warning(f"Could not add report to catalog: {e}")
+
+    # Answers the bots cached before this report are now out of date
+    await asyncio.to_thread(bump_generation, f"daily report {report_date}")
+
+    # Columnar copy for trend queries; the JSON above stays the record
+    try:
+        rows = await asyncio.to_thread(store_daily_metrics, report_date, report_id, generated_at, domain_metrics)
+        logger.info(f"Stored {rows} daily metrics in ClickHouse")
+    except Exception as e:
+        logger.warning(f"Could not store daily metrics in ClickHouse: {e}")
+
     return {
         "report_id": report_id,
         "date": report_date,
@@ -111,14 +159,15 @@ async def send_report_notification(report: Dict[str, Any]):
 
 
 async def main():
-    """Entry point for manual runs."""
+    """Entry point for manual runs: python -m agent.reports.daily_threat_assessment [--fresh]"""
+    import sys
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s %(name)s %(levelname)s %(message)s",
     )
     ensure_directories()
     try:
-        report = await generate_daily_report()
+        report = await generate_daily_report(reuse="--fresh" not in sys.argv[1:])
         await send_report_notification(report)
         print(f"\n✅ Daily report complete: {report['report_path']}")
     except Exception as e:
@@ -0,0 +1,154 @@
+"""
+Domain result reuse — lets a re-run of the daily report skip the domain
+agents whose input data has not changed since the last run.
+
+After a domain agent runs, its tool calls (tool, module, args), a
+fingerprint of their results, its summary and its metrics are stored in
+
+  reports/cache/domains/<domain>.json
+
+On the next run the stored calls are replayed directly — the ClickHouse /
+API queries only, no LLM. If the replayed results have the same
+fingerprint, the stored summary and metrics are reused and only synthesis
+runs again; otherwise the agent runs as usual and the entry is replaced.
+
+Fingerprints are taken over normalized results: volatile fields (query
+timestamps, scrape metadata, uptimes, ongoing durations) are dropped and
+numbers rounded to 3 significant figures, so a counter that ticked from
+12,310 to 12,345 in the minutes since the last run does not force a new
+analysis, while a new blocked IP or a moved block rate does.
+
+An entry is also ignored when the lookback window or the domain prompt
+changed, or when it is older than MAX_AGE.
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import math
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agent.llm import ToolCall
+from agent.reports.daily_threat_assessment import REPORTS_BASE
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(REPORTS_BASE) / "cache" / "domains"
+# Beyond this a domain is always re-analysed, whatever its data looks like
+MAX_AGE = timedelta(hours=6)
+SIGNIFICANT_FIGURES = 3
+
+# Result fields that change on every call without the data changing
+VOLATILE_KEYS = {"timestamp", "queried_at", "generated_at", "time_range", "scrape", "duration_seconds"}
+VOLATILE_SUBSTRINGS = ("uptime",)
+
+
+# ── Fingerprints ───────────────────────────────────────────────────────────────
+
+def _volatile(key: str) -> bool:
+    return key in VOLATILE_KEYS or any(s in key for s in VOLATILE_SUBSTRINGS)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if not _volatile(str(k))}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    if value == 0 or not math.isfinite(value):
+        return value
+    digits = SIGNIFICANT_FIGURES - 1 - int(math.floor(math.log10(abs(value))))
+    return round(value, digits)
+
+
+def canonical(result: Any) -> str:
+    """A tool result with volatile fields dropped and numbers rounded, as a stable string."""
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return result
+    return json.dumps(_normalize(result), sort_keys=True, default=str)
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()[:16]
+
+
+def fingerprint(calls: List[ToolCall]) -> str:
+    """Order-independent hash of the calls made and their normalized results."""
+    items = sorted(
+        json.dumps([c.tool.name, c.args, canonical(c.result)], sort_keys=True, default=str)
+        for c in calls
+    )
+    return hashlib.sha256("\n".join(items).encode()).hexdigest()[:32]
+
+
+# ── Store / reuse ──────────────────────────────────────────────────────────────
+
+def _path(domain: str) -> Path:
+    return CACHE_DIR / f"{domain}.json"
+
+
+def store(domain: str, hours: int, prompt: str, calls: List[ToolCall],
+          summary: str, metrics: Dict[str, float]) -> None:
+    """Record a fresh domain result and the calls that produced it."""
+    entry = {
+        "domain": domain,
+        "hours": hours,
+        "prompt_hash": _prompt_hash(prompt),
+        "generated_at": datetime.now().isoformat(),
+        "fingerprint": fingerprint(calls),
+        "calls": [
+            {"tool": c.tool.name, "module": getattr(getattr(c.tool, "func", None), "__module__", None),
+             "args": c.args}
+            for c in calls
+        ],
+        "summary": summary,
+        "metrics": metrics,
+    }
+    path = _path(domain)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(entry, indent=2, default=str))
+    tmp.replace(path)
+
+
+def _replay(entry: dict) -> Optional[List[ToolCall]]:
+    """Run the stored tool calls again, or None if any of them cannot be run."""
+    calls = []
+    for call in entry["calls"]:
+        try:
+            tool = getattr(importlib.import_module(call["module"]), call["tool"])
+            calls.append(ToolCall(tool, call["args"], tool.invoke(call["args"])))
+        except Exception as e:
+            logger.info("%s: cannot replay %s (%s), running the agent", entry["domain"], call["tool"], e)
+            return None
+    return calls
+
+
+def reusable(domain: str, hours: int, prompt: str) -> Optional[dict]:
+    """
+    The stored {"summary", "metrics"} for `domain` if its data is unchanged
+    since it was produced, else None (the agent has to run).
+    """
+    try:
+        entry = json.loads(_path(domain).read_text())
+        age = datetime.now() - datetime.fromisoformat(entry["generated_at"])
+    except (OSError, ValueError, KeyError):
+        return None
+    if entry.get("hours") != hours or entry.get("prompt_hash") != _prompt_hash(prompt):
+        return None
+    if age > MAX_AGE or not entry.get("calls"):
+        return None
+
+    calls = _replay(entry)
+    if calls is None or fingerprint(calls) != entry["fingerprint"]:
+        logger.info("%s: data changed since %s, running the agent", domain, entry["generated_at"])
+        return None
+    logger.info("%s: data unchanged since %s, reusing its result", domain, entry["generated_at"])
+    return {"summary": entry["summary"], "metrics": entry.get("metrics") or {}}
@@ -0,0 +1,305 @@
+"""
+Weekly and Monthly Rollup Reports
+
+Builds a week's or a month's report from what the daily runs stored, never
+from raw logs: each day's domain summaries (<date>_domains.json) and metrics
+(<date>_metrics.json) under reports/daily/. The LLM side is
+agent/graphs/rollup_report_graph.py.
+
+Synthesis is map-reduce over week-sized chunks: each domain's summaries for
+a chunk are condensed once (map) and cached under reports/rollups/chunks/,
+keyed by a fingerprint of their inputs; a monthly rollup then only reduces
+the weekly chunks the Sunday runs already produced, plus the partial weeks
+at either end of the month. Metric trends (min / mean / max / change vs the
+previous period) are computed here, not by the model.
+
+Days generated before domain summaries were stored contribute their whole
+daily report under the "daily_report" pseudo-domain.
+
+Output:
+  reports/weekly/YYYY/WNN_<start>_to_<end>_weekly_rollup.md  (+ _metrics.json)
+  reports/monthly/YYYY/YYYY-MM_monthly_rollup.md             (+ _metrics.json)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import statistics
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agent.execution import get_executor
+from agent.reports.daily_threat_assessment import REPORTS_BASE, REPORTS_DIR
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("weekly", "monthly")
+LEGACY_DOMAIN = "daily_report"
+CHUNK_CACHE_DIR = Path(REPORTS_BASE) / "rollups" / "chunks"
+
+# Per-day cap on what one domain contributes to a map prompt
+MAX_SUMMARY_CHARS = 4000
+# Metric rows shown to the model per domain (largest changes first)
+MAX_TABLE_ROWS = 30
+
+
+# ── Periods ────────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Period:
+    kind: str           # "weekly", "monthly", or "chunk"
+    start: date
+    end: date           # inclusive
+
+    @property
+    def days(self) -> List[date]:
+        return [self.start + timedelta(days=i) for i in range((self.end - self.start).days + 1)]
+
+    @property
+    def stem(self) -> str:
+        if self.kind == "monthly":
+            return self.start.strftime("%Y-%m")
+        if self.kind == "weekly":
+            return f"W{self.start.isocalendar()[1]:02d}_{self.start}_to_{self.end}"
+        return f"{self.start}_to_{self.end}"
+
+    @property
+    def label(self) -> str:
+        if self.kind == "monthly":
+            return self.start.strftime("%B %Y")
+        return f"{self.start} to {self.end}"
+
+    def previous(self) -> "Period":
+        if self.kind == "monthly":
+            return period_for("monthly", self.start - timedelta(days=1))
+        return Period(self.kind, self.start - timedelta(days=7), self.end - timedelta(days=7))
+
+    def chunks(self) -> List["Period"]:
+        """ISO weeks (Mon–Sun) covering the period, clipped to it."""
+        chunks, start = [], self.start
+        while start <= self.end:
+            end = min(start + timedelta(days=6 - start.weekday()), self.end)
+            chunks.append(Period("chunk", start, end))
+            start = end + timedelta(days=1)
+        return chunks
+
+
+def period_for(kind: str, day: date) -> Period:
+    """The ISO week (weekly) or calendar month (monthly) containing `day`."""
+    if kind == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return Period(kind, start, start + timedelta(days=6))
+    if kind == "monthly":
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return Period(kind, start, next_month - timedelta(days=1))
+    raise ValueError(f"Unknown rollup kind: {kind} (expected one of {KINDS})")
+
+
+# ── Daily inputs ───────────────────────────────────────────────────────────────
+
+@dataclass
+class Day:
+    date: date
+    summaries: Dict[str, str] = field(default_factory=dict)    # domain → summary
+    metrics: Dict[str, float] = field(default_factory=dict)    # "<domain>.<metric>" → value
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def load_day(day: date, reports_dir: Path = REPORTS_DIR) -> Optional[Day]:
+    """What the daily run stored for `day`, or None if there was no run."""
+    folder = reports_dir / f"{day:%Y}" / f"{day:%m}"
+    domains = _read_json(folder / f"{day}_domains.json")
+    metrics = _read_json(folder / f"{day}_metrics.json")
+    report = folder / f"{day}_daily_report.md"
+
+    summaries = dict((domains or {}).get("domains") or {})
+    if not summaries and report.exists():
+        summaries = {LEGACY_DOMAIN: report.read_text()}
+    values = {k: float(v) for k, v in ((metrics or {}).get("metrics") or {}).items()
+              if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    if not summaries and not values:
+        return None
+    return Day(day, summaries, values)
+
+
+def load_days(period: Period, reports_dir: Path = REPORTS_DIR) -> List[Day]:
+    return [d for d in (load_day(day, reports_dir) for day in period.days) if d is not None]
+
+
+# ── Metric trends ──────────────────────────────────────────────────────────────
+
+def metric_stats(days: List[Day], previous: List[Day]) -> Dict[str, Dict[str, Any]]:
+    """Per metric: days reported, min / mean / max / last, and change vs the previous period's mean."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    names = sorted({m for d in days for m in d.metrics})
+    for name in names:
+        values = [d.metrics[name] for d in days if name in d.metrics]
+        before = [d.metrics[name] for d in previous if name in d.metrics]
+        mean = statistics.fmean(values)
+        previous_mean = statistics.fmean(before) if before else None
+        change = (
+            round((mean - previous_mean) / abs(previous_mean) * 100, 1)
+            if previous_mean not in (None, 0) else None
+        )
+        stats[name] = {
+            "days": len(values),
+            "min": min(values),
+            "mean": round(mean, 3),
+            "max": max(values),
+            "last": values[-1],
+            "previous_mean": round(previous_mean, 3) if previous_mean is not None else None,
+            "change_pct": change,
+        }
+    return stats
+
+
+def _fmt(value: Optional[float]) -> str:
+    if value is None:
+        return "—"
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def stats_table(stats: Dict[str, Dict[str, Any]], domain: Optional[str] = None) -> str:
+    """Markdown table of one domain's metrics (all domains if None), biggest changes first."""
+    prefix = f"{domain}." if domain else ""
+    rows = [(name[len(prefix):], s) for name, s in stats.items() if name.startswith(prefix)]
+    if not rows:
+        return "No metrics recorded."
+    rows.sort(key=lambda r: (r[1]["change_pct"] is None, -abs(r[1]["change_pct"] or 0), r[0]))
+    lines = ["| Metric | Days | Min | Mean | Max | Last | Prev. mean | Change |",
+             "|---|---|---|---|---|---|---|---|"]
+    for name, s in rows[:MAX_TABLE_ROWS]:
+        change = f"{s['change_pct']:+.1f}%" if s["change_pct"] is not None else "—"
+        lines.append(f"| {name} | {s['days']} | {_fmt(s['min'])} | {_fmt(s['mean'])} | {_fmt(s['max'])} "
+                     f"| {_fmt(s['last'])} | {_fmt(s['previous_mean'])} | {change} |")
+    if len(rows) > MAX_TABLE_ROWS:
+        lines.append(f"\n_{len(rows) - MAX_TABLE_ROWS} steadier metrics omitted._")
+    return "\n".join(lines)
+
+
+# ── Chunk cache ────────────────────────────────────────────────────────────────
+
+def chunk_inputs(domain: str, chunk: Period, days: List[Day]) -> List[Dict[str, str]]:
+    """One domain's daily summaries within `chunk`, oldest first."""
+    return [
+        {"date": str(d.date), "summary": d.summaries[domain][:MAX_SUMMARY_CHARS]}
+        for d in days
+        if chunk.start <= d.date <= chunk.end and d.summaries.get(domain)
+    ]
+
+
+def fingerprint(inputs: List[Dict[str, str]], prompt: str) -> str:
+    payload = json.dumps({"inputs": inputs, "prompt": prompt}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _chunk_path(domain: str, chunk: Period) -> Path:
+    return CHUNK_CACHE_DIR / f"{chunk.start:%Y}" / f"{chunk.stem}_{domain}.json"
+
+
+def cached_chunk(domain: str, chunk: Period, fp: str) -> Optional[str]:
+    """The stored map summary for this domain and chunk, if its inputs are unchanged."""
+    cached = _read_json(_chunk_path(domain, chunk))
+    if cached and cached.get("fingerprint") == fp:
+        return cached.get("summary")
+    return None
+
+
+def store_chunk(domain: str, chunk: Period, fp: str, summary: str):
+    path = _chunk_path(domain, chunk)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"fingerprint": fp, "summary": summary,
+                               "generated_at": datetime.now().isoformat()}, indent=2))
+    tmp.replace(path)
+
+
+# ── Entry point ────────────────────────────────────────────────────────────────
+
+def get_rollup_paths(period: Period) -> tuple[Path, Path]:
+    """(report, metrics JSON) paths for a weekly or monthly rollup."""
+    folder = Path(REPORTS_BASE) / period.kind / f"{period.start:%Y}"
+    return folder / f"{period.stem}_{period.kind}_rollup.md", folder / f"{period.stem}_metrics.json"
+
+
+async def generate_rollup_report(kind: str, day: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Generate the weekly or monthly rollup for the period containing `day`
+    (default: today).
+
+    Returns:
+        Dict with report_id, kind, period, report_path, report_text — the same
+        shape as a daily report, so it can go through broadcast_report().
+    """
+    from agent.graphs.rollup_report_graph import run_rollup_report
+
+    period = period_for(kind, day or date.today())
+    days = await asyncio.to_thread(load_days, period)
+    if not days:
+        raise RuntimeError(f"No daily reports stored for {period.label}")
+    previous = await asyncio.to_thread(load_days, period.previous())
+    stats = metric_stats(days, previous)
+
+    report_id = str(uuid.uuid4())
+    logger.info(f"Generating {kind} rollup {report_id} for {period.label} from {len(days)} daily reports")
+
+    body = await get_executor().run(run_rollup_report, period, days, stats, lane="report", key="report")
+
+    header = (
+        f"# First Light — {kind.capitalize()} Rollup\n"
+        f"**Period:** {period.label}  \n"
+        f"**Daily reports:** {len(days)} of {len(period.days)}  \n"
+        f"**Report ID:** {report_id}  \n"
+        f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  \n"
+        f"\n---\n\n"
+    )
+    report_text = header + body
+
+    report_path, metrics_path = get_rollup_paths(period)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(report_text)
+    metrics_path.write_text(json.dumps({
+        "report_id": report_id, "report_type": kind, "period_start": str(period.start),
+        "period_end": str(period.end), "generated_at": datetime.now().isoformat(),
+        "days": [str(d.date) for d in days], "metrics": stats,
+    }, indent=2))
+    logger.info(f"Rollup saved: {report_path}")
+
+    return {
+        "report_id": report_id,
+        "kind": kind,
+        "period": period.label,
+        "date": str(period.end),
+        "report_path": str(report_path),
+        "report_text": report_text,
+    }
+
+
+async def main():
+    """Manual runs: python -m agent.reports.rollup weekly|monthly [YYYY-MM-DD]"""
+    import sys
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+    )
+    if len(sys.argv) < 2 or sys.argv[1] not in KINDS:
+        sys.exit(f"usage: python -m agent.reports.rollup {{{'|'.join(KINDS)}}} [YYYY-MM-DD]")
+    day = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    report = await generate_rollup_report(sys.argv[1], day)
+    print(f"\n✅ {report['kind'].capitalize()} rollup complete: {report['report_path']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
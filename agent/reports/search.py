@@ -0,0 +1,277 @@
+"""
+Report search index — full text, entities and numeric facts.
+
+Lives in the report catalog database (agent/reports/catalog.py), which keeps
+it in step with the report files: each report is (re)indexed when it is
+recorded or its file / metrics JSON changes, and dropped with its catalog
+entry.
+
+- report_fts: FTS5 over the report markdown, rowid = YYYYMMDD, ranked bm25
+- report_entities: IPs, MACs, domains and severity words per report, for
+  exact "every report mentioning X" lookups
+- report_facts: numbers per report — the metrics JSON ("metrics" object) and
+  "**Label:** 94.2%"-style lines in the markdown, named by slug and section
+  — for "every day X was below N" queries
+"""
+
+import ipaddress
+import json
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS report_fts USING fts5(body, tokenize = 'unicode61');
+
+CREATE TABLE IF NOT EXISTS report_entities (
+    kind TEXT NOT NULL,         -- 'ip', 'mac', 'domain', 'severity'
+    value TEXT NOT NULL,
+    date TEXT NOT NULL,
+    mentions INTEGER NOT NULL,
+    PRIMARY KEY (kind, value, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_report_entities_date ON report_entities(date);
+
+CREATE TABLE IF NOT EXISTS report_facts (
+    name TEXT NOT NULL,         -- slug, e.g. 'attestation_effectiveness'
+    section TEXT NOT NULL,      -- slug of the enclosing heading, 'metrics' for the JSON
+    date TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, section, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_report_facts_date ON report_facts(date);
+
+-- Which file versions are indexed; a report is re-indexed when either changes
+CREATE TABLE IF NOT EXISTS report_index_state (
+    date TEXT PRIMARY KEY,
+    report_mtime REAL NOT NULL,
+    metrics_mtime REAL            -- NULL when there is no metrics JSON
+) WITHOUT ROWID;
+"""
+
+SEVERITIES = ("critical", "high", "medium", "low", "warning", "error")
+
+_IPV4 = re.compile(r"(?<![\d.])(\d{1,3}(?:\.\d{1,3}){3})(?![\d.])")
+_MAC = re.compile(r"\b([0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5})\b")
+_DOMAIN = re.compile(r"\b((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24})\b", re.IGNORECASE)
+_SEVERITY = re.compile(r"\b(" + "|".join(SEVERITIES) + r")\b", re.IGNORECASE)
+_HEADING = re.compile(r"^#{2,4}\s+(.*)$")
+# "- **Total Blocks:** 16,921 connection attempts", "**Effectiveness:** 94.2%", "**Queries:** 10.8M+"
+_FACT = re.compile(
+    r"\*\*(?P<label>[^*:\n]{2,60}):\*\*\s*(?P<num>-?\d[\d,]*(?:\.\d+)?)\s*(?P<unit>%|[KMB](?![a-zA-Z]))?"
+)
+_UNIT_SCALE = {"K": 1e3, "M": 1e6, "B": 1e9}
+# Filenames and the like that the domain pattern would otherwise pick up
+_NOT_TLDS = {"md", "json", "py", "sh", "yaml", "yml", "log", "txt", "db"}
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def extract_entities(text: str) -> Counter:
+    """(kind, value) → mentions."""
+    found: Counter = Counter()
+    for ip in _IPV4.findall(text):
+        try:
+            found[("ip", str(ipaddress.IPv4Address(ip)))] += 1
+        except ValueError:
+            pass
+    for mac in _MAC.findall(text):
+        found[("mac", mac.lower())] += 1
+    for domain in _DOMAIN.findall(text):
+        domain = domain.lower()
+        if domain.rsplit(".", 1)[-1] not in _NOT_TLDS and not _IPV4.fullmatch(domain):
+            found[("domain", domain)] += 1
+    for severity in _SEVERITY.findall(text):
+        found[("severity", severity.lower())] += 1
+    return found
+
+
+def extract_facts(text: str, metrics: Optional[Dict] = None) -> Dict[Tuple[str, str], float]:
+    """(name, section) → value. The first occurrence of a label in a section wins."""
+    facts: Dict[Tuple[str, str], float] = {}
+    for key, value in (metrics or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            facts[(slug(key), "metrics")] = float(value)
+
+    section = ""
+    for line in text.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            section = slug(re.sub(r"^[\W\d_]+", "", heading.group(1)))
+            continue
+        for m in _FACT.finditer(line):
+            value = float(m.group("num").replace(",", "")) * _UNIT_SCALE.get(m.group("unit") or "", 1)
+            facts.setdefault((slug(m.group("label")), section), value)
+    return facts
+
+
+def _rowid(date: str) -> int:
+    return int(date.replace("-", ""))
+
+
+def remove(conn: sqlite3.Connection, date: str):
+    conn.execute("DELETE FROM report_fts WHERE rowid = ?", (_rowid(date),))
+    conn.execute("DELETE FROM report_entities WHERE date = ?", (date,))
+    conn.execute("DELETE FROM report_facts WHERE date = ?", (date,))
+    conn.execute("DELETE FROM report_index_state WHERE date = ?", (date,))
+
+
+def is_current(conn: sqlite3.Connection, date: str, report_mtime: float, metrics_mtime: Optional[float]) -> bool:
+    row = conn.execute(
+        "SELECT report_mtime, metrics_mtime FROM report_index_state WHERE date = ?", (date,)
+    ).fetchone()
+    return row is not None and row[0] == report_mtime and row[1] == metrics_mtime
+
+
+def index(conn: sqlite3.Connection, date: str, text: str, report_mtime: float,
+          metrics: Optional[Dict] = None, metrics_mtime: Optional[float] = None):
+    """Replace everything indexed for `date`. Runs inside the caller's transaction."""
+    remove(conn, date)
+    conn.execute("INSERT INTO report_fts (rowid, body) VALUES (?, ?)", (_rowid(date), text))
+    conn.executemany(
+        "INSERT INTO report_entities (kind, value, date, mentions) VALUES (?, ?, ?, ?)",
+        [(kind, value, date, n) for (kind, value), n in extract_entities(text).items()],
+    )
+    conn.executemany(
+        "INSERT INTO report_facts (name, section, date, value) VALUES (?, ?, ?, ?)",
+        [(name, section, date, value) for (name, section), value in extract_facts(text, metrics).items()],
+    )
+    conn.execute(
+        "INSERT INTO report_index_state (date, report_mtime, metrics_mtime) VALUES (?, ?, ?)",
+        (date, report_mtime, metrics_mtime),
+    )
+
+
+def load_metrics(raw: str) -> Optional[Dict]:
+    """The numeric "metrics" object of a <date>_metrics.json, if any."""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    metrics = data.get("metrics") if isinstance(data, dict) else None
+    return metrics if isinstance(metrics, dict) else None
+
+
+def fts_query(text: str) -> str:
+    """Free text → FTS5 query: each term a quoted phrase, all required.
+
+    Quoting keeps IPs, hostnames and punctuation from being parsed as FTS
+    syntax ("185.220.101.45" becomes the phrase 185 220 101 45). A trailing
+    '*' on a term is kept as a prefix match. Terms with no letters or digits
+    would match nothing and are dropped, so input that is all punctuation
+    gives "" (no text criterion).
+    """
+    terms = []
+    for term in text.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if any(c.isalnum() for c in term):
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " AND ".join(terms)
+
+
+def entity_kind(value: str) -> str:
+    """Which report_entities kind a search value belongs to."""
+    try:
+        ipaddress.IPv4Address(value)
+        return "ip"
+    except ValueError:
+        pass
+    if _MAC.fullmatch(value):
+        return "mac"
+    if value in SEVERITIES:
+        return "severity"
+    return "domain"
+
+
+def search(conn: sqlite3.Connection, text: str = "", entity: str = "", fact: str = "",
+           below: Optional[float] = None, above: Optional[float] = None,
+           since: str = "", until: str = "", limit: int = 20) -> List[Dict]:
+    """Reports matching every given criterion, best first (newest first without text).
+
+    Each hit has the date, a bm25 score and highlighted snippet (text search
+    only) and, with `fact`, the matching facts and their values. `limit`
+    counts reports, however many facts each one matches. Raises ValueError
+    for a text query FTS5 cannot parse.
+    """
+    query = fts_query(text)
+    if query:
+        # Date from the YYYYMMDD rowid; bm25() is lower-is-better
+        source = """(
+            SELECT printf('%04d-%02d-%02d', rowid / 10000, rowid / 100 % 100, rowid % 100) AS date,
+                   bm25(report_fts) AS score,
+                   snippet(report_fts, 0, '[', ']', ' … ', 16) AS snippet
+            FROM report_fts
+            WHERE report_fts MATCH ?
+        ) r"""
+        source_params = [query]
+        order = "r.score"
+    else:
+        source = "(SELECT date, NULL AS score, NULL AS snippet FROM reports) r"
+        source_params = []
+        order = "r.date DESC"
+
+    fact_where, fact_params = [], []
+    if fact:
+        pattern = f"%{slug(fact)}%"
+        fact_where.append("(f.name LIKE ? OR f.section || '.' || f.name LIKE ?)")
+        fact_params += [pattern, pattern]
+        if below is not None:
+            fact_where.append("f.value < ?")
+            fact_params.append(below)
+        if above is not None:
+            fact_where.append("f.value > ?")
+            fact_params.append(above)
+
+    where, where_params = [], []
+    if fact_where:
+        where.append(f"EXISTS (SELECT 1 FROM report_facts f WHERE f.date = r.date AND {' AND '.join(fact_where)})")
+        where_params += fact_params
+    if entity:
+        value = entity.strip().lower()
+        where.append("EXISTS (SELECT 1 FROM report_entities e WHERE e.kind = ? AND e.value = ? AND e.date = r.date)")
+        where_params += [entity_kind(value), value]
+    if since:
+        where.append("r.date >= ?")
+        where_params.append(since)
+    if until:
+        where.append("r.date <= ?")
+        where_params.append(until)
+
+    sql = f"""
+        SELECT r.date, r.score, r.snippet
+        FROM {source}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order}
+        LIMIT ?
+    """
+    try:
+        rows = conn.execute(sql, source_params + where_params + [limit]).fetchall()
+    except sqlite3.OperationalError as e:
+        if not query:
+            raise
+        raise ValueError(f"Invalid search query {text!r}: {e}") from e
+
+    hits = {
+        date: {
+            "date": date,
+            "score": round(-score, 3) if score is not None else None,
+            "snippet": snippet,
+            "facts": [],
+        }
+        for date, score, snippet in rows
+    }
+    if fact_where and hits:
+        placeholders = ",".join("?" * len(hits))
+        facts = conn.execute(
+            f"""SELECT f.date, f.name, f.section, f.value FROM report_facts f
+                WHERE f.date IN ({placeholders}) AND {' AND '.join(fact_where)}
+                ORDER BY f.section, f.name""",
+            list(hits) + fact_params,
+        )
+        for date, name, section, value in facts:
+            hits[date]["facts"].append({"name": name, "section": section, "value": value})
+    return list(hits.values())
@@ -6,14 +6,15 @@ agent service alive for on-demand queries via the MCP server.
 
 Schedule:
   - Daily report: 08:00 local time
-  - (future) Weekly rollup: Sunday 20:00
+  - Weekly rollup: Sunday 20:00 (Mon–Sun week, from the stored daily results)
+  - Monthly rollup: 1st of the month 09:00 (previous calendar month)
 """
 
 import asyncio
 import logging
 import os
 import signal
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -28,6 +29,9 @@ logger = logging.getLogger("scheduler")
 REPORT_LOCK_KEY = "report:lock:daily"
 REPORT_LOCK_TTL = 600  # 10 minutes
 
+ROLLUP_LOCK_KEY = "report:lock:{kind}"
+ROLLUP_LOCK_TTL = 1800  # monthly rollups make a few dozen LLM calls
+
 # Keep private aliases for backward compatibility within this module
 _REPORT_LOCK_KEY = REPORT_LOCK_KEY
 _REPORT_LOCK_TTL = REPORT_LOCK_TTL
@@ -78,6 +82,42 @@ async def run_daily_report():
                 pass
 
 
+async def run_rollup_report(kind: str, day: Optional[date] = None):
+    """Run the weekly or monthly rollup for the period containing `day`, Redis-locked like the daily report."""
+    lock_key = ROLLUP_LOCK_KEY.format(kind=kind)
+    r = await asyncio.get_event_loop().run_in_executor(None, _get_redis_client)
+    if r is not None and not r.set(lock_key, "1", nx=True, ex=ROLLUP_LOCK_TTL):
+        logger.warning("%s rollup already running (Redis lock held) — skipping this run", kind.capitalize())
+        return
+
+    logger.info("Starting %s rollup...", kind)
+    try:
+        from agent.reports.rollup import generate_rollup_report
+        from agent.notifications import broadcast_report
+        report = await generate_rollup_report(kind, day)
+        await broadcast_report(report)
+        logger.info(f"{kind.capitalize()} rollup complete: {report['report_path']}")
+    except Exception as e:
+        logger.error(f"{kind.capitalize()} rollup failed: {e}", exc_info=True)
+        await _notify_failure(f"{kind.capitalize()} rollup", str(e))
+    finally:
+        if r is not None:
+            try:
+                r.delete(lock_key)
+            except Exception:
+                pass
+
+
+async def run_weekly_rollup():
+    """Sunday evening: the Mon–Sun week ending today."""
+    await run_rollup_report("weekly")
+
+
+async def run_monthly_rollup():
+    """1st of the month: the month that just ended."""
+    await run_rollup_report("monthly", date.today() - timedelta(days=1))
+
+
 async def _notify_failure(job_name: str, error: str):
     """Send a failure alert to all registered notification channels."""
     try:
@@ -98,6 +138,13 @@ async def _run():
     from agent.notifications import register_defaults
     await register_defaults()
 
+    # Start exporter pollers so the health tools have an hour of history
+    # (rate-of-change fields) by the time the daily report runs
+    from agent.tools import get_all_tools  # noqa: F401 — registers scrape targets
+    import agent.tools.validator  # noqa: F401
+    from agent.utils import scrape_cache
+    scrape_cache.start_all()
+
     logger.info(f"First Light scheduler starting (tz={tz})")
     logger.info(f"Daily report scheduled at {report_hour:02d}:{report_minute:02d} {tz}")
 
@@ -110,8 +157,24 @@ async def _run():
         max_instances=1,
         misfire_grace_time=3600,
     )
+    scheduler.add_job(
+        run_weekly_rollup,
+        trigger=CronTrigger(day_of_week="sun", hour=20, minute=0, timezone=tz),
+        id="weekly_rollup",
+        name="Weekly Rollup",
+        max_instances=1,
+        misfire_grace_time=3600,
+    )
+    scheduler.add_job(
+        run_monthly_rollup,
+        trigger=CronTrigger(day=1, hour=9, minute=0, timezone=tz),
+        id="monthly_rollup",
+        name="Monthly Rollup",
+        max_instances=1,
+        misfire_grace_time=3600,
+    )
     scheduler.start()
-    logger.info("Scheduler running.")
+    logger.info("Scheduler running (weekly rollup Sun 20:00, monthly rollup 1st 09:00).")
 
     # Run immediately on startup if requested
     if os.getenv("RUN_ON_STARTUP", "false").lower() == "true":
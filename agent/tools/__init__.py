@@ -20,16 +20,20 @@ from agent.tools.metrics import (
     query_adguard_high_risk_clients,
     query_adguard_blocked_domains,
     query_adguard_traffic_by_type,
+    query_adguard_dns_queries,
 )
 
 from agent.tools.threat_intel_tools import (
     query_threat_intel_summary,
     lookup_ip_threat_intel,
     query_threat_intel_coverage,
+    query_blocked_ips_by_geo,
 )
 
 from agent.tools.qnap_tools import query_qnap_health, query_qnap_directory_sizes
 from agent.tools.proxmox_tools import query_proxmox_health
+from agent.tools.devices import lookup_device_by_ip
+from agent.tools.reports import search_reports
 
 
 def get_all_tools() -> List[BaseTool]:
@@ -40,18 +44,23 @@ def get_all_tools() -> List[BaseTool]:
         query_wireless_health,
         query_infrastructure_events,
         search_logs_by_ip,
+        lookup_device_by_ip,
         # Metrics query tools
         query_adguard_top_clients,
         query_adguard_block_rates,
         query_adguard_high_risk_clients,
         query_adguard_blocked_domains,
         query_adguard_traffic_by_type,
+        query_adguard_dns_queries,
         # Threat intelligence
         query_threat_intel_summary,
         lookup_ip_threat_intel,
         query_threat_intel_coverage,
+        query_blocked_ips_by_geo,
         # Hardware health
         query_qnap_health,
         query_qnap_directory_sizes,
         query_proxmox_health,
+        # Report history
+        search_reports,
     ]
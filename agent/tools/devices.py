@@ -0,0 +1,67 @@
+"""
+Device inventory tools — who held an IP address, and when.
+
+Reads the device-inventory lease history through agent/utils/resolve.py
+(mounted at /data/device-inventory/device_inventory.db, opened read-only).
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from langchain_core.tools import tool
+
+from agent.utils.resolve import lease_at, leases_between
+
+
+def _iso(ts: Optional[int]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _lease_json(lease: dict) -> dict:
+    return {
+        "hostname": lease["hostname"],
+        "mac": lease["mac"],
+        "vlan": lease["vlan"],
+        "held_from": _iso(lease["valid_from"]),
+        "held_until": _iso(lease["valid_to"]),
+    }
+
+
+@tool
+def lookup_device_by_ip(ip_address: str, at: Optional[str] = None, history_days: int = 7) -> str:
+    """Find which device (MAC/hostname) held an IP address at a given time.
+
+    Use this when attributing past log lines or alerts to a device: DHCP may
+    have handed the IP to a different device since.
+
+    Args:
+        ip_address: Internal IP address, e.g. "192.168.2.60".
+        at: ISO-8601 time to resolve, e.g. "2026-03-14T03:00:00-05:00"
+            (default: now). Times without an offset are treated as UTC.
+        history_days: Also list every holder of the IP over this many days
+            before `at` (default 7, max 90).
+
+    Returns:
+        JSON with the holder at that time (or null) and the lease history.
+    """
+    try:
+        when = datetime.fromisoformat(at) if at else datetime.now(timezone.utc)
+    except ValueError:
+        return json.dumps({"error": f"Invalid timestamp: {at} (use ISO-8601)"})
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+
+    history_days = max(1, min(history_days, 90))
+    holder = lease_at(ip_address, when)
+    history = leases_between(ip_address, when - timedelta(days=history_days), when)
+
+    return json.dumps({
+        "ip_address": ip_address,
+        "at": when.isoformat(),
+        "holder": _lease_json(holder) if holder else None,
+        "history": [_lease_json(lease) for lease in history],
+        "note": None if history else "No lease history for this IP (not a DHCP client, or inventory not mounted)",
+    }, indent=2)
@@ -0,0 +1,173 @@
+"""
+Offline GeoIP / ASN lookups — zero-network first tier for IP enrichment.
+
+Country and ASN come from local MaxMind-format (.mmdb) databases such as
+GeoLite2-Country / GeoLite2-ASN (or the DB-IP Lite equivalents, which use
+the same record layout). Databases are opened memory-mapped, so lookups never
+touch the network and every process on the host shares one copy of the data
+in the page cache.
+
+lookup_many() is the batch entry point: it de-duplicates the input, walks the
+IPs in address order (adjacent IPs share tree nodes, so mmap pages stay hot)
+and returns a dict keyed by IP. 100k IPs resolve in a few hundred ms with the
+maxminddb C extension.
+
+Databases are re-checked at most every RECHECK_SECONDS: when geoipupdate
+writes a new file (or writes the first one) the reader is reopened and the
+lookup cache is cleared, so neither a missing nor an outdated database sticks
+for the life of the process.
+
+This module has no agent/ imports on purpose — the threat-intel enricher
+container loads it directly from /app/agent/tools (see enricher.py).
+
+Environment:
+  GEOIP_COUNTRY_DB — path to the country database (default /data/geoip/GeoLite2-Country.mmdb)
+  GEOIP_ASN_DB     — path to the ASN database     (default /data/geoip/GeoLite2-ASN.mmdb)
+"""
+
+import ipaddress
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Iterable
+
+try:
+    import maxminddb
+except ImportError:  # optional — lookups degrade to "no data"
+    maxminddb = None
+
+logger = logging.getLogger(__name__)
+
+COUNTRY_DB = os.getenv("GEOIP_COUNTRY_DB", "/data/geoip/GeoLite2-Country.mmdb")
+ASN_DB = os.getenv("GEOIP_ASN_DB", "/data/geoip/GeoLite2-ASN.mmdb")
+
+
+@dataclass(frozen=True)
+class GeoInfo:
+    """Offline geo/ASN annotation for one IP. Empty strings / 0 mean unknown."""
+    country_code: str = ""
+    country_name: str = ""
+    asn: int = 0
+    as_org: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_EMPTY = GeoInfo()
+
+# ── Reader management ─────────────────────────────────────────────────────────
+# Readers are opened lazily and reused. Every RECHECK_SECONDS the file's mtime
+# is compared with the one the reader was opened from; a new, replaced or
+# removed file reopens the reader and clears the lookup cache. A missing
+# database or missing maxminddb package is logged once and then treated as
+# "no data" until the file changes.
+
+RECHECK_SECONDS = 60
+
+# path → (reader or None, mtime it was opened from or None, monotonic time of last check)
+_readers: dict[str, tuple] = {}
+_readers_lock = threading.Lock()
+
+
+def _load(path: str):
+    if maxminddb is None:
+        logger.warning("maxminddb not installed — offline GeoIP tier disabled")
+        return None
+    if not os.path.exists(path):
+        logger.warning("GeoIP database not found at %s — offline GeoIP tier disabled", path)
+        return None
+    try:
+        mode = getattr(maxminddb, "MODE_MMAP_EXT", maxminddb.MODE_MMAP)
+        try:
+            reader = maxminddb.open_database(path, mode)
+        except ValueError:
+            # C extension unavailable — pure-python mmap reader
+            reader = maxminddb.open_database(path, maxminddb.MODE_MMAP)
+        logger.info("GeoIP database opened: %s", path)
+        return reader
+    except Exception as e:
+        logger.warning("Failed to open GeoIP database %s: %s", path, e)
+        return None
+
+
+def _open_reader(path: str):
+    now = time.monotonic()
+    with _readers_lock:
+        cached = _readers.get(path)
+        if cached is not None and now - cached[2] < RECHECK_SECONDS:
+            return cached[0]
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        if cached is not None and cached[1] == mtime:
+            _readers[path] = (cached[0], mtime, now)
+            return cached[0]
+        # First use, or the file appeared, was replaced or went away. The old
+        # reader is not closed: lookups in flight may still hold it, and it
+        # unmaps once they drop it.
+        reader = _load(path)
+        _readers[path] = (reader, mtime, now)
+        _lookup.cache_clear()
+        return reader
+
+
+def is_available() -> bool:
+    """True if at least one GeoIP database could be opened."""
+    return _open_reader(COUNTRY_DB) is not None or _open_reader(ASN_DB) is not None
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────────
+
+def _sort_key(ip: str) -> tuple:
+    try:
+        addr = ipaddress.ip_address(ip)
+        return (addr.version, int(addr))
+    except ValueError:
+        return (9, 0)
+
+
+def lookup(ip: str) -> GeoInfo:
+    """Return offline country/ASN data for a single IP (empty GeoInfo if unknown)."""
+    country_reader = _open_reader(COUNTRY_DB)
+    asn_reader = _open_reader(ASN_DB)
+    return _lookup(ip, country_reader, asn_reader)
+
+
+# Keyed on the readers too, so an entry can never outlive the database it came from
+@lru_cache(maxsize=65536)
+def _lookup(ip: str, country_reader, asn_reader) -> GeoInfo:
+    if country_reader is None and asn_reader is None:
+        return _EMPTY
+
+    country_code = country_name = as_org = ""
+    asn = 0
+    try:
+        if country_reader is not None:
+            rec = country_reader.get(ip) or {}
+            country = rec.get("country") or rec.get("registered_country") or {}
+            country_code = country.get("iso_code", "") or ""
+            country_name = (country.get("names") or {}).get("en", "") or ""
+        if asn_reader is not None:
+            rec = asn_reader.get(ip) or {}
+            asn = int(rec.get("autonomous_system_number") or 0)
+            as_org = rec.get("autonomous_system_organization", "") or ""
+    except ValueError:
+        # Not a valid IP address
+        return _EMPTY
+
+    if not (country_code or asn):
+        return _EMPTY
+    return GeoInfo(country_code=country_code, country_name=country_name, asn=asn, as_org=as_org)
+
+
+def lookup_many(ips: Iterable[str]) -> dict[str, GeoInfo]:
+    """Batch lookup. Returns {ip: GeoInfo} for every distinct, non-empty input IP."""
+    unique = {ip for ip in ips if ip}
+    if not unique or not is_available():
+        return {ip: _EMPTY for ip in unique}
+    return {ip: lookup(ip) for ip in sorted(unique, key=_sort_key)}
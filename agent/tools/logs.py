@@ -13,6 +13,7 @@ from datetime import datetime, timezone
 from langchain_core.tools import tool
 
 from agent.config import get_config
+from agent.utils.resolve import leases_between
 
 
 @tool
@@ -300,6 +301,26 @@ def search_logs_by_ip(
         result = _execute_clickhouse_query(query, {"ip": ip_address})
         mentions = [json.loads(line) for line in result.split('\n') if line]
 
+        # Which device(s) held this IP while these logs were written — DHCP may
+        # have reassigned it since, so the current holder isn't necessarily right
+        device_history = []
+        if mentions:
+            window_start = min(int(m['first_seen']) for m in mentions) // 1_000_000_000
+            window_end = max(int(m['last_seen']) for m in mentions) // 1_000_000_000
+            device_history = [
+                {
+                    "hostname": lease["hostname"],
+                    "mac": lease["mac"],
+                    "vlan": lease["vlan"],
+                    "held_from": datetime.fromtimestamp(lease["valid_from"], tz=timezone.utc).isoformat(),
+                    "held_until": (
+                        datetime.fromtimestamp(lease["valid_to"], tz=timezone.utc).isoformat()
+                        if lease["valid_to"] is not None else None
+                    ),
+                }
+                for lease in leases_between(ip_address, window_start, window_end)
+            ]
+
         summary = {
             "ip_address": ip_address,
             "time_range": f"last {hours} hour(s)",
@@ -315,6 +336,8 @@ def search_logs_by_ip(
                 for m in mentions
             ]
         }
+        if device_history:
+            summary["device_history"] = device_history
 
         return json.dumps(summary, indent=2)
 
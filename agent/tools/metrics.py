@@ -1,14 +1,26 @@
 """
 Tools for querying metrics from SigNoz/ClickHouse.
+
+Client volume, block rates and blocked domains aggregate the per-query AdGuard
+log in first_light.dns_queries (shipped by adguard-exporter/
+adguard_querylog_shipper.py). Risk scores and traffic types are computed by the
+cache.db analytics on the AdGuard host, so those come from the exporter's
+gauges via first_light.adguard_client_samples, where a materialized view has
+already joined samples_v4 to time_series_v4 and extracted the client labels.
+
+Every tool returns a JSON list of rows, with private IPs annotated with the
+device hostname where known.
 """
 
+import json
+
 import httpx
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional, Tuple
 
 from langchain_core.tools import tool
 
 from agent.config import get_config
-from agent.utils.resolve import enrich_ip_column
+from agent.utils.resolve import enrich_ip_column, resolve_rows_at
 
 
 @tool
@@ -23,20 +35,19 @@ def query_adguard_top_clients(
         limit: Number of results to return (default: 20)
 
     Returns:
-        Formatted table of top clients with query counts
+        JSON list of top clients with total, blocked and unique-domain counts
     """
     query = f"""
         SELECT
-            simpleJSONExtractString(ts.labels, 'client.name') as client,
-            simpleJSONExtractString(ts.labels, 'client.ip') as ip,
-            sum(s.value) as total_queries
-        FROM signoz_metrics.samples_v4 s
-        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
-        WHERE s.metric_name = 'adguard.queries.total'
-          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
-        GROUP BY client, ip
+            client,
+            count() as total_queries,
+            countIf(blocked) as blocked_queries,
+            uniqExact(qname) as unique_domains
+        FROM first_light.dns_queries
+        WHERE ts > now() - INTERVAL {int(hours)} HOUR
+        GROUP BY client
         ORDER BY total_queries DESC
-        LIMIT {limit}
+        LIMIT {int(limit)}
     """
 
     return _execute_clickhouse_query(query)
@@ -56,21 +67,20 @@ def query_adguard_block_rates(
         limit: Number of results to return (default: 20)
 
     Returns:
-        Formatted table of clients with their block rates
+        JSON list of clients with query counts and block rate (%)
     """
     query = f"""
         SELECT
-            simpleJSONExtractString(ts.labels, 'client.name') as client,
-            simpleJSONExtractString(ts.labels, 'client.ip') as ip,
-            round(avg(s.value), 2) as avg_block_rate
-        FROM signoz_metrics.samples_v4 s
-        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
-        WHERE s.metric_name = 'adguard.block.rate'
-          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
-        GROUP BY client, ip
-        HAVING avg_block_rate >= {min_block_rate}
-        ORDER BY avg_block_rate DESC
-        LIMIT {limit}
+            client,
+            count() as total_queries,
+            countIf(blocked) as blocked_queries,
+            round(100 * blocked_queries / total_queries, 2) as block_rate
+        FROM first_light.dns_queries
+        WHERE ts > now() - INTERVAL {int(hours)} HOUR
+        GROUP BY client
+        HAVING block_rate >= {float(min_block_rate)}
+        ORDER BY block_rate DESC
+        LIMIT {int(limit)}
     """
 
     return _execute_clickhouse_query(query)
@@ -88,19 +98,19 @@ def query_adguard_high_risk_clients(
         min_risk_score: Minimum risk score to include (0-10, default: 5.0)
 
     Returns:
-        Formatted table of high-risk clients
+        JSON list of high-risk clients with average and peak risk score
     """
     query = f"""
         SELECT
-            simpleJSONExtractString(ts.labels, 'client.name') as client,
-            simpleJSONExtractString(ts.labels, 'client.ip') as ip,
-            round(avg(s.value), 2) as risk_score
-        FROM signoz_metrics.samples_v4 s
-        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
-        WHERE s.metric_name = 'adguard.client.risk_score'
-          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
-        GROUP BY client, ip
-        HAVING risk_score >= {min_risk_score}
+            argMax(client_name, ts) as client,
+            client_ip as ip,
+            round(avg(value), 2) as risk_score,
+            round(max(value), 2) as max_risk_score
+        FROM first_light.adguard_client_samples
+        WHERE metric_name = 'adguard.client.risk_score'
+          AND ts > now() - INTERVAL {int(hours)} HOUR
+        GROUP BY ip
+        HAVING risk_score >= {float(min_risk_score)}
         ORDER BY risk_score DESC
     """
 
@@ -119,25 +129,76 @@ def query_adguard_blocked_domains(
         limit: Number of results to return (default: 20)
 
     Returns:
-        Formatted table of most blocked domains
+        JSON list of most blocked domains with block count, clients and reasons
     """
     query = f"""
         SELECT
-            simpleJSONExtractString(ts.labels, 'domain') as domain,
-            sum(s.value) as total_blocks,
-            simpleJSONExtractString(ts.labels, 'unique_clients') as unique_clients
-        FROM signoz_metrics.samples_v4 s
-        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
-        WHERE s.metric_name = 'adguard.blocked_domains.total'
-          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
-        GROUP BY domain, unique_clients
+            qname as domain,
+            count() as total_blocks,
+            uniqExact(client) as unique_clients,
+            arrayStringConcat(groupUniqArray(reason), ',') as reasons
+        FROM first_light.dns_queries
+        WHERE blocked
+          AND ts > now() - INTERVAL {int(hours)} HOUR
+        GROUP BY domain
         ORDER BY total_blocks DESC
-        LIMIT {limit}
+        LIMIT {int(limit)}
     """
 
     return _execute_clickhouse_query(query)
 
 
+@tool
+def query_adguard_dns_queries(
+    client_ip: str = "",
+    domain: str = "",
+    hours: int = 1,
+    blocked_only: bool = False,
+    limit: int = 100
+) -> str:
+    """List individual DNS queries, newest first, to drill into a client or domain.
+
+    Args:
+        client_ip: Only queries from this client IP (default: all clients)
+        domain: Only queries for this domain or its subdomains, e.g. 'example.com'
+        hours: Lookback period in hours (default: 1)
+        blocked_only: Only return blocked queries (default: False)
+        limit: Maximum number of queries to return (default: 100)
+
+    Returns:
+        JSON list of queries with time, client, domain, type, blocked flag and reason.
+        Each client is named after the device that held its IP at the query's time.
+    """
+    filters = [f"ts > now() - INTERVAL {int(hours)} HOUR"]
+    params = {}
+    if client_ip:
+        filters.append("client = {client:String}")
+        params["client"] = client_ip
+    if domain:
+        domain = domain.rstrip(".").lower()
+        filters.append("(qname = {domain:String} OR endsWith(qname, concat('.', {domain:String})))")
+        params["domain"] = domain
+    if blocked_only:
+        filters.append("blocked")
+
+    query = f"""
+        SELECT
+            ts,
+            toUnixTimestamp(ts) as at,
+            client,
+            qname,
+            qtype,
+            blocked,
+            reason
+        FROM first_light.dns_queries
+        WHERE {' AND '.join(filters)}
+        ORDER BY ts DESC
+        LIMIT {int(limit)}
+    """
+
+    return _execute_clickhouse_query(query, params, resolve_at=("client", "at"))
+
+
 @tool
 def query_adguard_traffic_by_type(hours: int = 24) -> str:
     """Get DNS query volume by traffic type (user vs automated).
@@ -146,17 +207,26 @@ def query_adguard_traffic_by_type(hours: int = 24) -> str:
         hours: Lookback period in hours (default: 24)
 
     Returns:
-        Formatted table showing user vs automated traffic patterns
+        JSON list of traffic types with the latest 24h query count and client count
     """
+    # adguard.client.queries_24h is a gauge of each client's rolling 24h
+    # count, so take the latest sample per client rather than summing samples
+    # (adguard.queries.total is a counter that grows with every ingestion run)
     query = f"""
         SELECT
-            simpleJSONExtractString(ts.labels, 'traffic.type') as traffic_type,
-            sum(s.value) as total_queries,
-            count(DISTINCT simpleJSONExtractString(ts.labels, 'client.ip')) as unique_clients
-        FROM signoz_metrics.samples_v4 s
-        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
-        WHERE s.metric_name = 'adguard.queries.total'
-          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
+            traffic_type,
+            sum(queries) as total_queries,
+            count() as unique_clients
+        FROM (
+            SELECT
+                client_ip,
+                argMax(traffic_type, ts) as traffic_type,
+                argMax(value, ts) as queries
+            FROM first_light.adguard_client_samples
+            WHERE metric_name = 'adguard.client.queries_24h'
+              AND ts > now() - INTERVAL {int(hours)} HOUR
+            GROUP BY client_ip
+        )
         GROUP BY traffic_type
         ORDER BY total_queries DESC
     """
@@ -164,14 +234,23 @@ def query_adguard_traffic_by_type(hours: int = 24) -> str:
     return _execute_clickhouse_query(query)
 
 
-def _execute_clickhouse_query(query: str) -> str:
+def _execute_clickhouse_query(
+    query: str,
+    params: Optional[Dict[str, str]] = None,
+    resolve_at: Optional[Tuple[str, str]] = None,
+) -> str:
     """Execute a ClickHouse query via HTTP and return results.
 
     Args:
         query: SQL query to execute
+        params: Values for {name:Type} placeholders in the query
+        resolve_at: (ip column, unix-time column) for per-event rows — each IP
+            is resolved to the device that held it at that time (lease
+            history) instead of its current holder, and the time column is
+            dropped from the output
 
     Returns:
-        Query results as formatted string
+        JSON list of rows, or an error message
     """
     config = get_config()
 
@@ -185,19 +264,28 @@ def _execute_clickhouse_query(query: str) -> str:
                 params={
                     "user": config.signoz_clickhouse_user,
                     "password": config.signoz_clickhouse_password,
-                    "query": query
+                    "query": f"{query} FORMAT JSONEachRow",
+                    "output_format_json_quote_64bit_integers": 0,
+                    **{f"param_{k}": v for k, v in (params or {}).items()},
                 }
             )
 
             if response.status_code != 200:
                 return f"Error executing query: HTTP {response.status_code} - {response.text}"
 
-            result = response.text.strip()
+            rows = [json.loads(line) for line in response.text.splitlines() if line.strip()]
 
-            if not result:
+            if not rows:
                 return "No results found"
 
-            return enrich_ip_column(result)
+            if resolve_at:
+                ip_key, at_key = resolve_at
+                resolve_rows_at(rows, ip_key, at_key)
+                for row in rows:
+                    row.pop(at_key, None)
+                return json.dumps(rows, indent=2)
+
+            return enrich_ip_column(json.dumps(rows, indent=2))
 
     except httpx.TimeoutException:
         return "Query timed out after 30 seconds"
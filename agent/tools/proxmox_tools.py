@@ -1,36 +1,29 @@
 """
 Proxmox VE health tools — queries the fl-proxmox-exporter Prometheus endpoint.
+
+Scrapes are served from agent/utils/scrape_cache.py (polled every 60s in the
+scheduler, fetched on demand elsewhere).
 """
 
 import json
-import re
-from typing import Dict, List, Tuple
 
 import httpx
 from langchain_core.tools import tool
 
+from agent.utils import scrape_cache
+from agent.utils.prometheus import PrometheusMetrics, parse_prometheus
+
+_SCRAPE_INTERVAL = 60
+
+
+def _scrape_proxmox() -> PrometheusMetrics:
+    with httpx.Client(timeout=10.0) as client:
+        resp = client.get("http://fl-proxmox-exporter:9002/metrics")
+        resp.raise_for_status()
+    return parse_prometheus(resp.text)
+
 
-def _parse_prometheus(text: str) -> Dict[str, List[Tuple[Dict, float]]]:
-    """Parse Prometheus text format into {metric: [(labels, value), ...]}."""
-    result: Dict[str, List[Tuple[Dict, float]]] = {}
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{([^}]*)\}\s+([\d.eE+\-]+)', line)
-        if m:
-            name, labels_str, val = m.group(1), m.group(2), m.group(3)
-            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels_str))
-        else:
-            m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\s+([\d.eE+\-]+)', line)
-            if not m:
-                continue
-            name, val, labels = m.group(1), m.group(2), {}
-        try:
-            result.setdefault(name, []).append((labels, float(val)))
-        except ValueError:
-            pass
-    return result
+scrape_cache.register("proxmox", _scrape_proxmox, _SCRAPE_INTERVAL)
 
 
 def _gb(bytes_val):
@@ -53,13 +46,11 @@ def query_proxmox_health() -> str:
         JSON with node CPU/memory, per-VM/container status, storage usage, and alerts.
     """
     try:
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.get("http://fl-proxmox-exporter:9002/metrics")
-            resp.raise_for_status()
+        snap = scrape_cache.get("proxmox")
     except Exception as e:
         return json.dumps({"error": f"Could not reach Proxmox exporter: {e}"})
 
-    m = _parse_prometheus(resp.text)
+    m = snap.metrics
 
     # --- Node-level metrics ---
     nodes = {}
@@ -183,4 +174,5 @@ def query_proxmox_health() -> str:
         "storage": storage,
         "alerts": alerts,
         "healthy": len(alerts) == 0,
+        "scrape": snap.meta(_SCRAPE_INTERVAL),
     }, indent=2)
@@ -1,55 +1,39 @@
 """
 QNAP NAS health tools.
 
-query_qnap_health: queries the fl-qnap-api-exporter Prometheus endpoint.
+query_qnap_health: queries the fl-qnap-api-exporter Prometheus endpoint
+  (served from agent/utils/scrape_cache.py; polled every 60s in the scheduler).
 query_qnap_directory_sizes: uses the QNAP File Station API for directory analysis.
 """
 
 import hashlib
 import json
-import re
 import time
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Tuple
+from typing import Optional
 
 import httpx
 from langchain_core.tools import tool
 
 from agent.config import get_config
+from agent.utils import scrape_cache
+from agent.utils.prometheus import PrometheusMetrics, parse_prometheus
 
 # Module-level session cache — reuse QNAP auth token for up to 50 minutes
 _qnap_sid: Optional[str] = None
 _qnap_sid_expiry: float = 0.0
 
+_SCRAPE_INTERVAL = 60
+
+
+def _scrape_qnap() -> PrometheusMetrics:
+    with httpx.Client(timeout=10.0) as client:
+        resp = client.get("http://fl-qnap-api-exporter:9004/metrics")
+        resp.raise_for_status()
+    return parse_prometheus(resp.text)
 
-def _parse_prometheus(text: str) -> Dict[str, List[Tuple[Dict, float]]]:
-    """Parse Prometheus text format into {metric: [(labels, value), ...]}."""
-    result: Dict[str, List[Tuple[Dict, float]]] = {}
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{([^}]*)\}\s+([\d.eE+\-]+)', line)
-        if m:
-            name, labels_str, val = m.group(1), m.group(2), m.group(3)
-            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels_str))
-        else:
-            m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\s+([\d.eE+\-]+)', line)
-            if not m:
-                continue
-            name, val, labels = m.group(1), m.group(2), {}
-        try:
-            result.setdefault(name, []).append((labels, float(val)))
-        except ValueError:
-            pass
-    return result
-
-
-def _first(metrics, name, labels_filter=None):
-    for labels, val in metrics.get(name, []):
-        if labels_filter is None or all(labels.get(k) == v for k, v in labels_filter.items()):
-            return val
-    return None
+
+scrape_cache.register("qnap", _scrape_qnap, _SCRAPE_INTERVAL)
 
 
 def _gb(bytes_val):
@@ -72,29 +56,27 @@ def query_qnap_health() -> str:
         JSON with system resources, volume usage, and health indicators.
     """
     try:
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.get("http://fl-qnap-api-exporter:9004/metrics")
-            resp.raise_for_status()
+        snap = scrape_cache.get("qnap")
     except Exception as e:
         return json.dumps({"error": f"Could not reach QNAP exporter: {e}"})
 
-    m = _parse_prometheus(resp.text)
+    m = snap.metrics
 
     # --- CPU / Memory ---
-    cpu = _first(m, "qnap_cpu_usage_percent")
-    mem_used = _first(m, "qnap_memory_used_bytes")
-    mem_total = _first(m, "qnap_memory_total_bytes")
-    mem_free = _first(m, "qnap_memory_free_bytes")
+    cpu = m.first("qnap_cpu_usage_percent")
+    mem_used = m.first("qnap_memory_used_bytes")
+    mem_total = m.first("qnap_memory_total_bytes")
+    mem_free = m.first("qnap_memory_free_bytes")
     mem_pct = _pct(mem_used, mem_total)
     uptime_days = None
-    uptime_s = _first(m, "qnap_uptime_seconds")
+    uptime_s = m.first("qnap_uptime_seconds")
     if uptime_s:
         uptime_days = round(uptime_s / 86400, 1)
 
     # --- Temperatures ---
     temps = {}
-    cpu_temp = _first(m, "qnap_cpu_temperature_celsius")
-    sys_temp = _first(m, "qnap_system_temperature_celsius")
+    cpu_temp = m.first("qnap_cpu_temperature_celsius")
+    sys_temp = m.first("qnap_system_temperature_celsius")
     if cpu_temp is not None:
         temps["cpu"] = cpu_temp
     if sys_temp is not None:
@@ -164,6 +146,7 @@ def query_qnap_health() -> str:
         "disks": disks,
         "alerts": alerts,
         "healthy": len(alerts) == 0,
+        "scrape": snap.meta(_SCRAPE_INTERVAL),
     }, indent=2)
 
 
@@ -0,0 +1,85 @@
+"""
+Historical report tools — search past daily reports.
+
+Answers from the report catalog's search index (agent/reports/search.py) in
+the shared reports volume, so "when did we last see X" does not need the
+model to read old reports one by one.
+"""
+
+import json
+import threading
+from datetime import date as date_type
+from typing import Optional
+
+from langchain_core.tools import tool
+
+from agent.reports.catalog import ReportCatalog
+from agent.reports.daily_threat_assessment import REPORTS_DIR
+
+_catalog: Optional[ReportCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def _get_catalog() -> ReportCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ReportCatalog(REPORTS_DIR)
+            # A process that has never seen the catalog (e.g. a bot on a fresh
+            # volume) indexes what is already on disk
+            if _catalog.count() == 0:
+                _catalog.rebuild()
+        return _catalog
+
+
+@tool
+def search_reports(
+    query: str = "",
+    entity: str = "",
+    fact: str = "",
+    below: Optional[float] = None,
+    above: Optional[float] = None,
+    since: str = "",
+    until: str = "",
+    limit: int = 20,
+) -> str:
+    """Search past daily security reports by text, entity, or numeric fact.
+
+    Use this for history questions: "when did we last see 185.220.101.45",
+    "which days mentioned a critical finding", "every day attestation
+    effectiveness was below 95".
+
+    Args:
+        query: Free text, all terms required (e.g. "port scan tor"). A trailing
+            * makes a term a prefix match. Results are ranked by relevance.
+        entity: Exact IP, MAC, domain, or severity word (critical, high, ...)
+            the report must mention.
+        fact: Metric name to filter on, e.g. "effectiveness" or
+            "validator_health.effectiveness" (section.name); matched as a substring.
+        below: With fact — only reports where the value is below this.
+        above: With fact — only reports where the value is above this.
+        since: Earliest report date, YYYY-MM-DD.
+        until: Latest report date, YYYY-MM-DD.
+        limit: Maximum reports to return (default 20, max 100).
+
+    Returns:
+        JSON list of matching reports (date, relevance score and snippet for
+        text queries, matching facts) — newest first when there is no query.
+    """
+    if not any((query.strip(), entity.strip(), fact.strip(), since, until)):
+        return json.dumps({"error": "Give at least one of query, entity, fact, since or until"})
+    for name, value in (("since", since), ("until", until)):
+        if value:
+            try:
+                date_type.fromisoformat(value)
+            except ValueError:
+                return json.dumps({"error": f"Invalid {name} date: {value} (use YYYY-MM-DD)"})
+
+    try:
+        hits = _get_catalog().search(
+            text=query, entity=entity, fact=fact, below=below, above=above,
+            since=since, until=until, limit=max(1, min(limit, 100)),
+        )
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return json.dumps({"reports": hits, "count": len(hits)}, indent=2)
@@ -4,17 +4,51 @@ LangGraph tools for querying threat intelligence data from ClickHouse.
 These tools read from the threat_intel.enrichments table populated by the
 background enricher service. They give the agent access to enriched IP
 reputation data to correlate with firewall blocks and security events.
+
+Country / ASN come from the offline GeoIP tier (agent/tools/geoip.py) first,
+so they are available for every blocked IP — enriched or not — without a
+network round trip. Where this process has no local database, the geo_*
+columns the enricher stored with each enrichment are used, and the
+API-sourced fields only after those.
+
+Blocklist membership (FireHOL, Spamhaus DROP, CrowdSec — loaded by the
+enricher's feed job) is read from the threat_intel.blocklist_dict IP_TRIE
+dictionary, so "on blocklist X" costs no API calls either.
 """
 
 import json
 import re
+import time
+from collections import Counter
 from typing import Optional
 from langchain_core.tools import tool
 
+from agent.tools import geoip
 from agent.tools.logs import _execute_clickhouse_query
 
 _IP_RE = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
 
+# Comma-separated list names the IP is on ('' if none)
+_BLOCKLIST_SQL = (
+    "dictGetOrDefault('threat_intel.blocklist_dict', 'lists', "
+    "tuple(IPv4StringToNumOrDefault({col})), '')"
+)
+
+
+def _split_lists(value: Optional[str]) -> list[str]:
+    return [v for v in (value or "").split(",") if v]
+
+
+def _geo(local: geoip.GeoInfo, row: Optional[dict]) -> geoip.GeoInfo:
+    """Local GeoIP result, else the country / ASN the enricher stored for the IP."""
+    if local.country_code or local.asn or not row:
+        return local
+    return geoip.GeoInfo(
+        country_code=row.get("geo_country_code") or "",
+        asn=int(row.get("geo_asn") or 0),
+        as_org=row.get("geo_as_org") or "",
+    )
+
 
 @tool
 def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
@@ -50,7 +84,11 @@ def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
         ti.confidence,
         ti.categories,
         ti.recommendation,
-        ti.enriched_at
+        ti.geo_country_code,
+        ti.geo_asn,
+        ti.geo_as_org,
+        ti.enriched_at,
+        {_BLOCKLIST_SQL.format(col="fw.src_ip")} as blocklists
     FROM (
         SELECT
             attributes_string['pfsense.src_ip'] as src_ip,
@@ -82,6 +120,9 @@ def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
             argMax(confidence, enriched_at) as confidence,
             argMax(categories, enriched_at) as categories,
             argMax(recommendation, enriched_at) as recommendation,
+            argMax(geo_country_code, enriched_at) as geo_country_code,
+            argMax(geo_asn, enriched_at) as geo_asn,
+            argMax(geo_as_org, enriched_at) as geo_as_org,
             max(enriched_at) as enriched_at
         FROM threat_intel.enrichments
         WHERE toDateTime(enriched_at) >= now() - INTERVAL 48 HOUR
@@ -126,10 +167,14 @@ def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
                 "enriched_ips": cov.get("enriched_ips", 0),
             })
 
+        local = geoip.lookup_many(r["src_ip"] for r in rows)
+        geo = {r["src_ip"]: _geo(local[r["src_ip"]], r) for r in rows}
+
         # Aggregate summary stats
         malicious_count = sum(1 for r in rows if r.get("is_malicious"))
         high_confidence = sum(1 for r in rows if r.get("confidence") == "high")
         block_ips = [r for r in rows if r.get("recommendation") == "block"]
+        blocklisted = sum(1 for r in rows if r.get("blocklists"))
         monitor_ips = [r for r in rows if r.get("recommendation") == "monitor"]
 
         return json.dumps({
@@ -138,6 +183,7 @@ def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
             "confirmed_malicious": malicious_count,
             "high_confidence_threats": high_confidence,
             "recommended_blocks": len(block_ips),
+            "on_public_blocklists": blocklisted,
             "top_threats": [
                 {
                     "ip": r["src_ip"],
@@ -147,12 +193,14 @@ def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
                     "confidence": r["confidence"],
                     "recommendation": r["recommendation"],
                     "abuseipdb_score": r["abuseipdb_score"],
-                    "country": r["abuseipdb_country_code"],
-                    "asn_owner": r["virustotal_as_owner"],
+                    "country": geo[r["src_ip"]].country_code or r["abuseipdb_country_code"],
+                    "asn": geo[r["src_ip"]].asn or None,
+                    "asn_owner": geo[r["src_ip"]].as_org or r["virustotal_as_owner"],
                     "usage_type": r["abuseipdb_usage_type"],
                     "vt_malicious_vendors": r["virustotal_malicious"],
                     "alienvault_pulses": r["alienvault_pulse_count"],
                     "categories": r["categories"],
+                    "blocklists": _split_lists(r.get("blocklists")),
                     "top_target_port": r["top_dst_port"][0] if r.get("top_dst_port") else None,
                     "protocol": r["top_protocol"][0] if r.get("top_protocol") else None,
                 }
@@ -205,6 +253,9 @@ def lookup_ip_threat_intel(ip_address: str) -> str:
         categories,
         recommendation,
         error_sources,
+        geo_country_code,
+        geo_asn,
+        geo_as_org,
         enriched_at
     FROM threat_intel.enrichments
     WHERE ip = {ip:String}
@@ -241,24 +292,36 @@ def lookup_ip_threat_intel(ip_address: str) -> str:
             enrichment = json.loads(enrichment_result.strip().split('\n')[0])
 
         activity = [json.loads(line) for line in activity_result.strip().split('\n') if line.strip()]
+        geo = _geo(geoip.lookup(ip_address), enrichment)
+
+        try:
+            bl_query = f"SELECT {_BLOCKLIST_SQL.format(col='{ip:String}')} as lists FORMAT JSONEachRow"
+            bl_result = _execute_clickhouse_query(bl_query, {"ip": ip_address})
+            blocklists = _split_lists(json.loads(bl_result).get("lists")) if bl_result.strip() else []
+        except Exception:
+            blocklists = []  # blocklist dictionary not loaded yet
 
         if not enrichment and not activity:
             return json.dumps({
                 "ip": ip_address,
                 "status": "not_found",
-                "message": "No threat intel data or firewall activity found for this IP"
+                "message": "No threat intel data or firewall activity found for this IP",
+                "geo": geo.to_dict(),
+                "blocklists": blocklists,
             })
 
         result = {
             "ip": ip_address,
+            "geo": geo.to_dict(),
+            "blocklists": blocklists,
             "threat_intel": {
                 "threat_score": enrichment.get("threat_score", 0) if enrichment else None,
                 "is_malicious": enrichment.get("is_malicious", False) if enrichment else None,
                 "confidence": enrichment.get("confidence") if enrichment else None,
                 "recommendation": enrichment.get("recommendation") if enrichment else None,
                 "categories": enrichment.get("categories", []) if enrichment else [],
-                "country": enrichment.get("abuseipdb_country_code") if enrichment else None,
-                "asn_owner": enrichment.get("virustotal_as_owner") if enrichment else None,
+                "country": geo.country_code or (enrichment.get("abuseipdb_country_code") if enrichment else None),
+                "asn_owner": geo.as_org or (enrichment.get("virustotal_as_owner") if enrichment else None),
                 "usage_type": enrichment.get("abuseipdb_usage_type") if enrichment else None,
                 "sources": {
                     "abuseipdb": {
@@ -309,13 +372,14 @@ def query_threat_intel_coverage() -> str:
     Returns:
         JSON with coverage statistics and gaps
     """
-    query = """
+    query = f"""
     SELECT
         fw.src_ip,
         fw.block_count,
         if(ti.ip != '', 1, 0) as is_enriched,
         ti.threat_score,
-        ti.recommendation
+        ti.recommendation,
+        {_BLOCKLIST_SQL.format(col="fw.src_ip")} as blocklists
     FROM (
         SELECT
             attributes_string['pfsense.src_ip'] as src_ip,
@@ -346,6 +410,7 @@ def query_threat_intel_coverage() -> str:
         total = len(rows)
         enriched = sum(1 for r in rows if r.get("is_enriched"))
         unenriched = [r for r in rows if not r.get("is_enriched")]
+        blocklisted = sum(1 for r in rows if r.get("blocklists"))
 
         return json.dumps({
             "coverage": {
@@ -353,12 +418,102 @@ def query_threat_intel_coverage() -> str:
                 "enriched": enriched,
                 "unenriched": total - enriched,
                 "coverage_pct": round(enriched / total * 100, 1) if total else 0,
+                "on_public_blocklists": blocklisted,
             },
             "top_unenriched_ips": [
-                {"ip": r["src_ip"], "block_count": r["block_count"]}
+                {"ip": r["src_ip"], "block_count": r["block_count"], "blocklists": _split_lists(r.get("blocklists"))}
                 for r in unenriched[:10]
             ]
         }, indent=2)
 
     except Exception as e:
         return f"Error querying threat intel coverage: {str(e)}"
+
+
+@tool
+def query_blocked_ips_by_geo(hours: int = 24, top_n: int = 15) -> str:
+    """Break down firewall-blocked source IPs by country and ASN.
+
+    Uses the local offline GeoIP database — no threat intel API calls — so it
+    covers every blocked IP, including ones the enricher has not reached yet.
+    Useful for spotting campaigns from a single hosting provider or country.
+
+    Args:
+        hours: Lookback window for firewall blocks (default: 24, max: 168)
+        top_n: Number of countries / ASNs to return (default: 15)
+
+    Returns:
+        JSON with block counts and unique IPs per country and per ASN
+    """
+    hours = min(hours, 168)
+    top_n = max(1, min(top_n, 50))
+
+    query = f"""
+    SELECT
+        attributes_string['pfsense.src_ip'] as src_ip,
+        COUNT(*) as block_count
+    FROM signoz_logs.logs_v2
+    WHERE toDateTime(timestamp / 1000000000) >= now() - INTERVAL {hours} HOUR
+      AND resources_string['service.name'] = 'filterlog'
+      AND attributes_string['pfsense.action'] = 'block'
+      AND attributes_string['pfsense.src_ip'] NOT LIKE '192.168.%'
+      AND attributes_string['pfsense.src_ip'] NOT LIKE '10.%'
+      AND attributes_string['pfsense.src_ip'] != ''
+    GROUP BY src_ip
+    ORDER BY block_count DESC
+    LIMIT 100000
+    FORMAT JSONEachRow
+    """
+
+    try:
+        result = _execute_clickhouse_query(query)
+        rows = [json.loads(line) for line in result.strip().split('\n') if line.strip()]
+        if not rows:
+            return json.dumps({"time_range": f"last {hours}h", "message": "No blocked IPs found"})
+
+        if not geoip.is_available():
+            return json.dumps({
+                "time_range": f"last {hours}h",
+                "unique_blocked_ips": len(rows),
+                "error": "Offline GeoIP database not available (see GEOIP_COUNTRY_DB / GEOIP_ASN_DB)",
+            })
+
+        t0 = time.perf_counter()
+        geo = geoip.lookup_many(r["src_ip"] for r in rows)
+        lookup_ms = (time.perf_counter() - t0) * 1000
+
+        country_blocks, country_ips = Counter(), Counter()
+        asn_blocks, asn_ips = Counter(), Counter()
+        asn_names: dict[int, str] = {}
+        for r in rows:
+            g = geo[r["src_ip"]]
+            count = int(r["block_count"])
+            cc = g.country_code or "unknown"
+            country_blocks[cc] += count
+            country_ips[cc] += 1
+            asn_blocks[g.asn] += count
+            asn_ips[g.asn] += 1
+            asn_names.setdefault(g.asn, g.as_org)
+
+        return json.dumps({
+            "time_range": f"last {hours}h",
+            "unique_blocked_ips": len(rows),
+            "total_blocks": sum(country_blocks.values()),
+            "geo_lookup_ms": round(lookup_ms, 1),
+            "top_countries": [
+                {"country": cc, "blocks": n, "unique_ips": country_ips[cc]}
+                for cc, n in country_blocks.most_common(top_n)
+            ],
+            "top_asns": [
+                {
+                    "asn": asn or None,
+                    "as_org": asn_names.get(asn) or "unknown",
+                    "blocks": n,
+                    "unique_ips": asn_ips[asn],
+                }
+                for asn, n in asn_blocks.most_common(top_n)
+            ],
+        }, indent=2)
+
+    except Exception as e:
+        return f"Error querying blocked IPs by geo: {str(e)}"
@@ -1,24 +1,36 @@
 """
-Uptime Kuma tools — queries kuma.db directly via Python's sqlite3.
+Uptime Kuma tools — answered from the heartbeat rollup store.
 
-The kuma.db volume is mounted read-only at /data/uptimekuma/kuma.db.
+services/kuma-rollup tails kuma.db's heartbeat table into per-monitor
+current state, hourly up/down counts and incident intervals
+(/data/kuma-rollup/kuma_rollup.db, opened read-only). Every query here
+reads O(monitors × window) rows, however long Kuma's heartbeat history is.
 """
 
 import json
 import sqlite3
+import time
 from datetime import datetime, timezone
+from typing import Optional
 
 from langchain_core.tools import tool
 
-DB_PATH = "/data/uptimekuma/kuma.db"
+from agent.config import get_config
 
 
 def _connect():
-    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    conn = sqlite3.connect(f"file:{get_config().kuma_rollup_db}?mode=ro", uri=True)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def _utc(ts: Optional[int]) -> Optional[str]:
+    """Format like Kuma's own timestamps (UTC, 'YYYY-MM-DD HH:MM:SS')."""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
 @tool
 def query_uptime_kuma_status() -> str:
     """Get current up/down status and response time for all Uptime Kuma monitors.
@@ -33,14 +45,12 @@ def query_uptime_kuma_status() -> str:
             m.type,
             m.url,
             m.active,
-            h.status,
-            h.ping,
-            h.msg,
-            h.time AS last_checked
+            s.status,
+            s.ping,
+            s.msg,
+            s.last_checked
         FROM monitor m
-        LEFT JOIN heartbeat h ON h.id = (
-            SELECT id FROM heartbeat WHERE monitor_id = m.id ORDER BY time DESC LIMIT 1
-        )
+        LEFT JOIN monitor_state s ON s.monitor_id = m.id
         ORDER BY m.name
     """
     try:
@@ -64,25 +74,26 @@ def query_uptime_kuma_uptime(days: int = 1) -> str:
     Returns:
         JSON list of monitors with name, uptime_pct, avg_ping_ms, and check counts.
     """
-    # stat_daily timestamp is unix epoch at day boundary (UTC midnight)
+    # hourly.hour is unix seconds at the start of the UTC hour; (hour, monitor_id) is the key
     sql = """
         SELECT
             m.name,
-            SUM(s.up) AS up_count,
-            SUM(s.down) AS down_count,
-            ROUND(AVG(s.ping), 1) AS avg_ping_ms,
-            ROUND(MIN(s.ping_min), 1) AS min_ping_ms,
-            ROUND(MAX(s.ping_max), 1) AS max_ping_ms
-        FROM monitor m
-        JOIN stat_daily s ON s.monitor_id = m.id
-        WHERE s.timestamp >= strftime('%s', 'now', ?)
+            SUM(h.up) AS up_count,
+            SUM(h.down) AS down_count,
+            ROUND(1.0 * SUM(h.ping_sum) / NULLIF(SUM(h.ping_count), 0), 1) AS avg_ping_ms,
+            MIN(h.ping_min) AS min_ping_ms,
+            MAX(h.ping_max) AS max_ping_ms
+        FROM hourly h
+        JOIN monitor m ON m.id = h.monitor_id
+        WHERE h.hour >= ?
         GROUP BY m.id, m.name
         ORDER BY m.name
     """
-    interval = f"-{days} days"
+    cutoff = int(time.time()) - days * 86400
+    cutoff -= cutoff % 3600  # include the partial hour at the start of the window
     try:
         with _connect() as conn:
-            rows = [dict(r) for r in conn.execute(sql, (interval,))]
+            rows = [dict(r) for r in conn.execute(sql, (cutoff,))]
         for r in rows:
             total = (r["up_count"] or 0) + (r["down_count"] or 0)
             r["uptime_pct"] = round(r["up_count"] / total * 100, 2) if total > 0 else None
@@ -101,24 +112,32 @@ def query_uptime_kuma_incidents(hours: int = 24) -> str:
     Returns:
         JSON list of down events with monitor name, time, duration, and error message.
     """
+    # Anything overlapping the window either hasn't ended or ended inside it
     sql = """
         SELECT
             m.name,
-            h.time AS down_at,
-            h.end_time AS recovered_at,
-            h.duration AS duration_seconds,
-            h.msg AS error,
-            h.down_count
-        FROM heartbeat h
-        JOIN monitor m ON m.id = h.monitor_id
-        WHERE h.status = 0
-          AND h.time >= datetime('now', ?)
-        ORDER BY h.time DESC
+            i.started_at,
+            i.ended_at,
+            i.error,
+            i.down_beats
+        FROM incident i
+        JOIN monitor m ON m.id = i.monitor_id
+        WHERE i.ended_at IS NULL OR i.ended_at >= ?
+        ORDER BY i.started_at DESC
     """
-    interval = f"-{hours} hours"
+    now = int(time.time())
     try:
         with _connect() as conn:
-            rows = [dict(r) for r in conn.execute(sql, (interval,))]
-        return json.dumps(rows, indent=2) if rows else json.dumps([])
+            rows = conn.execute(sql, (now - hours * 3600,)).fetchall()
+        incidents = [{
+            "name": r["name"],
+            "down_at": _utc(r["started_at"]),
+            "recovered_at": _utc(r["ended_at"]),
+            "duration_seconds": (r["ended_at"] or now) - r["started_at"],
+            "ongoing": r["ended_at"] is None,
+            "error": r["error"],
+            "down_count": r["down_beats"],
+        } for r in rows]
+        return json.dumps(incidents, indent=2)
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -3,19 +3,32 @@ Ethereum Validator health tools — queries Nimbus and Nethermind Prometheus end
 
 Nimbus (consensus):  http://vldtr.mcducklabs.com:8008/metrics
 Nethermind (execution): http://vldtr.mcducklabs.com:6060/metrics
+
+In the scheduler both endpoints are polled every 30s by
+agent/utils/scrape_cache.py; the ring buffer of snapshots provides the
+rolling-window fields (attestation misses over the last hour, head slot /
+block progress rates). Other processes scrape on demand and only have the
+history their own calls built up.
 """
 
 import json
-import re
 import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
 from langchain_core.tools import tool
 from langfuse import observe
 
 from agent.config import get_config
+from agent.utils import scrape_cache
+from agent.utils.prometheus import PrometheusMetrics, parse_prometheus
+
+_SCRAPE_INTERVAL = 30
+_WINDOW_SECONDS = 3600
+_SLOTS_PER_EPOCH = 32
+_ATT_HIT = "validator_monitor_prev_epoch_on_chain_attester_hit_total"
+_ATT_MISS = "validator_monitor_prev_epoch_on_chain_attester_miss_total"
 
 
 def _nimbus_url() -> str:
@@ -30,57 +43,101 @@ def _nethermind_url() -> str:
     return f"http://{host}:{cfg.execution_metrics_port}/metrics"
 
 
-def _parse_prometheus(text: str) -> Dict[str, List[Tuple[Dict, float]]]:
-    """Parse Prometheus text format into {metric: [(labels, value), ...]}."""
-    result: Dict[str, List[Tuple[Dict, float]]] = {}
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{([^}]*)\}\s+([\d.eE+\-]+)', line)
-        if m:
-            name, labels_str, val = m.group(1), m.group(2), m.group(3)
-            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels_str))
-        else:
-            m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\s+([\d.eE+\-]+)', line)
-            if not m:
-                continue
-            name, val, labels = m.group(1), m.group(2), {}
-        try:
-            result.setdefault(name, []).append((labels, float(val)))
-        except ValueError:
-            pass
-    return result
-
-
-def _first(metrics, name, labels_filter=None):
-    for labels, val in metrics.get(name, []):
-        if labels_filter is None or all(labels.get(k) == v for k, v in labels_filter.items()):
-            return val
-    return None
-
-
-def _sum_all(metrics, name):
-    """Sum all values for a metric across all label sets."""
-    return sum(v for _, v in metrics.get(name, [])) or None
-
-
-@observe(as_type="span", name="validator.fetch_nimbus")
-def _fetch_nimbus_metrics() -> Optional[Dict]:
-    """Fetch and parse Nimbus consensus client Prometheus metrics."""
+# Only these series are read by query_validator_health — everything else in the
+# (multi-thousand series) scrapes is skipped before label parsing.
+_NIMBUS_WANTED = frozenset({
+    "beacon_head_slot",
+    "beacon_finalized_epoch",
+    "libp2p_peers",
+    "process_start_time_seconds",
+    "validator_monitor_balance_gwei",
+    "validator_monitor_effective_balance_gwei",
+    "validator_monitor_prev_epoch_on_chain_attester_hit_total",
+    "validator_monitor_prev_epoch_on_chain_attester_miss_total",
+    "validator_monitor_prev_epoch_on_chain_head_attester_hit_total",
+    "validator_monitor_prev_epoch_on_chain_head_attester_miss_total",
+    "validator_monitor_prev_epoch_on_chain_target_attester_hit_total",
+    "validator_monitor_prev_epoch_on_chain_target_attester_miss_total",
+    "validator_monitor_slashed",
+    "validator_monitor_active",
+    "validator_monitor_exited",
+})
+
+_NETHERMIND_WANTED = frozenset({
+    "nethermind_sync_peers",
+    "nethermind_blocks",
+    "nethermind_transactions",
+    "nethermind_reorganizations",
+    "nethermind_mgas_per_sec",
+    "nethermind_new_payload_execution_time",
+})
+
+
+def _scrape_nimbus() -> PrometheusMetrics:
     with httpx.Client(timeout=10.0) as client:
         resp = client.get(_nimbus_url())
         resp.raise_for_status()
-    return _parse_prometheus(resp.text)
+    return parse_prometheus(resp.text, wanted=_NIMBUS_WANTED)
 
 
-@observe(as_type="span", name="validator.fetch_nethermind")
-def _fetch_nethermind_metrics() -> Optional[Dict]:
-    """Fetch and parse Nethermind execution client Prometheus metrics."""
+def _scrape_nethermind() -> PrometheusMetrics:
     with httpx.Client(timeout=10.0) as client:
         resp = client.get(_nethermind_url())
         resp.raise_for_status()
-    return _parse_prometheus(resp.text)
+    return parse_prometheus(resp.text, wanted=_NETHERMIND_WANTED, capture_labels=("Version",))
+
+
+scrape_cache.register("nimbus", _scrape_nimbus, _SCRAPE_INTERVAL)
+scrape_cache.register("nethermind", _scrape_nethermind, _SCRAPE_INTERVAL)
+
+
+@observe(as_type="span", name="validator.fetch_nimbus")
+def _fetch_nimbus_metrics() -> scrape_cache.Snapshot:
+    """Latest Nimbus consensus client snapshot (cached, live scrape if stale)."""
+    return scrape_cache.get("nimbus")
+
+
+@observe(as_type="span", name="validator.fetch_nethermind")
+def _fetch_nethermind_metrics() -> scrape_cache.Snapshot:
+    """Latest Nethermind execution client snapshot (cached, live scrape if stale)."""
+    return scrape_cache.get("nethermind")
+
+
+def _rate_per_min(name: str, metric: str) -> Optional[float]:
+    """Average per-minute increase of a monotonic gauge across the cached window."""
+    points = [
+        (s.scraped_at, v) for s in scrape_cache.history(name, _WINDOW_SECONDS)
+        if (v := s.metrics.first(metric)) is not None
+    ]
+    if len(points) < 2 or points[-1][0] - points[0][0] < 120:
+        return None
+    (t0, v0), (t1, v1) = points[0], points[-1]
+    return round((v1 - v0) / ((t1 - t0) / 60), 2)
+
+
+def _nimbus_window() -> Dict[str, Any]:
+    """Rolling-window consensus stats from the snapshot history."""
+    # The *_prev_epoch_* gauges describe the previous epoch, so each epoch is
+    # counted once no matter how many snapshots saw it.
+    by_epoch: Dict[int, Tuple[float, float]] = {}
+    snaps = scrape_cache.history("nimbus", _WINDOW_SECONDS)
+    for snap in snaps:
+        slot = snap.metrics.first("beacon_head_slot")
+        hits = snap.metrics.first(_ATT_HIT, {"validator": "total"})
+        misses = snap.metrics.first(_ATT_MISS, {"validator": "total"})
+        if slot is not None and hits is not None and misses is not None:
+            by_epoch[int(slot) // _SLOTS_PER_EPOCH] = (hits, misses)
+
+    hits = sum(h for h, _ in by_epoch.values())
+    misses = sum(m for _, m in by_epoch.values())
+    covered = round((snaps[-1].scraped_at - snaps[0].scraped_at) / 60, 1) if len(snaps) > 1 else 0.0
+    return {
+        "window_minutes": covered,
+        "epochs_observed": len(by_epoch),
+        "attestation_misses": int(misses) if by_epoch else None,
+        "attestation_effectiveness_pct": round(hits / (hits + misses) * 100, 2) if hits + misses else None,
+        "head_slots_per_min": _rate_per_min("nimbus", "beacon_head_slot"),
+    }
 
 
 @tool
@@ -102,30 +159,31 @@ def query_validator_health(hours: int = 24) -> str:
 
     # ── Nimbus (consensus) ──────────────────────────────────────────────────
     try:
-        nm = _fetch_nimbus_metrics()
+        nimbus_snap = _fetch_nimbus_metrics()
+        nm = nimbus_snap.metrics
 
-        head_slot = _first(nm, "beacon_head_slot")
-        finalized_epoch = _first(nm, "beacon_finalized_epoch")
-        peers = _first(nm, "libp2p_peers")
-        start_ts = _first(nm, "process_start_time_seconds")
+        head_slot = nm.first("beacon_head_slot")
+        finalized_epoch = nm.first("beacon_finalized_epoch")
+        peers = nm.first("libp2p_peers")
+        start_ts = nm.first("process_start_time_seconds")
 
         uptime_hours = None
         if start_ts:
             uptime_hours = round((time.time() - start_ts) / 3600, 1)
 
         # Balance (in Gwei → ETH)
-        balance_gwei = _first(nm, "validator_monitor_balance_gwei", {"validator": "total"})
-        eff_balance_gwei = _first(nm, "validator_monitor_effective_balance_gwei", {"validator": "total"})
+        balance_gwei = nm.first("validator_monitor_balance_gwei", {"validator": "total"})
+        eff_balance_gwei = nm.first("validator_monitor_effective_balance_gwei", {"validator": "total"})
         balance_eth = round(balance_gwei / 1e9, 6) if balance_gwei else None
         eff_balance_eth = round(eff_balance_gwei / 1e9, 6) if eff_balance_gwei else None
 
         # Attestation effectiveness (prev epoch)
-        att_hits = _first(nm, "validator_monitor_prev_epoch_on_chain_attester_hit_total", {"validator": "total"})
-        att_misses = _first(nm, "validator_monitor_prev_epoch_on_chain_attester_miss_total", {"validator": "total"})
-        head_hits = _first(nm, "validator_monitor_prev_epoch_on_chain_head_attester_hit_total", {"validator": "total"})
-        head_misses = _first(nm, "validator_monitor_prev_epoch_on_chain_head_attester_miss_total", {"validator": "total"})
-        target_hits = _first(nm, "validator_monitor_prev_epoch_on_chain_target_attester_hit_total", {"validator": "total"})
-        target_misses = _first(nm, "validator_monitor_prev_epoch_on_chain_target_attester_miss_total", {"validator": "total"})
+        att_hits = nm.first("validator_monitor_prev_epoch_on_chain_attester_hit_total", {"validator": "total"})
+        att_misses = nm.first("validator_monitor_prev_epoch_on_chain_attester_miss_total", {"validator": "total"})
+        head_hits = nm.first("validator_monitor_prev_epoch_on_chain_head_attester_hit_total", {"validator": "total"})
+        head_misses = nm.first("validator_monitor_prev_epoch_on_chain_head_attester_miss_total", {"validator": "total"})
+        target_hits = nm.first("validator_monitor_prev_epoch_on_chain_target_attester_hit_total", {"validator": "total"})
+        target_misses = nm.first("validator_monitor_prev_epoch_on_chain_target_attester_miss_total", {"validator": "total"})
 
         def _effectiveness(hits, misses):
             if hits is None or misses is None:
@@ -137,9 +195,9 @@ def query_validator_health(hours: int = 24) -> str:
         head_eff = _effectiveness(head_hits, head_misses)
         target_eff = _effectiveness(target_hits, target_misses)
 
-        slashed = _first(nm, "validator_monitor_slashed", {"validator": "total"})
-        active = _first(nm, "validator_monitor_active", {"validator": "total"})
-        exited = _first(nm, "validator_monitor_exited", {"validator": "total"})
+        slashed = nm.first("validator_monitor_slashed", {"validator": "total"})
+        active = nm.first("validator_monitor_active", {"validator": "total"})
+        exited = nm.first("validator_monitor_exited", {"validator": "total"})
 
         result["consensus"] = {
             "client": "Nimbus",
@@ -161,6 +219,8 @@ def query_validator_health(hours: int = 24) -> str:
                 "target_pct": target_eff,
                 "prev_epoch_misses": int(att_misses) if att_misses else None,
             },
+            "last_hour": _nimbus_window(),
+            "scrape": nimbus_snap.meta(_SCRAPE_INTERVAL),
         }
 
         # Alerts
@@ -174,6 +234,18 @@ def query_validator_health(hours: int = 24) -> str:
             alerts.append(f"CRITICAL: Validator slashed!")
         if exited and exited > 0:
             alerts.append(f"WARNING: {int(exited)} validator(s) exited")
+        # Same bar as the previous-epoch check, over the hour: the counts cover
+        # all validators, so an odd miss is normal
+        window = result["consensus"]["last_hour"]
+        window_eff = window["attestation_effectiveness_pct"]
+        if window_eff is not None and window_eff < 95 and window["epochs_observed"] >= 3:
+            alerts.append(
+                f"WARNING: Attestation effectiveness {window_eff}% over the last "
+                f"{window['epochs_observed']} epochs ({window['attestation_misses']} missed, below 95%)"
+            )
+        # 5 slots/min expected; a stalled head means the node has lost sync
+        if window["head_slots_per_min"] is not None and window["head_slots_per_min"] < 2:
+            alerts.append(f"CRITICAL: Nimbus head slot advancing at {window['head_slots_per_min']}/min (expected ~5)")
 
     except Exception as e:
         result["consensus"] = {"client": "Nimbus", "status": "error", "error": str(e)}
@@ -181,25 +253,19 @@ def query_validator_health(hours: int = 24) -> str:
 
     # ── Nethermind (execution) ──────────────────────────────────────────────
     try:
-        em = _fetch_nethermind_metrics()
+        nethermind_snap = _fetch_nethermind_metrics()
+        em = nethermind_snap.metrics
 
         # Total peers across all client types
-        total_peers = int(_sum_all(em, "nethermind_sync_peers") or 0)
-        blocks = _first(em, "nethermind_blocks")
-        transactions = _first(em, "nethermind_transactions")
-        reorgs = _first(em, "nethermind_reorganizations")
-        mgas_per_sec = _first(em, "nethermind_mgas_per_sec")
-        new_payload_ms = _first(em, "nethermind_new_payload_execution_time")
-
-        # Version from any metric label
-        version = None
-        for _, entries in em.items():
-            for labels, _ in entries:
-                if "Version" in labels:
-                    version = labels["Version"]
-                    break
-            if version:
-                break
+        total_peers = int(em.sum("nethermind_sync_peers") or 0)
+        blocks = em.first("nethermind_blocks")
+        transactions = em.first("nethermind_transactions")
+        reorgs = em.first("nethermind_reorganizations")
+        mgas_per_sec = em.first("nethermind_mgas_per_sec")
+        new_payload_ms = em.first("nethermind_new_payload_execution_time")
+
+        # Version from any metric label (captured during the filtered parse)
+        version = em.label_value("Version")
 
         result["execution"] = {
             "client": "Nethermind",
@@ -211,6 +277,8 @@ def query_validator_health(hours: int = 24) -> str:
             "reorganizations": int(reorgs) if reorgs else None,
             "mgas_per_sec": round(mgas_per_sec, 1) if mgas_per_sec else None,
             "new_payload_ms": round(new_payload_ms, 1) if new_payload_ms else None,
+            "blocks_per_min_last_hour": _rate_per_min("nethermind", "nethermind_blocks"),
+            "scrape": nethermind_snap.meta(_SCRAPE_INTERVAL),
         }
 
         if total_peers < 5:
@@ -0,0 +1,172 @@
+"""
+Shared Prometheus text-format parser for exporter-backed tools.
+
+Single pass over the scrape: str.find to split each sample, one precompiled
+regex for the label block. Callers that only need a handful of series pass
+`wanted` so everything else is skipped before any label parsing — Nethermind
+and Nimbus expose thousands of series and the tools read a few dozen of them.
+
+The result is a dict {metric: [(labels, value), ...]} (so existing
+`m.get(name, [])` loops keep working) with indexed helpers:
+
+  first(name, {"validator": "total"})  — O(1) after the first call per label-key set
+  sum(name)                            — computed once per name, then cached
+  label_value("Version")               — first value seen for a label, any metric
+"""
+
+import math
+import re
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="([^"\\]*)"')
+# Slow path, only used when a label block contains escapes (\" \\ \n)
+_LABEL_ESCAPED_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"')
+_ESCAPES = {"\\\\": "\\", '\\"': '"', "\\n": "\n"}
+_ESCAPE_RE = re.compile(r'\\[\\"n]')
+
+
+def _parse_labels(block: str) -> Dict[str, str]:
+    if "\\" not in block:
+        return dict(_LABEL_RE.findall(block))
+    return {
+        k: _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group(0)], v)
+        for k, v in _LABEL_ESCAPED_RE.findall(block)
+    }
+
+
+def _split_sample(line: str) -> Tuple[str, str, str]:
+    """Split 'name{labels} value [timestamp]' into (name, label block, value token).
+
+    Plain str.find/rfind instead of a regex: the label block ends at the last
+    '}' because neither the value nor the timestamp can contain one.
+    """
+    brace = line.find("{")
+    if brace == -1:
+        parts = line.split(None, 2)
+        return parts[0], "", parts[1] if len(parts) > 1 else ""
+    close = line.rfind("}")
+    rest = line[close + 1:].split(None, 1)
+    return line[:brace].rstrip(), line[brace + 1:close], rest[0] if rest else ""
+
+
+class PrometheusMetrics(dict):
+    """Parsed scrape: {metric: [(labels, value), ...]} plus O(1) lookups."""
+
+    def __init__(self):
+        super().__init__()
+        self._sums: Dict[str, float] = {}
+        self._index: Dict[Tuple[str, Tuple[str, ...]], Dict[Tuple[str, ...], float]] = {}
+        self._labels: Dict[str, str] = {}
+
+    def first(self, name: str, labels_filter: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """Value of the first series of `name` whose labels match `labels_filter`."""
+        series = self.get(name)
+        if not series:
+            return None
+        if not labels_filter:
+            return series[0][1]
+        keys = tuple(sorted(labels_filter))
+        index = self._index.get((name, keys))
+        if index is None:
+            index = {}
+            for labels, value in series:
+                index.setdefault(tuple(labels.get(k) for k in keys), value)
+            self._index[(name, keys)] = index
+        return index.get(tuple(labels_filter[k] for k in keys))
+
+    def sum(self, name: str) -> Optional[float]:
+        """Sum of all series of `name` (None if absent or zero, like the old _sum_all)."""
+        total = self._sums.get(name)
+        if total is None:
+            total = self._sums[name] = sum(v for _, v in self.get(name, ()))
+        return total or None
+
+    def label_value(self, label: str) -> Optional[str]:
+        """First value seen for `label` on any series (captured labels included)."""
+        if label in self._labels:
+            return self._labels[label]
+        for series in self.values():
+            for labels, _ in series:
+                if label in labels:
+                    self._labels[label] = labels[label]
+                    return labels[label]
+        return None
+
+
+def parse_prometheus(
+    text: Union[str, Iterable[str]],
+    wanted: Optional[Iterable[str]] = None,
+    capture_labels: Iterable[str] = (),
+) -> PrometheusMetrics:
+    """Parse Prometheus text exposition format.
+
+    Args:
+        text: Full scrape body, or an iterable of lines (e.g. resp.iter_lines()).
+        wanted: Metric names to keep; None keeps everything. Other series are
+            skipped before their labels are parsed.
+        capture_labels: Label names whose first value should be recorded even
+            on series filtered out by `wanted` (e.g. Nethermind's "Version").
+
+    Samples whose value is NaN or ±Inf are skipped.
+    """
+    lines = text.splitlines() if isinstance(text, str) else text
+    wanted_set = frozenset(wanted) if wanted is not None else None
+    capture = {label: f'{label}="' for label in capture_labels}
+    result = PrometheusMetrics()
+    get_series = result.get
+    label_re = _LABEL_RE.findall
+    isfinite = math.isfinite
+
+    for line in lines:
+        if not line or line[0] == "#":
+            continue
+        if line[0] in " \t":
+            line = line.lstrip()
+            if not line or line[0] == "#":
+                continue
+
+        if capture:
+            for label, needle in list(capture.items()):
+                if needle in line:
+                    value = _parse_labels(_split_sample(line)[1]).get(label)
+                    if value is not None:
+                        result._labels[label] = value
+                        del capture[label]
+
+        if wanted_set is not None:
+            end = len(line)
+            for sep in ("{", " ", "\t"):
+                pos = line.find(sep, 0, end)
+                if pos != -1:
+                    end = pos
+            if line[:end] not in wanted_set:
+                continue
+
+        # Inlined _split_sample — this loop runs once per series in the scrape
+        brace = line.find("{")
+        if brace == -1:
+            parts = line.split(None, 2)
+            if len(parts) < 2:
+                continue
+            name, raw, labels = parts[0], parts[1], {}
+        else:
+            close = line.rfind("}")
+            rest = line[close + 1:].split(None, 1)
+            if not rest:
+                continue
+            name, raw = line[:brace].rstrip(), rest[0]
+            block = line[brace + 1:close]
+            labels = dict(label_re(block)) if "\\" not in block else _parse_labels(block)
+        try:
+            value = float(raw)
+        except ValueError:
+            continue
+        # NaN / ±Inf: not a usable reading for thresholds, and NaN is not valid JSON
+        if not isfinite(value):
+            continue
+        series = get_series(name)
+        if series is None:
+            series = result[name] = []
+        series.append((labels, value))
+
+    return result
@@ -1,15 +1,23 @@
 """
-Hostname resolution utility — four-tier lookup chain.
+Hostname resolution utility — five-tier lookup chain.
 
 Priority order per IP:
   1. topology.yaml device index  (zero latency, authoritative for known hosts)
-  2. ntopng active hosts cache   (populated once per report run via prime_ntopng_cache)
-  3. Reverse DNS with 2s timeout (PTR record via thread executor)
-  4. Raw IP fallback
-
-Results from tiers 1+2 are returned immediately without a network call.
-Tier 3 results are cached via @lru_cache for the process lifetime so the
-same IP is never looked up twice in a single run.
+  2. device-inventory hosts      (current IP holders, followed incrementally via device_events)
+  3. ntopng active hosts cache   (populated once per report run via prime_ntopng_cache)
+  4. Reverse DNS with 2s timeout (PTR record via thread executor)
+  5. Raw IP fallback
+
+Results from tiers 1-3 are returned immediately without a network call.
+Results are cached via @lru_cache so the same IP is never looked up twice
+in a single run; the cache is cleared whenever the inventory reports a
+changed device.
+
+For log lines from the past, resolve_hostname_at(ip, at) first asks the
+device-inventory lease history which MAC held the IP at that moment, so a
+DHCP reassignment since then doesn't pin old events on the current holder.
+resolve_rows_at applies it to per-event query results (each row resolved at
+its own timestamp); lease_at / leases_between expose the raw lease rows.
 
 DNS lookups run in a dedicated thread pool with a hard 2-second per-IP
 timeout to prevent blocking the ReAct loop on unresolvable addresses.
@@ -18,13 +26,19 @@ timeout to prevent blocking the ReAct loop on unresolvable addresses.
 import re
 import socket
 import logging
+import sqlite3
+import threading
+import time
 import concurrent.futures
+from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 import yaml
 
+from agent.config import get_config
+
 logger = logging.getLogger(__name__)
 
 # ── Thread pool for blocking DNS calls ────────────────────────────────────────
@@ -42,11 +56,28 @@ _PRIVATE_IP = re.compile(
 # Populated once at module import time. Maps ip -> short hostname.
 _topology_index: dict[str, str] = {}
 
-# ── Tier 2: ntopng active hosts cache ─────────────────────────────────────────
+# ── Tier 2: device-inventory current hosts ────────────────────────────────────
+# Maps ip -> (mac, short hostname). Loaded from the devices table on first
+# use, then kept current by applying device_events rows past a seq watermark
+# (see _sync_inventory_hosts below).
+_inventory_hosts: dict[str, tuple[str, str]] = {}
+
+# ── Tier 3: ntopng active hosts cache ─────────────────────────────────────────
 # Populated per report run via prime_ntopng_cache(). Maps ip -> hostname.
 _ntopng_cache: dict[str, str] = {}
 
 
+_LOCAL_SUFFIXES = (".mcducklabs.com", ".local", ".internal", ".home", ".lan")
+
+
+def _short_hostname(hostname: str) -> str:
+    """Strip common local domain suffixes for brevity."""
+    for suffix in _LOCAL_SUFFIXES:
+        if hostname.endswith(suffix):
+            return hostname[: -len(suffix)]
+    return hostname
+
+
 def _load_topology_index() -> dict[str, str]:
     """Index all known devices from topology.yaml by IP address."""
     index: dict[str, str] = {}
@@ -66,12 +97,7 @@ def _load_topology_index() -> dict[str, str]:
                 continue
             # Prefer alt_hostname for dual-role hosts, else hostname, else device_key
             hostname = info.get("alt_hostname") or info.get("hostname") or device_key
-            # Strip domain suffix for brevity
-            for suffix in (".mcducklabs.com", ".local", ".internal", ".home", ".lan"):
-                if hostname.endswith(suffix):
-                    hostname = hostname[: -len(suffix)]
-                    break
-            index[ip] = hostname
+            index[ip] = _short_hostname(hostname)
     except Exception as e:
         logger.warning("Failed to load topology index: %s", e)
     return index
@@ -103,20 +129,25 @@ def prime_ntopng_cache(host_data: list[dict]) -> None:
     logger.debug("ntopng cache primed with %d hosts", len(_ntopng_cache))
 
 
-@lru_cache(maxsize=512)
 def resolve_hostname(ip: str) -> str:
-    """Resolve an IP address to a display string via four-tier lookup.
+    """Resolve an IP address to a display string via five-tier lookup.
 
     Returns 'hostname (ip)' if any name is found, or the raw IP if all tiers fail.
 
-    Tier 1 (topology) and tier 2 (ntopng) never make network calls.
-    Tier 3 (reverse DNS) runs in a thread executor with a 2-second timeout.
+    Tiers 1-3 (topology, device inventory, ntopng) never make network calls.
+    Tier 4 (reverse DNS) runs in a thread executor with a 2-second timeout.
 
     Examples:
         "192.168.2.106"  → "nas (192.168.2.106)"      (topology index)
-        "192.168.2.60"   → "roku-wifi (192.168.2.60)"  (PTR record)
+        "192.168.2.60"   → "roku-wifi (192.168.2.60)"  (device inventory / PTR record)
         "10.0.0.255"     → "10.0.0.255"               (unresolvable, raw fallback)
     """
+    _sync_inventory_hosts()
+    return _resolve_hostname(ip)
+
+
+@lru_cache(maxsize=512)
+def _resolve_hostname(ip: str) -> str:
     if not ip or not isinstance(ip, str):
         return ip
 
@@ -128,26 +159,25 @@ def resolve_hostname(ip: str) -> str:
     if ip in _topology_index:
         return f"{_topology_index[ip]} ({ip})"
 
-    # Tier 2: ntopng cache
+    # Tier 2: device inventory
+    if ip in _inventory_hosts:
+        return f"{_inventory_hosts[ip][1]} ({ip})"
+
+    # Tier 3: ntopng cache
     if ip in _ntopng_cache:
         return f"{_ntopng_cache[ip]} ({ip})"
 
-    # Tier 3: reverse DNS with timeout
+    # Tier 4: reverse DNS with timeout
     try:
         future = _dns_executor.submit(socket.gethostbyaddr, ip)
         hostname, _, _ = future.result(timeout=2.0)
-        # Strip common local domain suffixes for brevity
-        for suffix in (".mcducklabs.com", ".local", ".internal", ".home", ".lan"):
-            if hostname.endswith(suffix):
-                hostname = hostname[: -len(suffix)]
-                break
-        return f"{hostname} ({ip})"
+        return f"{_short_hostname(hostname)} ({ip})"
     except concurrent.futures.TimeoutError:
         logger.debug("DNS timeout for %s", ip)
     except (socket.herror, socket.gaierror, OSError):
         pass
 
-    # Tier 4: raw IP fallback
+    # Tier 5: raw IP fallback
     return ip
 
 
@@ -160,7 +190,7 @@ def enrich_ip_column(text: str, max_lookups: int = 10) -> str:
     Args:
         text: Raw text possibly containing IP addresses.
         max_lookups: Max distinct IPs to resolve via DNS (default 10).
-                     IPs found in topology/ntopng tiers do not count toward
+                     IPs found in topology/inventory/ntopng tiers do not count toward
                      this limit as they require no network calls.
 
     Returns:
@@ -168,6 +198,7 @@ def enrich_ip_column(text: str, max_lookups: int = 10) -> str:
     """
     seen: dict[str, str] = {}
     dns_lookups_used = 0
+    _sync_inventory_hosts()
 
     def _replace(m: re.Match) -> str:
         nonlocal dns_lookups_used
@@ -180,6 +211,10 @@ def enrich_ip_column(text: str, max_lookups: int = 10) -> str:
             result = f"{_topology_index[ip]} ({ip})"
             seen[ip] = result
             return result
+        if ip in _inventory_hosts:
+            result = f"{_inventory_hosts[ip][1]} ({ip})"
+            seen[ip] = result
+            return result
         if ip in _ntopng_cache:
             result = f"{_ntopng_cache[ip]} ({ip})"
             seen[ip] = result
@@ -191,15 +226,192 @@ def enrich_ip_column(text: str, max_lookups: int = 10) -> str:
             return ip
 
         dns_lookups_used += 1
-        resolved = resolve_hostname(ip)
+        resolved = _resolve_hostname(ip)
         seen[ip] = resolved
         return resolved
 
     result = _PRIVATE_IP.sub(_replace, text)
 
     # Append a note when the cap was hit and some IPs remain unresolved
-    unresolved = sum(1 for k, v in seen.items() if v == k and k not in _topology_index and k not in _ntopng_cache)
+    unresolved = sum(1 for k, v in seen.items() if v == k and k not in _topology_index
+                     and k not in _inventory_hosts and k not in _ntopng_cache)
     if dns_lookups_used >= max_lookups and unresolved:
         result += f"\n(+ {unresolved} IPs not resolved — lookup limit reached)"
 
     return result
+
+
+# ── Historical tier: device-inventory lease history ──────────────────────────
+# exporters/device-inventory keeps lease_history(mac, ip, vlan, valid_from,
+# valid_to) indexed on (ip, valid_from). Opened read-only on first use; if the
+# database isn't mounted, the historical lookups return nothing and callers
+# fall back to the live tiers above.
+_inventory_conn: Optional[sqlite3.Connection] = None
+_inventory_lock = threading.Lock()
+
+_LEASE_COLUMNS = ("mac", "ip", "vlan", "valid_from", "valid_to", "hostname")
+_LEASE_SELECT = """
+    SELECT l.mac, l.ip, l.vlan, l.valid_from, l.valid_to, d.hostname
+    FROM lease_history l LEFT JOIN devices d ON d.mac = l.mac
+"""
+
+Timestamp = Union[datetime, int, float]
+
+
+def _to_epoch(at: Timestamp) -> int:
+    return int(at.timestamp()) if isinstance(at, datetime) else int(at)
+
+
+def _inventory() -> Optional[sqlite3.Connection]:
+    global _inventory_conn
+    if _inventory_conn is None:
+        path = Path(get_config().device_inventory_db)
+        if not path.exists():
+            return None
+        # mode=ro: never writes rows, but can still use the WAL's shared-memory
+        # index, so reads see the exporter's latest commit
+        _inventory_conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    return _inventory_conn
+
+
+# Tier 2 bookkeeping: last device_events.seq applied (None = not loaded yet)
+_inventory_watermark: Optional[int] = None
+_inventory_synced_at = 0.0
+_INVENTORY_SYNC_INTERVAL = 30.0  # seconds between change-feed polls
+
+
+def _load_inventory_hosts(conn: sqlite3.Connection) -> None:
+    """Full load: the watermark first, then the devices table, so no event is missed."""
+    global _inventory_watermark
+    watermark = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM device_events").fetchone()[0]
+    rows = conn.execute(
+        "SELECT ip, mac, hostname FROM devices WHERE ip IS NOT NULL AND hostname IS NOT NULL "
+        "ORDER BY last_seen"
+    ).fetchall()
+    _inventory_hosts.clear()
+    for ip, mac, hostname in rows:  # latest last_seen wins a shared IP
+        _inventory_hosts[ip] = (mac, _short_hostname(hostname))
+    _inventory_watermark = watermark
+
+
+def _apply_device_events(conn: sqlite3.Connection) -> int:
+    """Apply device_events past the watermark. Returns rows applied."""
+    global _inventory_watermark
+    rows = conn.execute(
+        "SELECT seq, mac, ip, prev_ip, hostname FROM device_events WHERE seq > ? ORDER BY seq",
+        (_inventory_watermark,),
+    ).fetchall()
+    for seq, mac, ip, prev_ip, hostname in rows:
+        # Drop the old address only if this MAC still owns it — in an IP swap
+        # the other device's event may already have claimed it
+        if prev_ip and prev_ip != ip and _inventory_hosts.get(prev_ip, ("",))[0] == mac:
+            del _inventory_hosts[prev_ip]
+        if ip and hostname:
+            _inventory_hosts[ip] = (mac, _short_hostname(hostname))
+        elif ip and _inventory_hosts.get(ip, ("",))[0] == mac:
+            del _inventory_hosts[ip]
+        _inventory_watermark = seq
+    return len(rows)
+
+
+def _sync_inventory_hosts(force: bool = False) -> None:
+    """Bring tier 2 up to date with the inventory's change feed.
+
+    Polls at most every _INVENTORY_SYNC_INTERVAL seconds; each poll is one
+    indexed range scan over the events since the last one. Any applied
+    change clears the resolve_hostname cache.
+    """
+    global _inventory_synced_at
+    now = time.monotonic()
+    if not force and now - _inventory_synced_at < _INVENTORY_SYNC_INTERVAL:
+        return
+    _inventory_synced_at = now
+    with _inventory_lock:
+        try:
+            conn = _inventory()
+            if conn is None:
+                return
+            if _inventory_watermark is None:
+                _load_inventory_hosts(conn)
+                changed = len(_inventory_hosts)
+            else:
+                newest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM device_events").fetchone()[0]
+                if newest < _inventory_watermark:  # database was replaced
+                    _load_inventory_hosts(conn)
+                    changed = len(_inventory_hosts)
+                else:
+                    changed = _apply_device_events(conn) if newest > _inventory_watermark else 0
+        except sqlite3.Error as e:
+            logger.warning("Device inventory sync failed: %s", e)
+            return
+    if changed:
+        _resolve_hostname.cache_clear()
+        logger.debug("Device inventory tier: %d updates, %d hosts", changed, len(_inventory_hosts))
+
+
+def _lease_query(sql: str, params: tuple) -> list[dict]:
+    with _inventory_lock:
+        try:
+            conn = _inventory()
+            if conn is None:
+                return []
+            rows = conn.execute(_LEASE_SELECT + sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Lease history lookup failed: %s", e)
+            return []
+    return [dict(zip(_LEASE_COLUMNS, row)) for row in rows]
+
+
+def lease_at(ip: str, at: Timestamp) -> Optional[dict]:
+    """The lease covering `ip` at time `at` (datetime or unix seconds), or None.
+
+    One index seek: the latest lease for the IP that started at or before
+    `at`, accepted only if it hadn't ended yet.
+    """
+    ts = _to_epoch(at)
+    rows = _lease_query(
+        "WHERE l.ip = ? AND l.valid_from <= ? ORDER BY l.valid_from DESC LIMIT 1", (ip, ts)
+    )
+    if not rows or (rows[0]["valid_to"] is not None and rows[0]["valid_to"] <= ts):
+        return None
+    return rows[0]
+
+
+def leases_between(ip: str, start: Timestamp, end: Timestamp) -> list[dict]:
+    """Every lease of `ip` overlapping [start, end], oldest first."""
+    return _lease_query(
+        "WHERE l.ip = ? AND l.valid_from <= ? AND (l.valid_to IS NULL OR l.valid_to >= ?) "
+        "ORDER BY l.valid_from",
+        (ip, _to_epoch(end), _to_epoch(start)),
+    )
+
+
+def resolve_hostname_at(ip: str, at: Timestamp) -> str:
+    """Like resolve_hostname, but for the device that held `ip` at time `at`.
+
+    Falls back to resolve_hostname(ip) when the lease history has no answer.
+    """
+    lease = lease_at(ip, at)
+    if lease is None:
+        return resolve_hostname(ip)
+    name = lease["hostname"] or lease["mac"]
+    return f"{name} ({ip})"
+
+
+def resolve_rows_at(rows: list[dict], ip_key: str, at_key: str) -> list[dict]:
+    """Replace each row's private IP in `ip_key` with the device that held it
+    at the row's `at_key` time (unix seconds), via resolve_hostname_at.
+
+    For per-event results (one row per query / log line); rows are changed
+    in place and returned. Public IPs are left as they are.
+    """
+    seen: dict[tuple[str, int], str] = {}
+    for row in rows:
+        ip, at = row.get(ip_key), row.get(at_key)
+        if not ip or at is None or not _PRIVATE_IP.fullmatch(ip):
+            continue
+        key = (ip, int(at))
+        if key not in seen:
+            seen[key] = resolve_hostname_at(ip, key[1])
+        row[ip_key] = seen[key]
+    return rows
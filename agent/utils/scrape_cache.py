@@ -0,0 +1,182 @@
+"""
+Background scrape-and-cache layer for exporter-backed health tools.
+
+In the scheduler, each target (Nimbus, Nethermind, Proxmox exporter, QNAP
+exporter) is polled by its own daemon thread on its own interval. The last N
+parsed snapshots are kept in an in-memory ring buffer, so:
+
+  - tools answer from the latest snapshot instead of fetching + parsing a full
+    /metrics page on every call (the daily report and chat users call them a lot)
+  - every answer carries staleness metadata (scraped_at, age_seconds, source)
+  - rate-of-change fields (e.g. attestation misses over the last hour) can be
+    computed from history — a single live scrape cannot provide them
+
+Pollers only run where start_all() is called — the scheduler, so history is
+warm for the daily report. Every other process that imports the tools (the
+Telegram and Slack bots, the UI, the MCP server) polls nothing: get() scrapes
+once synchronously when it has no snapshot younger than max_age, and that
+snapshot serves the following calls, so each process adds at most one scrape
+per target per max_age.
+
+Disable with SCRAPE_CACHE_ENABLED=false — get() then always scrapes live.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from agent.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Snapshot:
+    """One parsed scrape of a target."""
+    metrics: Any
+    scraped_at: float
+    duration_ms: float
+    source: str = "cache"   # "cache" (background poller) or "live" (synchronous)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.scraped_at
+
+    def meta(self, interval: Optional[float] = None) -> Dict[str, Any]:
+        """Staleness metadata to attach to tool output."""
+        age = self.age_seconds
+        meta = {
+            "scraped_at": datetime.fromtimestamp(self.scraped_at, timezone.utc).isoformat(),
+            "age_seconds": round(age, 1),
+            "source": self.source,
+            "scrape_ms": round(self.duration_ms, 1),
+        }
+        if interval:
+            meta["stale"] = age > interval * 3
+        return meta
+
+
+@dataclass
+class _Target:
+    name: str
+    fetch: Callable[[], Any]
+    interval: float
+    history: Deque[Snapshot]
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    thread: Optional[threading.Thread] = None
+    last_error: Optional[str] = None
+    last_error_at: Optional[float] = None
+
+
+_targets: Dict[str, _Target] = {}
+_registry_lock = threading.Lock()
+
+
+def _enabled() -> bool:
+    return get_config().scrape_cache_enabled
+
+
+def register(name: str, fetch: Callable[[], Any], interval: float) -> None:
+    """Register a scrape target. `fetch` returns parsed metrics (or raises)."""
+    keep = max(2, int(get_config().scrape_history_seconds / interval) + 1)
+    with _registry_lock:
+        if name not in _targets:
+            _targets[name] = _Target(name=name, fetch=fetch, interval=interval, history=deque(maxlen=keep))
+
+
+def _scrape(target: _Target, source: str) -> Snapshot:
+    t0 = time.perf_counter()
+    metrics = target.fetch()
+    snap = Snapshot(
+        metrics=metrics,
+        scraped_at=time.time(),
+        duration_ms=(time.perf_counter() - t0) * 1000,
+        source=source,
+    )
+    with target.lock:
+        target.history.append(snap)
+        target.last_error = None
+    return snap
+
+
+def _poll(target: _Target) -> None:
+    while True:
+        try:
+            _scrape(target, "cache")
+        except Exception as e:
+            with target.lock:
+                target.last_error = str(e)
+                target.last_error_at = time.time()
+            logger.warning("Scrape of %s failed: %s", target.name, e)
+        time.sleep(target.interval)
+
+
+def _ensure_started(target: _Target) -> None:
+    with target.lock:
+        if target.thread is not None and target.thread.is_alive():
+            return
+        target.thread = threading.Thread(
+            target=_poll, args=(target,), name=f"scrape-{target.name}", daemon=True
+        )
+        target.thread.start()
+
+
+def start_all() -> None:
+    """Start background pollers for every registered target."""
+    if not _enabled():
+        return
+    for target in list(_targets.values()):
+        _ensure_started(target)
+    logger.info("Scrape cache pollers running: %s", ", ".join(sorted(_targets)))
+
+
+def get(name: str, max_age: Optional[float] = None) -> Snapshot:
+    """Latest snapshot for `name`, scraping live if none is fresh enough.
+
+    max_age defaults to 2× the target interval. Never starts a poller (see
+    start_all()). Raises whatever the fetch raises when a live scrape is
+    needed and fails.
+    """
+    target = _targets[name]
+    if not _enabled():
+        return _scrape(target, "live")
+
+    max_age = max_age if max_age is not None else target.interval * 2
+    with target.lock:
+        latest = target.history[-1] if target.history else None
+    if latest is not None and latest.age_seconds <= max_age:
+        return latest
+    return _scrape(target, "live")
+
+
+def history(name: str, window_seconds: Optional[float] = None) -> List[Snapshot]:
+    """Snapshots for `name`, oldest first, optionally limited to the last window."""
+    target = _targets.get(name)
+    if target is None:
+        return []
+    with target.lock:
+        snaps = list(target.history)
+    if window_seconds is not None:
+        cutoff = time.time() - window_seconds
+        snaps = [s for s in snaps if s.scraped_at >= cutoff]
+    return snaps
+
+
+def status() -> Dict[str, Dict[str, Any]]:
+    """Per-target cache state (for diagnostics / the UI status page)."""
+    out = {}
+    for name, target in _targets.items():
+        with target.lock:
+            latest = target.history[-1] if target.history else None
+            out[name] = {
+                "interval_seconds": target.interval,
+                "snapshots": len(target.history),
+                "running": bool(target.thread and target.thread.is_alive()),
+                "latest": latest.meta(target.interval) if latest else None,
+                "last_error": target.last_error,
+            }
+    return out
@@ -23,3 +23,8 @@ def split_message(text: str, chunk_size: int) -> list[str]:
         chunks.append(text[:split_at])
         text = text[split_at:].lstrip("\n")
     return chunks
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) for budgeting prompt context."""
+    return len(text) // 4 + 1
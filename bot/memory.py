@@ -0,0 +1,211 @@
+"""
+Conversation memory for the chat bots.
+
+Each conversation (Telegram chat, Slack channel) is a Redis list of turns,
+appended with RPUSH + LTRIM in one MULTI block — no read-modify-write, so
+concurrent writers never conflict — plus a rolling summary string:
+
+  <prefix>:<conversation>           list of {"role", "content", "tokens"} JSON
+  <prefix>:<conversation>:summary   summary of the turns compacted out of the list
+
+load() returns the summary (as a system message) followed by the newest
+turns that fit the token budget, ready to go between the system prompt and
+the question. Once the list grows past `compact_after` turns, compact()
+folds everything but the most recent `keep_recent` turns into the summary
+with one small LLM call, so long conversations stay cheap. The bots run it
+in the background on the agent pool, under its own per-conversation key,
+so it never takes one of the chat's queue slots.
+
+Both keys expire after `ttl` seconds of inactivity. Redis being unavailable
+degrades to no memory, as before.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Callable, Optional
+
+from agent.utils.text import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM = """You maintain the running summary of a chat between a network operator and
+First Light AI, a network security and infrastructure assistant.
+
+Merge the existing summary with the new turns into one updated summary:
+- What the operator asked about and what was found (keep IPs, hostnames, devices, numbers)
+- Decisions, follow-ups and open questions
+- Drop greetings and anything superseded by later turns
+
+Plain bullet points, at most ~200 words. No preamble.
+"""
+
+SUMMARY_USER = """Existing summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+
+def window(turns: list[dict], summary: str, token_budget: int) -> list[dict]:
+    """Summary plus the newest turns that fit `token_budget`, oldest first, starting on a user turn."""
+    messages = []
+    budget = token_budget
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        budget -= estimate_tokens(summary)
+
+    recent: list[dict] = []
+    for turn in reversed(turns):
+        cost = turn.get("tokens") or estimate_tokens(turn["content"])
+        if cost > budget:
+            break
+        budget -= cost
+        recent.append({"role": turn["role"], "content": turn["content"]})
+    recent.reverse()
+    while recent and recent[0]["role"] != "user":
+        recent.pop(0)
+    return messages + recent
+
+
+class ConversationMemory:
+    """Redis list-backed conversation history with token windowing and rolling summaries."""
+
+    def __init__(
+        self,
+        prefix: str,
+        redis: Callable[[], Optional[object]],
+        ttl: int = 3600 * 4,
+        token_budget: int = 3000,
+        compact_after: int = 16,
+        keep_recent: int = 6,
+        max_turns: int = 60,
+    ):
+        self.prefix = prefix
+        self._redis = redis
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self.compact_after = compact_after
+        self.keep_recent = keep_recent
+        self.max_turns = max_turns    # hard cap in case compaction keeps failing
+        self._tasks: set[asyncio.Task] = set()
+
+    def _keys(self, conversation) -> tuple[str, str]:
+        key = f"{self.prefix}:{conversation}"
+        return key, f"{key}:summary"
+
+    def _read(self, r, conversation) -> tuple[list[dict], str]:
+        key, summary_key = self._keys(conversation)
+        pipe = r.pipeline(transaction=False)
+        pipe.lrange(key, 0, -1)
+        pipe.get(summary_key)
+        raw_turns, summary = pipe.execute()
+        turns = []
+        for raw in raw_turns:
+            try:
+                turn = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(turn, dict) and turn.get("content"):
+                turns.append(turn)
+        return turns, summary or ""
+
+    def load(self, conversation) -> list[dict]:
+        """History messages for the next query (empty if there is none or Redis is down)."""
+        r = self._redis()
+        if not r:
+            return []
+        try:
+            turns, summary = self._read(r, conversation)
+        except Exception as e:
+            logger.warning("Could not load history for %s: %s", conversation, e)
+            return []
+        return window(turns, summary, self.token_budget)
+
+    def append(self, conversation, turns: list[dict]) -> int:
+        """Append turns and refresh the TTL; returns the stored turn count (0 on failure)."""
+        r = self._redis()
+        if not r:
+            return 0
+        key, summary_key = self._keys(conversation)
+        entries = [
+            json.dumps({"role": t["role"], "content": t["content"], "tokens": estimate_tokens(t["content"])})
+            for t in turns if t.get("content")
+        ]
+        if not entries:
+            return 0
+        try:
+            pipe = r.pipeline()    # MULTI/EXEC: applied together, nothing to retry
+            pipe.rpush(key, *entries)
+            pipe.ltrim(key, -self.max_turns, -1)
+            pipe.expire(key, self.ttl)
+            pipe.expire(summary_key, self.ttl)
+            length = pipe.execute()[0]
+        except Exception as e:
+            logger.warning("Could not save history for %s: %s", conversation, e)
+            return 0
+        return min(length, self.max_turns)
+
+    def clear(self, conversation) -> None:
+        r = self._redis()
+        if r:
+            try:
+                r.delete(*self._keys(conversation))
+            except Exception as e:
+                logger.warning("Could not clear history for %s: %s", conversation, e)
+
+    def compact(self, conversation, session_id: Optional[str] = None) -> bool:
+        """Fold all but the newest `keep_recent` turns into the summary. Returns True if it did."""
+        from agent.llm import chat
+
+        r = self._redis()
+        if not r:
+            return False
+        turns, summary = self._read(r, conversation)
+        old = turns[:-self.keep_recent] if self.keep_recent else turns
+        if len(turns) <= self.compact_after or not old:
+            return False
+
+        text = "\n\n".join(f"{t['role'].upper()}: {t['content']}" for t in old)
+        response = chat(
+            [{"role": "system", "content": SUMMARY_SYSTEM},
+             {"role": "user", "content": SUMMARY_USER.format(summary=summary or "(none)", turns=text)}],
+            "micro",
+            session_id=session_id,
+            agent_name="interactive/memory",
+        )
+        new_summary = (response.choices[0].message.content or "").strip()
+        if not new_summary:
+            return False
+
+        # Appends go on the right, so dropping the summarized turns from the
+        # left is safe without a lock; queries for the chat are serialized anyway
+        key, summary_key = self._keys(conversation)
+        pipe = r.pipeline()
+        pipe.set(summary_key, new_summary, ex=self.ttl)
+        pipe.ltrim(key, len(old), -1)
+        pipe.execute()
+        logger.info("Compacted %d turns of %s into the summary", len(old), conversation)
+        return True
+
+    async def record(self, conversation, question: str, answer: str, session_id: Optional[str] = None) -> None:
+        """Append a question/answer exchange, compacting in the background when the list is long."""
+        length = self.append(conversation, [
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer},
+        ])
+        if length > self.compact_after:
+            task = asyncio.create_task(self._compact_later(conversation, session_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _compact_later(self, conversation, session_id: Optional[str]) -> None:
+        from agent.execution import get_executor
+        try:
+            # Own key: compactions of one conversation run one at a time, but
+            # never take the per-key queue slots of the chat's questions
+            await get_executor().run(self.compact, conversation, session_id,
+                                     key=f"compact:{self.prefix}:{conversation}")
+        except Exception as e:
+            logger.warning("History compaction for %s failed: %s", conversation, e)
@@ -8,7 +8,7 @@ Uses Slack Bolt in Socket Mode — no public URL required. Listens for:
       /firstlight report
       /firstlight ask <question>
 
-Conversation history per channel is stored in Redis (same structure as Telegram).
+Conversation history per channel is stored in Redis (bot/memory.py, same as Telegram).
 
 Required env vars:
   SLACK_BOT_TOKEN   — xoxb-... (OAuth bot token)
@@ -16,14 +16,16 @@ Required env vars:
 
 Optional:
   SLACK_MSG_CHUNK   — max chars per message part (default 2800)
+  SLACK_EDIT_INTERVAL — min seconds between progress edits (default 1.5)
 """
 
 import asyncio
-import json
 import logging
 import os
 
 from agent.utils.text import split_message
+from bot.memory import ConversationMemory
+from bot.streaming import ProgressiveReply
 
 logging.basicConfig(
     level=logging.INFO,
@@ -32,8 +34,8 @@ logging.basicConfig(
 logger = logging.getLogger("slack_bot")
 
 _MSG_CHUNK = int(os.getenv("SLACK_MSG_CHUNK", "2800"))
-_HISTORY_TTL = 3600 * 4
-_HISTORY_MAX_TURNS = 20
+# chat.update is Tier 3 (~50/min); one edit per 1.5s keeps a reply well inside it
+_EDIT_INTERVAL = float(os.getenv("SLACK_EDIT_INTERVAL", "1.5"))
 
 # Module-level Redis singleton — avoids a new connection per message
 _redis_client = None
@@ -57,98 +59,58 @@ def _get_redis():
         return None
 
 
-def _history_key(channel: str) -> str:
-    return f"slack:history:{channel}"
+# Per-channel history: a Redis list of turns plus a rolling summary, 4h TTL
+_memory = ConversationMemory("slack:memory", _get_redis)
 
 
-def _load_history(channel: str) -> list[dict]:
-    r = _get_redis()
-    if not r:
-        return []
-    try:
-        raw = r.get(_history_key(channel))
-        return json.loads(raw) if raw else []
-    except Exception:
-        return []
-
-
-def _save_history(channel: str, history: list[dict]) -> None:
-    r = _get_redis()
-    if not r:
-        return
-    try:
-        trimmed = history[-_HISTORY_MAX_TURNS:]
-        r.setex(_history_key(channel), _HISTORY_TTL, json.dumps(trimmed))
-    except Exception:
-        pass
-
-
-def _atomic_append_turns(channel: str, turns: list[dict], max_retries: int = 3) -> None:
-    """Atomically append turns to Slack conversation history using WATCH/MULTI/EXEC."""
-    r = _get_redis()
-    if not r:
-        return
-    key = _history_key(channel)
-    for attempt in range(max_retries + 1):
-        try:
-            with r.pipeline() as pipe:
-                pipe.watch(key)
-                raw = pipe.get(key)
-                history = json.loads(raw) if raw else []
-                history.extend(turns)
-                trimmed = history[-_HISTORY_MAX_TURNS:]
-                pipe.multi()
-                pipe.setex(key, _HISTORY_TTL, json.dumps(trimmed))
-                pipe.execute()
-            return
-        except Exception as e:
-            import redis as _redis
-            if isinstance(e, _redis.WatchError) and attempt < max_retries:
-                import random, time as _time
-                _time.sleep(random.uniform(0.05, 0.15))
-                continue
-            try:
-                r.setex(key, _HISTORY_TTL, json.dumps(turns[-_HISTORY_MAX_TURNS:]))
-            except Exception:
-                pass
-            return
-
+# ── Query helper ─────────────────────────────────────────────────────────────────
 
-# ── Message chunking ─────────────────────────────────────────────────────────────
+async def _run_query(question: str, channel: str, say, client, session_prefix: str = "slack") -> None:
+    """Run the interactive agent query with history, streaming progress into one message.
 
-async def _post_chunks(say, text: str) -> None:
-    """Post a potentially long response as multiple messages."""
-    chunks = split_message(text, _MSG_CHUNK)
-    for i, chunk in enumerate(chunks):
-        suffix = f"\n_(continued {i+1}/{len(chunks)})_" if len(chunks) > 1 else ""
-        await say(chunk + suffix)
+    A placeholder is posted and updated in place (chat.update) with each tool
+    call and the answer as it is generated, then replaced by the final
+    answer; overflow goes into follow-up messages.
+    """
+    from agent.graph import stream_interactive_query
 
+    history = _memory.load(channel)
+    session_id = f"{session_prefix}-{channel}"
+    placeholder = await say(":hourglass_flowing_sand: Querying the network data...")
+    ts, post_channel = placeholder["ts"], placeholder["channel"]
 
-# ── Query helper ─────────────────────────────────────────────────────────────────
+    async def edit(text: str) -> None:
+        await client.chat_update(channel=post_channel, ts=ts, text=text)
 
-async def _run_query(question: str, channel: str, session_prefix: str = "slack") -> str:
-    """Run the interactive agent query with history. Returns answer text."""
-    history = _load_history(channel)
+    progress = ProgressiveReply(edit, min_interval=_EDIT_INTERVAL, max_chars=_MSG_CHUNK)
+    answer = ""
     try:
-        from agent.graph import run_interactive_query
-        answer = await run_interactive_query(
+        async for event in stream_interactive_query(
             question=question,
             history=history,
-            session_id=f"{session_prefix}-{channel}",
-        )
-        _atomic_append_turns(channel, [
-            {"role": "user", "content": question},
-            {"role": "assistant", "content": answer},
-        ])
-        return answer
+            session_id=session_id,
+        ):
+            if event["type"] == "answer":
+                answer = event["text"]
+            else:
+                await progress.update(event)
+        await _memory.record(channel, question, answer, session_id=session_id)
     except Exception as e:
         logger.error("Slack query failed: %s", e, exc_info=True)
-        return f":warning: Query failed: {e}"
+        answer = f":warning: Query failed: {e}"
+    finally:
+        await progress.close()
+
+    chunks = split_message(answer, _MSG_CHUNK)
+    suffix = f"\n_(continued 1/{len(chunks)})_" if len(chunks) > 1 else ""
+    await edit(chunks[0] + suffix)
+    for i, chunk in enumerate(chunks[1:], start=2):
+        await say(chunk + f"\n_(continued {i}/{len(chunks)})_")
 
 
 # ── Handler functions (registered inside _main to avoid module-level AsyncApp) ──
 
-async def handle_mention(event, say):
+async def handle_mention(event, say, client):
     """Handle @firstlight <question> mentions."""
     text = event.get("text", "")
     # Remove <@BOTID> prefix
@@ -158,15 +120,13 @@ async def handle_mention(event, say):
         return
 
     channel = event.get("channel", "unknown")
-    await say(":hourglass_flowing_sand: Querying the network data...")
-    answer = await _run_query(question, channel)
-    await _post_chunks(say, answer)
+    await _run_query(question, channel, say, client)
 
 
 _GREETINGS = {"hi", "hey", "hello", "yo", "sup", "howdy"}
 
 
-async def handle_dm(event, say):
+async def handle_dm(event, say, client):
     """Handle direct messages to the bot."""
     # Ignore bot messages and message edits
     if event.get("bot_id") or event.get("subtype"):
@@ -180,9 +140,7 @@ async def handle_dm(event, say):
         return
 
     channel = event.get("channel", "unknown")
-    await say(":hourglass_flowing_sand: Querying the network data...")
-    answer = await _run_query(question=text, channel=channel, session_prefix="slack-dm")
-    await _post_chunks(say, answer)
+    await _run_query(text, channel, say, client, session_prefix="slack-dm")
 
 
 def _can_acquire_report_lock() -> bool:
@@ -208,7 +166,7 @@ def _release_report_lock() -> None:
             pass
 
 
-async def handle_slash(ack, body, say):
+async def handle_slash(ack, body, say, client):
     """Handle /firstlight slash command."""
     await ack()
 
@@ -227,14 +185,12 @@ async def handle_slash(ack, body, say):
         return
 
     if text == "status":
-        await say(":hourglass_flowing_sand: Running status check...")
-        answer = await _run_query(
+        await _run_query(
             "Give me a concise status summary covering: "
             "(1) QNAP NAS health, (2) Proxmox VMs, (3) recent firewall blocks, "
             "(4) top threat intel findings. Use bullet points. Be brief.",
-            channel,
+            channel, say, client,
         )
-        await _post_chunks(say, answer)
         return
 
     if text == "report":
@@ -262,9 +218,7 @@ async def handle_slash(ack, body, say):
     question = text[4:].strip() if text.startswith("ask ") else text
 
     if question:
-        await say(":hourglass_flowing_sand: Querying the network data...")
-        answer = await _run_query(question, channel)
-        await _post_chunks(say, answer)
+        await _run_query(question, channel, say, client)
     else:
         await say("Please provide a question. Usage: `/firstlight ask <your question>`")
 
@@ -0,0 +1,115 @@
+"""
+Progressive replies for the chat bots.
+
+ProgressiveReply turns agent.graph.stream_interactive_query events into a
+single placeholder message that is edited in place: one status line per tool
+call while the agent gathers data, then the answer as it is generated.
+
+Edits are rate-limited (Telegram and Slack both throttle message edits); an
+update that arrives inside the interval is held and flushed by a timer, so
+the last state is always shown without editing on every token. The final
+answer is delivered by the caller, which knows the platform's formatting
+and length limits.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_CURSOR = " ▍"
+
+
+def tool_label(name: str) -> str:
+    """query_threat_intel_summary → threat intel summary"""
+    return name.removeprefix("query_").replace("_", " ")
+
+
+class ProgressiveReply:
+    """Rate-limited in-place rendering of agent progress."""
+
+    def __init__(
+        self,
+        edit: Callable[[str], Awaitable[None]],
+        min_interval: float = 1.5,
+        max_chars: int = 4000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._edit = edit
+        self.min_interval = min_interval
+        self.max_chars = max_chars
+        self._clock = clock
+        self._steps: list[list] = []    # [label, state] — state: None running, True ok, False failed
+        self._draft = ""
+        self._ahead: Optional[int] = None    # set while waiting for an agent worker
+        self._shown: Optional[str] = None
+        self._last_edit = float("-inf")
+        self._timer: Optional[asyncio.Task] = None
+        self.edits = 0
+
+    def render(self) -> str:
+        icons = {None: "⏳", True: "✅", False: "⚠️"}
+        lines = [f"{icons[state]} {label}" for label, state in self._steps]
+        text = "\n".join(lines)
+        if self._draft:
+            room = self.max_chars - len(text) - len(_CURSOR) - 3
+            draft = self._draft if len(self._draft) <= room else "…" + self._draft[-(room - 1):]
+            text = f"{text}\n\n{draft}{_CURSOR}" if text else draft + _CURSOR
+        if not text and self._ahead is not None:
+            return f"⏳ Queued — {self._ahead} request(s) ahead…" if self._ahead else "⏳ Queued — starting next…"
+        return text or "⏳ Thinking…"
+
+    async def update(self, event: dict) -> None:
+        """Apply one stream event and edit the message if the interval allows."""
+        kind = event.get("type")
+        if kind == "queued":
+            self._ahead = event.get("ahead", 0)
+        elif kind == "tool_start":
+            # Text streamed before a tool call was the model thinking aloud
+            self._draft = ""
+            self._steps.append([tool_label(event["tool"]), None])
+        elif kind == "tool_end":
+            for step in reversed(self._steps):
+                if step[0] == tool_label(event["tool"]) and step[1] is None:
+                    step[1] = bool(event.get("ok"))
+                    break
+        elif kind == "token":
+            self._draft += event.get("text", "")
+        else:
+            return
+        await self._maybe_flush()
+
+    async def _maybe_flush(self) -> None:
+        wait = self._last_edit + self.min_interval - self._clock()
+        if wait <= 0:
+            await self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(wait))
+
+    async def _flush_later(self, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+            self._timer = None
+            await self._flush()
+        except asyncio.CancelledError:
+            pass
+
+    async def _flush(self) -> None:
+        text = self.render()
+        if text == self._shown:
+            return
+        self._last_edit = self._clock()
+        try:
+            await self._edit(text)
+            self._shown = text
+            self.edits += 1
+        except Exception as e:  # rate limited, message deleted, ... — the next flush retries
+            logger.debug("Progress edit failed: %s", e)
+
+    async def close(self) -> None:
+        """Stop pending edits before the caller writes the final answer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -16,14 +16,14 @@ Security: only responds to chat IDs listed in TELEGRAM_ALLOWED_CHAT_IDS
 """
 
 import asyncio
-import json
 import logging
 import os
 import signal
 from typing import Optional
 
-from telegram import Update
+from telegram import Message, Update
 from telegram.constants import ChatAction, ParseMode
+from telegram.error import BadRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -33,6 +33,8 @@ from telegram.ext import (
 )
 
 from agent.utils.text import split_message
+from bot.memory import ConversationMemory
+from bot.streaming import ProgressiveReply
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,9 +42,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger("telegram_bot")
 
-_HISTORY_TTL = 3600 * 4   # 4-hour conversation window
-_HISTORY_MAX_TURNS = 20   # cap stored turns
 _MSG_CHUNK = 4000          # Telegram safe chunk size
+_EDIT_INTERVAL = 1.2       # seconds between progress edits of one message
 
 # Module-level Redis singleton — avoids a new connection per message
 _redis_client = None
@@ -89,73 +90,50 @@ def _get_redis():
         return None
 
 
-def _history_key(chat_id: int) -> str:
-    return f"bot:history:{chat_id}"
+# Per-chat history: a Redis list of turns plus a rolling summary, 4h TTL
+_memory = ConversationMemory("bot:memory", _get_redis)
 
 
-def _load_history(chat_id: int) -> list[dict]:
-    r = _get_redis()
-    if not r:
-        return []
-    try:
-        raw = r.get(_history_key(chat_id))
-        return json.loads(raw) if raw else []
-    except Exception:
-        return []
-
-
-def _save_history(chat_id: int, history: list[dict]) -> None:
-    r = _get_redis()
-    if not r:
-        return
+async def _edit_markdown(message: Message, text: str) -> None:
+    """Edit with Markdown, falling back to plain text if Telegram rejects the markup."""
     try:
-        trimmed = history[-_HISTORY_MAX_TURNS:]
-        r.setex(_history_key(chat_id), _HISTORY_TTL, json.dumps(trimmed))
-    except Exception:
-        pass
+        await message.edit_text(text, parse_mode=ParseMode.MARKDOWN)
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return
+        await message.edit_text(text)
 
 
-def _atomic_append_turns(chat_id: int, turns: list[dict], max_retries: int = 3) -> None:
-    """Atomically append one or more turns to conversation history.
+async def _stream_answer(update: Update, question: str, history: Optional[list[dict]] = None) -> str:
+    """Run an interactive query, showing progress in a placeholder message.
 
-    Uses Redis WATCH + MULTI/EXEC optimistic locking so concurrent messages from
-    the same chat don't clobber each other. Falls back to unconditional write
-    after max_retries exhausted (same behaviour as before, but rare).
+    The placeholder shows each tool call as it runs and the answer as it is
+    generated, then is replaced with the final answer (overflow goes into
+    follow-up messages). Returns the answer text.
     """
-    r = _get_redis()
-    if not r:
-        return
-    key = _history_key(chat_id)
-    for attempt in range(max_retries + 1):
-        try:
-            with r.pipeline() as pipe:
-                pipe.watch(key)
-                raw = pipe.get(key)
-                history = json.loads(raw) if raw else []
-                history.extend(turns)
-                trimmed = history[-_HISTORY_MAX_TURNS:]
-                pipe.multi()
-                pipe.setex(key, _HISTORY_TTL, json.dumps(trimmed))
-                pipe.execute()
-            return  # success
-        except Exception as e:
-            import redis as _redis
-            if isinstance(e, _redis.WatchError) and attempt < max_retries:
-                import random, time as _time
-                _time.sleep(random.uniform(0.05, 0.15))
-                continue
-            # WatchError exhausted or other error — unconditional write
-            try:
-                r.setex(key, _HISTORY_TTL, json.dumps(turns[-_HISTORY_MAX_TURNS:]))
-            except Exception:
-                pass
-            return
+    from agent.graph import stream_interactive_query
 
+    placeholder = await update.message.reply_text("⏳ Thinking…")
+    progress = ProgressiveReply(placeholder.edit_text, min_interval=_EDIT_INTERVAL, max_chars=_MSG_CHUNK)
+    answer = ""
+    try:
+        async for event in stream_interactive_query(
+            question=question,
+            history=history,
+            session_id=f"tg-{update.effective_chat.id}",
+        ):
+            if event["type"] == "answer":
+                answer = event["text"]
+            else:
+                await progress.update(event)
+    finally:
+        await progress.close()
 
-async def _send_chunks(update: Update, text: str) -> None:
-    """Send a long message as multiple chunks."""
-    for chunk in split_message(text, _MSG_CHUNK):
+    chunks = split_message(answer, _MSG_CHUNK)
+    await _edit_markdown(placeholder, chunks[0])
+    for chunk in chunks[1:]:
         await update.message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN)
+    return answer
 
 
 # ── Command handlers ────────────────────────────────────────────────────────────
@@ -190,16 +168,12 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         return
     await update.message.chat.send_action(ChatAction.TYPING)
     try:
-        from agent.graph import run_interactive_query
-        answer = await run_interactive_query(
-            question=(
-                "Give me a concise status summary covering: "
-                "(1) QNAP NAS health, (2) Proxmox VMs, (3) recent firewall blocks, "
-                "(4) top threat intel findings. Use bullet points. Be brief."
-            ),
-            session_id=f"tg-{update.effective_chat.id}",
+        await _stream_answer(
+            update,
+            "Give me a concise status summary covering: "
+            "(1) QNAP NAS health, (2) Proxmox VMs, (3) recent firewall blocks, "
+            "(4) top threat intel findings. Use bullet points. Be brief.",
         )
-        await _send_chunks(update, answer)
     except Exception as e:
         logger.error("Status command failed: %s", e, exc_info=True)
         await update.message.reply_text(f"⚠️ Status check failed: {e}")
@@ -280,24 +254,12 @@ async def _handle_query(update: Update, question: str) -> None:
     chat_id = update.effective_chat.id
     await update.message.chat.send_action(ChatAction.TYPING)
 
-    # Load history snapshot for context (read-only — write happens atomically after)
-    history = _load_history(chat_id)
+    # Summary plus the recent turns that fit the token budget
+    history = _memory.load(chat_id)
 
     try:
-        from agent.graph import run_interactive_query
-        answer = await run_interactive_query(
-            question=question,
-            history=history,
-            session_id=f"tg-{chat_id}",
-        )
-
-        # Atomically append both turns — handles concurrent messages from same chat
-        _atomic_append_turns(chat_id, [
-            {"role": "user", "content": question},
-            {"role": "assistant", "content": answer},
-        ])
-
-        await _send_chunks(update, answer)
+        answer = await _stream_answer(update, question, history)
+        await _memory.record(chat_id, question, answer, session_id=f"tg-{chat_id}")
 
     except Exception as e:
         logger.error("Query failed: %s", e, exc_info=True)
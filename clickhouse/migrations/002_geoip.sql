@@ -0,0 +1,12 @@
+-- Offline GeoIP / ASN columns
+-- Migration: 002_geoip.sql
+-- Created: 2026-10-19
+--
+-- Country and ASN are filled by the enricher from a local MaxMind-format
+-- database (agent/tools/geoip.py) before any threat intel API call, so they
+-- are populated even when AbuseIPDB / VirusTotal have no data or no budget.
+
+ALTER TABLE threat_intel.enrichments
+    ADD COLUMN IF NOT EXISTS geo_country_code LowCardinality(String) DEFAULT '' AFTER error_sources,
+    ADD COLUMN IF NOT EXISTS geo_asn UInt32 DEFAULT 0 AFTER geo_country_code,
+    ADD COLUMN IF NOT EXISTS geo_as_org String DEFAULT '' AFTER geo_asn;
@@ -0,0 +1,38 @@
+-- Blocklist feeds (FireHOL, Spamhaus DROP, CrowdSec decisions)
+-- Migration: 003_blocklists.sql
+-- Created: 2026-10-19
+--
+-- Loaded by services/threat-intel-enricher/feeds.py. Each refresh inserts a
+-- full snapshot of a list; the dictionary only reads the latest snapshot per
+-- list and older ones expire via TTL.
+
+CREATE TABLE IF NOT EXISTS threat_intel.blocklist_entries (
+    list_name LowCardinality(String),
+    prefix String,               -- CIDR, e.g. '1.10.16.0/20'
+    loaded_at DateTime
+)
+ENGINE = MergeTree
+ORDER BY (list_name, loaded_at, prefix)
+TTL loaded_at + INTERVAL 3 DAY;
+
+-- Longest-prefix-match lookup: dictGetOrDefault('threat_intel.blocklist_dict',
+-- 'lists', tuple(IPv4StringToNumOrDefault(ip)), '') → 'firehol_level1,spamhaus_drop'
+CREATE DICTIONARY IF NOT EXISTS threat_intel.blocklist_dict (
+    prefix String,
+    lists String DEFAULT ''
+)
+PRIMARY KEY prefix
+SOURCE(CLICKHOUSE(QUERY '
+    SELECT prefix, arrayStringConcat(arraySort(groupUniqArray(list_name)), \',\') AS lists
+    FROM threat_intel.blocklist_entries
+    WHERE (list_name, loaded_at) IN (
+        SELECT list_name, max(loaded_at) FROM threat_intel.blocklist_entries GROUP BY list_name
+    )
+    GROUP BY prefix
+'))
+LAYOUT(IP_TRIE())
+LIFETIME(MIN 300 MAX 900);
+
+-- Blocklists an IP was on when the enricher short-circuited it (no API call)
+ALTER TABLE threat_intel.enrichments
+    ADD COLUMN IF NOT EXISTS blocklists Array(String) DEFAULT [] AFTER geo_as_org;
@@ -0,0 +1,30 @@
+-- Per-query AdGuard DNS log
+-- Migration: 004_dns_queries.sql
+-- Created: 2026-10-19
+--
+-- Loaded by adguard-exporter/adguard_querylog_shipper.py, which tails
+-- AdGuard Home's querylog.json on the AdGuard LXC and inserts in batches.
+-- The agent's DNS tools (agent/tools/metrics.py) aggregate from here instead
+-- of the 24h rollup gauges in signoz_metrics.
+--
+-- Daily partitions prune time-filtered queries; (client, ts) keeps each
+-- client's queries together for drill-downs and compresses qname well.
+-- Whole partitions are dropped once they age past the TTL.
+
+CREATE DATABASE IF NOT EXISTS first_light;
+
+CREATE TABLE IF NOT EXISTS first_light.dns_queries (
+    ts DateTime CODEC(Delta, ZSTD(1)),
+    client LowCardinality(String),          -- client IP as AdGuard saw it
+    qname String CODEC(ZSTD(3)),            -- lowercase, no trailing dot
+    qtype LowCardinality(String),           -- 'A', 'AAAA', 'HTTPS', ...
+    blocked Bool,
+    reason LowCardinality(String)           -- AdGuard filtering reason, e.g. 'FilteredBlockList'
+)
+ENGINE = MergeTree
+PARTITION BY toDate(ts)
+ORDER BY (client, ts)
+TTL ts + INTERVAL 30 DAY
+SETTINGS ttl_only_drop_parts = 1,
+         -- the shipper retries a failed batch with the same insert_deduplication_token
+         non_replicated_deduplication_window = 1000;
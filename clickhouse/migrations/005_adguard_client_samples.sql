@@ -0,0 +1,75 @@
+-- AdGuard per-client gauges with labels extracted at ingest
+-- Migration: 005_adguard_client_samples.sql
+-- Created: 2026-10-19
+--
+-- The exporter's per-client gauges (adguard-exporter/adguard_metrics_exporter_v2.py)
+-- land in signoz_metrics.samples_v4 with their labels in time_series_v4. Reading
+-- them meant joining the two tables on fingerprint and parsing the labels JSON
+-- on every query. This view does the join once, when SigNoz inserts a block of
+-- samples, and keeps a narrow copy ordered for "one metric, recent window".
+--
+-- The right-hand side only scans the last two days of AdGuard series, so each
+-- insert into samples_v4 stays cheap. A brand-new series can have its first
+-- samples arrive before its time_series_v4 row; those few are skipped, and the
+-- exporter reports the same gauge again at the next export interval.
+
+CREATE TABLE IF NOT EXISTS first_light.adguard_client_samples (
+    metric_name LowCardinality(String),
+    ts DateTime CODEC(Delta, ZSTD(1)),
+    client_ip LowCardinality(String),
+    client_name LowCardinality(String),
+    traffic_type LowCardinality(String),
+    value Float64 CODEC(Gorilla, ZSTD(1))
+)
+ENGINE = MergeTree
+PARTITION BY toYYYYMM(ts)
+ORDER BY (metric_name, ts, client_ip)
+TTL ts + INTERVAL 90 DAY;
+
+-- One-off backfill from existing history, before the view starts filling the
+-- table. Skipped when the table already has rows, so re-running is harmless.
+INSERT INTO first_light.adguard_client_samples
+SELECT
+    s.metric_name,
+    toDateTime(intDiv(s.unix_milli, 1000)),
+    series.client_ip,
+    series.client_name,
+    series.traffic_type,
+    s.value
+FROM signoz_metrics.samples_v4 AS s
+INNER JOIN (
+    SELECT
+        fingerprint,
+        any(JSONExtractString(labels, 'client.ip')) AS client_ip,
+        any(JSONExtractString(labels, 'client.name')) AS client_name,
+        any(JSONExtractString(labels, 'traffic.type')) AS traffic_type
+    FROM signoz_metrics.time_series_v4
+    WHERE metric_name IN ('adguard.queries.total', 'adguard.blocks.total', 'adguard.client.queries_24h', 'adguard.block.rate', 'adguard.client.risk_score')
+    GROUP BY fingerprint
+) AS series ON s.fingerprint = series.fingerprint
+WHERE s.metric_name IN ('adguard.queries.total', 'adguard.blocks.total', 'adguard.client.queries_24h', 'adguard.block.rate', 'adguard.client.risk_score')
+  AND s.unix_milli >= toUnixTimestamp(now() - INTERVAL 90 DAY) * 1000
+  AND (SELECT count() FROM first_light.adguard_client_samples) = 0;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS first_light.adguard_client_samples_mv
+TO first_light.adguard_client_samples
+AS SELECT
+    s.metric_name AS metric_name,
+    toDateTime(intDiv(s.unix_milli, 1000)) AS ts,
+    series.client_ip AS client_ip,
+    series.client_name AS client_name,
+    series.traffic_type AS traffic_type,
+    s.value AS value
+FROM signoz_metrics.samples_v4 AS s
+INNER JOIN (
+    SELECT
+        fingerprint,
+        any(JSONExtractString(labels, 'client.ip')) AS client_ip,
+        any(JSONExtractString(labels, 'client.name')) AS client_name,
+        any(JSONExtractString(labels, 'traffic.type')) AS traffic_type
+    FROM signoz_metrics.time_series_v4
+    WHERE metric_name IN ('adguard.queries.total', 'adguard.blocks.total', 'adguard.client.queries_24h', 'adguard.block.rate', 'adguard.client.risk_score')
+      AND unix_milli >= toUnixTimestamp(now() - INTERVAL 2 DAY) * 1000
+    GROUP BY fingerprint
+) AS series ON s.fingerprint = series.fingerprint
+WHERE s.metric_name IN ('adguard.queries.total', 'adguard.blocks.total', 'adguard.client.queries_24h', 'adguard.block.rate', 'adguard.client.risk_score');
@@ -0,0 +1,27 @@
+-- Numbers behind each daily report
+-- Migration: 006_daily_metrics.sql
+-- Created: 2026-10-19
+--
+-- Written by generate_daily_report() (agent/reports/daily_metrics.py): the
+-- numeric fields of the tool results each domain agent gathered over the
+-- report window, one row per (date, domain, metric). Trends, weekly and
+-- monthly rollups and charts read from here instead of re-querying raw logs
+-- or the report prose.
+--
+-- (domain, metric, date) puts one metric's history in a single contiguous
+-- range. Regenerating a report re-inserts its day; the newest generated_at
+-- wins on merge — read with FINAL (the table is small) or argMax.
+
+CREATE DATABASE IF NOT EXISTS first_light;
+
+CREATE TABLE IF NOT EXISTS first_light.daily_metrics (
+    date Date,
+    domain LowCardinality(String),          -- 'firewall_threat', 'dns_security', ...
+    metric LowCardinality(String),          -- '<tool>.<key path>', e.g. 'threat_intel_summary.confirmed_malicious'
+    value Float64 CODEC(Gorilla, ZSTD(1)),
+    report_id String,
+    generated_at DateTime
+)
+ENGINE = ReplacingMergeTree(generated_at)
+PARTITION BY toYear(date)
+ORDER BY (domain, metric, date);
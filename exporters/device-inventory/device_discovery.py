@@ -2,10 +2,11 @@
 """
 Device Inventory Discovery
 
-Discovers and tracks network devices from multiple sources:
-- UniFi Controller API
-- DHCP leases (pfSense, AdGuard Home)
-- Active network scanning (optional)
+Discovers and tracks network devices from multiple sources, queried
+concurrently each cycle and merged by MAC address:
+- UniFi Controller API (wireless + UniFi-switched clients)
+- ntopng ARP table (wired devices, VLANs UniFi never sees)
+- pfSense DHCP leases
 
 Maintains a SQLite database of all seen devices with:
 - MAC address, IP address, hostname
@@ -14,19 +15,25 @@ Maintains a SQLite database of all seen devices with:
 - First seen / last seen timestamps
 - VLAN / network location
 
+Only devices that are new or whose state changed are written and emitted
+as events: to SigNoz (OTLP logs, when enabled) and to the device_events
+table the agent's hostname resolver tails.
+
 Exposes Prometheus metrics for device counts and status.
 """
 
 import os
 import sys
 import time
+import json
 import logging
 import sqlite3
 import re
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 import yaml
 from prometheus_client import start_http_server, Gauge, Info, Counter
 
@@ -45,6 +52,13 @@ device_count = Gauge('network_devices_total', 'Total number of discovered device
 device_info = Info('network_device', 'Device information')
 new_devices_counter = Counter('network_devices_new_total', 'Count of newly discovered devices')
 device_last_seen = Gauge('network_device_last_seen_timestamp', 'Last seen timestamp', ['mac', 'hostname'])
+device_changes_counter = Counter('network_device_changes_total', 'Device change events emitted', ['event'])
+source_up = Gauge('network_discovery_source_up', 'Whether the last query of a discovery source succeeded', ['source'])
+source_devices = Gauge('network_discovery_source_devices', 'Devices reported by a discovery source last cycle', ['source'])
+source_duration = Gauge('network_discovery_source_duration_seconds', 'Duration of the last query of a discovery source', ['source'])
+
+# Per-device change events; an OTLP handler is attached when SigNoz export is enabled
+event_logger = logging.getLogger('device_inventory.events')
 
 
 @dataclass
@@ -60,19 +74,47 @@ class NetworkDevice:
     last_seen: Optional[datetime] = None
     is_authorized: bool = True
     notes: Optional[str] = None
+    sources: List[str] = field(default_factory=list)  # which discovery sources reported it (not stored)
+
+
+@dataclass
+class DeviceChange:
+    """A device that was new, or whose stored state changed, in a discovery cycle."""
+    event: str  # 'new' or 'changed'
+    device: NetworkDevice
+    changes: Dict[str, Tuple[Optional[str], Optional[str]]] = field(default_factory=dict)  # column -> (old, new)
+
+
+# Columns that define a device's state; a device whose values are unchanged is
+# not rewritten (only its last_seen is refreshed, and only occasionally)
+_STATE_COLUMNS = ('ip', 'hostname', 'manufacturer', 'device_type', 'vlan', 'notes')
+_IP, _VLAN = _STATE_COLUMNS.index('ip'), _STATE_COLUMNS.index('vlan')
 
 
 class DeviceInventory:
-    """Device inventory database manager."""
+    """Device inventory database manager.
 
-    def __init__(self, db_path: str):
+    Holds one WAL-mode connection for the life of the process and keeps an
+    in-memory snapshot of each device's state, so a discovery cycle is a
+    single transaction that only writes devices that are new, changed, or
+    whose last_seen has gone stale.
+    """
+
+    def __init__(self, db_path: str, last_seen_resolution: int = 900):
         self.db_path = db_path
+        # last_seen is only rewritten for unchanged devices once it is older
+        # than this many seconds — "active in the last 24h" doesn't need more
+        self.last_seen_resolution = timedelta(seconds=last_seen_resolution)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')  # WAL + NORMAL: durable at checkpoint, one fsync per commit
+        self.conn.execute('PRAGMA busy_timeout=5000')
         self._init_db()
+        self._known: Dict[str, Tuple[Tuple, datetime]] = self._load_snapshot()
 
     def _init_db(self):
         """Initialize SQLite database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
 
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS devices (
@@ -97,87 +139,248 @@ class DeviceInventory:
             CREATE INDEX IF NOT EXISTS idx_device_type ON devices(device_type)
         ''')
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Device inventory database initialized at {self.db_path}")
+        # Append-only IP/VLAN lease history: one row per (mac, ip, vlan) holding
+        # interval, valid_to NULL while current. Times are unix seconds.
+        seed_leases = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lease_history'"
+        ).fetchone() is None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lease_history (
+                id INTEGER PRIMARY KEY,
+                mac TEXT NOT NULL,
+                ip TEXT NOT NULL,
+                vlan TEXT,
+                valid_from INTEGER NOT NULL,
+                valid_to INTEGER
+            )
+        ''')
 
-    def upsert_device(self, device: NetworkDevice) -> bool:
-        """Insert or update a device. Returns True if new device."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Point-in-time lookup: WHERE ip = ? AND valid_from <= ? ORDER BY valid_from DESC LIMIT 1
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_lease_ip_from ON lease_history(ip, valid_from)
+        ''')
 
-        # Check if device exists
-        cursor.execute('SELECT mac, first_seen FROM devices WHERE mac = ?', (device.mac,))
-        existing = cursor.fetchone()
+        # Closing a device's current lease when its IP changes
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_lease_open ON lease_history(mac) WHERE valid_to IS NULL
+        ''')
 
-        is_new = existing is None
-        now = datetime.now()
+        # Change feed for consumers that follow the inventory incrementally
+        # (the agent's hostname resolver). AUTOINCREMENT: seq is never reused
+        # after pruning, so a reader's watermark stays valid.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS device_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts INTEGER NOT NULL,
+                mac TEXT NOT NULL,
+                event TEXT NOT NULL,
+                ip TEXT,
+                prev_ip TEXT,
+                hostname TEXT,
+                vlan TEXT,
+                changes TEXT
+            )
+        ''')
 
-        if is_new:
-            # New device
-            cursor.execute('''
-                INSERT INTO devices (mac, ip, hostname, manufacturer, device_type, vlan,
-                                     first_seen, last_seen, is_authorized, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                device.mac, device.ip, device.hostname, device.manufacturer,
-                device.device_type, device.vlan, now, now, device.is_authorized, device.notes
-            ))
-            logger.info(f"New device discovered: {device.mac} ({device.hostname or 'unknown'}) - {device.ip}")
-        else:
-            # Update existing device
+        # One-time migration, when lease_history is first created: seed it for
+        # devices recorded before lease tracking existed. Never again — once
+        # pruning has removed an offline device's leases, re-seeding would
+        # open a lease on an IP that another device may hold by now.
+        if seed_leases:
             cursor.execute('''
-                UPDATE devices
-                SET ip = ?, hostname = ?, manufacturer = ?, device_type = ?,
-                    vlan = ?, last_seen = ?, notes = ?
-                WHERE mac = ?
-            ''', (
-                device.ip, device.hostname, device.manufacturer, device.device_type,
-                device.vlan, now, device.notes, device.mac
-            ))
+                INSERT INTO lease_history (mac, ip, vlan, valid_from)
+                SELECT mac, ip, vlan, CAST(strftime('%s', first_seen, 'utc') AS INTEGER)
+                FROM devices
+                WHERE ip IS NOT NULL AND first_seen IS NOT NULL
+            ''')
+
+        self.conn.commit()
+        logger.info(f"Device inventory database initialized at {self.db_path} (WAL)")
+
+    def _load_snapshot(self) -> Dict[str, Tuple[Tuple, datetime]]:
+        """mac -> (state tuple, last_seen) for change detection."""
+        known = {}
+        rows = self.conn.execute(f"SELECT mac, {', '.join(_STATE_COLUMNS)}, last_seen FROM devices")
+        for row in rows:
+            try:
+                last_seen = datetime.fromisoformat(row[-1]) if row[-1] else datetime.min
+            except (TypeError, ValueError):
+                last_seen = datetime.min
+            known[row[0]] = (tuple(row[1:-1]), last_seen)
+        return known
+
+    @staticmethod
+    def _state(device: NetworkDevice) -> Tuple:
+        return tuple(getattr(device, col) for col in _STATE_COLUMNS)
+
+    def known_state(self, mac: str) -> Optional[Dict[str, Optional[str]]]:
+        """The stored state columns for a MAC, or None if it has never been seen."""
+        known = self._known.get(mac)
+        return dict(zip(_STATE_COLUMNS, known[0])) if known else None
+
+    def upsert_devices(self, devices: List[NetworkDevice]) -> List[DeviceChange]:
+        """Insert or update a discovery cycle's devices in one transaction.
+
+        Unchanged devices are skipped unless their last_seen is older than
+        last_seen_resolution. New and changed devices are also appended to
+        device_events. Returns those changes.
+        """
+        now = datetime.now()
+        stamp = now.isoformat(sep=' ')
+        now_ts = int(now.timestamp())
+        rows, changes, events = [], [], []
+        lease_closes, lease_opens = [], []
+        batch = {device.mac: device for device in devices}  # last report per MAC wins
+
+        for mac, device in batch.items():
+            state = self._state(device)
+            known = self._known.get(mac)
+            if known is None:
+                diff = {col: (None, new) for col, new in zip(_STATE_COLUMNS, state) if new is not None}
+                changes.append(DeviceChange('new', device, diff))
+            elif known[0] != state:
+                diff = {col: (old, new) for col, old, new in zip(_STATE_COLUMNS, known[0], state) if old != new}
+                changes.append(DeviceChange('changed', device, diff))
+            elif now - known[1] < self.last_seen_resolution:
+                continue
+            else:
+                diff = None  # unchanged; only last_seen is refreshed
+
+            if diff is not None:
+                events.append({
+                    'now': now_ts, 'mac': mac, 'event': changes[-1].event,
+                    'ip': device.ip, 'prev_ip': known[0][_IP] if known else None,
+                    'hostname': device.hostname, 'vlan': device.vlan,
+                    'changes': json.dumps(diff),
+                })
+
+            # New device, or its IP/VLAN moved: close the old lease, open a new one
+            if known is None or (known[0][_IP], known[0][_VLAN]) != (device.ip, device.vlan):
+                if known is not None:
+                    lease_closes.append({'mac': mac, 'now': now_ts})
+                if device.ip:
+                    lease_opens.append({'mac': mac, 'ip': device.ip, 'vlan': device.vlan, 'now': now_ts})
+            rows.append({
+                'mac': mac, **dict(zip(_STATE_COLUMNS, state)),
+                'is_authorized': device.is_authorized, 'now': stamp,
+            })
+
+        if rows:
+            with self.conn:  # one transaction, one commit
+                self.conn.executemany('''
+                    INSERT INTO devices (mac, ip, hostname, manufacturer, device_type, vlan, notes,
+                                         is_authorized, first_seen, last_seen)
+                    VALUES (:mac, :ip, :hostname, :manufacturer, :device_type, :vlan, :notes,
+                            :is_authorized, :now, :now)
+                    ON CONFLICT(mac) DO UPDATE SET
+                        ip = excluded.ip,
+                        hostname = excluded.hostname,
+                        manufacturer = excluded.manufacturer,
+                        device_type = excluded.device_type,
+                        vlan = excluded.vlan,
+                        notes = excluded.notes,
+                        last_seen = excluded.last_seen
+                ''', rows)
+                self.conn.executemany(
+                    'UPDATE lease_history SET valid_to = :now WHERE mac = :mac AND valid_to IS NULL',
+                    lease_closes,
+                )
+                # An IP handed to a new MAC ends whichever lease still holds it
+                self.conn.executemany('''
+                    UPDATE lease_history SET valid_to = :now
+                    WHERE ip = :ip AND mac != :mac AND valid_to IS NULL
+                ''', lease_opens)
+                self.conn.executemany('''
+                    INSERT INTO lease_history (mac, ip, vlan, valid_from)
+                    VALUES (:mac, :ip, :vlan, :now)
+                ''', lease_opens)
+                self.conn.executemany('''
+                    INSERT INTO device_events (ts, mac, event, ip, prev_ip, hostname, vlan, changes)
+                    VALUES (:now, :mac, :event, :ip, :prev_ip, :hostname, :vlan, :changes)
+                ''', events)
+            for row in rows:
+                self._known[row['mac']] = (tuple(row[col] for col in _STATE_COLUMNS), now)
+
+        new_count = sum(change.event == 'new' for change in changes)
+        logger.info(
+            f"Inventory upsert: {len(batch)} seen, {new_count} new, {len(changes) - new_count} changed, "
+            f"{len(rows)} written, {len(lease_opens)} leases opened"
+        )
+        return changes
+
+    def prune_lease_history(self, retain_days: int) -> int:
+        """Delete leases that ended more than retain_days ago. Returns rows deleted."""
+        cutoff = int((datetime.now() - timedelta(days=retain_days)).timestamp())
+        with self.conn:
+            deleted = self.conn.execute(
+                'DELETE FROM lease_history WHERE valid_to IS NOT NULL AND valid_to < ?', (cutoff,)
+            ).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} lease history rows older than {retain_days} days")
+        return deleted
+
+    def prune_device_events(self, retain_days: int) -> int:
+        """Delete change events older than retain_days. Returns rows deleted."""
+        cutoff = int((datetime.now() - timedelta(days=retain_days)).timestamp())
+        with self.conn:
+            deleted = self.conn.execute('DELETE FROM device_events WHERE ts < ?', (cutoff,)).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} device events older than {retain_days} days")
+        return deleted
+
+    def lease_at(self, ip: str, at: datetime) -> Optional[Dict]:
+        """Which MAC held `ip` at time `at` (None if no lease covers it)."""
+        ts = int(at.timestamp())
+        row = self.conn.execute('''
+            SELECT mac, ip, vlan, valid_from, valid_to FROM lease_history
+            WHERE ip = ? AND valid_from <= ?
+            ORDER BY valid_from DESC LIMIT 1
+        ''', (ip, ts)).fetchone()
+        if row is None or (row[4] is not None and row[4] <= ts):
+            return None
+        return dict(zip(('mac', 'ip', 'vlan', 'valid_from', 'valid_to'), row))
 
-        conn.commit()
-        conn.close()
-        return is_new
+    def upsert_device(self, device: NetworkDevice) -> bool:
+        """Insert or update a single device. Returns True if new device."""
+        return any(change.event == 'new' for change in self.upsert_devices([device]))
 
     def get_all_devices(self) -> List[Dict]:
         """Get all devices from database."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT * FROM devices ORDER BY last_seen DESC')
-        devices = [dict(row) for row in cursor.fetchall()]
-
-        conn.close()
-        return devices
+        cursor = self.conn.execute('SELECT * FROM devices ORDER BY last_seen DESC')
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
     def get_device_stats(self) -> Dict:
         """Get device statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         stats = {}
+        day_ago = (datetime.now() - timedelta(days=1)).isoformat(sep=' ')
 
-        # Total devices
-        cursor.execute('SELECT COUNT(*) FROM devices')
-        stats['total'] = cursor.fetchone()[0]
+        # Total, active (seen in last 24 hours) and unauthorized in one pass
+        total, active, unauthorized = self.conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(last_seen > ?), 0), COALESCE(SUM(is_authorized = 0), 0)
+            FROM devices
+        ''', (day_ago,)).fetchone()
+        stats['total'] = total
+        stats['active_24h'] = active
+        stats['unauthorized'] = unauthorized
 
         # Devices by type
-        cursor.execute('SELECT device_type, COUNT(*) FROM devices GROUP BY device_type')
-        stats['by_type'] = dict(cursor.fetchall())
+        stats['by_type'] = dict(self.conn.execute(
+            'SELECT device_type, COUNT(*) FROM devices GROUP BY device_type'
+        ).fetchall())
 
-        # Active devices (seen in last 24 hours)
-        day_ago = datetime.now() - timedelta(days=1)
-        cursor.execute('SELECT COUNT(*) FROM devices WHERE last_seen > ?', (day_ago,))
-        stats['active_24h'] = cursor.fetchone()[0]
+        return stats
 
-        # Unauthorized devices
-        cursor.execute('SELECT COUNT(*) FROM devices WHERE is_authorized = 0')
-        stats['unauthorized'] = cursor.fetchone()[0]
+    def close(self):
+        self.conn.close()
 
-        conn.close()
-        return stats
+
+class SourceError(Exception):
+    """A discovery source could not be queried this cycle."""
+
+
+class SessionExpired(SourceError):
+    """The source's login lapsed; log in again and retry."""
 
 
 class UniFiClient:
@@ -218,26 +421,314 @@ class UniFiClient:
             return False
 
     def get_clients(self) -> List[Dict]:
-        """Get all clients from UniFi Controller."""
+        """Get all clients from UniFi Controller.
+
+        Raises SourceError on failure (SessionExpired if the login lapsed).
+        """
+        url = f"{self.base_url}/api/s/{self.site}/stat/sta"
+        headers = {}
+        if self.csrf_token:
+            headers['X-CSRF-Token'] = self.csrf_token
+
+        response = self.session.get(url, headers=headers, verify=self.verify, timeout=30)
+
+        if response.status_code == 401:
+            raise SessionExpired("UniFi session expired")
+        if response.status_code != 200:
+            raise SourceError(f"Failed to get UniFi clients: HTTP {response.status_code}")
+        clients = response.json().get('data', [])
+        logger.info(f"Retrieved {len(clients)} clients from UniFi")
+        return clients
+
+
+def _normalize_mac(mac: Optional[str]) -> Optional[str]:
+    """Lower-case colon form; None for blanks, broadcast and all-zero entries."""
+    if not mac:
+        return None
+    mac = mac.strip().lower().replace('-', ':')
+    if mac in ('ff:ff:ff:ff:ff:ff', '00:00:00:00:00:00'):
+        return None
+    return mac
+
+
+class DiscoverySource:
+    """Somewhere devices can be discovered from.
+
+    Subclasses set `name` and implement discover(), which returns the
+    devices the source currently knows about or raises SourceError. A
+    source instance lives for the whole process, so it can keep its HTTP
+    session (and login) between cycles.
+    """
+
+    name = ''
+
+    def __init__(self, config: Dict):
+        self.config = config
+
+    def discover(self) -> List[NetworkDevice]:
+        raise NotImplementedError
+
+
+class UniFiSource(DiscoverySource):
+    """Clients from the UniFi Controller (wireless and UniFi-switched)."""
+
+    name = 'unifi'
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.client = UniFiClient(
+            host=config['host'],
+            port=config['port'],
+            username=config['username'],
+            password=config['password'],
+            site=config.get('site', 'default'),
+            verify_ssl=config.get('verify_ssl', False)
+        )
+        self.logged_in = False
+
+    def _clients(self, retry: bool = True) -> List[Dict]:
+        if not self.logged_in:
+            self.logged_in = self.client.login()
+            if not self.logged_in:
+                raise SourceError("UniFi login failed")
         try:
-            url = f"{self.base_url}/api/s/{self.site}/stat/sta"
-            headers = {}
-            if self.csrf_token:
-                headers['X-CSRF-Token'] = self.csrf_token
+            return self.client.get_clients()
+        except SessionExpired:
+            self.logged_in = False
+            if not retry:
+                raise
+            return self._clients(retry=False)
+
+    def discover(self) -> List[NetworkDevice]:
+        devices = []
+        for client_data in self._clients():
+            mac = _normalize_mac(client_data.get('mac'))
+            if not mac:
+                continue
+            devices.append(NetworkDevice(
+                mac=mac,
+                ip=client_data.get('ip'),
+                hostname=client_data.get('hostname') or client_data.get('name'),
+                manufacturer=client_data.get('oui'),
+                vlan=str(client_data.get('vlan')) if client_data.get('vlan') else None,
+            ))
+        return devices
 
-            response = self.session.get(url, headers=headers, verify=self.verify, timeout=30)
 
-            if response.status_code == 200:
-                data = response.json()
-                clients = data.get('data', [])
-                logger.info(f"Retrieved {len(clients)} clients from UniFi")
-                return clients
-            else:
-                logger.error(f"Failed to get UniFi clients: HTTP {response.status_code}")
-                return []
-        except Exception as e:
-            logger.error(f"Error getting UniFi clients: {e}")
-            return []
+class NtopngArpSource(DiscoverySource):
+    """IP/MAC pairs from ntopng's ARP table — wired hosts and VLANs UniFi doesn't see.
+
+    ntopng v6 REST needs a session cookie (Basic Auth gets a 302 to the login
+    page), so the session logs in once and again only when that happens.
+    """
+
+    name = 'ntopng'
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.base_url = f"{config.get('protocol', 'http')}://{config['host']}:{config.get('port', 3000)}"
+        self.ifids = config.get('ifids', [3])
+        # ntopng interface id -> VLAN label, for entries that don't carry one
+        self.ifid_vlans = {int(k): str(v) for k, v in (config.get('ifid_vlans') or {}).items()}
+        self.session = requests.Session()
+        self.session.verify = config.get('verify_ssl', False)
+        self.logged_in = False
+
+    def _login(self):
+        response = self.session.post(
+            f"{self.base_url}/authorize.html",
+            data={'user': self.config.get('username', 'admin'), 'password': self.config.get('password', '')},
+            timeout=10,
+        )
+        if response.status_code != 200:
+            raise SourceError(f"ntopng login failed: HTTP {response.status_code}")
+        self.logged_in = True
+
+    def _arp_table(self, ifid: int, retry: bool = True) -> List[Dict]:
+        if not self.logged_in:
+            self._login()
+        response = self.session.get(
+            f"{self.base_url}/lua/rest/v2/get/interface/arp.lua",
+            params={'ifid': ifid}, timeout=30, allow_redirects=False,
+        )
+        if response.status_code in (301, 302, 401, 403):
+            self.logged_in = False
+            if not retry:
+                raise SourceError(f"ntopng rejected the session: HTTP {response.status_code}")
+            return self._arp_table(ifid, retry=False)
+        if response.status_code != 200:
+            raise SourceError(f"ntopng ARP table: HTTP {response.status_code}")
+        body = response.json()
+        if body.get('rc', 0) != 0:
+            raise SourceError(f"ntopng ARP table: {body.get('rc_str', body.get('rc'))}")
+        rsp = body.get('rsp') or []
+        if isinstance(rsp, dict):  # some builds key the table by IP
+            rsp = [dict(entry, ip=ip) if isinstance(entry, dict) else {'ip': ip, 'mac': entry}
+                   for ip, entry in rsp.items()]
+        return rsp
+
+    def discover(self) -> List[NetworkDevice]:
+        devices = []
+        for ifid in self.ifids:
+            for entry in self._arp_table(ifid):
+                mac = _normalize_mac(entry.get('mac') or entry.get('mac_address'))
+                ip = entry.get('ip') or entry.get('ip_address')
+                if not mac or not ip:
+                    continue
+                vlan = entry.get('vlan') or entry.get('vlan_id')
+                devices.append(NetworkDevice(
+                    mac=mac,
+                    ip=ip,
+                    hostname=entry.get('name') or None,
+                    manufacturer=entry.get('manufacturer') or None,
+                    vlan=str(vlan) if vlan else self.ifid_vlans.get(int(ifid)),
+                ))
+        return devices
+
+
+class PfSenseDhcpSource(DiscoverySource):
+    """Active DHCP leases from the pfSense REST API package."""
+
+    name = 'pfsense'
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.url = f"https://{config['host']}{config.get('api_path', '/api/v1/services/dhcpd/lease')}"
+        # pfSense interface name (lan, opt1, ...) -> VLAN label
+        self.interface_vlans = {str(k): str(v) for k, v in (config.get('interface_vlans') or {}).items()}
+        self.session = requests.Session()
+        self.session.verify = config.get('verify_ssl', False)
+        if config.get('api_secret'):
+            self.session.headers['Authorization'] = f"{config['api_key']} {config['api_secret']}"
+        else:
+            self.session.headers['X-API-Key'] = config.get('api_key', '')
+
+    def discover(self) -> List[NetworkDevice]:
+        response = self.session.get(self.url, timeout=30)
+        if response.status_code != 200:
+            raise SourceError(f"pfSense DHCP leases: HTTP {response.status_code}")
+        devices = []
+        for lease in response.json().get('data') or []:
+            state = lease.get('act') or lease.get('active_status') or 'active'
+            if state not in ('active', 'static'):
+                continue
+            mac = _normalize_mac(lease.get('mac'))
+            if not mac or not lease.get('ip'):
+                continue
+            devices.append(NetworkDevice(
+                mac=mac,
+                ip=lease['ip'],
+                hostname=lease.get('hostname') or lease.get('descr') or None,
+                vlan=self.interface_vlans.get(str(lease.get('if'))),
+            ))
+        return devices
+
+
+SOURCE_TYPES = {source.name: source for source in (UniFiSource, NtopngArpSource, PfSenseDhcpSource)}
+
+
+def build_sources(config: Dict) -> List[DiscoverySource]:
+    """Instantiate every enabled discovery source from the config file."""
+    sections = {
+        'unifi': config.get('unifi', {}),
+        'ntopng': config.get('ntopng', {}),
+        'pfsense': config.get('dhcp', {}).get('pfsense', {}),
+    }
+    sources = []
+    for name, section in sections.items():
+        if section.get('enabled', False):
+            sources.append(SOURCE_TYPES[name](section))
+            logger.info(f"Discovery source enabled: {name}")
+    return sources
+
+
+class DiscoveryPipeline:
+    """Queries every discovery source concurrently, once per cycle.
+
+    Sources are I/O bound and independent, so a cycle takes as long as the
+    slowest source rather than the sum. A source that fails or overruns
+    `timeout` is skipped for the cycle (its devices are simply not touched);
+    one still running from an earlier cycle is not started again.
+    """
+
+    def __init__(self, sources: List[DiscoverySource], timeout: float = 60):
+        self.sources = sources
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max(len(sources), 1), thread_name_prefix='discovery')
+        self._running: Dict[str, Future] = {}
+
+    def _run_source(self, source: DiscoverySource) -> List[NetworkDevice]:
+        start = time.time()
+        try:
+            return source.discover()
+        finally:
+            source_duration.labels(source=source.name).set(time.time() - start)
+
+    def run(self) -> Dict[str, List[NetworkDevice]]:
+        """source name -> devices, for the sources that answered this cycle."""
+        futures = {}
+        for source in self.sources:
+            previous = self._running.get(source.name)
+            if previous is not None and not previous.done():
+                logger.warning(f"Discovery source {source.name} still running from last cycle; skipping")
+                continue
+            futures[source.name] = self._running[source.name] = self.executor.submit(self._run_source, source)
+
+        wait(futures.values(), timeout=self.timeout)
+        reports = {}
+        for name, future in futures.items():
+            if not future.done():
+                logger.error(f"Discovery source {name} timed out after {self.timeout}s")
+                source_up.labels(source=name).set(0)
+                continue
+            try:
+                reports[name] = future.result()
+            except SourceError as e:
+                logger.error(f"Discovery source {name} failed: {e}")
+            except Exception as e:
+                logger.error(f"Discovery source {name} failed: {e}", exc_info=True)
+            source_up.labels(source=name).set(1 if name in reports else 0)
+            source_devices.labels(source=name).set(len(reports.get(name, [])))
+        return reports
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Fields each source can report, merged per field by source priority
+_MERGED_FIELDS = ('ip', 'hostname', 'manufacturer', 'vlan')
+
+
+def merge_devices(reports: Dict[str, List[NetworkDevice]], inventory: DeviceInventory,
+                  priority: List[str], field_priority: Optional[Dict[str, List[str]]] = None) -> List[NetworkDevice]:
+    """Merge per-source reports into one device per MAC.
+
+    Each field takes the first non-empty value in source priority order
+    (`field_priority` overrides the order for individual fields). A field no
+    source reported this cycle keeps its stored value, so a source that
+    doesn't know hostnames (ARP) can't blank out one UniFi supplied earlier,
+    and manual notes survive.
+    """
+    field_priority = field_priority or {}
+    # Sources missing from the priority list rank after the listed ones
+    order = list(priority) + sorted(set(reports) - set(priority))
+
+    by_mac: Dict[str, Dict[str, NetworkDevice]] = {}
+    for name in order:
+        for device in reports.get(name, []):
+            by_mac.setdefault(device.mac, {}).setdefault(name, device)
+
+    merged = []
+    for mac, seen in by_mac.items():
+        known = inventory.known_state(mac) or {}
+        device = NetworkDevice(mac=mac, notes=known.get('notes'), sources=list(seen))
+        for col in _MERGED_FIELDS:
+            ranked = field_priority.get(col, order)
+            value = next((getattr(seen[name], col) for name in ranked
+                          if name in seen and getattr(seen[name], col)), None)
+            setattr(device, col, value or known.get(col))
+        merged.append(device)
+    return merged
 
 
 def classify_device(hostname: Optional[str], manufacturer: Optional[str], rules: Dict) -> str:
@@ -257,52 +748,76 @@ def classify_device(hostname: Optional[str], manufacturer: Optional[str], rules:
     return 'unknown'
 
 
-def discover_devices(config: Dict, inventory: DeviceInventory):
-    """Main discovery loop."""
+def setup_event_export(config: Dict):
+    """Ship device change events to SigNoz as OTLP logs, if enabled."""
+    signoz_config = config.get('signoz', {})
+    if not signoz_config.get('enabled', False):
+        return
+    try:
+        from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+        from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+        from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
+        from opentelemetry.sdk.resources import Resource
+    except ImportError:
+        logger.error("signoz.enabled is set but the opentelemetry packages are not installed")
+        return
+
+    provider = LoggerProvider(resource=Resource.create({"service.name": "device-inventory"}))
+    provider.add_log_record_processor(BatchLogRecordProcessor(
+        OTLPLogExporter(endpoint=signoz_config.get('endpoint', 'signoz-otel-collector:4317'), insecure=True)
+    ))
+    event_logger.addHandler(LoggingHandler(level=logging.NOTSET, logger_provider=provider))
+    event_logger.setLevel(logging.INFO)
+    logger.info(f"Device change events exported to {signoz_config.get('endpoint', 'signoz-otel-collector:4317')}")
+
+
+def emit_device_events(changes: List[DeviceChange]):
+    """Log one structured event per new/changed device (OTLP attributes via `extra`)."""
+    for change in changes:
+        device = change.device
+        if change.event == 'new':
+            message = f"New device discovered: {device.mac} ({device.hostname or 'unknown'}) - {device.ip}"
+        else:
+            diff = ', '.join(f"{col} {old} -> {new}" for col, (old, new) in change.changes.items())
+            message = f"Device changed: {device.mac} ({device.hostname or 'unknown'}): {diff}"
+        event_logger.info(message, extra={
+            'device.event': change.event,
+            'device.mac': device.mac,
+            'device.ip': device.ip or '',
+            'device.hostname': device.hostname or '',
+            'device.vlan': device.vlan or '',
+            'device.type': device.device_type or '',
+            'device.sources': ','.join(device.sources),
+            'device.changed_fields': ','.join(change.changes),
+        })
+        device_changes_counter.labels(event=change.event).inc()
+
+
+def discover_devices(config: Dict, inventory: DeviceInventory, pipeline: DiscoveryPipeline):
+    """Run one discovery cycle: query sources, merge, upsert, emit changes."""
     logger.info("Starting device discovery...")
 
+    discovery_config = config.get('discovery', {})
     classification_rules = config.get('classification', {})
-    new_device_count = 0
-
-    # Discover from UniFi
-    if config.get('unifi', {}).get('enabled', False):
-        unifi_config = config['unifi']
-        client = UniFiClient(
-            host=unifi_config['host'],
-            port=unifi_config['port'],
-            username=unifi_config['username'],
-            password=unifi_config['password'],
-            site=unifi_config.get('site', 'default'),
-            verify_ssl=unifi_config.get('verify_ssl', False)
-        )
-
-        if client.login():
-            clients = client.get_clients()
-            for client_data in clients:
-                mac = client_data.get('mac', '').lower()
-                if not mac:
-                    continue
-
-                device = NetworkDevice(
-                    mac=mac,
-                    ip=client_data.get('ip'),
-                    hostname=client_data.get('hostname') or client_data.get('name'),
-                    manufacturer=client_data.get('oui'),
-                    vlan=str(client_data.get('vlan')) if client_data.get('vlan') else None,
-                )
-
-                # Classify device
-                device.device_type = classify_device(
-                    device.hostname,
-                    device.manufacturer,
-                    classification_rules
-                )
 
-                if inventory.upsert_device(device):
-                    new_device_count += 1
-                    new_devices_counter.inc()
-
-    logger.info(f"Discovery complete. Found {new_device_count} new devices.")
+    reports = pipeline.run()
+    devices = merge_devices(
+        reports, inventory,
+        priority=discovery_config.get('source_priority', ['unifi', 'pfsense', 'ntopng']),
+        field_priority=discovery_config.get('field_priority'),
+    )
+    for device in devices:
+        device.device_type = classify_device(device.hostname, device.manufacturer, classification_rules)
+
+    changes = inventory.upsert_devices(devices)
+    emit_device_events(changes)
+    new_count = sum(change.event == 'new' for change in changes)
+    new_devices_counter.inc(new_count)
+
+    logger.info(
+        f"Discovery complete: {len(devices)} devices from {len(reports)}/{len(pipeline.sources)} sources, "
+        f"{new_count} new, {len(changes) - new_count} changed."
+    )
     update_metrics(inventory)
 
 
@@ -341,7 +856,10 @@ def main():
     # Initialize database
     db_path = config.get('database', {}).get('path', '/data/device_inventory.db')
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    inventory = DeviceInventory(db_path)
+    inventory = DeviceInventory(
+        db_path,
+        last_seen_resolution=config.get('discovery', {}).get('last_seen_resolution', 900),
+    )
 
     # Start Prometheus metrics server
     metrics_config = config.get('metrics', {})
@@ -350,15 +868,30 @@ def main():
         start_http_server(metrics_port)
         logger.info(f"Prometheus metrics available at http://0.0.0.0:{metrics_port}/metrics")
 
+    setup_event_export(config)
+
     # Discovery loop
     interval = config.get('discovery', {}).get('interval', 300)
+    retain_days = config.get('discovery', {}).get('retain_days', 90)
+    pipeline = DiscoveryPipeline(build_sources(config), timeout=config.get('discovery', {}).get('source_timeout', 60))
+    if not pipeline.sources:
+        logger.warning("No discovery sources enabled; only metrics will be served")
+    last_prune = 0.0
 
     while True:
         try:
-            discover_devices(config, inventory)
+            discover_devices(config, inventory, pipeline)
         except Exception as e:
             logger.error(f"Discovery error: {e}", exc_info=True)
 
+        if time.time() - last_prune > 86400:
+            try:
+                inventory.prune_lease_history(retain_days)
+                inventory.prune_device_events(retain_days)
+                last_prune = time.time()
+            except sqlite3.Error as e:
+                logger.error(f"Lease history prune failed: {e}")
+
         logger.info(f"Sleeping for {interval} seconds...")
         time.sleep(interval)
 
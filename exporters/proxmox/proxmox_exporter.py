@@ -4,18 +4,26 @@ Proxmox VE Metrics Exporter for Prometheus
 
 Queries Proxmox API for VM/container metrics and exposes them via Prometheus.
 Metrics include CPU, RAM, disk usage per VM/container, and storage pool utilization.
+
+Collection modes (COLLECTION_MODE):
+  bulk      (default) — one /cluster/resources call per cycle; it already carries
+                        cpu/mem/disk/uptime for every guest, node and storage
+  detailed            — bulk, plus /status/current for each running guest, fanned
+                        out over one keep-alive async client with at most
+                        MAX_CONCURRENCY requests in flight
+
+Series for guests/storage that disappear (deleted, renamed, status changed) are
+removed at the end of each cycle so they don't linger as stale values.
 """
 
+import asyncio
 import os
 import time
 import logging
-from typing import Dict, List, Any
-import requests
-from prometheus_client import start_http_server, Gauge, Info
-from urllib3.exceptions import InsecureRequestWarning
+from typing import Dict, List, Any, Set, Tuple
 
-# Suppress SSL warnings if verify_ssl is disabled
-requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+import httpx
+from prometheus_client import start_http_server, Counter, Gauge, Histogram, Info
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +31,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+logging.getLogger('httpx').setLevel(logging.WARNING)  # per-request INFO lines are too chatty
 
 # Environment variables
 PROXMOX_HOST = os.getenv('PROXMOX_HOST', 'pve.mcducklabs.com')
@@ -33,6 +42,8 @@ PROXMOX_NODE = os.getenv('PROXMOX_NODE', 'pve')
 PROXMOX_VERIFY_SSL = os.getenv('PROXMOX_VERIFY_SSL', 'false').lower() == 'true'
 EXPORTER_PORT = int(os.getenv('EXPORTER_PORT', '9002'))
 SCRAPE_INTERVAL = int(os.getenv('SCRAPE_INTERVAL', '60'))
+COLLECTION_MODE = os.getenv('COLLECTION_MODE', 'bulk').lower()
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', '8'))
 
 # Prometheus metrics
 pve_vm_cpu_usage = Gauge('pve_vm_cpu_usage_ratio', 'VM CPU usage ratio', ['vmid', 'name', 'node'])
@@ -60,132 +71,200 @@ pve_node_memory_total = Gauge('pve_node_memory_total_bytes', 'Node total memory
 
 pve_info = Info('pve_exporter', 'Proxmox VE exporter information')
 
+# Exporter self-metrics
+pve_scrape_duration = Gauge('pve_exporter_scrape_duration_seconds', 'Duration of the last collection cycle')
+pve_scrape_success = Gauge('pve_exporter_last_scrape_success', 'Whether the last collection cycle succeeded (1/0)')
+pve_guests = Gauge('pve_exporter_guests', 'Guests seen in the last cycle', ['type'])
+pve_api_requests = Counter('pve_exporter_api_requests_total', 'Proxmox API requests', ['endpoint', 'result'])
+pve_api_latency = Histogram(
+    'pve_exporter_api_request_duration_seconds', 'Proxmox API request latency', ['endpoint'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Every labelled gauge this exporter sets — used for stale-series cleanup
+_GUEST_GAUGES = {
+    'qemu': (pve_vm_cpu_usage, pve_vm_memory_usage, pve_vm_memory_total,
+             pve_vm_disk_usage, pve_vm_disk_total, pve_vm_uptime),
+    'lxc': (pve_ct_cpu_usage, pve_ct_memory_usage, pve_ct_memory_total,
+            pve_ct_disk_usage, pve_ct_disk_total, pve_ct_uptime),
+}
+
 
 class ProxmoxAPI:
-    """Proxmox VE API client."""
+    """Async Proxmox VE API client over a single keep-alive connection pool."""
 
-    def __init__(self, host: str, port: int, token_id: str, token_secret: str, verify_ssl: bool = False):
+    def __init__(self, host: str, port: int, token_id: str, token_secret: str,
+                 verify_ssl: bool = False, max_concurrency: int = MAX_CONCURRENCY):
         self.base_url = f"https://{host}:{port}/api2/json"
         self.headers = {
             "Authorization": f"PVEAPIToken={token_id}={token_secret}"
         }
-        self.verify_ssl = verify_ssl
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
-
-    def _get(self, endpoint: str) -> Dict[str, Any]:
-        """Make GET request to Proxmox API."""
-        url = f"{self.base_url}{endpoint}"
-        try:
-            response = self.session.get(url, verify=self.verify_ssl, timeout=10)
-            response.raise_for_status()
-            return response.json().get('data', {})
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed: {url} - {e}")
-            return {}
-
-    def get_cluster_resources(self) -> List[Dict[str, Any]]:
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            verify=verify_ssl,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _get(self, endpoint: str, kind: str) -> Any:
+        """Make GET request to Proxmox API. `kind` is the low-cardinality metric label."""
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(endpoint)
+                response.raise_for_status()
+                pve_api_requests.labels(endpoint=kind, result='ok').inc()
+                return response.json().get('data', {})
+            except (httpx.HTTPError, ValueError) as e:
+                pve_api_requests.labels(endpoint=kind, result='error').inc()
+                logger.error(f"API request failed: {endpoint} - {e}")
+                return {}
+            finally:
+                pve_api_latency.labels(endpoint=kind).observe(time.perf_counter() - start)
+
+    async def get_cluster_resources(self) -> List[Dict[str, Any]]:
         """Get all cluster resources (VMs, containers, storage, nodes)."""
-        return self._get('/cluster/resources')
+        return await self._get('/cluster/resources', 'cluster_resources') or []
 
-    def get_node_status(self, node: str) -> Dict[str, Any]:
+    async def get_node_status(self, node: str) -> Dict[str, Any]:
         """Get node status."""
-        return self._get(f'/nodes/{node}/status')
+        return await self._get(f'/nodes/{node}/status', 'node_status')
 
-    def get_vm_status(self, node: str, vmid: int) -> Dict[str, Any]:
+    async def get_vm_status(self, node: str, vmid: str) -> Dict[str, Any]:
         """Get VM current status."""
-        return self._get(f'/nodes/{node}/qemu/{vmid}/status/current')
+        return await self._get(f'/nodes/{node}/qemu/{vmid}/status/current', 'qemu_status')
 
-    def get_ct_status(self, node: str, ctid: int) -> Dict[str, Any]:
+    async def get_ct_status(self, node: str, ctid: str) -> Dict[str, Any]:
         """Get container current status."""
-        return self._get(f'/nodes/{node}/lxc/{ctid}/status/current')
+        return await self._get(f'/nodes/{node}/lxc/{ctid}/status/current', 'lxc_status')
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class _SeriesTracker:
+    """Remembers which label sets were set per gauge so vanished ones can be removed."""
+
+    def __init__(self):
+        self._previous: Dict[Gauge, Set[Tuple[str, ...]]] = {}
+        self._current: Dict[Gauge, Set[Tuple[str, ...]]] = {}
+
+    def set(self, gauge: Gauge, value: float, *labels: str):
+        gauge.labels(*labels).set(value)
+        self._current.setdefault(gauge, set()).add(labels)
+
+    def sweep(self):
+        """Drop series not refreshed this cycle, then start a new cycle."""
+        removed = 0
+        for gauge, previous in self._previous.items():
+            for labels in previous - self._current.get(gauge, set()):
+                try:
+                    gauge.remove(*labels)
+                    removed += 1
+                except KeyError:
+                    pass
+        if removed:
+            logger.info(f"Removed {removed} stale series")
+        self._previous, self._current = self._current, {}
+
+
+_series = _SeriesTracker()
 
 
-def collect_metrics(api: ProxmoxAPI, node: str):
+def _set_guest(kind: str, guest_id: str, name: str, node: str, status: str, stats: Dict[str, Any]):
+    cpu, mem, maxmem, disk, maxdisk, uptime = _GUEST_GAUGES[kind]
+    labels = (guest_id, name, node)
+    _series.set(cpu, stats.get('cpu', 0), *labels)
+    _series.set(mem, stats.get('mem', 0), *labels)
+    _series.set(maxmem, stats.get('maxmem', 0), *labels)
+    _series.set(disk, stats.get('disk', 0), *labels)
+    _series.set(maxdisk, stats.get('maxdisk', 0), *labels)
+    _series.set(uptime, stats.get('uptime', 0), *labels)
+    status_gauge = pve_vm_status if kind == 'qemu' else pve_ct_status
+    _series.set(status_gauge, 1 if status == 'running' else 0, *labels, status)
+
+
+async def _guest_details(api: ProxmoxAPI, guests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fetch /status/current for running guests concurrently (bounded by the API semaphore)."""
+    async def fetch(resource):
+        node, vmid = resource.get('node'), str(resource.get('vmid', ''))
+        if resource['type'] == 'qemu':
+            return await api.get_vm_status(node, vmid)
+        return await api.get_ct_status(node, vmid)
+
+    running = [g for g in guests if g.get('status') == 'running']
+    details = await asyncio.gather(*(fetch(g) for g in running))
+    merged = {id(g): {**g, **d} for g, d in zip(running, details) if d}
+    return [merged.get(id(g), g) for g in guests]
+
+
+async def collect_metrics(api: ProxmoxAPI, node: str, mode: str = COLLECTION_MODE):
     """Collect metrics from Proxmox and update Prometheus gauges."""
-    logger.info("Collecting metrics from Proxmox...")
+    logger.info(f"Collecting metrics from Proxmox ({mode} mode)...")
+    start = time.perf_counter()
 
     try:
-        # Get all cluster resources
-        resources = api.get_cluster_resources()
+        # Get all cluster resources — one request covers every guest, node and storage
+        resources = await api.get_cluster_resources()
+        if not resources:
+            raise RuntimeError("empty /cluster/resources response")
+
+        guests = [r for r in resources if r.get('type') in ('qemu', 'lxc')]
+        if mode == 'detailed':
+            guests = await _guest_details(api, guests)
+
+        for guest in guests:
+            _set_guest(
+                guest['type'],
+                str(guest.get('vmid', '')),
+                guest.get('name', 'unknown'),
+                guest.get('node', node),
+                guest.get('status', 'unknown'),
+                guest,
+            )
 
         for resource in resources:
             res_type = resource.get('type')
             res_node = resource.get('node', node)
 
-            # VM metrics
-            if res_type == 'qemu':
-                vmid = str(resource.get('vmid', ''))
-                name = resource.get('name', 'unknown')
-                status = resource.get('status', 'unknown')
-
-                # Get detailed status
-                vm_status = api.get_vm_status(res_node, vmid)
-                if vm_status:
-                    cpu = vm_status.get('cpu', 0)
-                    mem = vm_status.get('mem', 0)
-                    maxmem = vm_status.get('maxmem', 0)
-                    disk = vm_status.get('disk', 0)
-                    maxdisk = vm_status.get('maxdisk', 0)
-                    uptime = vm_status.get('uptime', 0)
-
-                    pve_vm_cpu_usage.labels(vmid=vmid, name=name, node=res_node).set(cpu)
-                    pve_vm_memory_usage.labels(vmid=vmid, name=name, node=res_node).set(mem)
-                    pve_vm_memory_total.labels(vmid=vmid, name=name, node=res_node).set(maxmem)
-                    pve_vm_disk_usage.labels(vmid=vmid, name=name, node=res_node).set(disk)
-                    pve_vm_disk_total.labels(vmid=vmid, name=name, node=res_node).set(maxdisk)
-                    pve_vm_uptime.labels(vmid=vmid, name=name, node=res_node).set(uptime)
-                    pve_vm_status.labels(vmid=vmid, name=name, node=res_node, status=status).set(1 if status == 'running' else 0)
-
-            # Container metrics
-            elif res_type == 'lxc':
-                ctid = str(resource.get('vmid', ''))
-                name = resource.get('name', 'unknown')
-                status = resource.get('status', 'unknown')
-
-                # Get detailed status
-                ct_status = api.get_ct_status(res_node, ctid)
-                if ct_status:
-                    cpu = ct_status.get('cpu', 0)
-                    mem = ct_status.get('mem', 0)
-                    maxmem = ct_status.get('maxmem', 0)
-                    disk = ct_status.get('disk', 0)
-                    maxdisk = ct_status.get('maxdisk', 0)
-                    uptime = ct_status.get('uptime', 0)
-
-                    pve_ct_cpu_usage.labels(ctid=ctid, name=name, node=res_node).set(cpu)
-                    pve_ct_memory_usage.labels(ctid=ctid, name=name, node=res_node).set(mem)
-                    pve_ct_memory_total.labels(ctid=ctid, name=name, node=res_node).set(maxmem)
-                    pve_ct_disk_usage.labels(ctid=ctid, name=name, node=res_node).set(disk)
-                    pve_ct_disk_total.labels(ctid=ctid, name=name, node=res_node).set(maxdisk)
-                    pve_ct_uptime.labels(ctid=ctid, name=name, node=res_node).set(uptime)
-                    pve_ct_status.labels(ctid=ctid, name=name, node=res_node, status=status).set(1 if status == 'running' else 0)
-
             # Storage metrics
-            elif res_type == 'storage':
+            if res_type == 'storage':
                 storage = resource.get('storage', 'unknown')
-                disk = resource.get('disk', 0)
-                maxdisk = resource.get('maxdisk', 0)
-
-                pve_storage_usage.labels(storage=storage, node=res_node).set(disk)
-                pve_storage_total.labels(storage=storage, node=res_node).set(maxdisk)
+                _series.set(pve_storage_usage, resource.get('disk', 0), storage, res_node)
+                _series.set(pve_storage_total, resource.get('maxdisk', 0), storage, res_node)
 
             # Node metrics
             elif res_type == 'node':
                 node_name = resource.get('node', 'unknown')
-                cpu = resource.get('cpu', 0)
-                mem = resource.get('mem', 0)
-                maxmem = resource.get('maxmem', 0)
-
-                pve_node_cpu_usage.labels(node=node_name).set(cpu)
-                pve_node_memory_usage.labels(node=node_name).set(mem)
-                pve_node_memory_total.labels(node=node_name).set(maxmem)
-
+                _series.set(pve_node_cpu_usage, resource.get('cpu', 0), node_name)
+                _series.set(pve_node_memory_usage, resource.get('mem', 0), node_name)
+                _series.set(pve_node_memory_total, resource.get('maxmem', 0), node_name)
+
+        _series.sweep()
+        for kind in ('qemu', 'lxc'):
+            pve_guests.labels(type=kind).set(sum(1 for g in guests if g['type'] == kind))
+        pve_scrape_success.set(1)
         logger.info(f"Metrics collection completed. Found {len(resources)} resources.")
 
     except Exception as e:
+        # Keep last good values (no sweep) — a transient API failure shouldn't blank dashboards
+        pve_scrape_success.set(0)
         logger.error(f"Error collecting metrics: {e}", exc_info=True)
 
+    finally:
+        pve_scrape_duration.set(time.perf_counter() - start)
+
+
+async def _run(api: ProxmoxAPI):
+    try:
+        while True:
+            await collect_metrics(api, PROXMOX_NODE)
+            await asyncio.sleep(SCRAPE_INTERVAL)
+    finally:
+        await api.aclose()
+
 
 def main():
     """Main exporter loop."""
@@ -199,12 +278,14 @@ def main():
     logger.info(f"Node: {PROXMOX_NODE}")
     logger.info(f"Scrape interval: {SCRAPE_INTERVAL}s")
     logger.info(f"SSL verification: {PROXMOX_VERIFY_SSL}")
+    logger.info(f"Collection mode: {COLLECTION_MODE} (max concurrency {MAX_CONCURRENCY})")
 
     # Set exporter info
     pve_info.info({
         'version': '1.0.0',
         'proxmox_host': PROXMOX_HOST,
-        'proxmox_node': PROXMOX_NODE
+        'proxmox_node': PROXMOX_NODE,
+        'collection_mode': COLLECTION_MODE,
     })
 
     # Initialize Proxmox API client
@@ -221,9 +302,7 @@ def main():
     logger.info(f"Metrics endpoint available at http://0.0.0.0:{EXPORTER_PORT}/metrics")
 
     # Collect metrics periodically
-    while True:
-        collect_metrics(api, PROXMOX_NODE)
-        time.sleep(SCRAPE_INTERVAL)
+    asyncio.run(_run(api))
 
 
 if __name__ == '__main__':
@@ -3,27 +3,33 @@
 QNAP API Exporter for Prometheus
 
 Queries QNAP NAS via API for detailed metrics:
-- Per-disk SMART status and health
-- Volume/share usage details
-- Container Station containers
-- RAID status
+- System resources, temperatures and uptime
 - Network statistics
-- Active connections
+- Volume/pool usage
+- Container Station containers
+
+The system, volume and container endpoints are requested concurrently over one
+keep-alive HTTP client. Each endpoint has its own timeout, latency histogram and
+up/down gauge, so a slow NAS CGI only delays (or drops) its own metrics instead
+of stalling the whole scrape. An expired session ID is detected on any endpoint
+and the client logs in again transparently, once, no matter how many requests
+notice at the same time.
+
+XML responses are parsed incrementally with iterparse, keeping only the fields
+the exporter reads.
 """
 
+import asyncio
+import io
 import os
 import time
 import logging
-import re
 import base64
-import requests
-from typing import Dict, List, Any, Optional
-from urllib.parse import urlencode
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 import xml.etree.ElementTree as ET
-from prometheus_client import start_http_server, Gauge, Info
 
-# Disable SSL warnings for self-signed certs
-requests.packages.urllib3.disable_warnings()
+import httpx
+from prometheus_client import start_http_server, Counter, Gauge, Histogram, Info
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +37,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+logging.getLogger('httpx').setLevel(logging.WARNING)  # per-request INFO lines are too chatty
 
 # Environment variables
 QNAP_HOST = os.getenv('QNAP_HOST', 'nas.mcducklabs.com')
@@ -40,10 +47,18 @@ QNAP_PORT = int(os.getenv('QNAP_PORT', '443'))
 QNAP_PROTOCOL = os.getenv('QNAP_PROTOCOL', 'https')
 EXPORTER_PORT = int(os.getenv('EXPORTER_PORT', '9004'))
 SCRAPE_INTERVAL = int(os.getenv('SCRAPE_INTERVAL', '60'))
+# Per-endpoint budget; must stay well under SCRAPE_INTERVAL
+ENDPOINT_TIMEOUT = float(os.getenv('ENDPOINT_TIMEOUT', '20'))
 
 # Prometheus metrics
 qnap_system_info = Info('qnap_system', 'QNAP system information')
 qnap_uptime_seconds = Gauge('qnap_uptime_seconds', 'System uptime', ['host'])
+qnap_cpu_usage = Gauge('qnap_cpu_usage_percent', 'CPU usage percentage', ['host'])
+qnap_cpu_temp = Gauge('qnap_cpu_temperature_celsius', 'CPU temperature', ['host'])
+qnap_system_temp = Gauge('qnap_system_temperature_celsius', 'System temperature', ['host'])
+qnap_memory_total = Gauge('qnap_memory_total_bytes', 'Total memory', ['host'])
+qnap_memory_free = Gauge('qnap_memory_free_bytes', 'Free memory', ['host'])
+qnap_memory_used = Gauge('qnap_memory_used_bytes', 'Used memory', ['host'])
 
 # Disk metrics
 qnap_disk_smart_status = Gauge('qnap_disk_smart_status', 'SMART status (1=good, 0=bad)', ['host', 'disk', 'model'])
@@ -68,147 +83,203 @@ qnap_container_status = Gauge('qnap_container_status', 'Container status (1=runn
 qnap_container_cpu = Gauge('qnap_container_cpu_percent', 'Container CPU usage', ['host', 'container'])
 qnap_container_memory = Gauge('qnap_container_memory_bytes', 'Container memory usage', ['host', 'container'])
 
+# Exporter self-metrics
+qnap_scrape_duration = Gauge('qnap_api_scrape_duration_seconds', 'Duration of the last collection cycle')
+qnap_endpoint_up = Gauge('qnap_api_endpoint_up', 'Whether the endpoint answered in the last cycle (1/0)', ['endpoint'])
+qnap_api_requests = Counter('qnap_api_requests_total', 'QNAP API requests', ['endpoint', 'result'])
+qnap_api_logins = Counter('qnap_api_logins_total', 'QNAP API logins (startup and session re-auth)', ['result'])
+qnap_api_latency = Histogram(
+    'qnap_api_request_duration_seconds', 'QNAP API request latency', ['endpoint'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30),
+)
+
+# Fields read from each XML response; everything else is skipped by the parser
+SYSINFO_FIELDS = frozenset({
+    'uptime_day', 'uptime_hour', 'uptime_min', 'uptime_sec',
+    'cpu_usage', 'total_memory', 'free_memory', 'cpu_tempc', 'sys_tempc',
+})
+SYSINFO_PREFIXES = ('eth_status', 'ifname', 'rx_packet', 'tx_packet')  # numbered per interface
+VOLUME_RECORDS = {
+    'volumeUse': frozenset({'volumeValue', 'total_size', 'free_size'}),
+    'volume': frozenset({'volumeValue', 'volumeLabel', 'volumeStat'}),
+}
+
+
+class SessionExpired(Exception):
+    """The NAS rejected our session ID."""
+
+
+def parse_xml(content: bytes, fields: Iterable[str] = (), prefixes: Tuple[str, ...] = (),
+              records: Optional[Dict[str, Iterable[str]]] = None) -> Tuple[Dict[str, str], Dict[str, List[Dict[str, str]]]]:
+    """Incrementally extract only the wanted parts of a QNAP XML response.
+
+    Args:
+        content: Raw response body.
+        fields: Leaf tags to capture anywhere outside a record (last one wins).
+        prefixes: Leaf tag prefixes to capture too (e.g. 'ifname' for ifname1..N).
+        records: {record tag: child tags} — each occurrence of a record tag
+            becomes one dict of its wanted children.
+
+    Returns:
+        (scalars, {record tag: [row, ...]}). 'authPassed' is always captured
+        so callers can detect an expired session.
+    """
+    wanted = frozenset(fields) | {'authPassed'}
+    records = {tag: frozenset(children) for tag, children in (records or {}).items()}
+    scalars: Dict[str, str] = {}
+    rows: Dict[str, List[Dict[str, str]]] = {tag: [] for tag in records}
+    record_tag, row = None, None
+
+    for event, elem in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if record_tag is None and tag in records:
+                record_tag, row = tag, {}
+            continue
+
+        if record_tag is not None:
+            if tag == record_tag:
+                rows[record_tag].append(row)
+                record_tag, row = None, None
+            elif tag in records[record_tag]:
+                row[tag] = (elem.text or '').strip()
+        elif tag in wanted or (prefixes and tag.startswith(prefixes)):
+            scalars[tag] = (elem.text or '').strip()
+        elem.clear()
+
+    return scalars, rows
+
 
 class QNAPAPIClient:
-    """Client for QNAP API."""
+    """Async client for the QNAP API over a single keep-alive connection pool."""
 
-    def __init__(self, host: str, username: str, password: str, port: int = 443, protocol: str = 'https'):
+    def __init__(self, host: str, username: str, password: str, port: int = 443, protocol: str = 'https',
+                 timeout: float = ENDPOINT_TIMEOUT):
         self.host = host
         self.username = username
         self.password = password
         self.port = port
         self.protocol = protocol
         self.base_url = f'{protocol}://{host}:{port}'
-        self.sid = None
-
-    def login(self) -> bool:
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            verify=False,  # NAS uses a self-signed cert
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+        )
+        self.sid: Optional[str] = None
+        self._login_lock = asyncio.Lock()
+
+    async def login(self) -> bool:
         """Authenticate and get session ID."""
         try:
-            url = f'{self.base_url}/cgi-bin/authLogin.cgi'
-
             # QNAP API requires base64-encoded password
             encoded_pwd = base64.b64encode(self.password.encode()).decode()
-
-            # Use POST with form data
-            data = {
-                'user': self.username,
-                'pwd': encoded_pwd
-            }
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-
-            response = requests.post(url, data=data, headers=headers, verify=False, timeout=10)
-
-            if response.status_code == 200:
-                # Parse XML response
-                root = ET.fromstring(response.content)
-
-                # Check if authentication passed
-                auth_passed = root.find('.//authPassed')
-                if auth_passed is not None and auth_passed.text == '1':
-                    # Extract session ID
-                    auth_sid = root.find('.//authSid')
-                    if auth_sid is not None and auth_sid.text:
-                        self.sid = auth_sid.text
-                        logger.info(f"Successfully authenticated to QNAP at {self.host}")
-                        return True
-                    else:
-                        logger.error("No session ID in response")
-                        return False
-                else:
-                    logger.error("Authentication failed - authPassed != 1")
-                    return False
-            else:
+            response = await self.client.post(
+                '/cgi-bin/authLogin.cgi',
+                data={'user': self.username, 'pwd': encoded_pwd},
+            )
+            if response.status_code != 200:
                 logger.error(f"Login failed: HTTP {response.status_code}")
+                qnap_api_logins.labels(result='error').inc()
                 return False
-        except Exception as e:
+
+            scalars, _ = parse_xml(response.content, fields=('authSid',))
+            if scalars.get('authPassed') != '1':
+                logger.error("Authentication failed - authPassed != 1")
+                qnap_api_logins.labels(result='rejected').inc()
+                return False
+            if not scalars.get('authSid'):
+                logger.error("No session ID in response")
+                qnap_api_logins.labels(result='error').inc()
+                return False
+
+            self.sid = scalars['authSid']
+            qnap_api_logins.labels(result='ok').inc()
+            logger.info(f"Successfully authenticated to QNAP at {self.host}")
+            return True
+        except (httpx.HTTPError, ET.ParseError) as e:
             logger.error(f"Login error: {e}")
+            qnap_api_logins.labels(result='error').inc()
             return False
 
-    def _request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make authenticated API request."""
-        if not self.sid:
-            if not self.login():
-                return None
-
-        try:
-            url = f'{self.base_url}{endpoint}'
-            if params is None:
-                params = {}
-            params['sid'] = self.sid
-
-            response = requests.get(url, params=params, verify=False, timeout=30)
-
-            if response.status_code == 200:
-                # Try to parse as XML
-                try:
-                    root = ET.fromstring(response.content)
-                    return self._xml_to_dict(root)
-                except:
-                    # If not XML, return text
-                    return {'content': response.text}
-            else:
-                logger.error(f"Request failed: {endpoint} - HTTP {response.status_code}")
-                return None
-        except Exception as e:
-            logger.error(f"Request error: {e}")
-            return None
-
-    def _xml_to_dict(self, element: ET.Element) -> Dict:
-        """Convert XML element to dictionary, handling multiple elements with same tag."""
-        result = {}
-        for child in element:
-            child_data = self._xml_to_dict(child) if len(child) > 0 else child.text
-
-            # If tag already exists, convert to list or append
-            if child.tag in result:
-                if not isinstance(result[child.tag], list):
-                    result[child.tag] = [result[child.tag]]
-                result[child.tag].append(child_data)
-            else:
-                result[child.tag] = child_data
-        return result
-
-    def get_system_info(self) -> Optional[Dict]:
-        """Get system information."""
-        return self._request('/cgi-bin/management/manaRequest.cgi', {
-            'subfunc': 'sysinfo',
-            'hd': 'no',
-            'multicpu': 'yes'
-        })
-
-    def get_disk_info(self) -> Optional[Dict]:
-        """Get disk information and SMART status."""
-        return self._request('/cgi-bin/disk/disk_manage.cgi', {
-            'func': 'extra_get',
-            'disktype': 'all',
-            'is_ajax': '1'
-        })
-
-    def get_volume_info(self) -> Optional[Dict]:
+    async def _ensure_session(self, stale_sid: Optional[str] = None) -> bool:
+        """Log in if there is no session, or if `stale_sid` is still the current one.
+
+        Concurrent requests that all see the same expired SID wait on the lock;
+        the first re-authenticates and the rest reuse the new SID.
+        """
+        async with self._login_lock:
+            if self.sid and self.sid != stale_sid:
+                return True
+            return await self.login()
+
+    async def _get(self, endpoint: str, kind: str, params: Dict[str, str], parse) -> Any:
+        """Authenticated GET, re-logging in once if the session has expired.
+
+        `parse(response)` turns the body into a result and raises SessionExpired
+        if the NAS says the SID is no longer valid. `kind` is the metric label.
+        """
+        for attempt in (1, 2):
+            if not await self._ensure_session():
+                raise SessionExpired("not authenticated")
+            sid = self.sid
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(endpoint, params={**params, 'sid': sid})
+                if response.status_code in (401, 403):
+                    raise SessionExpired(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                result = parse(response)
+                qnap_api_requests.labels(endpoint=kind, result='ok').inc()
+                return result
+            except SessionExpired:
+                qnap_api_requests.labels(endpoint=kind, result='reauth').inc()
+                if attempt == 2:
+                    raise
+                logger.info(f"Session expired on {kind}; re-authenticating")
+                await self._ensure_session(stale_sid=sid)
+            except asyncio.CancelledError:
+                # ENDPOINT_TIMEOUT hit — the scrape moves on without this endpoint
+                qnap_api_requests.labels(endpoint=kind, result='timeout').inc()
+                raise
+            except Exception:
+                qnap_api_requests.labels(endpoint=kind, result='error').inc()
+                raise
+            finally:
+                qnap_api_latency.labels(endpoint=kind).observe(time.perf_counter() - start)
+
+    @staticmethod
+    def _xml(response: httpx.Response, **spec) -> Tuple[Dict[str, str], Dict[str, List[Dict[str, str]]]]:
+        scalars, rows = parse_xml(response.content, **spec)
+        if scalars.get('authPassed') == '0':
+            raise SessionExpired("authPassed=0")
+        return scalars, rows
+
+    async def get_system_info(self) -> Dict[str, str]:
+        """Get system information (resources, temperatures, uptime, interfaces)."""
+        scalars, _ = await self._get(
+            '/cgi-bin/management/manaRequest.cgi', 'sysinfo',
+            {'subfunc': 'sysinfo', 'hd': 'no', 'multicpu': 'yes'},
+            lambda r: self._xml(r, fields=SYSINFO_FIELDS, prefixes=SYSINFO_PREFIXES),
+        )
+        return scalars
+
+    async def get_volume_info(self) -> Dict[str, List[Dict[str, str]]]:
         """Get volume/pool information and usage."""
-        return self._request('/cgi-bin/management/chartReq.cgi', {
-            'chart_func': 'disk_usage',
-            'disk_select': 'all',
-            'include': 'all'
-        })
-
-    def get_containers(self) -> Optional[List]:
+        _, rows = await self._get(
+            '/cgi-bin/management/chartReq.cgi', 'volumes',
+            {'chart_func': 'disk_usage', 'disk_select': 'all', 'include': 'all'},
+            lambda r: self._xml(r, records=VOLUME_RECORDS),
+        )
+        return rows
+
+    async def get_containers(self) -> List[Dict[str, Any]]:
         """Get Container Station containers."""
-        try:
-            url = f'{self.base_url}/container-station/api/v1/container'
-            response = requests.get(
-                url,
-                params={'sid': self.sid},
-                verify=False,
-                timeout=10
-            )
-            if response.status_code == 200:
-                return response.json()
-            return None
-        except:
-            return None
+        return await self._get('/container-station/api/v1/container', 'containers', {}, lambda r: r.json())
+
+    async def aclose(self):
+        await self.client.aclose()
 
 
 def parse_value(value: Any, default: float = 0.0) -> float:
@@ -227,181 +298,166 @@ def parse_value(value: Any, default: float = 0.0) -> float:
     return default
 
 
-def collect_metrics(client: QNAPAPIClient, hostname: str):
-    """Collect all metrics from QNAP."""
+def export_system_info(root: Dict[str, str], hostname: str):
+    # Parse uptime
+    uptime_day = parse_value(root.get('uptime_day'))
+    uptime_hour = parse_value(root.get('uptime_hour'))
+    uptime_min = parse_value(root.get('uptime_min'))
+    uptime_sec = parse_value(root.get('uptime_sec'))
+
+    total_uptime_seconds = (uptime_day * 86400) + (uptime_hour * 3600) + (uptime_min * 60) + uptime_sec
+    qnap_uptime_seconds.labels(host=hostname).set(total_uptime_seconds)
+    logger.debug(f"Uptime: {total_uptime_seconds} seconds ({uptime_day}d {uptime_hour}h {uptime_min}m)")
+
+    # CPU usage
+    cpu_usage = parse_value(root.get('cpu_usage'))
+    if cpu_usage > 0:
+        qnap_cpu_usage.labels(host=hostname).set(cpu_usage)
+        logger.debug(f"CPU usage: {cpu_usage}%")
+
+    # Memory
+    total_memory = parse_value(root.get('total_memory'))
+    free_memory = parse_value(root.get('free_memory'))
+    if total_memory > 0:
+        # Convert MB to bytes
+        total_bytes = total_memory * 1024 * 1024
+        free_bytes = free_memory * 1024 * 1024
+        used_bytes = total_bytes - free_bytes
+
+        qnap_memory_total.labels(host=hostname).set(total_bytes)
+        qnap_memory_free.labels(host=hostname).set(free_bytes)
+        qnap_memory_used.labels(host=hostname).set(used_bytes)
+        logger.debug(f"Memory: {used_bytes / (1024**3):.1f}GB / {total_bytes / (1024**3):.1f}GB used")
+
+    # Temperatures
+    cpu_temp = parse_value(root.get('cpu_tempc'))
+    sys_temp = parse_value(root.get('sys_tempc'))
+
+    if cpu_temp > 0:
+        qnap_cpu_temp.labels(host=hostname).set(cpu_temp)
+        logger.debug(f"CPU temp: {cpu_temp}°C")
+
+    if sys_temp > 0:
+        qnap_system_temp.labels(host=hostname).set(sys_temp)
+        logger.debug(f"System temp: {sys_temp}°C")
+
+    # Network interfaces
+    for i in range(1, 10):  # Support up to 9 interfaces
+        eth_status_key = f'eth_status{i}'
+        if eth_status_key not in root:
+            break
+
+        ifname = root.get(f'ifname{i}') or f'eth{i-1}'
+        rx_packets = parse_value(root.get(f'rx_packet{i}'))
+        tx_packets = parse_value(root.get(f'tx_packet{i}'))
+
+        if rx_packets > 0 or tx_packets > 0:
+            qnap_network_rx_bytes.labels(host=hostname, interface=ifname).set(rx_packets)
+            qnap_network_tx_bytes.labels(host=hostname, interface=ifname).set(tx_packets)
+            logger.debug(f"Interface {ifname}: RX={rx_packets}, TX={tx_packets}")
+
+
+def export_volume_info(vol_info: Dict[str, List[Dict[str, str]]], hostname: str):
+    # Map volumeValue to label and RAID type from the volume list
+    volume_labels = {}
+    for vol in vol_info.get('volume', []):
+        vol_value = vol.get('volumeValue')
+        if vol_value:
+            volume_labels[vol_value] = {
+                'label': vol.get('volumeLabel') or f'Volume{vol_value}',
+                'type': vol.get('volumeStat') or 'unknown',  # raid5, single, etc.
+            }
+
+    volume_use = vol_info.get('volumeUse', [])
+    logger.info(f"Found {len(volume_use)} volumes")
+    for vol_use in volume_use:
+        vol_value = vol_use.get('volumeValue')
+        total_size = parse_value(vol_use.get('total_size'))
+        free_size = parse_value(vol_use.get('free_size'))
+        if total_size <= 0:
+            continue
+
+        used_size = total_size - free_size
+        vol_info_data = volume_labels.get(vol_value, {'label': f'Volume{vol_value}', 'type': 'unknown'})
+        vol_label = vol_info_data['label']
+        vol_type = vol_info_data['type']
+
+        qnap_volume_capacity.labels(host=hostname, volume=vol_label, pool=vol_type).set(total_size)
+        qnap_volume_used.labels(host=hostname, volume=vol_label, pool=vol_type).set(used_size)
+        qnap_volume_free.labels(host=hostname, volume=vol_label, pool=vol_type).set(free_size)
+
+        usage_pct = (used_size / total_size) * 100
+        logger.debug(f"Volume {vol_label} ({vol_type}): {used_size/(1024**3):.1f}GB / {total_size/(1024**3):.1f}GB ({usage_pct:.1f}% used)")
+
+
+def export_containers(containers: Any, hostname: str):
+    if not isinstance(containers, list):
+        return
+    logger.info(f"Found {len(containers)} containers")
+    for container in containers:
+        name = container.get('name', 'unknown')
+        image = container.get('image', 'unknown')
+        state = container.get('state', 'unknown')
+
+        status = 1 if state == 'running' else 0
+        qnap_container_status.labels(host=hostname, container=name, image=image).set(status)
+
+        # CPU and memory if available
+        stats = container.get('stats', {})
+        if stats:
+            cpu = parse_value(stats.get('cpu_percent'))
+            mem = parse_value(stats.get('memory_usage'))
+
+            if cpu > 0:
+                qnap_container_cpu.labels(host=hostname, container=name).set(cpu)
+            if mem > 0:
+                qnap_container_memory.labels(host=hostname, container=name).set(mem)
+
+
+async def collect_metrics(client: QNAPAPIClient, hostname: str):
+    """Collect all metrics from QNAP; endpoints run concurrently and fail independently."""
     logger.info("Collecting QNAP API metrics...")
+    start = time.perf_counter()
+
+    endpoints = (
+        ('sysinfo', client.get_system_info, export_system_info),
+        ('volumes', client.get_volume_info, export_volume_info),
+        ('containers', client.get_containers, export_containers),
+    )
+    results = await asyncio.gather(
+        *(asyncio.wait_for(fetch(), timeout=ENDPOINT_TIMEOUT) for _, fetch, _ in endpoints),
+        return_exceptions=True,
+    )
+
+    for (kind, _, export), result in zip(endpoints, results):
+        if isinstance(result, BaseException):
+            qnap_endpoint_up.labels(endpoint=kind).set(0)
+            reason = 'timed out' if isinstance(result, asyncio.TimeoutError) else str(result) or type(result).__name__
+            logger.error(f"Endpoint {kind} failed: {reason}")
+            continue
+        qnap_endpoint_up.labels(endpoint=kind).set(1)
+        try:
+            export(result, hostname)
+        except Exception as e:
+            logger.error(f"Error exporting {kind} metrics: {e}", exc_info=True)
 
+    duration = time.perf_counter() - start
+    qnap_scrape_duration.set(duration)
+    logger.info(f"Metrics collection completed in {duration:.2f}s")
+
+
+async def _run(client: QNAPAPIClient, hostname: str):
     try:
-        # System info
-        sys_info = client.get_system_info()
-        if sys_info:
-            # Navigate through the nested dict structure
-            func = sys_info.get('func', {})
-            own_content = func.get('ownContent', {})
-            root = own_content.get('root', {})
-
-            if root:
-                # Parse uptime
-                uptime_day = parse_value(root.get('uptime_day'))
-                uptime_hour = parse_value(root.get('uptime_hour'))
-                uptime_min = parse_value(root.get('uptime_min'))
-                uptime_sec = parse_value(root.get('uptime_sec'))
-
-                total_uptime_seconds = (uptime_day * 86400) + (uptime_hour * 3600) + (uptime_min * 60) + uptime_sec
-                qnap_uptime_seconds.labels(host=hostname).set(total_uptime_seconds)
-                logger.debug(f"Uptime: {total_uptime_seconds} seconds ({uptime_day}d {uptime_hour}h {uptime_min}m)")
-
-                # CPU usage
-                cpu_usage = parse_value(root.get('cpu_usage'))
-                if cpu_usage > 0:
-                    # Create a CPU usage metric (not in original spec, but useful)
-                    cpu_gauge = Gauge('qnap_cpu_usage_percent', 'CPU usage percentage', ['host'])
-                    cpu_gauge.labels(host=hostname).set(cpu_usage)
-                    logger.debug(f"CPU usage: {cpu_usage}%")
-
-                # Memory
-                total_memory = parse_value(root.get('total_memory'))
-                free_memory = parse_value(root.get('free_memory'))
-                if total_memory > 0:
-                    # Convert MB to bytes
-                    mem_total_gauge = Gauge('qnap_memory_total_bytes', 'Total memory', ['host'])
-                    mem_free_gauge = Gauge('qnap_memory_free_bytes', 'Free memory', ['host'])
-                    mem_used_gauge = Gauge('qnap_memory_used_bytes', 'Used memory', ['host'])
-
-                    total_bytes = total_memory * 1024 * 1024
-                    free_bytes = free_memory * 1024 * 1024
-                    used_bytes = total_bytes - free_bytes
-
-                    mem_total_gauge.labels(host=hostname).set(total_bytes)
-                    mem_free_gauge.labels(host=hostname).set(free_bytes)
-                    mem_used_gauge.labels(host=hostname).set(used_bytes)
-                    logger.debug(f"Memory: {used_bytes / (1024**3):.1f}GB / {total_bytes / (1024**3):.1f}GB used")
-
-                # Temperatures
-                cpu_temp = parse_value(root.get('cpu_tempc'))
-                sys_temp = parse_value(root.get('sys_tempc'))
-
-                if cpu_temp > 0:
-                    cpu_temp_gauge = Gauge('qnap_cpu_temperature_celsius', 'CPU temperature', ['host'])
-                    cpu_temp_gauge.labels(host=hostname).set(cpu_temp)
-                    logger.debug(f"CPU temp: {cpu_temp}°C")
-
-                if sys_temp > 0:
-                    sys_temp_gauge = Gauge('qnap_system_temperature_celsius', 'System temperature', ['host'])
-                    sys_temp_gauge.labels(host=hostname).set(sys_temp)
-                    logger.debug(f"System temp: {sys_temp}°C")
-
-                # Network interfaces
-                for i in range(1, 10):  # Support up to 9 interfaces
-                    eth_status_key = f'eth_status{i}'
-                    if eth_status_key not in root:
-                        break
-
-                    ifname = root.get(f'ifname{i}', f'eth{i-1}')
-                    eth_status = parse_value(root.get(eth_status_key))
-                    rx_packets = parse_value(root.get(f'rx_packet{i}'))
-                    tx_packets = parse_value(root.get(f'tx_packet{i}'))
-
-                    if rx_packets > 0 or tx_packets > 0:
-                        qnap_network_rx_bytes.labels(host=hostname, interface=ifname).set(rx_packets)
-                        qnap_network_tx_bytes.labels(host=hostname, interface=ifname).set(tx_packets)
-                        logger.debug(f"Interface {ifname}: RX={rx_packets}, TX={tx_packets}")
-
-        # Volume info
-        vol_info = client.get_volume_info()
-        if vol_info:
-            # Parse volumeUseList which contains usage data
-            volume_use_list = vol_info.get('volumeUseList', {})
-            volume_use = volume_use_list.get('volumeUse', [])
-
-            # volumeUse can be a single dict or a list
-            if isinstance(volume_use, dict):
-                volume_use = [volume_use]
-
-            # Also get volume list for labels
-            volume_list = vol_info.get('volumeList', {})
-            volumes = volume_list.get('volume', [])
-            if isinstance(volumes, dict):
-                volumes = [volumes]
-
-            # Create a map of volumeValue to volumeLabel
-            volume_labels = {}
-            for vol in volumes:
-                vol_value = vol.get('volumeValue')
-                vol_label = vol.get('volumeLabel', f'Volume{vol_value}')
-                vol_stat = vol.get('volumeStat', 'unknown')  # raid5, single, etc.
-                if vol_value:
-                    volume_labels[vol_value] = {
-                        'label': vol_label,
-                        'type': vol_stat
-                    }
-
-            logger.info(f"Found {len(volume_use)} volumes")
-            for vol_use in volume_use:
-                vol_value = vol_use.get('volumeValue')
-                total_size = parse_value(vol_use.get('total_size'))
-                free_size = parse_value(vol_use.get('free_size'))
-
-                if total_size > 0:
-                    used_size = total_size - free_size
-
-                    # Get volume label
-                    vol_info_data = volume_labels.get(vol_value, {'label': f'Volume{vol_value}', 'type': 'unknown'})
-                    vol_label = vol_info_data['label']
-                    vol_type = vol_info_data['type']
-
-                    qnap_volume_capacity.labels(
-                        host=hostname,
-                        volume=vol_label,
-                        pool=vol_type
-                    ).set(total_size)
-
-                    qnap_volume_used.labels(
-                        host=hostname,
-                        volume=vol_label,
-                        pool=vol_type
-                    ).set(used_size)
-
-                    qnap_volume_free.labels(
-                        host=hostname,
-                        volume=vol_label,
-                        pool=vol_type
-                    ).set(free_size)
-
-                    usage_pct = (used_size / total_size) * 100 if total_size > 0 else 0
-                    logger.debug(f"Volume {vol_label} ({vol_type}): {used_size/(1024**3):.1f}GB / {total_size/(1024**3):.1f}GB ({usage_pct:.1f}% used)")
-
-        # Container Station
-        containers = client.get_containers()
-        if containers and isinstance(containers, list):
-            logger.info(f"Found {len(containers)} containers")
-            for container in containers:
-                name = container.get('name', 'unknown')
-                image = container.get('image', 'unknown')
-                state = container.get('state', 'unknown')
-
-                status = 1 if state == 'running' else 0
-                qnap_container_status.labels(
-                    host=hostname,
-                    container=name,
-                    image=image
-                ).set(status)
-
-                # CPU and memory if available
-                stats = container.get('stats', {})
-                if stats:
-                    cpu = parse_value(stats.get('cpu_percent'))
-                    mem = parse_value(stats.get('memory_usage'))
-
-                    if cpu > 0:
-                        qnap_container_cpu.labels(host=hostname, container=name).set(cpu)
-                    if mem > 0:
-                        qnap_container_memory.labels(host=hostname, container=name).set(mem)
-
-        logger.info("Metrics collection completed")
-
-    except Exception as e:
-        logger.error(f"Error collecting metrics: {e}", exc_info=True)
+        if not await client.login():
+            # Not fatal: every request re-attempts login, so a NAS that was
+            # rebooting at startup is picked up on a later cycle
+            logger.error("Failed to authenticate to QNAP; will retry on the next cycle")
+        while True:
+            cycle_start = time.monotonic()
+            await collect_metrics(client, hostname)
+            await asyncio.sleep(max(0.0, SCRAPE_INTERVAL - (time.monotonic() - cycle_start)))
+    finally:
+        await client.aclose()
 
 
 def main():
@@ -409,24 +465,14 @@ def main():
     logger.info(f"Starting QNAP API exporter on port {EXPORTER_PORT}")
     logger.info(f"QNAP host: {QNAP_HOST}:{QNAP_PORT}")
     logger.info(f"Username: {QNAP_USERNAME}")
-    logger.info(f"Scrape interval: {SCRAPE_INTERVAL}s")
+    logger.info(f"Scrape interval: {SCRAPE_INTERVAL}s (per-endpoint timeout {ENDPOINT_TIMEOUT}s)")
 
     # Start Prometheus metrics server
     start_http_server(EXPORTER_PORT)
     logger.info(f"Metrics endpoint available at http://0.0.0.0:{EXPORTER_PORT}/metrics")
 
-    # Create QNAP API client
     client = QNAPAPIClient(QNAP_HOST, QNAP_USERNAME, QNAP_PASSWORD, QNAP_PORT, QNAP_PROTOCOL)
-
-    # Initial login
-    if not client.login():
-        logger.error("Failed to authenticate to QNAP. Exiting.")
-        return
-
-    # Collection loop
-    while True:
-        collect_metrics(client, QNAP_HOST)
-        time.sleep(SCRAPE_INTERVAL)
+    asyncio.run(_run(client, QNAP_HOST))
 
 
 if __name__ == '__main__':
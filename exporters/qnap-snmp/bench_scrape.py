@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark QNAP SNMP scrape latency against an snmpsim fixture (or a real NAS).
+
+Compares:
+  - legacy: snmpget/snmpwalk subprocesses, one per OID/table, run in sequence
+    (what the exporter did before; skipped if net-snmp tools aren't installed)
+  - native, sequential GETNEXT-sized requests (max-repetitions 1, one table
+    at a time) — isolates the cost of the in-process engine itself
+  - native, GETBULK per table, all tables concurrently (what the exporter does)
+
+Usage:
+    pip install snmpsim   # as root, also export SNMPSIM_ALLOW_ROOT=true
+    python bench_scrape.py                       # starts snmpsim on 127.0.0.1:11161
+    python bench_scrape.py --host nas.mcducklabs.com --port 161 --community public
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import qnap_exporter as qe
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TABLES = (
+    (f'{qe.QNAP_DISK_TABLE}.1', qe.DISK_COLUMNS),
+    (f'{qe.QNAP_VOLUME_TABLE}.1', qe.VOLUME_COLUMNS),
+    (f'{qe.QNAP_IF_TABLE}.1', qe.IF_COLUMNS),
+    (qe.HR_STORAGE, qe.HR_STORAGE_COLUMNS),
+)
+
+
+def start_snmpsim(port: int) -> subprocess.Popen:
+    """Serve snmpsim/public.snmprec (community "public") on localhost."""
+    responder = shutil.which('snmpsim-command-responder')
+    if not responder:
+        sys.exit("snmpsim-command-responder not found — pip install snmpsim, or pass --host")
+    cache_dir = tempfile.mkdtemp(prefix='snmpsim-')
+    proc = subprocess.Popen(
+        [responder, f'--data-dir={os.path.join(HERE, "snmpsim")}',
+         f'--agent-udpv4-endpoint=127.0.0.1:{port}', f'--cache-dir={cache_dir}'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    if not asyncio.run(_wait_for_agent(port)):
+        proc.terminate()
+        sys.exit("snmpsim did not start")
+    return proc
+
+
+async def _wait_for_agent(port: int, timeout: float = 30) -> bool:
+    """Poll until the responder answers (it indexes the .snmprec on startup)."""
+    client = qe.QNAPSNMPClient('127.0.0.1', 'public', port, timeout=0.5, retries=0)
+    deadline = time.time() + timeout
+    try:
+        while time.time() < deadline:
+            if await client.get([qe.HR_SYSTEM_UPTIME]):
+                return True
+            await asyncio.sleep(0.5)
+        return False
+    finally:
+        client.close()
+
+
+def legacy_scrape(host: str, port: int, community: str) -> int:
+    """Subprocess sequence the exporter used to run. Returns process count."""
+    target = f'{host}:{port}'
+    calls = 0
+
+    def run(tool, flags, oid):
+        nonlocal calls
+        calls += 1
+        out = subprocess.run([tool, '-v', '2c', '-c', community, flags, target, oid],
+                             capture_output=True, text=True, timeout=30)
+        return out.stdout
+
+    for oid in (qe.QNAP_CPU_USAGE, qe.QNAP_SYSTEM_TEMP, qe.HR_SYSTEM_UPTIME):
+        run('snmpget', '-Oqv', oid)
+    for table in (qe.QNAP_DISK_TABLE, qe.QNAP_VOLUME_TABLE, qe.QNAP_IF_TABLE, qe.HR_STORAGE):
+        run('snmpwalk', '-Oen', table)
+    for col in ('5', '6', '4'):
+        run('snmpget', '-Oqv', f'{qe.HR_STORAGE}.{col}.1')
+    return calls
+
+
+async def native_sequential(client: qe.QNAPSNMPClient) -> int:
+    client.pdus = 0
+    await client.get([qe.QNAP_CPU_USAGE, qe.QNAP_SYSTEM_TEMP, qe.HR_SYSTEM_UPTIME])
+    for entry, columns in TABLES:
+        await client.bulk_table(entry, columns)
+    return client.pdus
+
+
+async def native_bulk(client: qe.QNAPSNMPClient) -> int:
+    client.pdus = 0
+    await client.fetch_all()
+    return client.pdus
+
+
+def bench(label: str, fn, rounds: int):
+    fn()  # warm-up (DNS, transport, snmpsim index)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        requests = fn()
+    per_scrape = (time.perf_counter() - t0) / rounds * 1000
+    print(f"  {label:<40} {per_scrape:8.2f} ms/scrape  ({requests} requests)")
+    return per_scrape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', help="SNMP agent (default: start snmpsim locally)")
+    parser.add_argument('--port', type=int, default=11161)
+    parser.add_argument('--community', default='public')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    sim = None
+    host = args.host
+    if not host:
+        host = '127.0.0.1'
+        sim = start_snmpsim(args.port)
+
+    try:
+        print(f"Target: {host}:{args.port} ({'snmpsim fixture' if sim else 'live agent'})")
+        legacy_ms = None
+        if shutil.which('snmpwalk') and shutil.which('snmpget'):
+            legacy_ms = bench("legacy snmpget/snmpwalk subprocesses",
+                              lambda: legacy_scrape(host, args.port, args.community), args.rounds)
+        else:
+            print("  legacy snmpget/snmpwalk subprocesses     skipped (net-snmp tools not installed)")
+
+        loop = asyncio.new_event_loop()
+        seq_client = qe.QNAPSNMPClient(host, args.community, args.port, max_repetitions=1)
+        seq_ms = bench("native, GETNEXT-sized, sequential",
+                       lambda: loop.run_until_complete(native_sequential(seq_client)), args.rounds)
+        bulk_client = qe.QNAPSNMPClient(host, args.community, args.port)
+        bulk_ms = bench("native, GETBULK, concurrent (exporter)",
+                        lambda: loop.run_until_complete(native_bulk(bulk_client)), args.rounds)
+        seq_client.close()
+        bulk_client.close()
+        loop.run_until_complete(asyncio.sleep(0))  # let the dispatchers cancel their timers
+        loop.close()
+
+        print(f"  speedup vs sequential: {seq_ms / bulk_ms:.1f}x"
+              + (f", vs legacy: {legacy_ms / bulk_ms:.1f}x" if legacy_ms else ""))
+
+        # Sanity: both native paths must return the same rows
+        check = asyncio.run(_compare(host, args.port, args.community))
+        print(f"  equivalence: {check}")
+    finally:
+        if sim:
+            sim.terminate()
+            sim.wait()
+
+
+async def _compare(host: str, port: int, community: str) -> str:
+    a = qe.QNAPSNMPClient(host, community, port, max_repetitions=1)
+    b = qe.QNAPSNMPClient(host, community, port)
+    rows_a, rows_b = [], []
+    for entry, columns in TABLES:
+        rows_a += await a.bulk_table(entry, columns)
+        rows_b += await b.bulk_table(entry, columns)
+    a.close()
+    b.close()
+    if sorted(rows_a) != sorted(rows_b):
+        return f"MISMATCH ({len(rows_a)} vs {len(rows_b)} rows)"
+    return f"OK ({len(rows_b)} rows)"
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,8 @@
 """
 QNAP NAS SNMP Exporter for Prometheus
 
-Queries QNAP NAS via SNMP and exposes metrics for:
+Queries QNAP NAS via SNMP (in-process pysnmp engine, GETBULK per table,
+all tables fetched concurrently over one UDP transport) and exposes metrics for:
 - CPU usage
 - Memory usage
 - Disk temperatures and status
@@ -13,11 +14,17 @@ Queries QNAP NAS via SNMP and exposes metrics for:
 
 import os
 import time
+import asyncio
 import logging
 import re
-import subprocess
-from typing import Dict, List, Any, Optional
-from prometheus_client import start_http_server, Gauge, Counter, Info
+from typing import Dict, List, Iterable, Optional, Tuple
+from prometheus_client import start_http_server, Gauge, REGISTRY
+from prometheus_client.core import CounterMetricFamily
+from pysnmp.hlapi.v3arch.asyncio import (
+    SnmpEngine, CommunityData, UdpTransportTarget, ContextData,
+    ObjectType, ObjectIdentity, get_cmd, bulk_cmd,
+)
+from pysnmp.proto.rfc1905 import EndOfMibView, NoSuchInstance, NoSuchObject
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +37,11 @@ logger = logging.getLogger(__name__)
 QNAP_HOST = os.getenv('QNAP_HOST', 'nas.mcducklabs.com')
 SNMP_COMMUNITY = os.getenv('SNMP_COMMUNITY', 'public')
 SNMP_PORT = int(os.getenv('SNMP_PORT', '161'))
+SNMP_TIMEOUT = float(os.getenv('SNMP_TIMEOUT', '3'))
+SNMP_RETRIES = int(os.getenv('SNMP_RETRIES', '1'))
+# Rows requested per GETBULK. Sized so a NAS with a typical number of disks /
+# volumes / interfaces returns each whole table in a single response PDU.
+SNMP_MAX_REPETITIONS = int(os.getenv('SNMP_MAX_REPETITIONS', '24'))
 EXPORTER_PORT = int(os.getenv('EXPORTER_PORT', '9003'))
 SCRAPE_INTERVAL = int(os.getenv('SCRAPE_INTERVAL', '60'))
 
@@ -45,6 +57,15 @@ QNAP_IF_TABLE = f'{QNAP_OID_BASE}.1.2.9'  # Network interface table
 HOST_RESOURCES_MIB = '1.3.6.1.2.1.25'
 HR_STORAGE = f'{HOST_RESOURCES_MIB}.2.3.1'  # hrStorageTable
 HR_SYSTEM_UPTIME = f'{HOST_RESOURCES_MIB}.1.1.0'  # hrSystemUptime
+HR_STORAGE_RAM = f'{HOST_RESOURCES_MIB}.2.1.2'  # hrStorageType value for RAM
+
+# Columns actually read from each table. Only these are requested, one
+# GETBULK varbind per column, so a table comes back row-aligned in one PDU
+# instead of walking every column (model, capacity, SMART text, ...) OID by OID.
+DISK_COLUMNS = ('2', '3', '4')  # name, temperature, status
+VOLUME_COLUMNS = ('2', '4', '5')  # name, size, free
+IF_COLUMNS = ('2', '3', '4')  # name, rx bytes, tx bytes
+HR_STORAGE_COLUMNS = ('2', '3', '4', '5', '6')  # type, descr, units, size, used
 
 # Prometheus metrics
 qnap_cpu_usage = Gauge('qnap_cpu_usage_percent', 'CPU usage percentage', ['host'])
@@ -58,91 +79,168 @@ qnap_volume_size = Gauge('qnap_volume_size_bytes', 'Volume total size', ['host',
 qnap_volume_used = Gauge('qnap_volume_used_bytes', 'Volume used space', ['host', 'volume'])
 qnap_volume_free = Gauge('qnap_volume_free_bytes', 'Volume free space', ['host', 'volume'])
 
-qnap_if_rx_bytes = Counter('qnap_interface_rx_bytes_total', 'Interface RX bytes', ['host', 'interface'])
-qnap_if_tx_bytes = Counter('qnap_interface_tx_bytes_total', 'Interface TX bytes', ['host', 'interface'])
-
 qnap_memory_total = Gauge('qnap_memory_total_bytes', 'Total memory', ['host'])
 qnap_memory_used = Gauge('qnap_memory_used_bytes', 'Used memory', ['host'])
 
+# Exporter self-metrics
+qnap_scrape_duration = Gauge('qnap_snmp_scrape_duration_seconds', 'Time to collect all SNMP data', ['host'])
+qnap_scrape_pdus = Gauge('qnap_snmp_scrape_pdus', 'SNMP request PDUs sent in the last scrape', ['host'])
+qnap_scrape_success = Gauge('qnap_snmp_last_scrape_success', 'Whether the last SNMP scrape succeeded', ['host'])
+
+
+class InterfaceCounterCollector:
+    """Exposes the NAS's own interface byte counters as Prometheus counters.
+
+    The agent already reports cumulative totals, so they are passed through
+    as-is on each scrape rather than inc()'d into a client-side Counter
+    (which added the full total every collection cycle). Each walk replaces
+    the host's interfaces, so a removed or renamed interface stops exporting.
+    """
+
+    def __init__(self):
+        self.values: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def update(self, host: str, interfaces: Dict[str, Tuple[int, int]]):
+        """Replace `host`'s interfaces with those seen in this walk."""
+        values = {key: value for key, value in self.values.items() if key[0] != host}
+        values.update({(host, name): counters for name, counters in interfaces.items()})
+        # Swapped in whole: collect() may be iterating the previous dict
+        self.values = values
+
+    def collect(self):
+        rx = CounterMetricFamily('qnap_interface_rx_bytes', 'Interface RX bytes', labels=['host', 'interface'])
+        tx = CounterMetricFamily('qnap_interface_tx_bytes', 'Interface TX bytes', labels=['host', 'interface'])
+        for (host, interface), (rx_bytes, tx_bytes) in self.values.items():
+            if rx_bytes is not None:
+                rx.add_metric([host, interface], rx_bytes)
+            if tx_bytes is not None:
+                tx.add_metric([host, interface], tx_bytes)
+        yield rx
+        yield tx
+
+
+interface_counters = InterfaceCounterCollector()
+REGISTRY.register(interface_counters)
+
 
 class QNAPSNMPClient:
-    """SNMP client for QNAP NAS using subprocess."""
+    """In-process SNMPv2c client for QNAP NAS.
 
-    def __init__(self, host: str, community: str, port: int = 161):
+    One SnmpEngine and one UDP transport are created up front and reused for
+    every request. Tables are fetched with GETBULK across just the columns we
+    need, and independent requests can be awaited concurrently.
+    """
+
+    def __init__(self, host: str, community: str, port: int = 161,
+                 timeout: float = SNMP_TIMEOUT, retries: int = SNMP_RETRIES,
+                 max_repetitions: int = SNMP_MAX_REPETITIONS):
         self.host = host
         self.community = community
         self.port = port
-
-    def get(self, oid: str) -> Optional[str]:
-        """Get single SNMP value using snmpget."""
-        try:
-            cmd = [
-                'snmpget', '-v', '2c', '-c', self.community,
-                '-Oqv',  # Output: quick, value only
-                f'{self.host}:{self.port}',
-                oid
-            ]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=5
+        self.timeout = timeout
+        self.retries = retries
+        self.max_repetitions = max_repetitions
+        self.engine = SnmpEngine()
+        self.auth = CommunityData(community, mpModel=1)
+        self.context = ContextData()
+        self.transport: Optional[UdpTransportTarget] = None
+        self.pdus = 0
+
+    async def connect(self):
+        """Resolve the host and open the UDP transport (once)."""
+        if self.transport is None:
+            self.transport = await UdpTransportTarget.create(
+                (self.host, self.port), timeout=self.timeout, retries=self.retries
             )
 
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
-                logger.debug(f"SNMP get error for {oid}: {result.stderr}")
-                return None
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout querying {oid}")
-            return None
-        except Exception as e:
-            logger.error(f"Error querying {oid}: {e}")
+    def close(self):
+        self.engine.close_dispatcher()
+
+    @staticmethod
+    def _render(value) -> Optional[str]:
+        if isinstance(value, (NoSuchObject, NoSuchInstance, EndOfMibView)):
             return None
+        return value.prettyPrint()
+
+    async def get(self, oids: Iterable[str]) -> Dict[str, str]:
+        """GET several scalars in a single PDU. Missing OIDs are omitted."""
+        await self.connect()
+        self.pdus += 1
+        error_indication, error_status, error_index, var_binds = await get_cmd(
+            self.engine, self.auth, self.transport, self.context,
+            *[ObjectType(ObjectIdentity(oid)) for oid in oids],
+            lookupMib=False,
+        )
+        if error_indication or error_status:
+            logger.debug(f"SNMP get error: {error_indication or error_status.prettyPrint()}")
+            return {}
+        results = {}
+        for oid, value in var_binds:
+            rendered = self._render(value)
+            if rendered is not None:
+                results[str(oid)] = rendered
+        return results
+
+    async def bulk_table(self, entry: str, columns: Iterable[str]) -> List[tuple]:
+        """Fetch selected columns of an SNMP table with GETBULK.
 
-    def walk(self, oid: str) -> List[tuple]:
-        """Walk SNMP tree using snmpwalk."""
+        `entry` is the table's entry OID ({entry}.{column}.{index}). Each
+        request carries one varbind per column, so the response is row-aligned
+        and a table of up to max_repetitions rows needs one PDU. Columns that
+        run past their subtree drop out of the next request.
+
+        Returns [(oid, value), ...] like the old snmpwalk-based walk().
+        """
+        await self.connect()
+        prefixes = {f'{entry}.{col}': f'{entry}.{col}.' for col in columns}
+        cursors = {prefix: prefix for prefix in prefixes}
+        repetitions = self.max_repetitions
         results = []
-        try:
-            cmd = [
-                'snmpwalk', '-v', '2c', '-c', self.community,
-                '-Oen',  # Output: OID in numeric form
-                f'{self.host}:{self.port}',
-                oid
-            ]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
+        while cursors:
+            self.pdus += 1
+            active = list(cursors)
+            error_indication, error_status, error_index, var_binds = await bulk_cmd(
+                self.engine, self.auth, self.transport, self.context,
+                0, repetitions,
+                *[ObjectType(ObjectIdentity(cursors[prefix])) for prefix in active],
+                lookupMib=False,
             )
+            if error_status and error_status.prettyPrint() == 'tooBig' and repetitions > 1:
+                # Response would not fit the agent's message size; ask for fewer rows
+                repetitions //= 2
+                continue
+            if error_indication or error_status:
+                logger.debug(f"SNMP bulk error for {entry}: {error_indication or error_status.prettyPrint()}")
+                break
+            if not var_binds:
+                break
 
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if not line:
-                        continue
-                    # Parse format: OID = TYPE: value
-                    parts = line.split(' = ', 1)
-                    if len(parts) == 2:
-                        oid_part = parts[0].strip()
-                        value_part = parts[1].strip()
-                        # Remove type prefix (e.g., "STRING: ", "INTEGER: ")
-                        if ': ' in value_part:
-                            value = value_part.split(': ', 1)[1]
-                        else:
-                            value = value_part
-                        # Remove quotes from strings
-                        value = value.strip('"')
-                        results.append((oid_part, value))
-            else:
-                logger.debug(f"SNMP walk error for {oid}: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout walking {oid}")
-        except Exception as e:
-            logger.error(f"Error walking {oid}: {e}")
+            done = set()
+            for i, (oid, value) in enumerate(var_binds):
+                prefix = active[i % len(active)]
+                if prefix in done:
+                    continue
+                oid_str = str(oid)
+                rendered = self._render(value)
+                if rendered is None or not oid_str.startswith(prefixes[prefix]):
+                    done.add(prefix)
+                    continue
+                results.append((oid_str, rendered))
+                cursors[prefix] = oid_str
+            for prefix in done:
+                cursors.pop(prefix, None)
         return results
 
+    async def fetch_all(self) -> Tuple[Dict[str, str], List[tuple], List[tuple], List[tuple], List[tuple]]:
+        """Scalars plus the four tables, all requests in flight at once."""
+        return await asyncio.gather(
+            self.get([QNAP_CPU_USAGE, QNAP_SYSTEM_TEMP, HR_SYSTEM_UPTIME]),
+            self.bulk_table(f'{QNAP_DISK_TABLE}.1', DISK_COLUMNS),
+            self.bulk_table(f'{QNAP_VOLUME_TABLE}.1', VOLUME_COLUMNS),
+            self.bulk_table(f'{QNAP_IF_TABLE}.1', IF_COLUMNS),
+            self.bulk_table(HR_STORAGE, HR_STORAGE_COLUMNS),
+        )
+
 
 def parse_temperature(temp_str: str) -> Optional[float]:
     """Parse QNAP temperature string like '45 C/113 F' to celsius."""
@@ -156,13 +254,19 @@ def parse_percentage(pct_str: str) -> Optional[float]:
     return float(match.group(1)) if match else None
 
 
-def collect_metrics(client: QNAPSNMPClient, hostname: str):
+async def collect_metrics(client: QNAPSNMPClient, hostname: str):
     """Collect all metrics from QNAP."""
     logger.info("Collecting QNAP metrics...")
+    start = time.perf_counter()
+    client.pdus = 0
 
     try:
+        scalars, disk_table, volume_table, if_table, storage_table = await client.fetch_all()
+        if not (scalars or disk_table or volume_table or storage_table):
+            raise RuntimeError(f"no SNMP response from {client.host}:{client.port}")
+
         # CPU usage
-        cpu = client.get(QNAP_CPU_USAGE)
+        cpu = scalars.get(QNAP_CPU_USAGE)
         if cpu:
             cpu_val = parse_percentage(cpu)
             if cpu_val is not None:
@@ -170,7 +274,7 @@ def collect_metrics(client: QNAPSNMPClient, hostname: str):
                 logger.debug(f"CPU: {cpu_val}%")
 
         # System temperature
-        sys_temp = client.get(QNAP_SYSTEM_TEMP)
+        sys_temp = scalars.get(QNAP_SYSTEM_TEMP)
         if sys_temp:
             temp_val = parse_temperature(sys_temp)
             if temp_val is not None:
@@ -178,7 +282,7 @@ def collect_metrics(client: QNAPSNMPClient, hostname: str):
                 logger.debug(f"System temp: {temp_val}°C")
 
         # System uptime (in timeticks, convert to seconds)
-        uptime = client.get(HR_SYSTEM_UPTIME)
+        uptime = scalars.get(HR_SYSTEM_UPTIME)
         if uptime:
             try:
                 # Timeticks are in hundredths of a second
@@ -188,7 +292,6 @@ def collect_metrics(client: QNAPSNMPClient, hostname: str):
                 pass
 
         # Disk information
-        disk_table = client.walk(QNAP_DISK_TABLE)
         disk_data = {}
         for oid, value in disk_table:
             # Parse OID to get disk index and field
@@ -221,7 +324,6 @@ def collect_metrics(client: QNAPSNMPClient, hostname: str):
                 qnap_disk_status.labels(host=hostname, disk=disk_name).set(data['status'])
 
         # Volume information
-        volume_table = client.walk(QNAP_VOLUME_TABLE)
         volume_data = {}
         for oid, value in volume_table:
             parts = oid.split('.')
@@ -268,7 +370,6 @@ def collect_metrics(client: QNAPSNMPClient, hostname: str):
                     qnap_volume_used.labels(host=hostname, volume=vol_name).set(used)
 
         # Network interface stats
-        if_table = client.walk(QNAP_IF_TABLE)
         if_data = {}
         for oid, value in if_table:
             parts = oid.split('.')
@@ -292,45 +393,49 @@ def collect_metrics(client: QNAPSNMPClient, hostname: str):
                     except:
                         pass
 
-        # Export interface metrics
-        for index, data in if_data.items():
-            if_name = data.get('name', f'eth{index}')
-            if 'rx' in data:
-                qnap_if_rx_bytes.labels(host=hostname, interface=if_name).inc(data['rx'])
-            if 'tx' in data:
-                qnap_if_tx_bytes.labels(host=hostname, interface=if_name).inc(data['tx'])
+        # Export interface metrics. An empty walk is a failed request, not a
+        # NAS without interfaces: keep the last values until the next one
+        if if_data:
+            interface_counters.update(hostname, {
+                data.get('name', f'eth{index}'): (data.get('rx'), data.get('tx'))
+                for index, data in if_data.items()
+            })
 
-        # Memory information from hrStorageTable
-        storage_table = client.walk(HR_STORAGE)
+        # Memory information from hrStorageTable (already fetched in bulk)
+        storage_data = {}
         for oid, value in storage_table:
-            # Look for "Physical memory" entry
-            if 'Physical memory' in value or '.2.1' in oid:  # hrStorageDescr
-                # Get the index
-                index = oid.split('.')[-1]
-                # Get size and used
-                size_oid = f'{HR_STORAGE}.5.{index}'  # hrStorageSize
-                used_oid = f'{HR_STORAGE}.6.{index}'  # hrStorageUsed
-                units_oid = f'{HR_STORAGE}.4.{index}'  # hrStorageAllocationUnits
-
-                size = client.get(size_oid)
-                used = client.get(used_oid)
-                units = client.get(units_oid)
-
-                if size and used and units:
-                    try:
-                        unit_bytes = int(units.split()[-1]) if 'Bytes' in units else 1024
-                        total_bytes = int(size) * unit_bytes
-                        used_bytes = int(used) * unit_bytes
-                        qnap_memory_total.labels(host=hostname).set(total_bytes)
-                        qnap_memory_used.labels(host=hostname).set(used_bytes)
-                    except:
-                        pass
-                break
+            parts = oid.split('.')
+            storage_data.setdefault(parts[-1], {})[parts[-2]] = value
+        for index, row in storage_data.items():
+            # hrStorageType == hrStorageRam, or a "Physical memory" description
+            if row.get('2') != HR_STORAGE_RAM and 'Physical memory' not in row.get('3', ''):
+                continue
+            try:
+                unit_bytes = int(row['4'])
+                qnap_memory_total.labels(host=hostname).set(int(row['5']) * unit_bytes)
+                qnap_memory_used.labels(host=hostname).set(int(row['6']) * unit_bytes)
+            except (KeyError, ValueError):
+                pass
+            break
 
-        logger.info("Metrics collection completed")
+        qnap_scrape_success.labels(host=hostname).set(1)
+        logger.info(
+            f"Metrics collection completed in {(time.perf_counter() - start) * 1000:.0f} ms "
+            f"({client.pdus} PDUs)"
+        )
 
     except Exception as e:
+        qnap_scrape_success.labels(host=hostname).set(0)
         logger.error(f"Error collecting metrics: {e}", exc_info=True)
+    finally:
+        qnap_scrape_duration.labels(host=hostname).set(time.perf_counter() - start)
+        qnap_scrape_pdus.labels(host=hostname).set(client.pdus)
+
+
+async def _run(client: QNAPSNMPClient, hostname: str):
+    while True:
+        await collect_metrics(client, hostname)
+        await asyncio.sleep(SCRAPE_INTERVAL)
 
 
 def main():
@@ -339,18 +444,18 @@ def main():
     logger.info(f"QNAP host: {QNAP_HOST}")
     logger.info(f"SNMP community: {SNMP_COMMUNITY}")
     logger.info(f"Scrape interval: {SCRAPE_INTERVAL}s")
+    logger.info(f"GETBULK max-repetitions: {SNMP_MAX_REPETITIONS}")
 
     # Start Prometheus metrics server
     start_http_server(EXPORTER_PORT)
     logger.info(f"Metrics endpoint available at http://0.0.0.0:{EXPORTER_PORT}/metrics")
 
-    # Create SNMP client
+    # One client (engine + UDP transport) for the life of the process
     client = QNAPSNMPClient(QNAP_HOST, SNMP_COMMUNITY, SNMP_PORT)
-
-    # Collection loop
-    while True:
-        collect_metrics(client, QNAP_HOST)
-        time.sleep(SCRAPE_INTERVAL)
+    try:
+        asyncio.run(_run(client, QNAP_HOST))
+    finally:
+        client.close()
 
 
 if __name__ == '__main__':
@@ -45,6 +45,7 @@ from agent.tools.metrics import (
     query_adguard_high_risk_clients,
     query_adguard_blocked_domains,
     query_adguard_traffic_by_type,
+    query_adguard_dns_queries,
 )
 
 
@@ -114,6 +115,20 @@ async def list_tools() -> list[Tool]:
                 }
             }
         ),
+        Tool(
+            name="dns_queries",
+            description="List individual DNS queries for a client and/or domain, newest first",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "client_ip": {"type": "string", "description": "Only queries from this client IP"},
+                    "domain": {"type": "string", "description": "Only queries for this domain or its subdomains"},
+                    "hours": {"type": "integer", "description": "Lookback period in hours", "default": 1},
+                    "blocked_only": {"type": "boolean", "description": "Only blocked queries", "default": False},
+                    "limit": {"type": "integer", "description": "Maximum number of queries", "default": 100}
+                }
+            }
+        ),
         Tool(
             name="security_summary",
             description="Get security summary showing threats, blocks, and attacks",
@@ -181,6 +196,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         "high_risk_clients": query_adguard_high_risk_clients,
         "blocked_domains": query_adguard_blocked_domains,
         "dns_traffic_by_type": query_adguard_traffic_by_type,
+        "dns_queries": query_adguard_dns_queries,
         "security_summary": query_security_summary,
         "dns_anomalies": query_adguard_anomalies,
         "wireless_health": query_wireless_health,
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the AdGuard metric tools' queries: the samples_v4 ⋈ time_series_v4
+join they used to run against the pre-joined first_light.adguard_client_samples
+(clickhouse/migrations/005_adguard_client_samples.sql).
+
+For each query and window (24h, 7d) it reports the median wall time over
+--rounds runs with the query cache off, and the rows/bytes ClickHouse read
+(X-ClickHouse-Summary). Uses the agent's ClickHouse settings (SIGNOZ_CLICKHOUSE_*).
+
+Usage:
+    python scripts/bench_adguard_metric_queries.py
+    python scripts/bench_adguard_metric_queries.py --rounds 10 --windows 24 168 720
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.config import get_config
+
+LEGACY = {
+    "high_risk_clients": """
+        SELECT
+            simpleJSONExtractString(ts.labels, 'client.name') as client,
+            simpleJSONExtractString(ts.labels, 'client.ip') as ip,
+            round(avg(s.value), 2) as risk_score
+        FROM signoz_metrics.samples_v4 s
+        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
+        WHERE s.metric_name = 'adguard.client.risk_score'
+          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
+        GROUP BY client, ip
+        ORDER BY risk_score DESC
+    """,
+    "traffic_by_type": """
+        SELECT
+            simpleJSONExtractString(ts.labels, 'traffic.type') as traffic_type,
+            sum(s.value) as total_queries,
+            count(DISTINCT simpleJSONExtractString(ts.labels, 'client.ip')) as unique_clients
+        FROM signoz_metrics.samples_v4 s
+        JOIN signoz_metrics.time_series_v4 ts ON s.fingerprint = ts.fingerprint
+        WHERE s.metric_name = 'adguard.queries.total'
+          AND s.unix_milli > toUnixTimestamp(now() - INTERVAL {hours} HOUR) * 1000
+        GROUP BY traffic_type
+        ORDER BY total_queries DESC
+    """,
+}
+
+# Same shapes as agent/tools/metrics.py
+CURRENT = {
+    "high_risk_clients": """
+        SELECT
+            argMax(client_name, ts) as client,
+            client_ip as ip,
+            round(avg(value), 2) as risk_score,
+            round(max(value), 2) as max_risk_score
+        FROM first_light.adguard_client_samples
+        WHERE metric_name = 'adguard.client.risk_score'
+          AND ts > now() - INTERVAL {hours} HOUR
+        GROUP BY ip
+        ORDER BY risk_score DESC
+    """,
+    "traffic_by_type": """
+        SELECT
+            traffic_type,
+            sum(queries) as total_queries,
+            count() as unique_clients
+        FROM (
+            SELECT
+                client_ip,
+                argMax(traffic_type, ts) as traffic_type,
+                argMax(value, ts) as queries
+            FROM first_light.adguard_client_samples
+            WHERE metric_name = 'adguard.client.queries_24h'
+              AND ts > now() - INTERVAL {hours} HOUR
+            GROUP BY client_ip
+        )
+        GROUP BY traffic_type
+        ORDER BY total_queries DESC
+    """,
+}
+
+
+def run(client: httpx.Client, url: str, auth: Dict[str, str], sql: str) -> Tuple[float, Dict, List[Dict]]:
+    start = time.perf_counter()
+    response = client.post(url, params={
+        **auth,
+        "query": f"{sql} FORMAT JSONEachRow",
+        "use_query_cache": 0,
+        "output_format_json_quote_64bit_integers": 0,
+    })
+    elapsed = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+    summary = json.loads(response.headers.get("X-ClickHouse-Summary", "{}"))
+    rows = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+    return elapsed, summary, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--windows", type=int, nargs="+", default=[24, 168], help="Lookback windows in hours")
+    args = parser.parse_args()
+
+    config = get_config()
+    url = f"http://{config.signoz_clickhouse_host}:8123"
+    auth = {"user": config.signoz_clickhouse_user, "password": config.signoz_clickhouse_password}
+
+    with httpx.Client(timeout=120.0) as client:
+        for name in LEGACY:
+            for hours in args.windows:
+                print(f"{name} ({hours}h)")
+                for label, sql in (("legacy", LEGACY[name]), ("current", CURRENT[name])):
+                    sql = sql.format(hours=hours)
+                    run(client, url, auth, sql)  # warm the mark cache / page cache
+                    samples = [run(client, url, auth, sql) for _ in range(args.rounds)]
+                    _, summary, rows = samples[-1]
+                    print(f"  {label:<8} {statistics.median(s[0] for s in samples):9.1f} ms"
+                          f"   read {int(summary.get('read_rows', 0)):>12,} rows"
+                          f" {int(summary.get('read_bytes', 0)) / 1e6:10.1f} MB"
+                          f"   {len(rows)} result rows")
+
+
+if __name__ == "__main__":
+    main()
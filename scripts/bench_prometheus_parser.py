@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared Prometheus parser (agent/utils/prometheus.py) against
+the per-tool regex parser it replaced.
+
+Usage:
+    # Captured scrape (recommended): curl -s http://vldtr:6060/metrics > nethermind.prom
+    python scripts/bench_prometheus_parser.py --file nethermind.prom
+
+    # Live endpoint
+    python scripts/bench_prometheus_parser.py --url http://vldtr.mcducklabs.com:6060/metrics
+
+    # No validator handy — synthetic Nethermind-shaped scrape
+    python scripts/bench_prometheus_parser.py --synthetic 5000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.utils.prometheus import parse_prometheus
+from agent.tools.validator import _NETHERMIND_WANTED
+
+
+def legacy_parse(text: str) -> Dict[str, List[Tuple[Dict, float]]]:
+    """The parser previously copy-pasted into proxmox_tools / qnap_tools / validator."""
+    result: Dict[str, List[Tuple[Dict, float]]] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{([^}]*)\}\s+([\d.eE+\-]+)', line)
+        if m:
+            name, labels_str, val = m.group(1), m.group(2), m.group(3)
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels_str))
+        else:
+            m = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\s+([\d.eE+\-]+)', line)
+            if not m:
+                continue
+            name, val, labels = m.group(1), m.group(2), {}
+        try:
+            result.setdefault(name, []).append((labels, float(val)))
+        except ValueError:
+            pass
+    return result
+
+
+def synthetic_scrape(series: int) -> str:
+    """Nethermind-shaped exposition: many labelled series plus the few the tool reads."""
+    lines = []
+    for i in range(series):
+        metric = f"nethermind_synthetic_metric_{i % 200}"
+        if i % 200 == 0 or i < 200:
+            lines.append(f"# HELP {metric} Synthetic series")
+            lines.append(f"# TYPE {metric} gauge")
+        lines.append(
+            f'{metric}{{Instance="node",Network="Mainnet",SyncType="Snap",PruningMode="Hybrid",'
+            f'Version="1.29.0+abc123",Commit="abc123",Runtime=".NET 8",BuildTimestamp="1720000000",'
+            f'shard="{i}"}} {i * 1.5}'
+        )
+    for client in ("Geth", "Nethermind", "Besu", "Erigon", "Reth"):
+        lines.append(f'nethermind_sync_peers{{ClientType="{client}"}} {len(client)}')
+    lines += [
+        "nethermind_blocks 20500000",
+        "nethermind_transactions 2.1e+09",
+        "nethermind_reorganizations 3",
+        "nethermind_mgas_per_sec 42.5",
+        "nethermind_new_payload_execution_time 118",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def bench(label: str, fn, text: str, rounds: int) -> float:
+    fn(text)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn(text)
+    per_call = (time.perf_counter() - t0) / rounds * 1000
+    print(f"  {label:<34} {per_call:8.2f} ms/parse")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Captured Prometheus scrape")
+    parser.add_argument("--url", help="Fetch a live /metrics endpoint")
+    parser.add_argument("--synthetic", type=int, default=5000, help="Synthetic series count (default 5000)")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            text = f.read()
+        source = args.file
+    elif args.url:
+        import httpx
+        text = httpx.get(args.url, timeout=10.0).text
+        source = args.url
+    else:
+        text = synthetic_scrape(args.synthetic)
+        source = f"synthetic ({args.synthetic} series)"
+
+    print(f"Source: {source} — {len(text.splitlines())} lines, {len(text) / 1024:.0f} KiB")
+    old = bench("legacy regex parser", legacy_parse, text, args.rounds)
+    new = bench("shared parser (all series)", parse_prometheus, text, args.rounds)
+    filt = bench(
+        "shared parser (validator wanted)",
+        lambda t: parse_prometheus(t, wanted=_NETHERMIND_WANTED, capture_labels=("Version",)),
+        text, args.rounds,
+    )
+    print(f"  speedup: {old / new:.1f}x full, {old / filt:.1f}x filtered")
+
+    # Sanity: the new parser must agree with the old one on every series
+    legacy, shared = legacy_parse(text), parse_prometheus(text)
+    mismatched = [n for n in legacy if legacy[n] != shared.get(n)]
+    print(f"  equivalence: {'OK' if not mismatched else f'{len(mismatched)} metrics differ, e.g. {mismatched[:3]}'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,9 +27,12 @@ EOF
 
 echo "Database created successfully"
 
-# Run migration
+# Run migrations (all idempotent — safe to re-run after pulling new ones)
 echo "Creating tables and views..."
-docker exec -i signoz-clickhouse clickhouse-client --host "${CLICKHOUSE_HOST}" --port "${CLICKHOUSE_PORT}" --database threat_intel < clickhouse/migrations/001_threat_intel.sql
+for migration in clickhouse/migrations/*.sql; do
+    echo "  applying $(basename "${migration}")"
+    docker exec -i signoz-clickhouse clickhouse-client --host "${CLICKHOUSE_HOST}" --port "${CLICKHOUSE_PORT}" --database threat_intel --multiquery < "${migration}"
+done
 
 echo "Schema initialization complete!"
 
@@ -62,6 +62,7 @@ Tools to call:
 3. query_adguard_blocked_domains(hours={{hours}})
 4. query_adguard_top_clients(hours={{hours}})
 5. query_adguard_traffic_by_type(hours={{hours}})
+6. query_adguard_dns_queries(client_ip=..., domain=..., hours={{hours}}) — drill into individual queries for any client or domain that stands out
 
 Return a focused markdown summary with:
 - Total queries, block rate %
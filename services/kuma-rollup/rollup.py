@@ -0,0 +1,355 @@
+"""
+Uptime Kuma Heartbeat Rollup Service
+
+Tails Uptime Kuma's heartbeat table by id high-water mark and maintains a
+small read-side store the agent's uptime tools query instead of kuma.db:
+
+- monitor        — copy of Kuma's monitor list (refreshed each poll; tiny)
+- monitor_state  — latest heartbeat per monitor (current status in O(monitors))
+- hourly         — per-monitor, per-hour up/down/other counts and ping stats
+- incident       — down intervals: opened by the first down beat after an
+                   up, closed by the next up beat
+
+Each poll reads only heartbeats with id > watermark (a primary-key range
+scan), folds them into the rollups, and commits the rollups together with
+the new watermark in one transaction — a crash re-reads the same batch
+instead of double-counting it. Kuma's own history pruning doesn't matter:
+ids are never reused.
+
+Exposes Prometheus metrics for lag and throughput.
+"""
+
+import os
+import sqlite3
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, start_http_server
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+heartbeats_processed = Counter('kuma_rollup_heartbeats_processed_total', 'Heartbeats folded into the rollups')
+incidents_opened = Counter('kuma_rollup_incidents_opened_total', 'Down intervals opened')
+watermark_gauge = Gauge('kuma_rollup_watermark', 'Highest heartbeat id applied')
+lag_seconds = Gauge('kuma_rollup_lag_seconds', 'Age of the newest heartbeat applied')
+poll_duration = Gauge('kuma_rollup_poll_duration_seconds', 'Duration of the last poll')
+last_poll_success = Gauge('kuma_rollup_last_poll_success', 'Whether the last poll succeeded')
+
+# Kuma heartbeat.status values
+DOWN, UP = 0, 1
+
+
+@dataclass
+class RollupConfig:
+    """Configuration for the rollup service."""
+    kuma_db: str
+    rollup_db: str
+    poll_interval: int = 15
+    batch_size: int = 5000
+    retain_days: int = 400
+    metrics_port: int = 9007
+
+    @classmethod
+    def from_env(cls) -> 'RollupConfig':
+        """Load configuration from environment variables."""
+        return cls(
+            kuma_db=os.getenv('KUMA_DB', '/data/uptimekuma/kuma.db'),
+            rollup_db=os.getenv('ROLLUP_DB', '/data/kuma-rollup/kuma_rollup.db'),
+            poll_interval=int(os.getenv('POLL_INTERVAL_SECONDS', '15')),
+            batch_size=int(os.getenv('BATCH_SIZE', '5000')),
+            retain_days=int(os.getenv('RETAIN_DAYS', '400')),
+            metrics_port=int(os.getenv('METRICS_PORT', '9007')),
+        )
+
+
+def parse_kuma_time(value: Optional[str]) -> Optional[int]:
+    """Kuma stores heartbeat.time as 'YYYY-MM-DD HH:MM:SS[.fff]' in UTC."""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+
+class RollupStore:
+    """The rollup SQLite database (owned by this service, read by the agent)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize SQLite database schema."""
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            );
+
+            CREATE TABLE IF NOT EXISTS monitor (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                type TEXT,
+                url TEXT,
+                active INTEGER
+            );
+
+            CREATE TABLE IF NOT EXISTS monitor_state (
+                monitor_id INTEGER PRIMARY KEY,
+                status INTEGER,
+                ping INTEGER,
+                msg TEXT,
+                last_checked TEXT,
+                heartbeat_id INTEGER
+            );
+
+            -- hour = unix seconds at the start of the UTC hour
+            CREATE TABLE IF NOT EXISTS hourly (
+                monitor_id INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                up INTEGER NOT NULL DEFAULT 0,
+                down INTEGER NOT NULL DEFAULT 0,
+                other INTEGER NOT NULL DEFAULT 0,
+                ping_sum INTEGER NOT NULL DEFAULT 0,
+                ping_count INTEGER NOT NULL DEFAULT 0,
+                ping_min INTEGER,
+                ping_max INTEGER,
+                PRIMARY KEY (hour, monitor_id)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS incident (
+                id INTEGER PRIMARY KEY,
+                monitor_id INTEGER NOT NULL,
+                started_at INTEGER NOT NULL,
+                ended_at INTEGER,
+                error TEXT,
+                down_beats INTEGER NOT NULL DEFAULT 1
+            );
+
+            -- Incidents overlapping a window: WHERE ended_at IS NULL OR ended_at >= ?
+            CREATE INDEX IF NOT EXISTS idx_incident_ended ON incident(ended_at);
+            CREATE INDEX IF NOT EXISTS idx_incident_open ON incident(monitor_id) WHERE ended_at IS NULL;
+        ''')
+        self.conn.commit()
+        logger.info(f"Rollup store initialized at {self.db_path} (WAL)")
+
+    @property
+    def watermark(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'heartbeat_watermark'").fetchone()
+        return row[0] if row else 0
+
+    def open_incident_monitors(self) -> set:
+        """Monitors with an incident still open."""
+        return {row[0] for row in self.conn.execute('SELECT monitor_id FROM incident WHERE ended_at IS NULL')}
+
+    def apply(self, monitors: List[Tuple], heartbeats: List[Tuple]) -> int:
+        """Fold a batch of heartbeats (id order) into the rollups, atomically with the watermark.
+
+        heartbeats rows: (id, monitor_id, status, msg, time, ping). Returns
+        the new watermark.
+        """
+        hourly: Dict[Tuple[int, int], List] = {}
+        state: Dict[int, Tuple] = {}
+        open_before = self.open_incident_monitors()
+        extend_open = {}  # monitor_id -> extra down beats for an incident opened before this batch
+        opened = {}  # monitor_id -> [started_at, error, down_beats] for incidents opened in this batch
+        transitions = []  # ('open', monitor_id, record) / ('close', monitor_id, ts), in heartbeat order
+        watermark = self.watermark
+
+        for hb_id, monitor_id, status, msg, hb_time, ping in heartbeats:
+            watermark = hb_id
+            ts = parse_kuma_time(hb_time)
+            if ts is None:
+                continue
+            state[monitor_id] = (monitor_id, status, ping, msg, hb_time, hb_id)
+
+            bucket = hourly.setdefault((ts - ts % 3600, monitor_id), [0, 0, 0, 0, 0, None, None])
+            bucket[0 if status == UP else 1 if status == DOWN else 2] += 1
+            if ping is not None:
+                bucket[3] += ping
+                bucket[4] += 1
+                bucket[5] = ping if bucket[5] is None else min(bucket[5], ping)
+                bucket[6] = ping if bucket[6] is None else max(bucket[6], ping)
+
+            # pending (2) / maintenance (3) neither open nor close an incident
+            if status == DOWN:
+                if monitor_id in opened:
+                    opened[monitor_id][2] += 1
+                elif monitor_id in open_before:
+                    extend_open[monitor_id] = extend_open.get(monitor_id, 0) + 1
+                else:
+                    opened[monitor_id] = [ts, msg, 1]
+                    transitions.append(('open', monitor_id, opened[monitor_id]))
+            elif status == UP:
+                if monitor_id in opened:
+                    del opened[monitor_id]
+                    transitions.append(('close', monitor_id, ts))
+                elif monitor_id in open_before:
+                    open_before.discard(monitor_id)
+                    transitions.append(('close', monitor_id, ts))
+
+        with self.conn:  # one transaction: rollups + watermark
+            if monitors:
+                self.conn.execute('DELETE FROM monitor')
+                self.conn.executemany('INSERT INTO monitor (id, name, type, url, active) VALUES (?, ?, ?, ?, ?)',
+                                      monitors)
+            self.conn.executemany('''
+                INSERT INTO hourly (hour, monitor_id, up, down, other, ping_sum, ping_count, ping_min, ping_max)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(hour, monitor_id) DO UPDATE SET
+                    up = up + excluded.up,
+                    down = down + excluded.down,
+                    other = other + excluded.other,
+                    ping_sum = ping_sum + excluded.ping_sum,
+                    ping_count = ping_count + excluded.ping_count,
+                    ping_min = MIN(COALESCE(ping_min, excluded.ping_min), COALESCE(excluded.ping_min, ping_min)),
+                    ping_max = MAX(COALESCE(ping_max, excluded.ping_max), COALESCE(excluded.ping_max, ping_max))
+            ''', [(hour, monitor_id, *bucket) for (hour, monitor_id), bucket in hourly.items()])
+            self.conn.executemany('''
+                INSERT INTO monitor_state (monitor_id, status, ping, msg, last_checked, heartbeat_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(monitor_id) DO UPDATE SET
+                    status = excluded.status, ping = excluded.ping, msg = excluded.msg,
+                    last_checked = excluded.last_checked, heartbeat_id = excluded.heartbeat_id
+            ''', list(state.values()))
+
+            # Down beats for incidents that were already open come before any
+            # close in this batch, so apply them first; then replay transitions
+            self.conn.executemany(
+                'UPDATE incident SET down_beats = down_beats + ? WHERE monitor_id = ? AND ended_at IS NULL',
+                [(beats, monitor_id) for monitor_id, beats in extend_open.items()],
+            )
+            for kind, monitor_id, value in transitions:
+                if kind == 'open':
+                    started_at, error, down_beats = value
+                    self.conn.execute(
+                        'INSERT INTO incident (monitor_id, started_at, error, down_beats) VALUES (?, ?, ?, ?)',
+                        (monitor_id, started_at, error, down_beats),
+                    )
+                    incidents_opened.inc()
+                else:
+                    self.conn.execute(
+                        'UPDATE incident SET ended_at = ? WHERE monitor_id = ? AND ended_at IS NULL',
+                        (value, monitor_id),
+                    )
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('heartbeat_watermark', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (watermark,),
+            )
+        return watermark
+
+    def prune(self, retain_days: int) -> int:
+        """Drop hourly buckets and closed incidents older than retain_days."""
+        cutoff = int(time.time()) - retain_days * 86400
+        with self.conn:
+            deleted = self.conn.execute('DELETE FROM hourly WHERE hour < ?', (cutoff,)).rowcount
+            deleted += self.conn.execute(
+                'DELETE FROM incident WHERE ended_at IS NOT NULL AND ended_at < ?', (cutoff,)
+            ).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} rollup rows older than {retain_days} days")
+        return deleted
+
+    def close(self):
+        self.conn.close()
+
+
+class KumaReader:
+    """Read-only access to Uptime Kuma's database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    def monitors(self) -> List[Tuple]:
+        return self.conn.execute('SELECT id, name, type, url, active FROM monitor').fetchall()
+
+    def heartbeats_after(self, watermark: int, limit: int) -> List[Tuple]:
+        """Next heartbeats past the watermark — a range scan on the integer primary key."""
+        return self.conn.execute('''
+            SELECT id, monitor_id, status, msg, time, ping FROM heartbeat
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''', (watermark, limit)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def poll(kuma: KumaReader, store: RollupStore, batch_size: int) -> int:
+    """Apply every heartbeat past the watermark, in batches. Returns heartbeats applied."""
+    applied = 0
+    monitors = kuma.monitors()
+    while True:
+        batch = kuma.heartbeats_after(store.watermark, batch_size)
+        if not batch:
+            break
+        watermark = store.apply(monitors, batch)
+        monitors = []  # refreshed once per poll
+        applied += len(batch)
+        heartbeats_processed.inc(len(batch))
+        watermark_gauge.set(watermark)
+        newest = parse_kuma_time(batch[-1][4])
+        if newest:
+            lag_seconds.set(max(0, time.time() - newest))
+        if len(batch) < batch_size:
+            break
+    if monitors:  # nothing new, still pick up added/renamed monitors
+        store.apply(monitors, [])
+    return applied
+
+
+def main():
+    """Main entry point."""
+    config = RollupConfig.from_env()
+    os.makedirs(os.path.dirname(config.rollup_db), exist_ok=True)
+
+    store = RollupStore(config.rollup_db)
+    start_http_server(config.metrics_port)
+    logger.info(f"Prometheus metrics available at http://0.0.0.0:{config.metrics_port}/metrics")
+
+    kuma = None
+    last_prune = 0.0
+    while True:
+        start = time.time()
+        try:
+            if kuma is None:
+                kuma = KumaReader(config.kuma_db)
+            applied = poll(kuma, store, config.batch_size)
+            if applied:
+                logger.info(f"Applied {applied} heartbeats (watermark {store.watermark})")
+            last_poll_success.set(1)
+        except sqlite3.Error as e:
+            # kuma.db missing or mid-migration: reopen on the next poll
+            logger.error(f"Poll failed: {e}")
+            last_poll_success.set(0)
+            if kuma is not None:
+                kuma.close()
+                kuma = None
+        poll_duration.set(time.time() - start)
+
+        if time.time() - last_prune > 86400:
+            try:
+                store.prune(config.retain_days)
+                last_prune = time.time()
+            except sqlite3.Error as e:
+                logger.error(f"Prune failed: {e}")
+
+        time.sleep(config.poll_interval)
+
+
+if __name__ == '__main__':
+    main()
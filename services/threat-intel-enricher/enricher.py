@@ -3,11 +3,16 @@ Threat Intelligence Enrichment Service
 
 Batch enrichment service that:
 1. Queries ClickHouse for IPs needing enrichment
-2. Calls threat intelligence APIs
-3. Stores results back to ClickHouse
-4. Exposes Prometheus metrics
+2. Annotates country/ASN from the local GeoIP database (no network)
+3. Short-circuits IPs already on a public blocklist (no API call)
+4. Calls threat intelligence APIs for reputation
+5. Stores results back to ClickHouse
+6. Exposes Prometheus metrics
+
+Blocklist feeds are refreshed on their own schedule by feeds.FeedLoader.
 """
 
+import json
 import os
 import sys
 import time
@@ -26,6 +31,9 @@ from apscheduler.triggers.interval import IntervalTrigger
 # (which would require langchain_core, not present in this lightweight container)
 sys.path.insert(0, '/app/agent/tools')
 from threat_intel import ThreatIntelligence
+import geoip
+
+from feeds import FeedLoader
 
 logging.basicConfig(
     level=logging.INFO,
@@ -41,6 +49,7 @@ api_errors = Counter('threat_intel_api_errors_total', 'API errors by source', ['
 pending_ips = Gauge('threat_intel_pending_ips', 'Number of IPs pending enrichment')
 last_run_timestamp = Gauge('threat_intel_last_run_timestamp', 'Unix timestamp of last enrichment run')
 last_run_duration = Gauge('threat_intel_last_run_duration_seconds', 'Duration of last enrichment run')
+geo_lookups = Counter('threat_intel_geo_lookups_total', 'Offline GeoIP lookups', ['result'])
 
 
 @dataclass
@@ -57,6 +66,8 @@ class EnrichmentConfig:
     max_age_hours: int = 168   # Re-enrich after 7 days, not 24h
     min_block_count: int = 5   # Ignore IPs with fewer than this many blocks
     daily_budget: int = 900    # Hard cap on AbuseIPDB calls per UTC day
+    blocklist_refresh_hours: int = 6
+    blocklist_threat_score: int = 75  # Score assigned to IPs found on a blocklist
 
     @classmethod
     def from_env(cls) -> 'EnrichmentConfig':
@@ -73,6 +84,8 @@ class EnrichmentConfig:
             max_age_hours=int(os.getenv('ENRICHMENT_MAX_AGE_HOURS', '168')),
             min_block_count=int(os.getenv('ENRICHMENT_MIN_BLOCK_COUNT', '5')),
             daily_budget=int(os.getenv('ABUSEIPDB_DAILY_BUDGET', '900')),
+            blocklist_refresh_hours=int(os.getenv('BLOCKLIST_REFRESH_HOURS', '6')),
+            blocklist_threat_score=int(os.getenv('BLOCKLIST_THREAT_SCORE', '75')),
         )
 
 
@@ -119,8 +132,25 @@ class ClickHouseClient:
             logger.error(f"ClickHouse execute error: {e}")
             return False
 
-    def insert_enrichment(self, enrichment: Dict) -> bool:
+    def insert_rows(self, table: str, rows: List[Dict]) -> bool:
+        """Bulk insert rows (one request) via JSONEachRow."""
+        if not rows:
+            return True
+        try:
+            response = self.client.post(
+                self.url,
+                params={'query': f'INSERT INTO {table} FORMAT JSONEachRow'},
+                content='\n'.join(json.dumps(r) for r in rows),
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"ClickHouse insert into {table} error: {e}")
+            return False
+
+    def insert_enrichment(self, enrichment: Dict, geo: Optional[geoip.GeoInfo] = None) -> bool:
         """Insert enrichment result into ClickHouse."""
+        geo = geo or geoip.GeoInfo()
         sources = enrichment.get('sources', {})
         assessment = enrichment.get('threat_assessment', {})
 
@@ -155,7 +185,10 @@ class ClickHouseClient:
          "confidence": "{assessment.get('confidence', 'low')}",
          "categories": {assessment.get('categories', [])},
          "recommendation": "{assessment.get('recommendation', 'allow')}",
-         "error_sources": {error_sources}
+         "error_sources": {error_sources},
+         "geo_country_code": {json.dumps(geo.country_code)},
+         "geo_asn": {geo.asn},
+         "geo_as_org": {json.dumps(geo.as_org)}
         }}
         """
 
@@ -175,6 +208,7 @@ class ThreatIntelEnricher:
             cache_dir=config.cache_dir
         )
         self._budget_file = os.path.join(config.cache_dir, "abuseipdb_daily_budget.txt")
+        self.feed_loader = FeedLoader(self.ch_client, config.cache_dir)
 
     def _budget_remaining(self) -> int:
         """Return remaining AbuseIPDB calls for today (UTC). Resets at midnight UTC."""
@@ -266,6 +300,73 @@ class ThreatIntelEnricher:
         pending_ips.set(len(ips))
         return ips
 
+    def _blocklist_rows(self, listed: Dict[str, str]) -> List[Dict]:
+        """Build synthetic enrichment rows for blocklisted IPs — no API spend."""
+        enriched_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        geo = geoip.lookup_many(listed)
+        return [
+            {
+                'ip': ip,
+                'enriched_at': enriched_at,
+                'threat_score': self.config.blocklist_threat_score,
+                'is_malicious': True,
+                'confidence': 'medium',
+                'categories': ['blocklist'],
+                'recommendation': 'block',
+                'blocklists': lists.split(','),
+                'geo_country_code': geo[ip].country_code,
+                'geo_asn': geo[ip].asn,
+                'geo_as_org': geo[ip].as_org,
+            }
+            for ip, lists in listed.items()
+        ]
+
+    def short_circuit_blocklisted(self) -> int:
+        """Record every recently blocked IP that is on a blocklist, in one bulk insert.
+
+        These IPs are then excluded from get_ips_needing_enrichment() by the
+        already-enriched filter, so the API budget goes to unlisted IPs only.
+        """
+        query = f"""
+        SELECT ip, dictGetOrDefault('threat_intel.blocklist_dict', 'lists',
+                                    tuple(IPv4StringToNumOrDefault(ip)), '') as lists
+        FROM (
+            SELECT attributes_string['pfsense.src_ip'] as ip
+            FROM signoz_logs.logs_v2
+            WHERE toDateTime(timestamp / 1000000000) >= now() - INTERVAL {self.config.lookback_hours} HOUR
+              AND resources_string['service.name'] = 'filterlog'
+              AND attributes_string['pfsense.action'] = 'block'
+              AND attributes_string['pfsense.src_ip'] != ''
+            GROUP BY ip
+        )
+        WHERE lists != ''
+          AND ip NOT IN (
+            SELECT DISTINCT ip FROM threat_intel.enrichments
+            WHERE toDateTime(enriched_at) >= now() - INTERVAL {self.config.max_age_hours} HOUR
+          )
+        LIMIT 50000
+        """
+        listed = {r['ip']: r['lists'] for r in self.ch_client.query(query) if r.get('ip')}
+        if listed and self.ch_client.insert_rows('threat_intel.enrichments', self._blocklist_rows(listed)):
+            enrichments_total.labels(status='blocklisted').inc(len(listed))
+            logger.info(f"Short-circuited {len(listed)} blocklisted IPs (no API calls)")
+            return len(listed)
+        return 0
+
+    def get_blocklisted(self, ips: Set[str]) -> Dict[str, str]:
+        """Return {ip: 'list1,list2'} for the IPs in `ips` that are on a blocklist."""
+        valid = [ip for ip in ips if not self._is_private_ip(ip)]
+        if not valid:
+            return {}
+        ip_array = ', '.join(f"'{ip}'" for ip in valid)
+        query = f"""
+        SELECT ip, dictGetOrDefault('threat_intel.blocklist_dict', 'lists',
+                                    tuple(IPv4StringToNumOrDefault(ip)), '') as lists
+        FROM (SELECT arrayJoin([{ip_array}]) as ip)
+        WHERE lists != ''
+        """
+        return {r['ip']: r['lists'] for r in self.ch_client.query(query) if r.get('ip')}
+
     def _is_private_ip(self, ip: str) -> bool:
         """Check if IP is private/internal."""
         parts = ip.split('.')
@@ -320,12 +421,26 @@ class ThreatIntelEnricher:
         logger.info("Starting enrichment batch...")
 
         try:
+            self.short_circuit_blocklisted()
             ips = self.get_ips_needing_enrichment()
 
+            # SSH / ntopng sources may still include listed IPs
+            listed = self.get_blocklisted(ips)
+            if listed and self.ch_client.insert_rows('threat_intel.enrichments', self._blocklist_rows(listed)):
+                enrichments_total.labels(status='blocklisted').inc(len(listed))
+                ips -= set(listed)
+
             if not ips:
                 logger.info("No IPs need enrichment")
                 return
 
+            # Offline tier: country/ASN for the whole batch in one pass, before
+            # any API budget is spent. The API tier below is reputation-only.
+            geo = geoip.lookup_many(ips)
+            located = sum(1 for g in geo.values() if g.country_code or g.asn)
+            geo_lookups.labels(result='hit').inc(located)
+            geo_lookups.labels(result='miss').inc(len(geo) - located)
+
             enriched_count = 0
             failed_count = 0
 
@@ -340,7 +455,7 @@ class ThreatIntelEnricher:
 
                 if result:
                     # Store in ClickHouse
-                    if self.ch_client.insert_enrichment(result):
+                    if self.ch_client.insert_enrichment(result, geo.get(ip)):
                         enriched_count += 1
                         logger.info(f"Stored enrichment for {ip} - Score: {result['threat_assessment']['threat_score']} (budget remaining: {self._budget_remaining()})")
                     else:
@@ -381,6 +496,9 @@ def main():
     # Create enricher
     enricher = ThreatIntelEnricher(config)
 
+    # Load blocklists first so the initial batch can skip listed IPs
+    enricher.feed_loader.run()
+
     # Run initial enrichment
     enricher.run_enrichment_batch()
 
@@ -393,6 +511,13 @@ def main():
         name='Run enrichment batch',
         replace_existing=True
     )
+    scheduler.add_job(
+        enricher.feed_loader.run,
+        trigger=IntervalTrigger(hours=config.blocklist_refresh_hours),
+        id='blocklist_refresh',
+        name='Refresh blocklist feeds',
+        replace_existing=True
+    )
     scheduler.start()
     logger.info(f"Scheduler started - will run every {config.interval_minutes} minutes")
 
@@ -0,0 +1,155 @@
+"""
+Blocklist Feed Ingestion
+
+Downloads free public IP blocklists (or reads local copies) and loads them into
+ClickHouse as threat_intel.blocklist_entries. The threat_intel.blocklist_dict
+IP_TRIE dictionary is built over the latest snapshot of each list, so
+firewall queries can flag "on blocklist X" with a single dictGet and the
+enricher can skip paid API calls for IPs that are already listed.
+
+Feeds are configured with BLOCKLIST_FEEDS as comma-separated name=source pairs,
+where source is an http(s) URL or a local file path. CrowdSec decisions are
+pulled from the local LAPI when CROWDSEC_LAPI_URL and CROWDSEC_BOUNCER_KEY are
+set (create the key with `cscli bouncers add first-light-enricher`).
+"""
+
+import ipaddress
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEEDS = (
+    "firehol_level1=https://iplists.firehol.org/files/firehol_level1.netset,"
+    "spamhaus_drop=https://www.spamhaus.org/drop/drop.txt"
+)
+
+feed_entries = Gauge('threat_intel_blocklist_entries', 'Prefixes loaded per blocklist', ['list'])
+feed_last_load = Gauge('threat_intel_blocklist_last_load_timestamp', 'Unix timestamp of last successful load', ['list'])
+feed_errors = Counter('threat_intel_blocklist_errors_total', 'Blocklist load failures', ['list'])
+
+
+@dataclass
+class Feed:
+    """A single blocklist source."""
+    name: str
+    source: str
+
+
+def feeds_from_env() -> List[Feed]:
+    """Parse BLOCKLIST_FEEDS (name=url_or_path,...) into Feed objects."""
+    feeds = []
+    for item in os.getenv('BLOCKLIST_FEEDS', DEFAULT_FEEDS).split(','):
+        name, sep, source = item.strip().partition('=')
+        if sep and name and source:
+            feeds.append(Feed(name=name.strip(), source=source.strip()))
+    return feeds
+
+
+def parse_netset(text: str) -> List[str]:
+    """Extract normalized CIDR prefixes from a netset / DROP-style list.
+
+    Handles '#' and ';' comments (Spamhaus appends '; SBL123' to each line)
+    and bare IPs. Invalid lines are skipped.
+    """
+    prefixes = set()
+    for line in text.splitlines():
+        entry = line.split('#', 1)[0].split(';', 1)[0].strip()
+        if not entry:
+            continue
+        try:
+            prefixes.add(str(ipaddress.ip_network(entry.split()[0], strict=False)))
+        except ValueError:
+            continue
+    return sorted(prefixes)
+
+
+class FeedLoader:
+    """Fetches blocklists and loads them into ClickHouse."""
+
+    def __init__(self, ch_client, cache_dir: str, feeds: Optional[List[Feed]] = None):
+        self.ch_client = ch_client
+        self.cache_dir = os.path.join(cache_dir, 'blocklists')
+        self.feeds = feeds if feeds is not None else feeds_from_env()
+        self.lapi_url = os.getenv('CROWDSEC_LAPI_URL', '').rstrip('/')
+        self.lapi_key = os.getenv('CROWDSEC_BOUNCER_KEY', '')
+        self.http = httpx.Client(timeout=60.0, follow_redirects=True)
+
+    def _fetch(self, feed: Feed) -> str:
+        """Return list contents; the last good download is kept as a local fallback."""
+        if not feed.source.startswith(('http://', 'https://')):
+            with open(feed.source) as f:
+                return f.read()
+
+        cached = os.path.join(self.cache_dir, f"{feed.name}.txt")
+        try:
+            response = self.http.get(feed.source)
+            response.raise_for_status()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cached, 'w') as f:
+                f.write(response.text)
+            return response.text
+        except Exception as e:
+            if os.path.exists(cached):
+                logger.warning(f"Download of {feed.name} failed ({e}) — using cached copy")
+                with open(cached) as f:
+                    return f.read()
+            raise
+
+    def _fetch_crowdsec(self) -> List[str]:
+        """Active ban decisions from the local CrowdSec LAPI (community blocklist + local)."""
+        response = self.http.get(
+            f"{self.lapi_url}/v1/decisions",
+            params={'type': 'ban'},
+            headers={'X-Api-Key': self.lapi_key},
+        )
+        response.raise_for_status()
+        values = [d.get('value', '') for d in (response.json() or [])
+                  if d.get('scope', '').lower() in ('ip', 'range')]
+        return parse_netset('\n'.join(values))
+
+    def _load(self, name: str, prefixes: List[str]) -> bool:
+        """Insert one snapshot of a list. Older snapshots age out via TTL."""
+        if not prefixes:
+            logger.warning(f"Blocklist {name} is empty — keeping previous snapshot")
+            return False
+        loaded_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [{'list_name': name, 'prefix': p, 'loaded_at': loaded_at} for p in prefixes]
+        if not self.ch_client.insert_rows('threat_intel.blocklist_entries', rows):
+            return False
+        feed_entries.labels(list=name).set(len(prefixes))
+        feed_last_load.labels(list=name).set(time.time())
+        logger.info(f"Loaded blocklist {name}: {len(prefixes)} prefixes")
+        return True
+
+    def run(self) -> Dict[str, int]:
+        """Refresh every configured feed, then reload the IP_TRIE dictionary."""
+        loaded = {}
+        for feed in self.feeds:
+            try:
+                prefixes = parse_netset(self._fetch(feed))
+                if self._load(feed.name, prefixes):
+                    loaded[feed.name] = len(prefixes)
+            except Exception as e:
+                logger.error(f"Failed to load blocklist {feed.name}: {e}")
+                feed_errors.labels(list=feed.name).inc()
+
+        if self.lapi_url and self.lapi_key:
+            try:
+                prefixes = self._fetch_crowdsec()
+                if self._load('crowdsec', prefixes):
+                    loaded['crowdsec'] = len(prefixes)
+            except Exception as e:
+                logger.error(f"Failed to load CrowdSec decisions: {e}")
+                feed_errors.labels(list='crowdsec').inc()
+
+        if loaded:
+            self.ch_client.execute("SYSTEM RELOAD DICTIONARY threat_intel.blocklist_dict")
+        return loaded
@@ -0,0 +1,102 @@
+"""
+Unit tests for the AdGuard metrics exporter's delivery bookkeeping
+(adguard-exporter/adguard_metrics_exporter_v2.py).
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from opentelemetry.sdk._logs.export import InMemoryLogExporter
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "adguard-exporter"))
+
+import adguard_metrics_exporter_v2 as v2  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+_SCHEMA = """
+    CREATE TABLE ingestion_runs (duration_seconds REAL, records_inserted INTEGER,
+                                 records_skipped INTEGER, status TEXT);
+    CREATE TABLE anomalies (detected_at INTEGER, anomaly_type TEXT, client_ip TEXT, severity TEXT,
+                            description TEXT, metadata TEXT, confidence REAL, acknowledged INTEGER);
+    CREATE TABLE clients (client_ip TEXT, client_name TEXT);
+    CREATE TABLE client_summary (client_ip TEXT, last_24h_queries INTEGER, last_24h_blocked INTEGER,
+                                 last_24h_block_pct REAL, risk_score REAL, traffic_type TEXT);
+"""
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    db = tmp_path / "cache.db"
+    with sqlite3.connect(db) as conn:
+        conn.executescript(_SCHEMA)
+    reader, logs = InMemoryMetricReader(), InMemoryLogExporter()
+    monkeypatch.setattr(v2, "OTLPMetricExporter", lambda **kw: None)
+    monkeypatch.setattr(v2, "PeriodicExportingMetricReader", lambda exporter, **kw: reader)
+    monkeypatch.setattr(v2, "OTLPLogExporter", lambda **kw: logs)
+    exp = v2.AdGuardMetricsExporter(str(db), "localhost:4317", state_path=str(tmp_path / "state.json"))
+    exp.connect_db()
+    exp.load_state()
+    yield exp, db, reader, logs
+    exp.close_db()
+    exp.log_provider.shutdown()
+    exp.meter_provider.shutdown()
+
+
+def _sums(reader):
+    sums = {}
+    for rm in reader.get_metrics_data().resource_metrics:
+        for sm in rm.scope_metrics:
+            for metric in sm.metrics:
+                if hasattr(metric.data, "is_monotonic"):
+                    sums[metric.name] = sum(p.value for p in metric.data.data_points)
+    return sums
+
+
+def test_failed_flush_replays_anomaly_logs_but_not_ingestion_counters(exporter, monkeypatch):
+    exp, db, reader, logs = exporter
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO ingestion_runs VALUES (12.5, 900, 100, 'success')")
+        conn.execute("INSERT INTO client_summary VALUES ('10.0.0.5', 1200, 60, 5.0, 2.0, 'desktop')")
+        conn.execute("INSERT INTO anomalies VALUES (?, 'dga', '10.0.0.5', 'high', 'DGA-like domain', "
+                     "NULL, 0.9, 0)", (int(time.time()),))
+
+    monkeypatch.setattr(exp, "flush", lambda: False)
+    exp.poll()
+    recorded = _sums(reader)
+    assert recorded["adguard.queries.total"] == 1200 and recorded["adguard.ingestion.records"] == 1000
+
+    # The next poll re-sends the anomaly log, but records the ingestion run
+    # and its 24h totals only once
+    exp.poll()
+    after = _sums(reader)
+    assert after["adguard.queries.total"] == 1200 and after["adguard.ingestion.records"] == 1000
+    assert "adguard.anomalies.exported" not in after
+    assert exp.watermarks["anomalies"] == 0 and exp.watermarks["ingestion_runs"] == 1
+
+    monkeypatch.setattr(exp, "flush", lambda: True)
+    exp.poll()
+    assert exp.watermarks["anomalies"] == 1
+    assert _sums(reader)["adguard.anomalies.exported"] == 1
+    exp.log_provider.force_flush()
+    assert [r.log_record.body for r in logs.get_finished_logs()] == ["DGA-like domain"] * 3
+
+
+def test_queries_24h_gauge_reports_the_current_count(exporter):
+    exp, db, reader, _ = exporter
+    for queries in (1200, 1500):
+        with sqlite3.connect(db) as conn:
+            conn.execute("INSERT INTO ingestion_runs VALUES (1.0, 10, 0, 'success')")
+            conn.execute("DELETE FROM client_summary")
+            conn.execute("INSERT INTO client_summary VALUES ('10.0.0.5', ?, 60, 5.0, 2.0, 'desktop')", (queries,))
+        exp.poll()
+
+    metrics = {m.name: m.data for rm in reader.get_metrics_data().resource_metrics
+               for sm in rm.scope_metrics for m in sm.metrics}
+    # The counter accumulates every run's 24h total; the gauge is the latest one
+    assert [p.value for p in metrics["adguard.queries.total"].data_points] == [2700]
+    assert [p.value for p in metrics["adguard.client.queries_24h"].data_points] == [1500]
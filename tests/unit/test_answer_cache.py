@@ -0,0 +1,111 @@
+"""
+Unit tests for the bot answer cache (agent/answer_cache.py) and its use in
+agent.graph.stream_interactive_query.
+"""
+
+import asyncio
+
+import pytest
+
+from agent import answer_cache, graph
+from agent.answer_cache import AnswerCache, cacheable, storable, tokens
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+
+    def expire(self, key, seconds):
+        return True
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+
+def test_normalization_and_follow_up_detection():
+    assert tokens("Any threats today?") == tokens("threats TODAY") == {"threats", "today"}
+    assert tokens("Is the validator OK?") == tokens("validator status") == {"validator"}
+    assert tokens("blocks from 10.0.0.5?") == {"blocks", "from", "10.0.0.5"}
+
+    history = [{"role": "user", "content": "top blocked IPs?"}]
+    assert cacheable("any threats today?", history)
+    assert not cacheable("is that one dangerous?", history)
+    assert cacheable("is that one dangerous?")          # nothing to refer back to
+    assert not cacheable("what about yesterday?")
+
+    assert storable("Validator healthy, 80 peers.")
+    assert not storable("I couldn't reach ClickHouse, please try again.")
+    assert not storable("[interactive: no content returned]")
+
+
+def test_generation_bump_invalidates_and_only_identical_questions_hit(monkeypatch):
+    r = _FakeRedis()
+    monkeypatch.setattr(answer_cache, "_get_redis", lambda: r)
+    cache = AnswerCache(lambda: r, bucket_seconds=900)
+
+    entry, generation = cache.get("any threats today?")
+    assert entry is None and generation == 0
+    cache.put("any threats today?", "Two scanners blocked.", generation)
+
+    hit, _ = cache.get("Threats today")
+    assert hit["answer"] == "Two scanners blocked." and hit["question"] == "any threats today?"
+    assert "(cached answer)" in answer_cache.stamp(hit)
+    assert cache.get("any new threats today?")[0] is None
+
+    # Questions that differ only in a host, IP or window never share an answer
+    ssh = "show failed ssh logins from 192.168.1.10 in the last 6 hours on pfsense"
+    cache.put(ssh, "3 failures.", generation)
+    assert cache.get(ssh.replace("1.10", "1.20"))[0] is None
+    assert cache.get(ssh.replace("6 hours", "12 hours"))[0] is None
+    cache.put("top blocked domains last 24 hours", "I could not query AdGuard.", generation)
+    assert cache.get("top blocked domains last 24 hours")[0] is None
+
+    answer_cache.bump_generation("alert")
+    assert cache.get("any threats today?") == (None, 1)
+
+
+def test_stream_serves_cached_answer_without_running_the_loop(monkeypatch):
+    r = _FakeRedis()
+    monkeypatch.setattr(graph, "get_answer_cache", lambda: AnswerCache(lambda: r))
+    runs = []
+
+    def fake_sync(question, history, session_id, on_event=None):
+        runs.append(question)
+        if "peers" in question:
+            on_event({"type": "tool_end", "tool": "query_validator_health", "ok": False, "seconds": 0.1})
+        return "validator healthy"
+
+    monkeypatch.setattr(graph, "run_interactive_query_sync", fake_sync)
+
+    async def ask(question, history=None):
+        return [e async for e in graph.stream_interactive_query(question, history)]
+
+    first = asyncio.run(ask("is the validator ok?"))
+    assert first[-1] == {"type": "answer", "text": "validator healthy"}
+    second = asyncio.run(ask("Validator status?"))
+    assert len(second) == 1 and second[0]["cached"] is True
+    assert second[0]["text"].startswith("validator healthy\n\n_As of ")
+    # A follow-up in a conversation always runs the agent
+    asyncio.run(ask("is it ok?", [{"role": "user", "content": "validator?"}]))
+    # Not stored when a tool failed during the run
+    asyncio.run(ask("validator peers?"))
+    asyncio.run(ask("validator peers?"))
+    assert runs == ["is the validator ok?", "is it ok?", "validator peers?", "validator peers?"]
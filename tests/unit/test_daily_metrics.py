@@ -0,0 +1,100 @@
+"""
+Unit tests for per-report metrics capture (agent/reports/daily_metrics.py).
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.tools import tool
+
+from agent import llm
+from agent.llm import ToolCall
+from agent.reports.daily_metrics import extract_metrics, to_rows
+
+pytestmark = pytest.mark.unit
+
+
+@tool
+def query_threat_intel_summary(hours: int = 24, min_score: int = 0) -> str:
+    """Summary."""
+    return ""
+
+
+@tool
+def lookup_ip_threat_intel(ip_address: str) -> str:
+    """Lookup."""
+    return ""
+
+
+@tool
+def query_adguard_traffic_by_type(hours: int = 24) -> str:
+    """Traffic."""
+    return ""
+
+
+@tool
+def query_validator_health(hours: int = 24) -> str:
+    """Validator."""
+    return ""
+
+
+def test_extract_metrics_keeps_report_window_calls_only():
+    summary = {"time_range": "last 24h", "confirmed_malicious": 3, "on_public_blocklists": 11,
+               "top_threats": [{"ip": "1.2.3.4", "threat_score": 90}]}
+    calls = [
+        ToolCall(query_threat_intel_summary, {"hours": 24}, json.dumps(summary)),
+        # Narrower window, filtered, or a drill-down: not comparable day to day
+        ToolCall(query_threat_intel_summary, {"hours": 1}, json.dumps({"confirmed_malicious": 0})),
+        ToolCall(query_threat_intel_summary, {"hours": 24, "min_score": 50}, json.dumps({"confirmed_malicious": 1})),
+        ToolCall(lookup_ip_threat_intel, {"ip_address": "1.2.3.4"}, json.dumps({"threat_score": 90})),
+        ToolCall(query_adguard_traffic_by_type, {}, json.dumps([
+            {"traffic_type": "iot", "total_queries": 5000, "unique_clients": 12},
+            {"traffic_type": "", "total_queries": 7},
+        ])),
+        ToolCall(query_validator_health, {"hours": 24}, json.dumps({
+            "consensus": {"peers": 80, "attestation_effectiveness": {"source_pct": 99.5, "head_pct": None},
+                          "scrape": {"age_seconds": 4}},
+            "healthy": True,
+        })),
+        ToolCall(query_validator_health, {"hours": 24}, "Error querying validator: timeout"),
+    ]
+
+    assert extract_metrics(calls, hours=24) == {
+        "threat_intel_summary.confirmed_malicious": 3.0,
+        "threat_intel_summary.on_public_blocklists": 11.0,
+        "adguard_traffic_by_type.iot.total_queries": 5000.0,
+        "adguard_traffic_by_type.iot.unique_clients": 12.0,
+        "validator_health.consensus.peers": 80.0,
+        "validator_health.consensus.attestation_effectiveness.source_pct": 99.5,
+        "validator_health.healthy": 1.0,
+    }
+    assert extract_metrics(calls[:1], hours=168) == {}
+
+
+def test_to_rows():
+    rows = to_rows("2026-03-14", "r1", datetime(2026, 3, 14, 6, 0, 5),
+                   {"validator": {"validator_health.consensus.peers": 80.0}, "dns_security": {}})
+    assert rows == [{
+        "date": "2026-03-14", "domain": "validator", "metric": "validator_health.consensus.peers",
+        "value": 80.0, "report_id": "r1", "generated_at": "2026-03-14 06:00:05",
+    }]
+
+
+def test_react_loop_records_tool_calls(monkeypatch):
+    def _message(tool_calls=None, content=None):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=tool_calls, content=content))])
+
+    call = SimpleNamespace(id="c1", function=SimpleNamespace(name="query_validator_health", arguments='{"hours": 24}'))
+    replies = iter([_message([call]), _message(content="all good")])
+    monkeypatch.setattr(llm, "chat", lambda *a, **k: next(replies))
+
+    with llm.record_tool_calls() as calls:
+        assert llm.run_react_loop("sys", "user", [query_validator_health], "validator") == "all good"
+    assert [(c.tool.name, c.args) for c in calls] == [("query_validator_health", {"hours": 24})]
+
+    # Outside the block nothing is recorded
+    replies = iter([_message([call]), _message(content="again")])
+    llm.run_react_loop("sys", "user", [query_validator_health], "validator")
+    assert len(calls) == 1
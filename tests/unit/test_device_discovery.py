@@ -0,0 +1,117 @@
+"""
+Unit tests for multi-source device discovery: merging source reports by
+MAC, change events, and the resolver tier that follows device_events.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "exporters" / "device-inventory"))
+
+import device_discovery as dd  # noqa: E402
+from agent.utils import resolve  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+PRIORITY = ["unifi", "pfsense", "ntopng"]
+
+
+class _StaticSource(dd.DiscoverySource):
+    def __init__(self, name, devices=None, error=None):
+        super().__init__({})
+        self.name = name
+        self.devices = devices or []
+        self.error = error
+
+    def discover(self):
+        if self.error:
+            raise self.error
+        return self.devices
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    inv = dd.DeviceInventory(str(tmp_path / "inventory.db"))
+    yield inv
+    inv.close()
+
+
+@pytest.fixture
+def resolver(inventory, monkeypatch):
+    conn = sqlite3.connect(f"file:{inventory.db_path}?mode=ro", uri=True, check_same_thread=False)
+    monkeypatch.setattr(resolve, "_inventory_conn", conn)
+    monkeypatch.setattr(resolve, "_inventory_watermark", None)
+    monkeypatch.setattr(resolve, "_inventory_hosts", {})
+    monkeypatch.setattr(resolve, "_topology_index", {})
+    resolve._resolve_hostname.cache_clear()
+    yield resolve
+    resolve._resolve_hostname.cache_clear()
+    conn.close()
+
+
+def test_merge_uses_source_priority_and_keeps_known_fields(inventory):
+    inventory.upsert_devices([dd.NetworkDevice(mac="aa", ip="10.0.0.5", hostname="nvr", notes="rack 2")])
+
+    reports = {
+        "ntopng": [dd.NetworkDevice(mac="aa", ip="10.0.0.6", vlan="3"),
+                   dd.NetworkDevice(mac="cc", ip="10.0.0.9")],
+        "pfsense": [dd.NetworkDevice(mac="aa", ip="10.0.0.7", hostname="nvr-dhcp")],
+    }
+    merged = {d.mac: d for d in dd.merge_devices(reports, inventory, PRIORITY, {"ip": ["ntopng", "pfsense"]})}
+
+    assert merged["aa"].ip == "10.0.0.6"  # field override
+    assert merged["aa"].hostname == "nvr-dhcp"  # pfsense outranks ntopng (no name)
+    assert merged["aa"].vlan == "3"
+    assert merged["aa"].notes == "rack 2"  # manual notes survive
+    assert merged["aa"].sources == ["pfsense", "ntopng"]
+    assert merged["cc"].hostname is None
+
+    # ARP alone can't blank out a stored hostname
+    arp_only = dd.merge_devices({"ntopng": [dd.NetworkDevice(mac="aa", ip="10.0.0.5")]}, inventory, PRIORITY)
+    assert arp_only[0].hostname == "nvr"
+
+
+def test_pipeline_skips_failed_sources():
+    pipeline = dd.DiscoveryPipeline([
+        _StaticSource("unifi", error=dd.SourceError("login failed")),
+        _StaticSource("ntopng", [dd.NetworkDevice(mac="aa", ip="10.0.0.5")]),
+    ], timeout=5)
+    try:
+        reports = pipeline.run()
+    finally:
+        pipeline.close()
+    assert list(reports) == ["ntopng"]
+
+
+def test_only_changes_are_emitted(inventory):
+    first = inventory.upsert_devices([dd.NetworkDevice(mac="aa", ip="10.0.0.5", hostname="nvr")])
+    assert [c.event for c in first] == ["new"]
+
+    assert inventory.upsert_devices([dd.NetworkDevice(mac="aa", ip="10.0.0.5", hostname="nvr")]) == []
+
+    moved = inventory.upsert_devices([dd.NetworkDevice(mac="aa", ip="10.0.0.8", hostname="nvr")])
+    assert [(c.event, c.changes) for c in moved] == [("changed", {"ip": ("10.0.0.5", "10.0.0.8")})]
+    events = inventory.conn.execute("SELECT event, ip, prev_ip FROM device_events ORDER BY seq").fetchall()
+    assert events == [("new", "10.0.0.5", None), ("changed", "10.0.0.8", "10.0.0.5")]
+
+
+def test_resolver_follows_device_events(inventory, resolver):
+    inventory.upsert_devices([
+        dd.NetworkDevice(mac="aa", ip="192.168.2.60", hostname="roku.lan"),
+        dd.NetworkDevice(mac="bb", ip="192.168.2.61", hostname="laptop"),
+    ])
+    resolver._sync_inventory_hosts(force=True)
+    assert resolver._resolve_hostname("192.168.2.60") == "roku (192.168.2.60)"
+
+    # IP swap in one cycle: the laptop's event must not be undone by the roku's
+    inventory.upsert_devices([
+        dd.NetworkDevice(mac="bb", ip="192.168.2.60", hostname="laptop"),
+        dd.NetworkDevice(mac="aa", ip="192.168.2.70", hostname="roku.lan"),
+    ])
+    resolver._sync_inventory_hosts(force=True)
+    assert resolver._resolve_hostname("192.168.2.60") == "laptop (192.168.2.60)"
+    assert resolver._resolve_hostname("192.168.2.70") == "roku (192.168.2.70)"
+    assert "192.168.2.61" not in resolver._inventory_hosts
@@ -0,0 +1,104 @@
+"""
+Unit tests for reusing unchanged domain results across daily report runs
+(agent/reports/domain_cache.py, agent/graphs/daily_report_graph.run_domain).
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from langchain_core.tools import tool
+
+from agent import llm
+from agent.domains.daily_report import DomainAgentError
+from agent.graphs import daily_report_graph as graph_mod
+from agent.llm import ToolCall
+from agent.reports import domain_cache
+from agent.reports.domain_cache import canonical, fingerprint
+
+pytestmark = pytest.mark.unit
+
+_DATA = {"blocked": 12345, "top_ip": "203.0.113.7"}
+
+
+@tool
+def query_block_totals(hours: int = 24) -> str:
+    """Block totals."""
+    return json.dumps({**_DATA, "queried_at": datetime.now().isoformat(), "time_range": f"{hours}h"})
+
+
+def test_canonical_ignores_volatile_fields_and_small_drift():
+    a = {"blocked": 12310, "rate_pct": 4.137, "queried_at": "10:00", "qnap_uptime_seconds": 100,
+         "clients": [{"ip": "10.0.0.5", "queries": 981}]}
+    b = {"blocked": 12345, "rate_pct": 4.139, "queried_at": "10:05", "qnap_uptime_seconds": 400,
+         "clients": [{"ip": "10.0.0.5", "queries": 981}]}
+    assert canonical(json.dumps(a)) == canonical(b)
+    assert canonical({**b, "blocked": 12951}) != canonical(a)
+    # Small counts keep every digit
+    assert canonical({**b, "clients": [{"ip": "10.0.0.5", "queries": 984}]}) != canonical(a)
+    assert canonical("Tool output in plain text") == "Tool output in plain text"
+
+    calls = [ToolCall(query_block_totals, {"hours": 24}, a), ToolCall(query_block_totals, {"hours": 1}, b)]
+    assert fingerprint(calls) == fingerprint(list(reversed(calls)))
+
+
+def test_run_domain_reuses_result_while_data_is_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(domain_cache, "CACHE_DIR", tmp_path)
+    runs = []
+
+    def fake_agent(hours, prompt_override="", session_id=None):
+        runs.append(hours)
+        args = {"hours": hours}
+        llm._tool_calls.get().append(ToolCall(query_block_totals, args, query_block_totals.invoke(args)))
+        return f"summary #{len(runs)}"
+
+    monkeypatch.setitem(graph_mod.DOMAIN_AGENTS, "firewall_threat", fake_agent)
+    node = {"domain": "firewall_threat", "hours": 24, "session_id": "s", "prompt_override": "", "reuse": True}
+
+    first = graph_mod.run_domain(node)["domain_results"][0]
+    assert first["summary"] == "summary #1" and first["reused"] is False
+
+    # Timestamps moved, data did not: no agent run
+    second = graph_mod.run_domain(node)["domain_results"][0]
+    assert (second["summary"], second["reused"]) == ("summary #1", True)
+    assert second["metrics"] == first["metrics"] and runs == [24]
+
+    # Different window, explicit fresh run, or new data: the agent runs
+    graph_mod.run_domain({**node, "hours": 12})
+    graph_mod.run_domain({**node, "reuse": False})
+    monkeypatch.setitem(_DATA, "top_ip", "198.51.100.9")
+    assert graph_mod.run_domain(node)["domain_results"][0]["reused"] is False
+    assert runs == [24, 12, 24, 24]
+
+
+def test_stale_or_failed_results_are_not_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(domain_cache, "CACHE_DIR", tmp_path)
+    call = ToolCall(query_block_totals, {"hours": 24}, query_block_totals.invoke({"hours": 24}))
+    domain_cache.store("validator", 24, "", [call], "all good", {"validator.peers": 80.0})
+    assert domain_cache.reusable("validator", 24, "")["summary"] == "all good"
+    assert domain_cache.reusable("validator", 24, "a new Langfuse prompt") is None
+
+    path = tmp_path / "validator.json"
+    entry = json.loads(path.read_text())
+    entry["generated_at"] = (datetime.now() - domain_cache.MAX_AGE - timedelta(minutes=1)).isoformat()
+    path.write_text(json.dumps(entry))
+    assert domain_cache.reusable("validator", 24, "") is None
+
+    def failing_agent(hours, prompt_override="", session_id=None):
+        llm._tool_calls.get().append(call)
+        raise DomainAgentError("**Wireless**: Agent failed — timeout")
+
+    node = {"domain": "wireless", "hours": 24, "session_id": "s", "prompt_override": "", "reuse": True}
+    monkeypatch.setitem(graph_mod.DOMAIN_AGENTS, "wireless", failing_agent)
+    result = graph_mod.run_domain(node)["domain_results"][0]
+    assert result["failed"] is True and result["summary"] == "**Wireless**: Agent failed — timeout"
+    assert not (tmp_path / "wireless.json").exists()
+
+    # Failure is the flag, not the wording: a real summary may quote it
+    def quoting_agent(hours, prompt_override="", session_id=None):
+        llm._tool_calls.get().append(call)
+        return "UniFi log shows 'Agent failed' from the AP controller twice"
+
+    monkeypatch.setitem(graph_mod.DOMAIN_AGENTS, "wireless", quoting_agent)
+    assert graph_mod.run_domain(node)["domain_results"][0]["failed"] is False
+    assert (tmp_path / "wireless.json").exists()
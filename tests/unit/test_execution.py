@@ -0,0 +1,96 @@
+"""
+Unit tests for the agent execution scheduler (agent/execution.py).
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from agent.execution import AgentExecutor, ExecutorBusy
+
+pytestmark = pytest.mark.unit
+
+
+def _blocking(started: list, name: str, release: threading.Event):
+    def fn():
+        started.append(name)
+        release.wait(5)
+        return name
+    return fn
+
+
+async def _until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_report_lane_overtakes_queued_queries():
+    async def scenario():
+        ex = AgentExecutor(max_workers=2, max_queued=8)
+        started, release = [], threading.Event()
+        positions = []
+
+        first = asyncio.ensure_future(ex.run(_blocking(started, "chat-a", release), key="a"))
+        second = asyncio.ensure_future(ex.run(_blocking(started, "chat-b", release), key="b",
+                                              on_queued=positions.append))
+        await _until(lambda: started == ["chat-a"])
+        # Interactive work is capped at max_workers - 1, leaving a worker for reports
+        lane = ex.stats()["lanes"]["interactive"]
+        assert (lane["running"], lane["queued"]) == (1, 1)
+        report = asyncio.ensure_future(ex.run(_blocking(started, "report", release), lane="report"))
+        await _until(lambda: "report" in started)
+        assert started == ["chat-a", "report"] and positions == [0]
+
+        release.set()
+        assert await asyncio.gather(first, second, report) == ["chat-a", "chat-b", "report"]
+        stats = ex.stats()
+        assert stats["running"] == stats["queued"] == 0
+        assert stats["lanes"]["interactive"]["completed"] == 2
+        assert stats["lanes"]["interactive"]["wait_seconds_max"] > 0
+
+    asyncio.run(scenario())
+
+
+def test_same_key_runs_one_at_a_time_and_others_overtake():
+    async def scenario():
+        ex = AgentExecutor(max_workers=3, max_queued=8)
+        started, gate_a, gate_rest = [], threading.Event(), threading.Event()
+
+        a1 = asyncio.ensure_future(ex.run(_blocking(started, "a1", gate_a), key="a"))
+        a2 = asyncio.ensure_future(ex.run(_blocking(started, "a2", gate_rest), key="a"))
+        b1 = asyncio.ensure_future(ex.run(_blocking(started, "b1", gate_rest), key="b"))
+        await _until(lambda: sorted(started) == ["a1", "b1"])
+
+        gate_a.set()
+        await a1
+        await _until(lambda: "a2" in started)
+        gate_rest.set()
+        assert await asyncio.gather(a2, b1) == ["a2", "b1"]
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_and_cancelled_waiters_free_their_place():
+    async def scenario():
+        ex = AgentExecutor(max_workers=1, max_queued=8, max_queued_per_key=1)
+        started, release = [], threading.Event()
+
+        running = asyncio.ensure_future(ex.run(_blocking(started, "a1", release), key="a"))
+        waiting = asyncio.ensure_future(ex.run(_blocking(started, "a2", release), key="a"))
+        await _until(lambda: ex.stats()["queued"] == 1)
+
+        with pytest.raises(ExecutorBusy):
+            await ex.run(_blocking(started, "a3", release), key="a")
+        assert ex.stats()["lanes"]["interactive"]["rejected"] == 1
+
+        waiting.cancel()
+        await _until(lambda: ex.stats()["queued"] == 0)
+        release.set()
+        assert await running == "a1"
+        assert started == ["a1"]
+        assert await ex.run(lambda: "a4", key="a") == "a4"
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+"""
+Unit tests for the offline GeoIP tier's reader management (agent/tools/geoip.py).
+"""
+
+import os
+import types
+
+import pytest
+
+from agent.tools import geoip
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeReader:
+    def __init__(self, country):
+        self.country = country
+
+    def get(self, ip):
+        return {"country": {"iso_code": self.country, "names": {"en": self.country}}}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = tmp_path / "GeoLite2-Country.mmdb"
+    opened = []
+
+    def open_database(p, mode):
+        opened.append(p)
+        return _FakeReader(open(p).read())
+
+    fake = types.SimpleNamespace(MODE_MMAP=0, MODE_MMAP_EXT=1, open_database=open_database)
+    monkeypatch.setattr(geoip, "maxminddb", fake)
+    monkeypatch.setattr(geoip, "COUNTRY_DB", str(path))
+    monkeypatch.setattr(geoip, "ASN_DB", str(tmp_path / "missing-asn.mmdb"))
+    monkeypatch.setattr(geoip, "_readers", {})
+    clock = [1000.0]
+    monkeypatch.setattr(geoip.time, "monotonic", lambda: clock[0])
+    geoip._lookup.cache_clear()
+    yield path, opened, clock
+    geoip._lookup.cache_clear()
+
+
+def test_missing_database_is_retried_and_replaced_database_reopened(db):
+    path, opened, clock = db
+    assert geoip.lookup("203.0.113.7") == geoip.GeoInfo()
+
+    # geoipupdate writes the file: picked up on the next check, not before
+    path.write_text("NL")
+    assert geoip.lookup("203.0.113.7").country_code == ""
+    clock[0] += geoip.RECHECK_SECONDS
+    assert geoip.lookup("203.0.113.7").country_code == "NL"
+
+    # Unchanged file: no reopen, cached answers kept
+    clock[0] += geoip.RECHECK_SECONDS
+    assert geoip.lookup("203.0.113.7").country_code == "NL" and len(opened) == 1
+
+    # Refreshed database: reopened and the lookup cache cleared
+    path.write_text("DE")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    clock[0] += geoip.RECHECK_SECONDS
+    assert geoip.lookup("203.0.113.7").country_code == "DE" and len(opened) == 2
@@ -0,0 +1,65 @@
+"""
+Unit tests for the Uptime Kuma heartbeat rollup service (services/kuma-rollup).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "kuma-rollup"))
+
+import rollup  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+MONITORS = [(1, "nas", "http", "http://nas", 1), (2, "dns", "dns", None, 1)]
+
+
+def _beat(hb_id, monitor_id, status, minute, ping=10, msg=""):
+    return (hb_id, monitor_id, status, msg, f"2026-03-14 02:{minute:02d}:00.000", ping)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = rollup.RollupStore(str(tmp_path / "rollup.db"))
+    yield s
+    s.close()
+
+
+def test_hourly_counts_and_state(store):
+    store.apply(MONITORS, [
+        _beat(1, 1, 1, 0, ping=10),
+        _beat(2, 2, 1, 0, ping=30),
+        _beat(3, 1, 0, 1, ping=None, msg="timeout"),
+    ])
+    store.apply([], [_beat(4, 1, 1, 2, ping=20)])
+
+    assert store.watermark == 4
+    hour = store.conn.execute("SELECT up, down, ping_sum, ping_count, ping_min, ping_max FROM hourly "
+                              "WHERE monitor_id = 1").fetchall()
+    assert hour == [(2, 1, 30, 2, 10, 20)]
+    state = store.conn.execute("SELECT monitor_id, status, heartbeat_id FROM monitor_state ORDER BY 1").fetchall()
+    assert state == [(1, 1, 4), (2, 1, 2)]
+
+
+def test_incident_spans_batches(store):
+    store.apply(MONITORS, [_beat(1, 1, 1, 0), _beat(2, 1, 0, 1, msg="timeout"), _beat(3, 1, 0, 2)])
+    assert store.conn.execute("SELECT ended_at, down_beats FROM incident").fetchall() == [(None, 2)]
+
+    # Still down, then recovers, then fails again — all in the next batch
+    store.apply([], [_beat(4, 1, 0, 3), _beat(5, 1, 1, 4), _beat(6, 1, 0, 5, msg="refused")])
+    incidents = store.conn.execute(
+        "SELECT started_at, ended_at, error, down_beats FROM incident ORDER BY id"
+    ).fetchall()
+    t0 = rollup.parse_kuma_time("2026-03-14 02:01:00")
+    assert incidents == [
+        (t0, t0 + 180, "timeout", 3),
+        (t0 + 240, None, "refused", 1),
+    ]
+
+
+def test_pending_beats_do_not_close_incidents(store):
+    store.apply(MONITORS, [_beat(1, 2, 0, 0), _beat(2, 2, 2, 1)])
+    assert store.conn.execute("SELECT COUNT(*) FROM incident WHERE ended_at IS NULL").fetchone()[0] == 1
+    assert store.conn.execute("SELECT other FROM hourly WHERE monitor_id = 2").fetchone()[0] == 1
@@ -0,0 +1,120 @@
+"""
+Unit tests for the device-inventory lease history and the agent's
+point-in-time lookup over it (agent/utils/resolve.py).
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "exporters" / "device-inventory"))
+
+import device_discovery as dd  # noqa: E402
+from agent.utils import resolve  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+T0 = datetime(2026, 3, 14, 2, 0, 0)
+T1 = datetime(2026, 3, 14, 4, 0, 0)
+
+
+class _Clock(datetime):
+    current = T0
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def inventory(tmp_path, monkeypatch):
+    monkeypatch.setattr(dd, "datetime", _Clock)
+    inv = dd.DeviceInventory(str(tmp_path / "inventory.db"))
+
+    # 02:00 — roku has .60; 04:00 — roku moves to .70 and the laptop gets .60
+    _Clock.current = T0
+    inv.upsert_devices([
+        dd.NetworkDevice(mac="aa", ip="192.168.2.60", hostname="roku", vlan="2"),
+        dd.NetworkDevice(mac="bb", ip="192.168.2.61", hostname="laptop", vlan="2"),
+    ])
+    _Clock.current = T1
+    inv.upsert_devices([
+        dd.NetworkDevice(mac="aa", ip="192.168.2.70", hostname="roku", vlan="2"),
+        dd.NetworkDevice(mac="bb", ip="192.168.2.60", hostname="laptop", vlan="2"),
+    ])
+
+    conn = sqlite3.connect(f"file:{tmp_path / 'inventory.db'}?mode=ro", uri=True, check_same_thread=False)
+    monkeypatch.setattr(resolve, "_inventory_conn", conn)
+    yield inv
+    conn.close()
+    inv.close()
+
+
+def test_point_in_time_lookup(inventory):
+    three_am = datetime(2026, 3, 14, 3, 0, 0)
+    assert inventory.lease_at("192.168.2.60", three_am)["mac"] == "aa"
+    assert resolve.lease_at("192.168.2.60", three_am)["hostname"] == "roku"
+    assert resolve.lease_at("192.168.2.60", datetime(2026, 3, 14, 5, 0, 0))["mac"] == "bb"
+    assert resolve.lease_at("192.168.2.60", datetime(2026, 3, 14, 1, 0, 0)) is None
+
+
+def test_resolve_hostname_at_uses_history(inventory):
+    assert resolve.resolve_hostname_at("192.168.2.60", datetime(2026, 3, 14, 3, 0, 0)) == "roku (192.168.2.60)"
+    assert resolve.resolve_hostname_at("192.168.2.60", datetime(2026, 3, 14, 5, 0, 0)) == "laptop (192.168.2.60)"
+
+
+def test_resolve_rows_at_names_each_event_by_its_own_time(inventory):
+    rows = [
+        {"client": "192.168.2.60", "at": int(datetime(2026, 3, 14, 5, 0, 0).timestamp())},
+        {"client": "192.168.2.60", "at": int(datetime(2026, 3, 14, 3, 0, 0).timestamp())},
+        {"client": "8.8.8.8", "at": int(datetime(2026, 3, 14, 3, 0, 0).timestamp())},
+    ]
+    assert [r["client"] for r in resolve.resolve_rows_at(rows, "client", "at")] == [
+        "laptop (192.168.2.60)", "roku (192.168.2.60)", "8.8.8.8",
+    ]
+
+
+def test_leases_between_and_unchanged_cycles(inventory):
+    leases = resolve.leases_between("192.168.2.60", T0, datetime(2026, 3, 14, 6, 0, 0))
+    assert [lease["mac"] for lease in leases] == ["aa", "bb"]
+    assert leases[0]["valid_to"] == leases[1]["valid_from"]
+
+    # An unchanged cycle must not open new leases
+    before = inventory.conn.execute("SELECT COUNT(*) FROM lease_history").fetchone()[0]
+    inventory.upsert_devices([dd.NetworkDevice(mac="bb", ip="192.168.2.60", hostname="laptop", vlan="2")])
+    assert inventory.conn.execute("SELECT COUNT(*) FROM lease_history").fetchone()[0] == before
+
+
+def test_pruned_leases_are_not_reseeded_on_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(dd, "datetime", _Clock)
+    path = str(tmp_path / "inventory.db")
+    inv = dd.DeviceInventory(path)
+    # The printer goes offline; the laptop is handed its IP at 04:00
+    _Clock.current = T0
+    inv.upsert_devices([dd.NetworkDevice(mac="cc", ip="192.168.2.62", hostname="printer", vlan="2")])
+    _Clock.current = T1
+    inv.upsert_devices([dd.NetworkDevice(mac="bb", ip="192.168.2.62", hostname="laptop", vlan="2")])
+    _Clock.current = datetime(2026, 3, 20, 2, 0, 0)
+    assert inv.prune_lease_history(retain_days=1) == 1
+    inv.close()
+
+    inv = dd.DeviceInventory(path)
+    assert inv.conn.execute("SELECT mac FROM lease_history").fetchall() == [("bb",)]
+    assert inv.lease_at("192.168.2.62", datetime(2026, 3, 20, 1, 0, 0))["mac"] == "bb"
+    inv.close()
+
+
+def test_devices_from_before_lease_tracking_are_seeded_once(tmp_path):
+    path = str(tmp_path / "inventory.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE devices (mac TEXT PRIMARY KEY, ip TEXT, hostname TEXT, manufacturer TEXT, "
+                     "device_type TEXT, vlan TEXT, first_seen TIMESTAMP, last_seen TIMESTAMP, "
+                     "is_authorized BOOLEAN DEFAULT 1, notes TEXT)")
+        conn.execute("INSERT INTO devices (mac, ip, vlan, first_seen) VALUES ('aa', '192.168.2.60', '2', ?)",
+                     (str(T0),))
+    inv = dd.DeviceInventory(path)
+    assert inv.conn.execute("SELECT mac, ip, valid_to FROM lease_history").fetchall() == [("aa", "192.168.2.60", None)]
+    inv.close()
@@ -0,0 +1,147 @@
+"""
+Unit tests for bot conversation memory (bot/memory.py).
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from bot.memory import ConversationMemory, window
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeRedis:
+    """The handful of list/string commands ConversationMemory uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(values)
+        return len(self.data[key])
+
+    def ltrim(self, key, start, end):
+        items = self.data.get(key, [])
+        stop = len(items) if end == -1 else end + 1
+        self.data[key] = items[max(0, len(items) + start) if start < 0 else start:stop]
+        return True
+
+    def lrange(self, key, start, end):
+        return list(self.data.get(key, []))
+
+    def expire(self, key, seconds):
+        self.ttl[key] = seconds
+        return key in self.data
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttl[key] = ex
+        return True
+
+    def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis, self._calls = redis, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+def _turn(role, content, tokens):
+    return {"role": role, "content": content, "tokens": tokens}
+
+
+def test_window_keeps_newest_turns_within_budget():
+    turns = [_turn("user", "q1", 50), _turn("assistant", "a1", 500),
+             _turn("user", "q2", 40), _turn("assistant", "a2", 100)]
+    assert window(turns, "", 1000) == [{"role": t["role"], "content": t["content"]} for t in turns]
+    # a1 does not fit; the window must not start on an assistant turn
+    assert [m["content"] for m in window(turns, "", 300)] == ["q2", "a2"]
+
+    with_summary = window(turns, "asked about the NAS", 300)
+    assert with_summary[0]["role"] == "system" and "asked about the NAS" in with_summary[0]["content"]
+    assert [m["content"] for m in with_summary[1:]] == ["q2", "a2"]
+
+
+def test_append_trims_and_refreshes_ttl():
+    r = _FakeRedis()
+    memory = ConversationMemory("bot:memory", lambda: r, ttl=60, max_turns=4)
+    for i in range(3):
+        length = memory.append(42, [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}])
+    assert length == 4
+    assert [m["content"] for m in memory.load(42)] == ["q1", "a1", "q2", "a2"]
+    assert r.ttl["bot:memory:42"] == 60
+
+    assert ConversationMemory("bot:memory", lambda: None).load(42) == []
+
+
+def test_compact_folds_old_turns_into_summary(monkeypatch):
+    import agent.llm
+
+    prompts = []
+
+    def fake_chat(messages, agent_type, session_id=None, agent_name=None):
+        prompts.append(messages[-1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="- checked the NAS"))])
+
+    monkeypatch.setattr(agent.llm, "chat", fake_chat)
+    r = _FakeRedis()
+    memory = ConversationMemory("slack:memory", lambda: r, compact_after=4, keep_recent=2)
+    for i in range(3):
+        memory.append("C1", [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}])
+
+    assert memory.compact("C1") is True
+    assert "USER: q0" in prompts[0] and "q2" not in prompts[0]
+    assert r.data["slack:memory:C1:summary"] == "- checked the NAS"
+
+    history = memory.load("C1")
+    assert history[0]["content"].endswith("- checked the NAS")
+    assert [m["content"] for m in history[1:]] == ["q2", "a2"]
+    # Below the threshold again: nothing to do
+    assert memory.compact("C1") is False
+
+
+def test_background_compaction_leaves_the_chat_queue_free(monkeypatch):
+    import asyncio
+    import threading
+
+    import agent.execution
+    from agent.execution import AgentExecutor
+
+    executor = AgentExecutor(max_workers=3)
+    monkeypatch.setattr(agent.execution, "get_executor", lambda: executor)
+    memory = ConversationMemory("bot:memory", lambda: _FakeRedis(), compact_after=0)
+    release, compacting = threading.Event(), threading.Event()
+
+    def slow_compact(conversation, session_id=None):
+        compacting.set()
+        release.wait(5)
+
+    monkeypatch.setattr(memory, "compact", slow_compact)
+
+    async def scenario():
+        await memory.record(42, "q", "a", session_id="42")
+        while not compacting.is_set():
+            await asyncio.sleep(0.01)
+        # While the chat's history is being compacted, the chat can still
+        # queue as many questions as the per-key limit allows
+        asked = [asyncio.ensure_future(executor.run(release.wait, 5, key="42")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(*asked, *memory._tasks)
+
+    asyncio.run(scenario())
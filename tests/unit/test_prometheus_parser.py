@@ -0,0 +1,62 @@
+"""
+Unit tests for the shared Prometheus text-format parser (agent/utils/prometheus.py).
+"""
+
+import pytest
+
+from agent.utils.prometheus import parse_prometheus
+
+SCRAPE = """\
+# HELP beacon_head_slot Slot of the head block
+# TYPE beacon_head_slot gauge
+beacon_head_slot 9123456
+validator_monitor_balance_gwei{validator="0xabc"} 32000000000
+validator_monitor_balance_gwei{validator="total"} 64001234567
+nethermind_sync_peers{ClientType="Geth"} 12
+nethermind_sync_peers{ClientType="Besu"} 3
+nethermind_build_info{Version="1.29.0+abc",Commit="abc"} 1
+http_requests_total{path="/a{b}",msg="say \\"hi\\""} 7 1720000000000
+process_cpu_seconds_total NaN
+process_open_fds +Inf
+process_max_fds -Inf
+"""
+
+pytestmark = pytest.mark.unit
+
+
+def test_parses_labels_and_values():
+    m = parse_prometheus(SCRAPE)
+    assert m["beacon_head_slot"] == [({}, 9123456.0)]
+    assert m.first("validator_monitor_balance_gwei", {"validator": "total"}) == 64001234567
+    assert m.first("validator_monitor_balance_gwei") == 32000000000
+    assert m.first("validator_monitor_balance_gwei", {"validator": "missing"}) is None
+
+
+def test_escaped_and_braced_label_values():
+    m = parse_prometheus(SCRAPE)
+    labels, value = m["http_requests_total"][0]
+    assert labels == {"path": "/a{b}", "msg": 'say "hi"'}
+    assert value == 7
+
+
+def test_sum_and_label_value():
+    m = parse_prometheus(SCRAPE)
+    assert m.sum("nethermind_sync_peers") == 15
+    assert m.sum("absent_metric") is None
+    assert m.label_value("Version") == "1.29.0+abc"
+
+
+def test_wanted_filter_keeps_captured_labels():
+    m = parse_prometheus(SCRAPE, wanted={"nethermind_sync_peers"}, capture_labels=("Version",))
+    assert set(m) == {"nethermind_sync_peers"}
+    assert m.label_value("Version") == "1.29.0+abc"
+
+
+def test_accepts_line_iterable():
+    m = parse_prometheus(iter(SCRAPE.splitlines()), wanted=["beacon_head_slot"])
+    assert m.first("beacon_head_slot") == 9123456
+
+
+def test_non_finite_values_are_skipped():
+    m = parse_prometheus(SCRAPE)
+    assert not {"process_cpu_seconds_total", "process_open_fds", "process_max_fds"} & set(m)
@@ -0,0 +1,105 @@
+"""
+Unit tests for the AdGuard query log shipper (adguard-exporter/adguard_querylog_shipper.py).
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "adguard-exporter"))
+
+import adguard_querylog_shipper as shipper  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+
+def _line(qh, ip="192.168.1.20", filtered=False, reason=None, t="2026-03-14T02:00:00.123456789-05:00"):
+    entry = {"T": t, "QH": qh, "QT": "A", "QC": "IN", "IP": ip, "Elapsed": 1200}
+    if filtered or reason is not None:
+        entry["Result"] = {"IsFiltered": filtered, "Reason": reason or 0}
+    return json.dumps(entry) + "\n"
+
+
+class _Writer:
+    table = "first_light.dns_queries"
+
+    def __init__(self):
+        self.batches = []
+
+    def insert(self, rows, token):
+        self.batches.append((token, [r["qname"] for r in rows]))
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "querylog.json"
+    path.write_text("")
+    return path
+
+
+def _shipper(log, writer=None):
+    tailer = shipper.QueryLogTailer(str(log), str(log.parent / "state.json"))
+    return shipper.QueryLogShipper(tailer, writer or _Writer(), batch_size=2)
+
+
+def test_parse_entry():
+    row = shipper.parse_entry(_line("Ads.Example.com.", filtered=True, reason=3).encode())
+    assert row == {
+        "ts": 1773471600,
+        "client": "192.168.1.20",
+        "qname": "ads.example.com",
+        "qtype": "A",
+        "blocked": True,
+        "reason": "FilteredBlockList",
+    }
+    assert shipper.parse_entry(_line("ok.com").encode())["reason"] == "NotFilteredNotFound"
+    assert shipper.parse_entry(b"{not json\n") is None
+
+
+def test_batches_stop_at_partial_line_and_resume(log):
+    log.write_text(_line("a.com") + "{broken\n" + _line("b.com") + '{"T": "2026-03-14T')
+    s = _shipper(log)
+
+    assert s.ship_available() == 2
+    assert [names for _, names in s.writer.batches] == [["a.com"], ["b.com"]]
+    assert s.skipped == 1
+
+    # The half-written line is completed later; a restart resumes after b.com
+    with open(log, "a") as f:
+        f.write('02:00:01Z", "QH": "c.com", "IP": "192.168.1.21"}\n')
+    resumed = _shipper(log)
+    assert resumed.ship_available() == 1
+    assert resumed.writer.batches[0][1] == ["c.com"]
+
+
+def test_failed_insert_keeps_position(log):
+    log.write_text(_line("a.com"))
+
+    class _Down(_Writer):
+        def insert(self, rows, token):
+            raise ConnectionError("clickhouse down")
+
+    with pytest.raises(ConnectionError):
+        _shipper(log, _Down()).ship_available()
+    retry = _shipper(log)
+    retry.ship_available()
+    assert retry.writer.batches == [(f"{os.stat(log).st_ino}:0:{log.stat().st_size}", ["a.com"])]
+
+
+def test_rotation_drains_old_file_first(log):
+    log.write_text(_line("a.com"))
+    s = _shipper(log)
+    s.ship_available()
+
+    # More lands in the old file, then AdGuard rotates and starts a new one
+    with open(log, "a") as f:
+        f.write(_line("b.com"))
+    os.rename(log, f"{log}.1")
+    log.write_text(_line("c.com"))
+
+    s.ship_available()
+    assert [names for _, names in s.writer.batches] == [["a.com"], ["b.com"], ["c.com"]]
+    assert s.tailer.inode == os.stat(log).st_ino
@@ -0,0 +1,44 @@
+"""
+Unit tests for the UI's rendered report cache (ui/report_cache.py).
+"""
+
+import gzip
+
+import pytest
+
+from ui.report_cache import RenderCache, build_body
+
+pytestmark = pytest.mark.unit
+
+
+def test_negotiation_and_conditional_match():
+    entry = build_body(b"<p>report</p>" * 100, "text/html")
+    assert gzip.decompress(entry.variants["gzip"]) == entry.variants["identity"]
+
+    assert entry.negotiate("gzip, deflate") == "gzip"
+    assert entry.negotiate("gzip;q=0, identity") == "identity"
+    assert entry.negotiate("") == "identity"
+
+    gz = entry.etag_for("gzip")
+    assert gz != entry.etag and gz.endswith('-gzip"')
+    assert entry.matches(f'"other", W/{gz}')
+    assert entry.matches(entry.etag)
+    assert not entry.matches('"other"')
+    assert not entry.matches(None)
+
+
+def test_lru_renders_once_per_key():
+    cache = RenderCache(maxsize=2)
+    calls = []
+
+    def render(name):
+        return lambda: calls.append(name) or name.encode()
+
+    cache.get(("html", "a", 1), render("a"), "text/html")
+    cache.get(("html", "b", 1), render("b"), "text/html")
+    cache.get(("html", "a", 1), render("a"), "text/html")   # hit; b is now least recent
+    cache.get(("html", "a", 2), render("a2"), "text/html")  # file changed: new key, evicts b
+    cache.get(("html", "a", 1), render("a"), "text/html")
+
+    assert calls == ["a", "b", "a2"]
+    assert (cache.hits, cache.misses, len(cache)) == (2, 3, 2)
@@ -0,0 +1,59 @@
+"""
+Unit tests for the daily report catalog (agent/reports/catalog.py).
+"""
+
+import pytest
+
+from agent.reports.catalog import ReportCatalog
+
+pytestmark = pytest.mark.unit
+
+
+def _write(daily, date, text="# report\n"):
+    year, month, _ = date.split("-")
+    path = daily / year / month / f"{date}_daily_report.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def daily(tmp_path):
+    return tmp_path / "daily"
+
+
+def test_rebuild_page_and_count(daily):
+    for date in ("2025-12-31", "2026-01-02", "2026-01-01"):
+        _write(daily, date)
+    catalog = ReportCatalog(daily)
+
+    assert catalog.rebuild() == 3
+    assert catalog.db_path == daily.parent / "catalog.db"
+    assert [r["date"] for r in catalog.page(2)] == ["2026-01-02", "2026-01-01"]
+    assert [r["date"] for r in catalog.page(2, 2)] == ["2025-12-31"]
+    assert catalog.count() == 3
+
+
+def test_count_sees_other_writers(daily):
+    reader, writer = ReportCatalog(daily), ReportCatalog(daily)
+    assert reader.count() == 0
+
+    writer.record(_write(daily, "2026-03-14", "x" * 2048))
+    assert reader.count() == 1
+    assert reader.get("2026-03-14")["size_kb"] == 2.0
+
+
+def test_get_heals_missing_and_stale_entries(daily):
+    catalog = ReportCatalog(daily)
+    catalog.rebuild()
+
+    # Written without going through record(): found at the conventional path
+    path = _write(daily, "2026-03-14")
+    assert catalog.get("2026-03-14")["path"] == str(path)
+    assert catalog.count() == 1
+
+    # Deleted on disk: dropped from the catalog on lookup
+    path.unlink()
+    assert catalog.get("2026-03-14") is None
+    assert catalog.count() == 0
+    assert catalog.get("2026-03-15") is None
@@ -0,0 +1,113 @@
+"""
+Unit tests for the report search index (agent/reports/search.py) via the catalog.
+"""
+
+import json
+import os
+
+import pytest
+
+from agent.reports import search
+from agent.reports.catalog import ReportCatalog
+
+pytestmark = pytest.mark.unit
+
+REPORT = """# Daily Threat Assessment
+
+## 🔒 Firewall
+- **Total Blocks:** 16,921 connection attempts
+- Top source 185.220.101.45 (tor exit), also seen resolving evil-c2.example.net
+
+## 🛡️ Validator Health
+- **Effectiveness:** {effectiveness}%
+- Severity: HIGH — missed attestations from aa:bb:cc:dd:ee:ff
+"""
+
+
+def _write(daily, date, effectiveness=99.1, metrics=None):
+    year, month, _ = date.split("-")
+    path = daily / year / month / f"{date}_daily_report.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(REPORT.format(effectiveness=effectiveness))
+    if metrics is not None:
+        path.with_name(f"{date}_metrics.json").write_text(json.dumps({"date": date, "metrics": metrics}))
+    return path
+
+
+@pytest.fixture
+def daily(tmp_path):
+    return tmp_path / "daily"
+
+
+def test_extract_entities_and_facts():
+    text = REPORT.format(effectiveness=94.2)
+    entities = search.extract_entities(text + "\nSee notes.md and 999.1.1.1")
+    assert entities[("ip", "185.220.101.45")] == 1
+    assert ("domain", "evil-c2.example.net") in entities
+    assert ("mac", "aa:bb:cc:dd:ee:ff") in entities
+    assert ("severity", "high") in entities
+    assert ("domain", "notes.md") not in entities
+    assert ("ip", "999.1.1.1") not in entities
+
+    facts = search.extract_facts(text, {"dns_block_rate": 12.5, "note": "n/a"})
+    assert facts[("total_blocks", "firewall")] == 16921
+    assert facts[("effectiveness", "validator_health")] == 94.2
+    assert facts[("dns_block_rate", "metrics")] == 12.5
+    assert len(facts) == 3
+
+
+def test_search_text_entity_and_fact_threshold(daily):
+    _write(daily, "2026-03-13", effectiveness=99.1)
+    _write(daily, "2026-03-14", effectiveness=94.2, metrics={"dns_block_rate": 12.5})
+    catalog = ReportCatalog(daily)
+    catalog.rebuild()
+
+    hits = catalog.search(text="185.220.101.45 tor")
+    assert {h["date"] for h in hits} == {"2026-03-13", "2026-03-14"}
+    assert "[tor]" in hits[0]["snippet"]
+
+    assert [h["date"] for h in catalog.search(entity="185.220.101.45")] == ["2026-03-14", "2026-03-13"]
+    assert catalog.search(entity="10.0.0.1") == []
+
+    low = catalog.search(fact="validator_health.effectiveness", below=95)
+    assert [h["date"] for h in low] == ["2026-03-14"]
+    assert low[0]["facts"] == [{"name": "effectiveness", "section": "validator_health", "value": 94.2}]
+    assert [h["date"] for h in catalog.search(fact="dns_block_rate", above=10)] == ["2026-03-14"]
+    assert [h["date"] for h in catalog.search(entity="high", until="2026-03-13")] == ["2026-03-13"]
+
+
+def test_rebuild_reindexes_only_changes(daily):
+    path = _write(daily, "2026-03-14", effectiveness=99.1)
+    gone = _write(daily, "2026-03-15")
+    catalog = ReportCatalog(daily)
+    catalog.rebuild()
+    assert catalog.search(fact="effectiveness", below=95) == []
+
+    # Regenerated with a new figure, and a report deleted on disk
+    path.write_text(REPORT.format(effectiveness=90.0))
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    gone.unlink()
+
+    assert catalog.rebuild() == 1
+    assert [h["date"] for h in catalog.search(fact="effectiveness", below=95)] == ["2026-03-14"]
+    assert catalog.search(entity="185.220.101.45", since="2026-03-15") == []
+    conn = catalog._db()
+    assert conn.execute("SELECT COUNT(*) FROM report_fts").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM report_index_state").fetchone()[0] == 1
+
+
+def test_punctuation_query_and_limit_counts_reports(daily):
+    for day in ("2026-03-12", "2026-03-13", "2026-03-14"):
+        _write(daily, day, metrics={"dns_block_rate": 12.5, "dns_queries": 9000.0, "ssh_failures": 3.0})
+    catalog = ReportCatalog(daily)
+    catalog.rebuild()
+
+    assert search.fts_query("* -- !!") == ""
+    assert search.fts_query("tor -") == '"tor"'
+    # No usable terms: no text criterion rather than an FTS5 syntax error
+    assert [h["date"] for h in catalog.search(text="*", since="2026-03-14")] == ["2026-03-14"]
+
+    # Each report matches several facts; the limit still counts reports
+    hits = catalog.search(fact="s", limit=2)
+    assert [h["date"] for h in hits] == ["2026-03-14", "2026-03-13"]
+    assert len(hits[0]["facts"]) > 2
@@ -0,0 +1,114 @@
+"""
+Unit tests for weekly/monthly rollups (agent/reports/rollup.py, agent/graphs/rollup_report_graph.py).
+"""
+
+import asyncio
+import json
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from agent.reports import rollup
+from agent.reports.rollup import Day, load_day, metric_stats, period_for, stats_table
+
+pytestmark = pytest.mark.unit
+
+
+def _write_day(daily, day, domains=None, metrics=None, report=None):
+    folder = daily / f"{day:%Y}" / f"{day:%m}"
+    folder.mkdir(parents=True, exist_ok=True)
+    if domains is not None:
+        (folder / f"{day}_domains.json").write_text(json.dumps({"domains": domains}))
+    if metrics is not None:
+        (folder / f"{day}_metrics.json").write_text(json.dumps({"metrics": metrics}))
+    if report is not None:
+        (folder / f"{day}_daily_report.md").write_text(report)
+
+
+def test_periods_and_chunks():
+    week = period_for("weekly", date(2026, 3, 4))
+    assert (week.start, week.end) == (date(2026, 3, 2), date(2026, 3, 8))
+    assert week.stem == "W10_2026-03-02_to_2026-03-08"
+    assert [(c.start, c.end) for c in week.chunks()] == [(week.start, week.end)]
+
+    month = period_for("monthly", date(2026, 3, 31))
+    assert (month.start, month.end, month.stem) == (date(2026, 3, 1), date(2026, 3, 31), "2026-03")
+    assert [(c.start.day, c.end.day) for c in month.chunks()] == [(1, 1), (2, 8), (9, 15), (16, 22), (23, 29), (30, 31)]
+    # A full week inside the month is the same chunk the weekly rollup cached
+    assert month.chunks()[1].stem == week.chunks()[0].stem
+    assert month.previous().stem == "2026-02"
+
+
+def test_load_day_and_metric_stats(tmp_path):
+    _write_day(tmp_path, date(2026, 3, 2), domains={"validator": "peers ok"},
+               metrics={"validator.peers": 80, "validator.healthy": True})
+    _write_day(tmp_path, date(2026, 3, 3), report="# old-style report")
+
+    day = load_day(date(2026, 3, 2), tmp_path)
+    assert day.summaries == {"validator": "peers ok"} and day.metrics == {"validator.peers": 80.0}
+    assert load_day(date(2026, 3, 3), tmp_path).summaries == {rollup.LEGACY_DOMAIN: "# old-style report"}
+    assert load_day(date(2026, 3, 4), tmp_path) is None
+
+    days = [Day(date(2026, 3, 2), metrics={"validator.peers": 80.0, "dns_security.blocked": 10.0}),
+            Day(date(2026, 3, 3), metrics={"validator.peers": 60.0})]
+    previous = [Day(date(2026, 2, 24), metrics={"validator.peers": 100.0})]
+    stats = metric_stats(days, previous)
+    assert stats["validator.peers"] == {"days": 2, "min": 60.0, "mean": 70.0, "max": 80.0, "last": 60.0,
+                                        "previous_mean": 100.0, "change_pct": -30.0}
+    assert stats["dns_security.blocked"]["change_pct"] is None
+
+    table = stats_table(stats, "validator")
+    assert "| peers | 2 | 60 | 70 | 80 | 60 | 100 | -30.0% |" in table
+    assert "blocked" not in table
+
+
+def test_monthly_rollup_reuses_weekly_chunks(tmp_path, monkeypatch):
+    from agent.graphs import rollup_report_graph as graph_mod
+
+    monkeypatch.setattr(rollup, "CHUNK_CACHE_DIR", tmp_path / "chunks")
+    calls = []
+
+    def fake_chat(messages, agent_type, session_id=None, agent_name=None):
+        calls.append(agent_name)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"<{agent_name}>"))])
+
+    monkeypatch.setattr(graph_mod, "chat", fake_chat)
+
+    days = [Day(date(2026, 3, d), summaries={"validator": f"day {d}"}) for d in range(1, 32)]
+
+    week = period_for("weekly", date(2026, 3, 8))
+    assert graph_mod.run_rollup_report(week, days, {}) == "<rollup/synthesis>"
+    assert sorted(calls) == ["rollup/synthesis", "rollup/validator/map"]
+
+    calls.clear()
+    month = period_for("monthly", date(2026, 3, 1))
+    graph_mod.run_rollup_report(month, days, {})
+    # Six chunks, one of them (Mar 2–8) already mapped by the weekly run
+    assert calls.count("rollup/validator/map") == 5
+    assert calls.count("rollup/validator/reduce") == 1
+    assert calls.count("rollup/synthesis") == 1
+
+    # Changed input for one day invalidates only its chunk
+    calls.clear()
+    days[9] = Day(date(2026, 3, 10), summaries={"validator": "day 10, revised"})
+    graph_mod.run_rollup_report(month, days, {})
+    assert calls.count("rollup/validator/map") == 1
+
+
+def test_slack_labels_rollups_with_their_kind_and_period():
+    from agent.notifications.slack import SlackWebhookChannel
+
+    channel = SlackWebhookChannel("https://hooks.invalid")
+    posted = []
+
+    async def fake_post(payload):
+        posted.append(payload["blocks"][0]["text"]["text"])
+        return True
+
+    channel._post = fake_post
+    asyncio.run(channel.send_report({"kind": "weekly", "period": "2026-03-02 to 2026-03-08",
+                                     "date": "2026-03-08", "report_text": "body"}))
+    asyncio.run(channel.send_report({"date": "2026-03-08", "report_text": "body"}))
+    assert posted == ["First Light Weekly Rollup — 2026-03-02 to 2026-03-08",
+                      "First Light Daily Report — 2026-03-08"]
@@ -0,0 +1,27 @@
+"""
+Unit tests for the exporter scrape cache (agent/utils/scrape_cache.py).
+"""
+
+import threading
+
+import pytest
+
+from agent.utils import scrape_cache
+
+pytestmark = pytest.mark.unit
+
+
+def test_get_fetches_on_demand_without_starting_a_poller(monkeypatch):
+    monkeypatch.setattr(scrape_cache, "_targets", {})
+    fetches = []
+    scrape_cache.register("exporter", lambda: fetches.append(1) or {"up": 1}, interval=60)
+    threads = threading.active_count()
+
+    first = scrape_cache.get("exporter")
+    assert first.source == "live" and first.metrics == {"up": 1}
+    # Fresh enough: served from the last on-demand scrape
+    assert scrape_cache.get("exporter") is first
+    assert scrape_cache.get("exporter", max_age=0) is not first
+    assert len(fetches) == 2
+    assert threading.active_count() == threads
+    assert scrape_cache.status()["exporter"]["running"] is False
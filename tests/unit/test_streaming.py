@@ -0,0 +1,90 @@
+"""
+Unit tests for streaming interactive answers (agent.llm on_event,
+agent.graph.stream_interactive_query, bot/streaming.py).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.tools import tool
+
+from agent import graph, llm
+from bot.streaming import ProgressiveReply
+
+pytestmark = pytest.mark.unit
+
+
+@tool
+def query_qnap_health() -> str:
+    """QNAP."""
+    return '{"volumes": "ok"}'
+
+
+def _response(tool_calls=None, content=None):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=tool_calls, content=content))])
+
+
+def test_react_loop_reports_tools_and_tokens(monkeypatch):
+    call = SimpleNamespace(id="c1", function=SimpleNamespace(name="query_qnap_health", arguments="{}"))
+    turns = iter([("Let me", [call]), ("All good", None)])
+
+    def fake_chat(messages, agent_type, tools=None, session_id=None, agent_name=None, on_token=None):
+        text, tool_calls = next(turns)
+        for word in text.split(" "):
+            on_token(word + " ")
+        return _response(tool_calls, None if tool_calls else "All good")
+
+    monkeypatch.setattr(llm, "chat", fake_chat)
+    events = []
+    answer = llm.run_react_loop("sys", "q", [query_qnap_health], "interactive", on_event=events.append)
+
+    assert answer == "All good"
+    assert [e["type"] for e in events] == ["token", "token", "tool_start", "tool_end", "token", "token"]
+    assert events[2] == {"type": "tool_start", "tool": "query_qnap_health", "args": {}}
+    assert events[3]["ok"] is True
+
+
+def test_stream_interactive_query_yields_events_then_answer(monkeypatch):
+    def fake_sync(question, history, session_id, on_event=None):
+        on_event({"type": "tool_start", "tool": "query_qnap_health", "args": {}})
+        on_event({"type": "tool_end", "tool": "query_qnap_health", "ok": True, "seconds": 0.1})
+        on_event({"type": "token", "text": "fine"})
+        return "fine"
+
+    monkeypatch.setattr(graph, "run_interactive_query_sync", fake_sync)
+    monkeypatch.setattr(graph, "get_answer_cache", lambda: None)
+
+    async def collect():
+        return [e async for e in graph.stream_interactive_query("how is the NAS?")]
+
+    events = asyncio.run(collect())
+    assert [e["type"] for e in events] == ["tool_start", "tool_end", "token", "answer"]
+    assert events[-1] == {"type": "answer", "text": "fine"}
+
+
+def test_progressive_reply_rate_limits_edits():
+    async def scenario():
+        edits = []
+        now = [100.0]
+
+        async def edit(text):
+            edits.append(text)
+
+        reply = ProgressiveReply(edit, min_interval=0.05, max_chars=60, clock=lambda: now[0])
+        await reply.update({"type": "token", "text": "Checking"})
+        await reply.update({"type": "tool_start", "tool": "query_qnap_health", "args": {}})
+        # Within the interval: held, nothing new shown yet
+        assert edits == ["Checking ▍"]
+
+        now[0] += 1
+        await reply.update({"type": "tool_end", "tool": "query_qnap_health", "ok": True})
+        assert edits[-1] == "✅ qnap health"
+
+        await reply.update({"type": "token", "text": "x" * 100})
+        await asyncio.sleep(0.1)    # the held update is flushed by the timer
+        assert edits[-1].startswith("✅ qnap health\n\n…x") and len(edits[-1]) <= 60
+        await reply.close()
+        return reply.edits
+
+    assert asyncio.run(scenario()) == 3
@@ -0,0 +1,51 @@
+"""
+Unit tests for the validator health tool's rolling-window alerts (agent/tools/validator.py).
+"""
+
+import json
+import time
+
+import pytest
+
+from agent.tools import validator
+from agent.utils import scrape_cache
+from agent.utils.prometheus import parse_prometheus
+
+pytestmark = pytest.mark.unit
+
+
+def _snapshot(slot, hits, misses, scraped_at):
+    text = (
+        f"beacon_head_slot {slot}\n"
+        f"libp2p_peers 80\n"
+        f'{validator._ATT_HIT}{{validator="total"}} {hits}\n'
+        f'{validator._ATT_MISS}{{validator="total"}} {misses}\n'
+    )
+    return scrape_cache.Snapshot(metrics=parse_prometheus(text), scraped_at=scraped_at, duration_ms=1.0)
+
+
+def _window_alerts(monkeypatch, hits, misses):
+    now = time.time()
+    # Four epochs, two snapshots each: every epoch must be counted once
+    snaps = [_snapshot(epoch * 32 + offset, hits, misses, now - 1500 + epoch * 384 + offset * 12)
+             for epoch in range(4) for offset in (1, 2)]
+    monkeypatch.setattr(scrape_cache, "history", lambda name, window=None: snaps if name == "nimbus" else [])
+    monkeypatch.setattr(validator, "_fetch_nimbus_metrics", lambda: snaps[-1])
+    monkeypatch.setattr(validator, "_fetch_nethermind_metrics", lambda: snaps[-1])
+
+    result = json.loads(validator.query_validator_health.invoke({}))
+    window = result["consensus"]["last_hour"]
+    assert window["epochs_observed"] == 4 and window["attestation_misses"] == 4 * misses
+    return window, [a for a in result["alerts"] if "over the last" in a]
+
+
+def test_occasional_misses_across_validators_do_not_alert(monkeypatch):
+    window, alerts = _window_alerts(monkeypatch, hits=63, misses=1)
+    assert window["attestation_effectiveness_pct"] == 98.44
+    assert alerts == []
+
+
+def test_miss_ratio_above_five_percent_alerts(monkeypatch):
+    window, alerts = _window_alerts(monkeypatch, hits=60, misses=4)
+    assert window["attestation_effectiveness_pct"] == 93.75
+    assert alerts == ["WARNING: Attestation effectiveness 93.75% over the last 4 epochs (16 missed, below 95%)"]
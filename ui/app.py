@@ -5,7 +5,7 @@ FastAPI + Jinja2 + HTMX management interface.
 Runs on port 8085.
 
 Features:
-- Reports list with view/download
+- Reports list (paginated, from the report catalog) with view/download
 - Trigger on-demand report
 - System status (channels, scheduler, Redis)
 - Config overview (which integrations are active)
@@ -23,6 +23,7 @@ import logging
 import os
 import re
 import secrets
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -32,11 +33,20 @@ from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from agent.execution import get_executor
+from agent.reports.catalog import ReportCatalog
+from ui.report_cache import CachedBody, RenderCache
+
 logger = logging.getLogger(__name__)
 
 _REPORTS_DIR = Path(os.getenv("FIRST_LIGHT_REPORTS_DIR", "/data/reports")) / "daily"
 _TEMPLATES_DIR = Path(__file__).parent / "templates"
 _STATIC_DIR = Path(__file__).parent / "static"
+_PAGE_SIZE = 50
+# Reports only change when regenerated (new mtime → new cache key), but the
+# UI may sit behind Basic Auth: let browsers keep a private copy and
+# revalidate it with the ETag on every view
+_REPORT_CACHE_CONTROL = "private, no-cache"
 
 app = FastAPI(title="First Light UI", docs_url=None, redoc_url=None)
 
@@ -44,6 +54,8 @@ app = FastAPI(title="First Light UI", docs_url=None, redoc_url=None)
 _background_tasks: set = set()
 
 _DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_catalog = ReportCatalog(_REPORTS_DIR)
+_render_cache = RenderCache(maxsize=int(os.getenv("UI_REPORT_CACHE_SIZE", "32")))
 templates = Jinja2Templates(directory=str(_TEMPLATES_DIR))
 
 if _STATIC_DIR.exists():
@@ -77,21 +89,46 @@ def _check_auth(request: Request) -> None:
 
 # ── Helpers ──────────────────────────────────────────────────────────────────────
 
-def _list_reports() -> list[dict]:
-    """Return metadata for all saved daily reports, newest first."""
-    reports = []
-    if not _REPORTS_DIR.exists():
-        return reports
-    for md_file in sorted(_REPORTS_DIR.rglob("*_daily_report.md"), reverse=True):
-        stat = md_file.stat()
-        date_str = md_file.stem.replace("_daily_report", "")
-        reports.append({
-            "date": date_str,
-            "path": str(md_file),
-            "size_kb": round(stat.st_size / 1024, 1),
-            "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M"),
-        })
-    return reports
+def _get_report(date: str) -> dict:
+    """Catalog entry for `date`, or the appropriate HTTP error."""
+    if not _DATE_RE.match(date):
+        raise HTTPException(status_code=400, detail="Invalid date format")
+    report = _catalog.get(date)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if not str(Path(report["path"]).resolve()).startswith(str(_REPORTS_DIR.resolve())):
+        raise HTTPException(status_code=403)
+    return report
+
+
+def _cached_report(request: Request, date: str, kind: str, render, media_type: str,
+                   headers: Optional[dict] = None) -> Response:
+    """Serve a rendered report body from the cache, honouring If-None-Match.
+
+    The cache key includes the file's mtime and size, so a regenerated report
+    is re-rendered; otherwise only the stat touches the disk.
+    """
+    report = _get_report(date)
+    path = Path(report["path"])
+    stat = path.stat()
+    entry: CachedBody = _render_cache.get(
+        (kind, str(path), stat.st_mtime_ns, stat.st_size),
+        lambda: render(report, path.read_text()),
+        media_type,
+    )
+
+    coding = entry.negotiate(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": entry.etag_for(coding),
+        "Cache-Control": _REPORT_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        **(headers or {}),
+    }
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return Response(entry.variants[coding], media_type=media_type, headers=headers)
 
 
 def _system_status() -> dict:
@@ -140,16 +177,22 @@ def _system_status() -> dict:
         "notification_channels": channels,
         "integrations": integrations,
         "reports_dir": str(_REPORTS_DIR),
-        "report_count": len(_list_reports()),
+        "report_count": _catalog.count(),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
 
 
 # ── Routes ───────────────────────────────────────────────────────────────────────
 
+@app.on_event("startup")
+async def _index_reports():
+    """Pick up reports written before the catalog existed, or copied in by hand."""
+    await asyncio.to_thread(_catalog.rebuild)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request, _: None = Depends(_check_auth)):
-    reports = _list_reports()[:10]
+    reports = _catalog.page(10)
     status = _system_status()
     return templates.TemplateResponse(
         "index.html",
@@ -158,48 +201,39 @@ async def index(request: Request, _: None = Depends(_check_auth)):
 
 
 @app.get("/reports", response_class=HTMLResponse)
-async def reports_page(request: Request, _: None = Depends(_check_auth)):
-    reports = _list_reports()
+async def reports_page(request: Request, page: int = 1, _: None = Depends(_check_auth)):
+    total = _catalog.count()
+    pages = max(1, -(-total // _PAGE_SIZE))
+    page = min(max(page, 1), pages)
+    reports = _catalog.page(_PAGE_SIZE, (page - 1) * _PAGE_SIZE)
     return templates.TemplateResponse(
         "reports.html",
-        {"request": request, "reports": reports},
+        {"request": request, "reports": reports, "page": page, "pages": pages, "total": total},
     )
 
 
 @app.get("/reports/{date}", response_class=HTMLResponse)
 async def view_report(date: str, request: Request, _: None = Depends(_check_auth)):
     """View a specific report by date (YYYY-MM-DD)."""
-    if not _DATE_RE.match(date):
-        raise HTTPException(status_code=400, detail="Invalid date format")
-    for report in _list_reports():
-        if report["date"] == date:
-            report_path = Path(report["path"]).resolve()
-            if not str(report_path).startswith(str(_REPORTS_DIR.resolve())):
-                raise HTTPException(status_code=403)
-            content = report_path.read_text()
-            return templates.TemplateResponse(
-                "report_view.html",
-                {"request": request, "date": date, "content": content, "report": report},
-            )
-    raise HTTPException(status_code=404, detail="Report not found")
+    def render(report: dict, content: str) -> bytes:
+        # Rendered without the request: the same bytes serve every viewer
+        page = templates.get_template("report_view.html").render(
+            date=date, content=content, report=report,
+        )
+        return page.encode("utf-8")
+
+    return _cached_report(request, date, "html", render, "text/html; charset=utf-8")
 
 
 @app.get("/reports/{date}/raw", response_class=PlainTextResponse)
-async def download_report(date: str, _: None = Depends(_check_auth)):
+async def download_report(date: str, request: Request, _: None = Depends(_check_auth)):
     """Download raw report markdown."""
-    if not _DATE_RE.match(date):
-        raise HTTPException(status_code=400, detail="Invalid date format")
-    for report in _list_reports():
-        if report["date"] == date:
-            report_path = Path(report["path"]).resolve()
-            if not str(report_path).startswith(str(_REPORTS_DIR.resolve())):
-                raise HTTPException(status_code=403)
-            content = report_path.read_text()
-            return PlainTextResponse(
-                content,
-                headers={"Content-Disposition": f"attachment; filename={date}_daily_report.md"},
-            )
-    raise HTTPException(status_code=404, detail="Report not found")
+    return _cached_report(
+        request, date, "raw",
+        lambda report, content: content.encode("utf-8"),
+        "text/plain; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={date}_daily_report.md"},
+    )
 
 
 @app.get("/status", response_class=HTMLResponse)
@@ -217,9 +251,43 @@ async def api_status(_: None = Depends(_check_auth)):
     return JSONResponse(_system_status())
 
 
+@app.get("/api/search")
+async def api_search(
+    q: str = "",
+    entity: str = "",
+    fact: str = "",
+    below: Optional[float] = None,
+    above: Optional[float] = None,
+    since: str = "",
+    until: str = "",
+    limit: int = 20,
+    _: None = Depends(_check_auth),
+):
+    """Search historical reports: full text (q), entity, and/or fact thresholds."""
+    for value in (since, until):
+        if value and not _DATE_RE.match(value):
+            raise HTTPException(status_code=400, detail="Invalid date format")
+    if not any((q.strip(), entity.strip(), fact.strip(), since, until)):
+        raise HTTPException(status_code=400, detail="Give at least one of q, entity, fact, since, until")
+
+    start = time.perf_counter()
+    try:
+        hits = await asyncio.to_thread(
+            _catalog.search, text=q, entity=entity, fact=fact, below=below, above=above,
+            since=since, until=until, limit=max(1, min(limit, 100)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse({"hits": hits, "took_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+
 @app.post("/api/report/trigger")
 async def trigger_report(request: Request, _: None = Depends(_check_auth)):
-    """Trigger an on-demand report (runs in background)."""
+    """Trigger an on-demand report (runs in background on the agent pool's report lane)."""
+    reports = get_executor().stats()["lanes"]["report"]
+    if reports["running"] or reports["queued"]:
+        raise HTTPException(status_code=409, detail="A report is already being generated")
+
     async def _run():
         from agent.reports.daily_threat_assessment import generate_daily_report, send_report_notification
         try:
@@ -236,6 +304,12 @@ async def trigger_report(request: Request, _: None = Depends(_check_auth)):
     return JSONResponse({"status": "triggered", "message": "Report generation started"})
 
 
+@app.get("/api/executor")
+async def executor_stats(_: None = Depends(_check_auth)):
+    """Agent execution pool: queue depth, running jobs, wait and run times per lane."""
+    return JSONResponse(get_executor().stats())
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -0,0 +1,109 @@
+"""
+Rendered report cache for the management UI.
+
+A report page (or raw markdown download) is built once per file version —
+keyed on path + mtime + size — and compressed up front, then kept in a small
+LRU. Repeat views are answered from memory and conditional requests with a
+304, so neither reads the report file again.
+
+Each entry carries a strong ETag (SHA-256 of the uncompressed body); the
+gzip / brotli variants get their own tags ("<hash>-gzip", "<hash>-br") since
+they are different representations of the same resource.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional — gzip and identity only
+    brotli = None
+
+# Preferred content-coding first
+_CODINGS = ("br", "gzip", "identity")
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """One rendered body and its precompressed variants."""
+    etag: str                   # quoted strong ETag of the identity body
+    media_type: str
+    variants: Dict[str, bytes]  # content-coding → bytes
+
+    def etag_for(self, coding: str) -> str:
+        return self.etag if coding == "identity" else f'{self.etag[:-1]}-{coding}"'
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Best available content-coding for an Accept-Encoding header."""
+        accepted = {}
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            if name:
+                accepted[name.strip().lower()] = q
+        for coding in _CODINGS:
+            if coding in self.variants and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+                return coding
+        return "identity"
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match uses weak comparison: any of our tags, W/ or not."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        ours = {self.etag_for(c) for c in self.variants}
+        return any(tag.strip().removeprefix("W/") in ours for tag in if_none_match.split(","))
+
+
+def build_body(body: bytes, media_type: str) -> CachedBody:
+    """Hash and precompress a rendered body."""
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return CachedBody(etag=etag, media_type=media_type, variants=variants)
+
+
+class RenderCache:
+    """Thread-safe LRU of CachedBody, keyed by anything that changes with the file."""
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, render: Callable[[], bytes], media_type: str) -> CachedBody:
+        """Cached body for `key`, calling `render` (and compressing) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Render outside the lock; a concurrent miss on the same key just
+        # renders twice and the later insert wins
+        entry = build_body(render(), media_type)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
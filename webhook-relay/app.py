@@ -13,6 +13,18 @@ app = Flask(__name__)
 # Load from environment
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://fl-redis:6379/0')
+# Bumped on every alert so the bots stop serving cached answers (agent/answer_cache.py)
+ANSWER_GENERATION_KEY = 'answers:generation'
+
+
+def invalidate_cached_answers():
+    """Best effort: a Redis outage must not block alert delivery"""
+    try:
+        import redis
+        redis.Redis.from_url(REDIS_URL, socket_connect_timeout=2, socket_timeout=2).incr(ANSWER_GENERATION_KEY)
+    except Exception as e:
+        app.logger.warning(f"Could not invalidate cached answers: {e}")
 
 def format_alert_message(webhook_data):
     """Convert SigNoz webhook payload to Telegram message"""
@@ -81,6 +93,8 @@ def webhook():
         if not data:
             return jsonify({'error': 'No JSON data received'}), 400
 
+        invalidate_cached_answers()
+
         # Format message for Telegram
         message = format_alert_message(data)
 